@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+响应解析基准测试
+
+用检查记录（conf_check 每次运行写入的 *.trace.jsonl.gz）中的真实模型响应，
+测量响应解析、遮罩还原和编号校验（parse_batch_response）的耗时和解析失败的批次数，
+修改解析逻辑前后各运行一次即可对比。
+
+用法:
+    python benchmarks/bench_parse.py .conf_check_state/traces/DLG_text_20250101_120000.trace.jsonl.gz
+    python benchmarks/bench_parse.py TRACE --runs 20
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import conf_check  # noqa: E402
+from lexicon import NameMatcher  # noqa: E402
+from masking import mask_payload  # noqa: E402
+from response_trace import load_run, row_from_record  # noqa: E402
+from scheduler import Batch  # noqa: E402
+
+
+def replay_once(run, records):
+    """解析记录中的全部响应，返回 (耗时秒数, 问题数, 解析失败的批次数)"""
+    conf_check.RESPONSE_FORMAT = run.get("response_format", "json")
+    conf_check.ISSUE_CODES = [tuple(code) for code in run.get("issue_codes") or conf_check.ISSUE_CODES]
+    mask = run.get("mask_markup", True)
+    conf_check.LEXICON = NameMatcher(run.get("lexicon") or ()) or None
+    batches = [Batch(r["batch"], [row_from_record(item) for item in r["rows"]]) for r in records]
+    issues = failed = 0
+    started = time.perf_counter()
+    # 解析日志输出到终端的耗时不计入
+    with contextlib.redirect_stdout(io.StringIO()):
+        for batch, record in zip(batches, records):
+            _, restore = mask_payload(batch.payload(), conf_check.LEXICON) if mask else (None, {})
+            result = conf_check.parse_batch_response(batch, len(records), record.get("response"), restore)
+            issues += len(result["issues"])
+            failed += bool(result["error"])
+    return time.perf_counter() - started, issues, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应解析基准测试（使用检查记录中的真实响应）")
+    parser.add_argument("trace", help="检查记录文件（*.trace.jsonl.gz）")
+    parser.add_argument("--runs", type=int, default=5, help="重复解析的次数")
+    args = parser.parse_args()
+
+    run, records = load_run(args.trace)
+    conf_check.QUIET = True
+    print("=" * 60)
+    print(f"⏱️ 响应解析基准: {len(records)} 个批次（{run.get('model', '')}，{run.get('response_format', 'json')} 格式）")
+    print("=" * 60)
+    timings = []
+    for _ in range(args.runs):
+        seconds, issues, failed = replay_once(run, records)
+        timings.append(seconds)
+    median = statistics.median(timings)
+    print(f"📦 解析 {len(records)} 个批次: {median * 1000:.1f} ms（中位数，{args.runs} 次），"
+          f"每批次 {median * 1000 / max(len(records), 1):.2f} ms")
+    print(f"🔍 解析出 {issues} 个问题，{failed} 个批次解析失败或录制时请求失败")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
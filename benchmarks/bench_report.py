@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Excel 报告写出基准测试
+
+生成指定数量的模拟问题，分别用 xlsxwriter（常量内存模式）和 openpyxl（只写模式）
+写出审核用的 Excel 报告，比较耗时和 Python 内存峰值（tracemalloc）。
+
+用法:
+    python benchmarks/bench_report.py
+    python benchmarks/bench_report.py --rows 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+from findings import FindingsStore  # noqa: E402
+from report_writers import ExcelReportWriter  # noqa: E402
+
+
+def build_store(rows):
+    store = FindingsStore()
+    for i in range(rows):
+        store.add("DLG", i + 4, str(1000 + i), f"这是第{i}行对白，慢慢的走向远方，{'文本' * (i % 20)}",
+                  "错别字：「慢慢的走」应为「慢慢地走」", f"这是第{i}行对白，慢慢地走向远方")
+    return store
+
+
+def measure(engine, store, order, path):
+    """写出一次报告，返回 (耗时秒数, 内存峰值MB, 文件大小MB)"""
+    writer = ExcelReportWriter(path)
+    writer.link_source(os.path.join(os.path.dirname(path), "source.xlsx"), 1)
+    write = writer._finalize_xlsxwriter if engine == "xlsxwriter" else writer._finalize_openpyxl
+    tracemalloc.start()
+    started = time.perf_counter()
+    write(store, order, path)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1048576, os.path.getsize(path) / 1048576
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel 报告写出基准测试")
+    parser.add_argument("--rows", type=int, default=50000, help="模拟问题数（默认50000）")
+    args = parser.parse_args()
+
+    store = build_store(args.rows)
+    order = store.sorted_indices("row")
+    engines = ["openpyxl"]
+    try:
+        import xlsxwriter  # noqa: F401
+        engines.insert(0, "xlsxwriter")
+    except ImportError:
+        print("⚠️ 未安装 xlsxwriter，只测试 openpyxl（pip install .[xlsx]）")
+    print(f"📊 {args.rows} 条问题（tracemalloc 会拖慢写出，耗时只用于比较两种方式）")
+    with tempfile.TemporaryDirectory() as tmp:
+        for engine in engines:
+            elapsed, peak, size = measure(engine, store, order, os.path.join(tmp, f"{engine}.xlsx"))
+            print(f"   - {engine:<10}: {elapsed:6.2f} 秒，内存峰值 {peak:7.1f} MB，文件 {size:5.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
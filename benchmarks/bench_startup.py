@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+启动耗时基准测试
+
+测量 conf_check 的导入耗时（python -X importtime）和命令行轻量路径（--help）的启动时间，
+并检查导入时是否意外加载了 pandas 等重量级依赖。
+
+用法:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --max-seconds 1.0
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(ROOT_DIR, "scripts")
+
+# 导入 conf_check 时不应加载的模块
+HEAVY_MODULES = ["pandas", "numpy", "openpyxl", "requests", "tqdm", "yaml"]
+
+
+def run_python(args, env_extra=None):
+    """在 scripts 目录下运行 python 子进程"""
+    env = dict(os.environ)
+    env.update(env_extra or {})
+    return subprocess.run(
+        [sys.executable] + args,
+        cwd=SCRIPTS_DIR,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        env=env,
+    )
+
+
+def parse_importtime(stderr):
+    """
+    解析 -X importtime 输出
+
+    Returns:
+        list: [(模块名, 自身耗时us, 累计耗时us, 缩进层级)]
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        self_us, cumulative_us, name = parts
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def measure_import(module="conf_check"):
+    """测量模块导入耗时，返回 (累计毫秒, 耗时最多的依赖, 已加载的重量级模块)"""
+    result = run_python(["-X", "importtime", "-c", f"import {module}"])
+    entries = parse_importtime(result.stderr)
+    total = 0
+    children = []
+    for i, (name, _, cumulative, depth) in enumerate(entries):
+        if name == module and depth == 0:
+            total = cumulative
+            # importtime 先输出子模块再输出父模块：向前收集直接子模块
+            for entry in reversed(entries[:i]):
+                if entry[3] == 0:
+                    break
+                if entry[3] == 1:
+                    children.append(entry)
+            break
+    top = sorted(children, key=lambda e: -e[2])[:8]
+
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    probe = run_python(["-c", code])
+    loaded = [m for m in probe.stdout.strip().split(",") if m]
+    return total / 1000.0, top, loaded
+
+
+def measure_command(args, runs):
+    """多次运行命令，返回耗时列表（秒）"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        run_python(args)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="conf_check 启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="每项测量的运行次数")
+    parser.add_argument("--max-seconds", type=float, default=None, help="--help 中位耗时超过该值时返回非0")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("⏱️ conf_check 启动耗时基准")
+    print("=" * 60)
+
+    import_ms, top, loaded = measure_import()
+    print(f"📦 import conf_check: {import_ms:.1f} ms（-X importtime 累计）")
+    for name, _, cumulative, _ in top:
+        print(f"   - {name}: {cumulative / 1000.0:.1f} ms")
+    if loaded:
+        print(f"⚠️ 导入时加载了重量级模块: {', '.join(loaded)}")
+    else:
+        print("✅ 导入时未加载重量级模块")
+
+    baseline = statistics.median(measure_command(["-c", "pass"], args.runs))
+    help_times = measure_command(["conf_check.py", "--help"], args.runs)
+    help_median = statistics.median(help_times)
+    print(f"🐍 python 空启动: {baseline * 1000:.0f} ms（中位数）")
+    print(f"🚀 conf_check.py --help: {help_median * 1000:.0f} ms（中位数，{args.runs} 次）")
+
+    if args.max_seconds is not None and help_median > args.max_seconds:
+        print(f"❌ 启动耗时超过 {args.max_seconds} 秒")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,120 +4,349 @@
 Excel to Alpaca Format Converter
 将Excel文件转换为Alpaca格式的训练数据
 
+- 流式读取（openpyxl 只读模式逐行读取），按块写出 JSONL，内存占用不随行数增长
+- 多个输入文件在多个进程中并行转换，合并时按内容哈希去重
+- --from-report: 直接从 conf_check 报告生成数据集（处理状态为「已修复」的问题作为标注，
+  全部「忽略」的行作为无问题样本）
+
 Author: AI Assistant
 Date: 2025-11-29
 """
 
+import csv
 import json
 import argparse
+import hashlib
+import os
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+REQUIRED_COLUMNS = ['instruction', 'input', 'output']
+CHUNK_SIZE = 5000  # 每次写出的条数
+
+# conf_check 报告的列名和处理状态（与 scripts/findings.py 一致）
+REPORT_FIELDS = {
+    "行号": "row",
+    "配置原文": "text",
+    "问题说明": "issue",
+    "修改建议": "suggestion",
+    "处理状态": "status",
+    "Sheet": "sheet",
+}
+STATUS_ACCEPTED = "已修复"
+STATUS_REJECTED = "忽略"
+REPORT_INSTRUCTION = (
+    "检查以下游戏配置文本中的错别字、语病和标点问题，"
+    "以JSON数组返回问题说明(issue)和修改建议(suggestion)，没有问题时返回[]"
+)
+
 
-try:
-    import pandas as pd
-except ImportError:
-    print("错误: 需要安装pandas库")
-    print("请运行: pip install pandas openpyxl")
-    sys.exit(1)
+def _cell_text(value: Any) -> str:
+    """Convert a cell value to stripped text (empty for None/NaN)"""
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return str(value).strip()
 
 
-def read_excel_file(excel_path: str) -> pd.DataFrame:
+def iter_sheet_rows(excel_path: str) -> Iterator[Tuple[Any, ...]]:
     """
-    Read Excel file and return DataFrame
-    
+    Stream the rows of the first sheet (header row included)
+
+    .xlsx/.xlsm are read row by row with openpyxl's read-only mode;
+    .xls files need xlrd and are read with pandas in one go.
+
     Args:
         excel_path: Path to Excel file
-        
-    Returns:
-        DataFrame containing the Excel data
-        
+
+    Yields:
+        Row values as tuples
+
     Raises:
         FileNotFoundError: If Excel file doesn't exist
-        ValueError: If required columns are missing
+        ValueError: If the file cannot be read
     """
     if not Path(excel_path).exists():
         raise FileNotFoundError(f"Excel文件不存在: {excel_path}")
-    
-    try:
-        # Read Excel file, support both .xlsx and .xls
-        df = pd.read_excel(excel_path, engine='openpyxl')
-    except Exception as e:
+
+    if Path(excel_path).suffix.lower() == '.xls':
         try:
-            # Try with xlrd engine for older .xls files
-            df = pd.read_excel(excel_path, engine='xlrd')
-        except Exception:
+            import pandas as pd
+            df = pd.read_excel(excel_path, engine='xlrd', header=None, dtype=object)
+        except ImportError:
+            raise ValueError("读取 .xls 文件需要安装 pandas 和 xlrd: pip install pandas xlrd")
+        except Exception as e:
             raise ValueError(f"无法读取Excel文件: {e}")
-    
-    # Check required columns
-    required_columns = ['instruction', 'input', 'output']
-    missing_columns = [col for col in required_columns if col not in df.columns]
-    
+        yield from df.itertuples(index=False, name=None)
+        return
+
+    from openpyxl import load_workbook
+
+    try:
+        wb = load_workbook(excel_path, read_only=True, data_only=True)
+    except Exception as e:
+        raise ValueError(f"无法读取Excel文件: {e}")
+    try:
+        yield from wb.worksheets[0].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def read_excel_file(excel_path: str) -> Iterator[Dict[str, str]]:
+    """
+    Stream Excel rows as dictionaries with instruction/input/output
+
+    Args:
+        excel_path: Path to Excel file
+
+    Yields:
+        {"instruction", "input", "output"} for each data row
+
+    Raises:
+        FileNotFoundError: If Excel file doesn't exist
+        ValueError: If required columns are missing
+    """
+    rows = iter_sheet_rows(excel_path)
+    header = [_cell_text(v) for v in next(rows, ())]
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in header]
     if missing_columns:
         raise ValueError(
             f"Excel文件缺少必需的列: {', '.join(missing_columns)}\n"
-            f"当前列: {', '.join(df.columns)}\n"
-            f"需要的列: {', '.join(required_columns)}"
+            f"当前列: {', '.join(header)}\n"
+            f"需要的列: {', '.join(REQUIRED_COLUMNS)}"
         )
-    
-    return df
+    positions = {col: header.index(col) for col in REQUIRED_COLUMNS}
+    for values in rows:
+        yield {
+            col: _cell_text(values[pos]) if pos < len(values) else ""
+            for col, pos in positions.items()
+        }
 
 
-def convert_to_alpaca_format(df: pd.DataFrame) -> List[Dict[str, Any]]:
+def convert_to_alpaca_format(rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, str]]:
     """
-    Convert DataFrame to Alpaca format
-    
+    Convert rows to Alpaca format entries, skipping empty rows
+
     Args:
-        df: DataFrame with instruction, input, output columns
-        
-    Returns:
-        List of dictionaries in Alpaca format
-    """
-    alpaca_data = []
-    
-    for idx, row in df.iterrows():
-        # Handle NaN values and convert to string
-        instruction = str(row['instruction']) if pd.notna(row['instruction']) else ""
-        input_text = str(row['input']) if pd.notna(row['input']) else ""
-        output_text = str(row['output']) if pd.notna(row['output']) else ""
-        
-        # Skip empty rows
-        if not instruction and not input_text and not output_text:
+        rows: Dictionaries with instruction, input, output keys
+
+    Yields:
+        Dictionaries in Alpaca format
+    """
+    for row in rows:
+        entry = {col: _cell_text(row.get(col)) for col in REQUIRED_COLUMNS}
+        if entry["instruction"] or entry["input"] or entry["output"]:
+            yield entry
+
+
+def iter_report_records(report_path: str) -> Iterator[Dict[str, str]]:
+    """
+    Stream findings from a conf_check report (.xlsx / .csv / .jsonl)
+
+    Yields:
+        {"row", "text", "issue", "suggestion", "status"} for each finding
+    """
+    suffix = Path(report_path).suffix.lower()
+    if suffix == '.jsonl':
+        with open(report_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    if suffix == '.csv':
+        f = open(report_path, 'r', encoding='utf-8-sig', newline='')
+        rows = csv.reader(f)
+    else:
+        f = None
+        rows = iter_sheet_rows(report_path)
+    try:
+        header = [REPORT_FIELDS.get(_cell_text(v), "") for v in next(rows, ())]
+        missing = [name for name, field in REPORT_FIELDS.items()
+                   if field in ("text", "issue", "suggestion", "status") and field not in header]
+        if missing:
+            raise ValueError(f"报告缺少必需的列: {', '.join(missing)}（{report_path}）")
+        for values in rows:
+            yield {field: _cell_text(value) for field, value in zip(header, values) if field}
+    finally:
+        if f is not None:
+            f.close()
+
+
+def convert_report_to_alpaca(records: Iterable[Dict[str, Any]],
+                             instruction: str = REPORT_INSTRUCTION) -> Iterator[Dict[str, str]]:
+    """
+    Join report findings with their review status into Alpaca entries
+
+    同一行的问题在报告中是连续的：有「已修复」问题的行输出这些问题，
+    所有问题都被标记为「忽略」的行输出 []（误报样本），仍待处理的行跳过。
+
+    Args:
+        records: Findings from iter_report_records()
+        instruction: Instruction text for every entry
+
+    Yields:
+        Dictionaries in Alpaca format
+    """
+    key = lambda r: (_cell_text(r.get("sheet")), _cell_text(r.get("row")), _cell_text(r.get("text")))  # noqa: E731
+    for (_, _, text), group in groupby(records, key=key):
+        if not text:
+            continue
+        group = list(group)
+        accepted = [
+            {"issue": _cell_text(r.get("issue")), "suggestion": _cell_text(r.get("suggestion"))}
+            for r in group if _cell_text(r.get("status")) == STATUS_ACCEPTED
+        ]
+        if not accepted and any(_cell_text(r.get("status")) != STATUS_REJECTED for r in group):
             continue
-        
-        # Create Alpaca format entry
-        entry = {
-            "instruction": instruction.strip(),
-            "input": input_text.strip(),
-            "output": output_text.strip()
+        yield {
+            "instruction": instruction,
+            "input": text,
+            "output": json.dumps(accepted, ensure_ascii=False),
         }
-        
-        alpaca_data.append(entry)
-    
-    return alpaca_data
 
 
-def save_to_json(data: List[Dict[str, Any]], output_path: str) -> None:
+def entry_line(entry: Dict[str, str]) -> str:
+    """Serialize one entry as a JSONL line (same entry always gives the same line)"""
+    return json.dumps(entry, ensure_ascii=False) + "\n"
+
+
+def entry_digest(line: str) -> int:
+    """64-bit content hash of a serialized entry (used for dedup)"""
+    return int.from_bytes(hashlib.blake2b(line.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def write_entries(entries: Iterable[Dict[str, str]], output_path: str,
+                  seen: Optional[set] = None, chunk_size: int = CHUNK_SIZE) -> Tuple[int, int]:
     """
-    Save data to JSON file with proper encoding
-    
+    Write entries to a JSONL file in chunks, skipping duplicates
+
     Args:
-        data: List of dictionaries to save
-        output_path: Path to output JSON file
+        entries: Alpaca entries
+        output_path: Path to output JSONL file
+        seen: Hashes already written (updated in place)
+        chunk_size: Number of lines buffered per write
+
+    Returns:
+        (written, duplicates)
     """
-    try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(
-                data,
-                f,
-                ensure_ascii=False,  # Keep Chinese characters
-                indent=2,  # Pretty print with 2-space indentation
-                sort_keys=False  # Keep original order
-            )
-        print(f"✓ 成功保存到: {output_path}")
-        print(f"✓ 共转换 {len(data)} 条数据")
-    except Exception as e:
-        raise IOError(f"保存JSON文件失败: {e}")
+    seen = set() if seen is None else seen
+    written = duplicates = 0
+    buffer = []
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            line = entry_line(entry)
+            digest = entry_digest(line)
+            if digest in seen:
+                duplicates += 1
+                continue
+            seen.add(digest)
+            buffer.append(line)
+            if len(buffer) >= chunk_size:
+                f.writelines(buffer)
+                written += len(buffer)
+                buffer.clear()
+        f.writelines(buffer)
+        written += len(buffer)
+    return written, duplicates
+
+
+def convert_file(input_path: str, part_path: str, from_report: bool = False,
+                 instruction: str = REPORT_INSTRUCTION) -> Tuple[str, int, int]:
+    """
+    Convert one input file to a JSONL part file (runs in a worker process)
+
+    Returns:
+        (input_path, written, duplicates within the file)
+    """
+    if from_report:
+        entries = convert_report_to_alpaca(iter_report_records(input_path), instruction)
+    else:
+        entries = convert_to_alpaca_format(read_excel_file(input_path))
+    written, duplicates = write_entries(entries, part_path)
+    return input_path, written, duplicates
+
+
+def merge_parts(part_paths: List[str], output_path: str, chunk_size: int = CHUNK_SIZE) -> Tuple[int, int]:
+    """
+    Merge part files into the output, dropping entries already seen in earlier parts
+
+    .json 输出写为JSON数组（兼容旧版本），其他扩展名写为JSONL。
+
+    Returns:
+        (written, duplicates)
+    """
+    as_array = Path(output_path).suffix.lower() == '.json'
+    seen = set()
+    written = duplicates = 0
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as out:
+        if as_array:
+            out.write("[\n")
+        buffer = []
+        for part_path in part_paths:
+            with open(part_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    digest = entry_digest(line)
+                    if digest in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(digest)
+                    if as_array:
+                        line = ("  " if not written and not buffer else ",\n  ") + line.rstrip("\n")
+                    buffer.append(line)
+                    if len(buffer) >= chunk_size:
+                        out.writelines(buffer)
+                        written += len(buffer)
+                        buffer.clear()
+        out.writelines(buffer)
+        written += len(buffer)
+        if as_array:
+            out.write("\n]\n")
+    os.replace(tmp_path, output_path)
+    return written, duplicates
+
+
+def convert_files(input_paths: List[str], output_path: str, workers: int = 1, from_report: bool = False,
+                  instruction: str = REPORT_INSTRUCTION) -> Tuple[int, int]:
+    """
+    Convert several files (in parallel processes) into one deduplicated dataset
+
+    Args:
+        input_paths: Excel files (or conf_check reports with from_report)
+        output_path: Output .jsonl (or .json array) path
+        workers: Number of worker processes
+        from_report: Build entries from conf_check reports
+        instruction: Instruction text for report entries
+
+    Returns:
+        (written, duplicates)
+    """
+    with tempfile.TemporaryDirectory(dir=str(Path(output_path).resolve().parent)) as tmp_dir:
+        part_paths = [os.path.join(tmp_dir, f"part{i:05d}.jsonl") for i in range(len(input_paths))]
+        jobs = list(zip(input_paths, part_paths))
+        duplicates = 0
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+                futures = [executor.submit(convert_file, src, part, from_report, instruction) for src, part in jobs]
+                results = [future.result() for future in futures]
+        else:
+            results = [convert_file(src, part, from_report, instruction) for src, part in jobs]
+        for input_path, written, file_duplicates in results:
+            duplicates += file_duplicates
+            print(f"✓ {input_path}: {written} 条")
+        written, merge_duplicates = merge_parts(part_paths, output_path)
+    return written, duplicates + merge_duplicates
+
+
+def default_output_path(input_paths: List[str]) -> str:
+    """Same name as the input with .jsonl (alpaca_dataset.jsonl for several inputs)"""
+    if len(input_paths) == 1:
+        return str(Path(input_paths[0]).with_suffix('.jsonl'))
+    return "alpaca_dataset.jsonl"
 
 
 def main():
@@ -128,57 +357,75 @@ def main():
         epilog="""
 示例用法:
   python excel_to_alpaca.py input.xlsx
+  python excel_to_alpaca.py a.xlsx b.xlsx c.xlsx -o train.jsonl --workers 4
   python excel_to_alpaca.py input.xlsx -o output.json
-  python excel_to_alpaca.py input.xlsx --output training_data.json
+  python excel_to_alpaca.py reports/*_Check_Report_*.xlsx --from-report -o review.jsonl
 
 Excel文件要求:
   - 必须包含三列: instruction, input, output
-  - 支持 .xlsx 和 .xls 格式
+  - 支持 .xlsx 和 .xls 格式（.xls 需要 pandas 和 xlrd）
   - 支持中文和特殊字符
+
+输出格式:
+  - .jsonl（默认）: 每行一条，流式写出
+  - .json: JSON数组（与旧版本兼容）
+  - 多个文件中内容完全相同的条目只保留一条
         """
     )
-    
+
     parser.add_argument(
-        'excel_file',
-        type=str,
-        help='输入的Excel文件路径'
+        'excel_files',
+        nargs='+',
+        help='输入的Excel文件路径（可指定多个）'
     )
-    
+
     parser.add_argument(
         '-o', '--output',
         type=str,
         default=None,
-        help='输出的JSON文件路径 (默认: 与输入文件同名的.json文件)'
+        help='输出文件路径 (默认: 与输入文件同名的.jsonl文件)'
+    )
+
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='并行转换的进程数 (默认: CPU核数)'
     )
-    
+
+    parser.add_argument(
+        '--from-report',
+        action='store_true',
+        help='输入为 conf_check 报告（.xlsx/.csv/.jsonl），以「已修复」的问题作为标注生成数据集'
+    )
+
+    parser.add_argument(
+        '--instruction',
+        default=REPORT_INSTRUCTION,
+        help='--from-report 时每条数据的 instruction'
+    )
+
     args = parser.parse_args()
-    
-    # Determine output path
-    if args.output:
-        output_path = args.output
-    else:
-        # Use same name as input file but with .json extension
-        input_path = Path(args.excel_file)
-        output_path = input_path.with_suffix('.json')
-    
+    output_path = args.output or default_output_path(args.excel_files)
+
     try:
-        print(f"正在读取Excel文件: {args.excel_file}")
-        df = read_excel_file(args.excel_file)
-        print(f"✓ 成功读取 {len(df)} 行数据")
-        
-        print("正在转换为Alpaca格式...")
-        alpaca_data = convert_to_alpaca_format(df)
-        
-        print(f"正在保存到: {output_path}")
-        save_to_json(alpaca_data, str(output_path))
-        
+        print(f"正在转换 {len(args.excel_files)} 个文件（{max(1, args.workers)} 个进程）...")
+        written, duplicates = convert_files(
+            args.excel_files, output_path, max(1, args.workers), args.from_report, args.instruction)
+        print(f"✓ 成功保存到: {output_path}")
+        print(f"✓ 共转换 {written} 条数据" + (f"，去除重复 {duplicates} 条" if duplicates else ""))
+
         # Show preview
-        if alpaca_data:
+        if written:
+            with open(output_path, 'r', encoding='utf-8') as f:
+                first = f.readline()
+                if first.strip() == "[":
+                    first = f.readline().strip().rstrip(",")
             print("\n数据预览 (第一条):")
-            print(json.dumps(alpaca_data[0], ensure_ascii=False, indent=2))
-        
+            print(json.dumps(json.loads(first), ensure_ascii=False, indent=2))
+
         return 0
-        
+
     except Exception as e:
         print(f"\n错误: {e}", file=sys.stderr)
         return 1
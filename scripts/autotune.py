@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+自动调优 - 用真实数据校准批次大小和并发数
+
+不同显卡、模型和 Ollama 配置下最合适的批次大小与并发数差别很大，
+手动猜测通常会浪费三到五成的吞吐量。校准模式从当前 Sheet 中均匀抽样，
+依次尝试几组批次大小和并发数，记录行/秒、推理服务返回的生成速度和解析失败率，
+在失败率不超过上限的配置中选择吞吐量最高的一组，按 模型+推理服务地址 保存，
+之后的运行自动使用。
+"""
+import json
+import os
+from datetime import datetime
+from urllib.parse import urlparse
+
+from scheduler import STATE_DIR
+
+PROFILE_FILE = "tune_profiles.json"
+DEFAULT_BATCH_SIZES = [10, 20, 30, 50]
+DEFAULT_WORKER_LEVELS = [1, 2, 4]
+DEFAULT_MAX_FAILURE_RATE = 0.1
+# 并发数加倍后吞吐量提升不足此比例时，不再继续加大并发
+MIN_WORKER_GAIN = 1.1
+
+
+def profile_key(model, endpoints):
+    """
+    调优配置的键：模型名 + 推理服务地址（host:port）
+
+    Args:
+        model: 模型名称
+        endpoints: generate 接口地址列表
+    """
+    hosts = sorted({urlparse(e).netloc or e for e in endpoints})
+    return f"{model}@{','.join(hosts)}"
+
+
+def profile_path(state_dir=STATE_DIR):
+    return os.path.join(state_dir, PROFILE_FILE)
+
+
+def load_profile(model, endpoints, state_dir=STATE_DIR):
+    """
+    读取已保存的调优配置
+
+    Returns:
+        dict: 调优配置，不存在时返回None
+    """
+    path = profile_path(state_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            profiles = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return profiles.get(profile_key(model, endpoints))
+
+
+def save_profile(model, endpoints, profile, state_dir=STATE_DIR):
+    """保存调优配置（同一文件中保存多个 模型+地址 的配置）"""
+    path = profile_path(state_dir)
+    profiles = {}
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                profiles = json.load(f)
+        except (OSError, ValueError):
+            profiles = {}
+    profiles[profile_key(model, endpoints)] = profile
+    os.makedirs(state_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def sample_rows(rows, count):
+    """从行列表中均匀抽样（覆盖表格的不同位置，避免只测开头的短文本）"""
+    if len(rows) <= count:
+        return list(rows)
+    step = len(rows) / count
+    return [rows[int(i * step)] for i in range(count)]
+
+
+def _rate(meta_list, count_key, seconds_key):
+    """根据推理服务返回的 token 数和秒数（backends.normalize_timing）计算 token/秒"""
+    count = sum(m.get(count_key, 0) for m in meta_list)
+    seconds = sum(m.get(seconds_key, 0) for m in meta_list)
+    return count / seconds if seconds else None
+
+
+def summarize_trial(batch_size, workers, results, wall_seconds):
+    """
+    汇总一次试验的结果
+
+    Args:
+        batch_size: 批次大小
+        workers: 并发数
+        results: check_batch 的结果列表（包含 "rows"、"error"、"meta"）
+        wall_seconds: 试验总耗时
+
+    Returns:
+        dict: 试验统计
+    """
+    rows = sum(r.get("rows", batch_size) for r in results if not r.get("error"))
+    failures = sum(1 for r in results if r.get("error"))
+    metas = [r.get("meta") or {} for r in results]
+    return {
+        "batch_size": batch_size,
+        "workers": workers,
+        "batches": len(results),
+        "rows_per_second": rows / wall_seconds if wall_seconds > 0 else 0.0,
+        "failure_rate": failures / len(results) if results else 1.0,
+        "eval_rate": _rate(metas, "completion_tokens", "completion_seconds"),
+        "prompt_eval_rate": _rate(metas, "prompt_tokens", "prompt_seconds"),
+        "seconds": wall_seconds,
+    }
+
+
+def calibrate(rows, probe, batch_sizes=None, worker_levels=None,
+              max_failure_rate=DEFAULT_MAX_FAILURE_RATE, rounds=1, log=print):
+    """
+    校准批次大小和并发数
+
+    每组配置发送 rounds 轮、每轮 workers 个并发批次。对每个批次大小从低到高
+    增加并发数，吞吐量提升不明显时停止；批次大小在单并发下失败率已超过上限时，
+    不再尝试更大的批次。
+
+    Args:
+        rows: 抽样的 RowItem 列表
+        probe: probe(batch_rows_list, workers) -> (结果列表, 总耗时秒数)
+        batch_sizes: 候选批次大小
+        worker_levels: 候选并发数
+        max_failure_rate: 允许的最大失败率（API失败和JSON解析失败）
+        rounds: 每组配置的轮数
+        log: 输出函数
+
+    Returns:
+        tuple: (最佳试验统计或None, 全部试验统计列表)
+    """
+    batch_sizes = sorted(batch_sizes or DEFAULT_BATCH_SIZES)
+    worker_levels = sorted(worker_levels or DEFAULT_WORKER_LEVELS)
+    trials = []
+    for batch_size in batch_sizes:
+        if batch_size > len(rows):
+            log(f"   - 批次 {batch_size}: 样本行数不足，跳过")
+            continue
+        best_for_size = None
+        for workers in worker_levels:
+            count = workers * rounds
+            offsets = [(i * batch_size) % len(rows) for i in range(count)]
+            batches = [(rows + rows)[start:start + batch_size] for start in offsets]
+            results, seconds = probe(batches, workers)
+            trial = summarize_trial(batch_size, workers, results, seconds)
+            trials.append(trial)
+            eval_rate = f"，生成 {trial['eval_rate']:.0f} token/秒" if trial["eval_rate"] else ""
+            log(f"   - 批次 {batch_size} × 并发 {workers}: {trial['rows_per_second']:.2f} 行/秒，"
+                f"失败率 {trial['failure_rate']:.0%}{eval_rate}")
+            if trial["failure_rate"] > max_failure_rate:
+                break
+            if best_for_size is not None and \
+                    trial["rows_per_second"] < best_for_size["rows_per_second"] * MIN_WORKER_GAIN:
+                break
+            if best_for_size is None or trial["rows_per_second"] > best_for_size["rows_per_second"]:
+                best_for_size = trial
+        first = next((t for t in trials if t["batch_size"] == batch_size), None)
+        if first is not None and first["failure_rate"] > max_failure_rate:
+            log(f"   - 批次 {batch_size} 失败率超过 {max_failure_rate:.0%}，不再尝试更大的批次")
+            break
+
+    eligible = [t for t in trials if t["failure_rate"] <= max_failure_rate]
+    if not eligible:
+        return None, trials
+    # 吞吐量相同时选择较小的批次（幻觉更少）
+    best = max(eligible, key=lambda t: (round(t["rows_per_second"], 3), -t["batch_size"], -t["workers"]))
+    return best, trials
+
+
+def build_profile(best, trials, sample_size):
+    """构造保存到磁盘的调优配置"""
+    return {
+        "batch_size": best["batch_size"],
+        "workers": best["workers"],
+        "rows_per_second": round(best["rows_per_second"], 3),
+        "failure_rate": round(best["failure_rate"], 3),
+        "eval_rate": best["eval_rate"] and round(best["eval_rate"], 1),
+        "sample_rows": sample_size,
+        "calibrated_at": datetime.now().isoformat(timespec="seconds"),
+        "trials": [
+            {k: (round(v, 3) if isinstance(v, float) else v) for k, v in t.items()} for t in trials
+        ],
+    }
+
+
+def estimate_probe_rows(batch_sizes, worker_levels, rounds=1):
+    """估算校准最多发送的行数（用于提示校准耗时）"""
+    return sum(b * w * rounds for b in batch_sizes for w in worker_levels)
+
+
+def default_sample_size(batch_sizes, worker_levels):
+    """默认抽样行数：足够组成最大批次 × 最大并发的一轮请求"""
+    return max(batch_sizes) * max(worker_levels) if batch_sizes and worker_levels else 0
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+推理后端 - 统一 Ollama 与 OpenAI 兼容接口的请求、模型列表和耗时统计
+
+- ollama: Ollama 的 /api/generate 与 /api/tags（默认）
+- openai: OpenAI 兼容的 /v1/chat/completions 与 /v1/models，适用于 llama.cpp server、
+  vLLM 等支持连续批处理（continuous batching）的推理服务，并发请求的吞吐量远高于逐个处理
+
+各后端返回的耗时统计统一为 normalize_timing() 的字段（token 数和秒数），
+调用方（动态超时、自动调优）不需要关心具体的后端。新后端通过 register_backend 注册。
+"""
+import json
+import os
+import time
+
+BACKENDS = {}
+
+# OpenAI 兼容接口支持的生成参数（与 Ollama options 的对应关系），其余参数（num_ctx、num_gpu 等）由服务端启动参数决定
+_OPENAI_OPTIONS = {
+    "temperature": "temperature",
+    "top_p": "top_p",
+    "seed": "seed",
+    "num_predict": "max_tokens",
+    "stop": "stop",
+}
+
+
+class BackendError(Exception):
+    """推理服务返回了错误（status 为 HTTP 状态码）"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def normalize_timing(prompt_tokens=None, completion_tokens=None, prompt_seconds=None,
+                     completion_seconds=None, total_seconds=None):
+    """
+    统一的耗时统计（只包含服务端返回了的字段）
+
+    Returns:
+        dict: prompt_tokens / completion_tokens（token 数）、
+              prompt_seconds / completion_seconds / total_seconds（秒）
+    """
+    values = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "prompt_seconds": prompt_seconds,
+        "completion_seconds": completion_seconds,
+        "total_seconds": total_seconds,
+    }
+    return {key: value for key, value in values.items() if value is not None}
+
+
+def register_backend(name):
+    """注册推理后端的装饰器"""
+    def decorator(cls):
+        cls.name = name
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def create_backend(name):
+    """
+    按名称创建推理后端
+
+    Args:
+        name: 后端名称（ollama / openai）
+
+    Returns:
+        推理后端实例
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"未知的推理后端: {name}（可选: {', '.join(sorted(BACKENDS))}）")
+    return BACKENDS[name]()
+
+
+def _check_status(response, label):
+    if response.status_code != 200:
+        raise BackendError(f"{label} API错误 (HTTP {response.status_code}): {response.text}", response.status_code)
+
+
+def _stream_lines(response, timeout, cancel_event):
+    """
+    逐行读取流式响应；事件被设置时返回，总耗时超过 timeout 时抛出 TimeoutError
+
+    流式请求下 requests 的 timeout 只约束相邻两个数据块的间隔，
+    模型陷入循环持续输出时不会触发，因此这里额外检查总耗时。
+    """
+    started = time.monotonic()
+    for line in response.iter_lines():
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        if time.monotonic() - started > timeout:
+            raise TimeoutError(f"模型生成时间过长（>{timeout:.0f}秒），已中止")
+        if line:
+            yield line.decode("utf-8") if isinstance(line, bytes) else line
+
+
+@register_backend("ollama")
+class OllamaBackend:
+    """Ollama /api/generate"""
+
+    label = "Ollama"
+    can_start_model = True  # 模型未加载时可以通过 ollama run 启动
+    calibration_workers = None  # --calibrate 尝试的并发数（None 时使用 autotune 的默认值）
+
+    def headers(self):
+        return {}
+
+    def list_models(self, api_url, timeout=5):
+        """
+        获取服务中的模型列表
+
+        Args:
+            api_url: API 基础地址（如 http://localhost:11434/api）
+
+        Returns:
+            list: 模型名称列表
+
+        Raises:
+            BackendError: 服务返回错误
+        """
+        import requests
+
+        response = requests.get(f"{api_url.rstrip('/')}/tags", timeout=timeout)
+        _check_status(response, self.label)
+        return [model["name"] for model in response.json().get("models", [])]
+
+    def build_payload(self, model, prompt, options, stream=False, keep_alive=None):
+        payload = {"model": model, "prompt": prompt, "stream": stream, "options": dict(options)}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return payload
+
+    @staticmethod
+    def parse_timing(data):
+        """Ollama 的 *_count / *_duration（纳秒）转换为统一的耗时统计"""
+        def seconds(key):
+            return data[key] / 1e9 if data.get(key) is not None else None
+
+        return normalize_timing(
+            prompt_tokens=data.get("prompt_eval_count"),
+            completion_tokens=data.get("eval_count"),
+            prompt_seconds=seconds("prompt_eval_duration"),
+            completion_seconds=seconds("eval_duration"),
+            total_seconds=seconds("total_duration"),
+        )
+
+    def generate(self, endpoint, model, prompt, options, timeout, cancel_event=None, keep_alive=None, meta=None):
+        """
+        生成一次回复
+
+        Args:
+            endpoint: 生成接口地址
+            model: 模型名称
+            prompt: 提示词
+            options: 模型参数（Ollama options 格式）
+            timeout: 超时时间（秒）
+            cancel_event: threading.Event，指定时使用流式请求，事件被设置或总耗时超过 timeout 时
+                立即断开连接（服务端会随之停止生成）
+            keep_alive: 模型保持加载的时间
+            meta: dict，传入时写入统一格式的耗时统计
+
+        Returns:
+            str: 模型响应文本；请求被取消时返回None
+
+        Raises:
+            BackendError: 服务返回错误
+            TimeoutError: 流式请求总耗时超过 timeout
+            requests.exceptions.RequestException: 连接失败或超时
+        """
+        import requests
+
+        payload = self.build_payload(model, prompt, options, cancel_event is not None, keep_alive)
+        if cancel_event is None:
+            response = requests.post(endpoint, json=payload, headers=self.headers(), timeout=timeout)
+            _check_status(response, self.label)
+            data = response.json()
+            if meta is not None:
+                meta.update(self.parse_timing(data))
+            return data.get("response", "")
+
+        pieces = []
+        with requests.post(endpoint, json=payload, headers=self.headers(), timeout=timeout, stream=True) as response:
+            _check_status(response, self.label)
+            for line in _stream_lines(response, timeout, cancel_event):
+                chunk = json.loads(line)
+                pieces.append(chunk.get("response", ""))
+                if chunk.get("done"):
+                    if meta is not None:
+                        meta.update(self.parse_timing(chunk))
+                    return "".join(pieces)
+        return None if cancel_event.is_set() else "".join(pieces)
+
+
+@register_backend("openai")
+class OpenAIBackend(OllamaBackend):
+    """
+    OpenAI 兼容的 /v1/chat/completions
+
+    设置环境变量 OPENAI_API_KEY 时以 Bearer token 发送（vLLM 的 --api-key 等）。
+    llama.cpp server 返回 timings 时使用服务端的耗时，否则用 usage 的 token 数和请求总耗时估算。
+    """
+
+    label = "OpenAI 兼容接口"
+    can_start_model = False
+    calibration_workers = (1, 4, 8, 16)
+
+    def headers(self):
+        api_key = os.environ.get("OPENAI_API_KEY")
+        return {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    def list_models(self, api_url, timeout=5):
+        import requests
+
+        response = requests.get(f"{api_url.rstrip('/')}/models", headers=self.headers(), timeout=timeout)
+        _check_status(response, self.label)
+        return [model["id"] for model in response.json().get("data", [])]
+
+    def build_payload(self, model, prompt, options, stream=False, keep_alive=None):
+        payload = {"model": model, "messages": [{"role": "user", "content": prompt}], "stream": stream}
+        for key, name in _OPENAI_OPTIONS.items():
+            if options.get(key) is not None:
+                payload[name] = options[key]
+        if stream:
+            # 最后一个数据块附带 usage
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    @staticmethod
+    def parse_timing(data, elapsed=None):
+        """usage / timings 转换为统一的耗时统计"""
+        usage = data.get("usage") or {}
+        timings = data.get("timings") or {}
+        if timings:
+            return normalize_timing(
+                prompt_tokens=timings.get("prompt_n", usage.get("prompt_tokens")),
+                completion_tokens=timings.get("predicted_n", usage.get("completion_tokens")),
+                prompt_seconds=timings["prompt_ms"] / 1000 if timings.get("prompt_ms") is not None else None,
+                completion_seconds=timings["predicted_ms"] / 1000 if timings.get("predicted_ms") is not None else None,
+                total_seconds=elapsed,
+            )
+        return normalize_timing(
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            completion_seconds=elapsed if usage.get("completion_tokens") else None,
+            total_seconds=elapsed,
+        )
+
+    def generate(self, endpoint, model, prompt, options, timeout, cancel_event=None, keep_alive=None, meta=None):
+        import requests
+
+        started = time.monotonic()
+        payload = self.build_payload(model, prompt, options, cancel_event is not None)
+        if cancel_event is None:
+            response = requests.post(endpoint, json=payload, headers=self.headers(), timeout=timeout)
+            _check_status(response, self.label)
+            data = response.json()
+            if meta is not None:
+                meta.update(self.parse_timing(data, time.monotonic() - started))
+            choices = data.get("choices") or [{}]
+            return (choices[0].get("message") or {}).get("content") or ""
+
+        pieces = []
+        final = {}
+        with requests.post(endpoint, json=payload, headers=self.headers(), timeout=timeout, stream=True) as response:
+            _check_status(response, self.label)
+            for line in _stream_lines(response, timeout, cancel_event):
+                # Server-Sent Events: "data: {...}"，以 "data: [DONE]" 结束
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                for choice in chunk.get("choices") or []:
+                    pieces.append((choice.get("delta") or {}).get("content") or "")
+                if chunk.get("usage") or chunk.get("timings"):
+                    final = chunk
+        if cancel_event.is_set():
+            return None
+        if meta is not None:
+            meta.update(self.parse_timing(final, time.monotonic() - started))
+        return "".join(pieces)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+紧凑输出协议 - 减少每个问题生成的 token
+
+每个批次的耗时主要花在生成上。JSON 格式 {"line_no":260,"issue":"问题类型：具体问题","suggestion":"修改建议"}
+中的键名、引号和自由书写的问题类型在每个问题上都要重复生成。紧凑协议让模型每个问题只输出一行：
+
+    编号|类型代码|具体问题|修改建议
+
+类型代码取自配置文件 rules.required 的必查项（A、B、C...），解析后在本地展开为
+与 JSON 格式相同的 {"line_no", "issue": "问题类型：具体问题", "suggestion"}，报告格式不变。
+"""
+import re
+
+RESPONSE_FORMATS = ("json", "compact")
+NO_ISSUES = "无"
+
+# 配置文件中没有 rules.required 时使用的必查项（与 JSON 格式提示词中的必查项一致）
+DEFAULT_REQUIRED = [
+    "错别字（重点：的地得用法、悉悉索索→窸窸窣窣）",
+    "语病（主语混乱、缺少主语、搭配不当、词性误用、数量表达混乱）",
+    "成语错用（负隅顽抗、娓娓道来、逡巡不前等贬义/褒义误用）",
+    "多字/漏字",
+    "内容合规（明确触及政治敏感、暴力色情、黄赌毒，不要过多扩展）",
+]
+
+_LABEL_PATTERN = re.compile(r"[（(:：]")
+
+
+def issue_label(description):
+    """
+    必查项描述中的问题类型名称
+
+    Args:
+        description: 如 "错别字（重点：的地得用法）"
+
+    Returns:
+        str: 如 "错别字"
+    """
+    return _LABEL_PATTERN.split(str(description), 1)[0].strip()
+
+
+def _code(index):
+    """第 index 个类型代码：A..Z，超过26个时为 Z1、Z2..."""
+    return chr(ord("A") + index) if index < 26 else f"Z{index - 25}"
+
+
+def issue_codes(required=None):
+    """
+    为必查项分配类型代码
+
+    Args:
+        required: 必查项描述列表（配置文件 rules.required），为空时使用 DEFAULT_REQUIRED
+
+    Returns:
+        list: [(代码, 问题类型, 描述)]
+    """
+    return [(_code(i), issue_label(desc), desc) for i, desc in enumerate(required or DEFAULT_REQUIRED)]
+
+
+def format_required(codes):
+    """提示词中带代码的必查项列表"""
+    return "\n".join(f"{code}. {desc}" for code, _, desc in codes)
+
+
+def format_output_rules(codes):
+    """提示词中紧凑协议的输出要求"""
+    first = codes[0][0] if codes else "A"
+    return f"""输出要求:
+1. 每个问题输出一行:编号|类型代码|具体问题|修改建议
+2. 编号是数据中该文本的编号，类型代码是上面必查项前的字母
+3. 无问题只输出:{NO_ISSUES}
+4. 禁止表头、Markdown标记和任何解释文字
+示例:3|{first}|"的"应为"地"|他高兴地跑了"""
+
+
+def parse_compact_response(response_text, codes):
+    """
+    解析紧凑协议的响应并展开为问题列表
+
+    Args:
+        response_text: 模型返回的文本
+        codes: issue_codes() 的结果
+
+    Returns:
+        list: [{"line_no", "issue", "suggestion"}]；既没有明确的"无"也没有任何可解析的问题行时
+              （包括空白响应和只有 ``` 的响应）返回None，按解析失败处理，不能当作没有问题
+    """
+    labels = {code.upper(): label for code, label, _ in codes}
+    issues = []
+    no_issues = False
+    for line in str(response_text or "").splitlines():
+        line = line.strip().replace("｜", "|")
+        if not line or line.startswith("```"):
+            continue
+        if line.strip("。.") == NO_ISSUES:
+            no_issues = True
+            continue
+        parts = [part.strip() for part in line.split("|", 3)]
+        if len(parts) < 3 or not parts[0].isdigit():
+            # 表头、解释文字或被截断的行
+            continue
+        handle, code, detail = parts[0], parts[1], parts[2]
+        # 模型没有使用代码而是直接写了类型名称时保留原样
+        label = labels.get(code.upper(), code)
+        issues.append({
+            "line_no": int(handle),
+            "issue": f"{label}：{detail}" if detail else label,
+            "suggestion": parts[3] if len(parts) > 3 else "",
+        })
+    if not issues and not no_issues:
+        return None
+    return issues
@@ -1,29 +1,91 @@
 # -*- coding: utf-8 -*-
-import pandas as pd
-import requests
+# 注意：pandas、requests、tqdm 等较重的库在函数内按需导入，
+# 保证 --help、参数校验和健康检查等轻量路径能快速启动
+import difflib
 import json
 import re
 import time
 import os
 import sys
 import argparse
-from tqdm import tqdm
+import queue
+import threading
 from datetime import datetime
-import math
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
-# 修复Windows控制台编码问题（使用line_buffering确保实时输出）
-if sys.platform == 'win32':
-    import io
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', line_buffering=True)
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', line_buffering=True)
+from autotune import (
+    DEFAULT_BATCH_SIZES,
+    DEFAULT_MAX_FAILURE_RATE,
+    DEFAULT_WORKER_LEVELS,
+    build_profile,
+    calibrate,
+    default_sample_size,
+    load_profile,
+    sample_rows,
+    save_profile,
+)
+from backends import BACKENDS, BackendError, create_backend
+from compact_schema import (
+    RESPONSE_FORMATS,
+    format_output_rules,
+    format_required,
+    issue_codes,
+    parse_compact_response,
+)
+from cpu_profile import cpu_groups, cpu_options, launch_commands, plan_slots
+from config_loader import DEFAULT_CONFIG_PATH, DEFAULT_MODEL_OPTIONS, ConfigError, ConfigWatcher, load_config
+from dedup import cluster_rows, issue_spans, project_batch
+from findings import FindingsStore, split_issue
+from latency import LatencyTracker, estimate_tokens
+from lexicon import NameMatcher, drop_name_issues, harvest_names, parse_sources
+from local_rules import LocalRules, prefilter
+from progress_events import EventEmitter, ProgressTracker, open_emitter
+from masking import SENTINEL_CHAR, mask_payload, mask_text, unmask_issues
+from planner import build_plan, find_traces, format_duration, trace_throughput
+from report_writers import (
+    COVERAGE_SHEET_NAME,
+    WRITERS,
+    ExcelReportWriter,
+    PartialCsvWriter,
+    create_report_writers,
+    parse_formats,
+)
+from response_trace import TRACE_SUFFIX, TraceWriter, load_run, row_from_record
+from results_store import ResultsStore
+from sampling import StratifiedSample, parse_sample_size
+from sheet_index import SheetIndex, normalize_header_rows
+from stage_profiler import PROFILE_MODES, StageProfiler
+from watch import WATCH_KEEP_ALIVE, FileWatcher, copy_findings, diff_rows, group_by_row
+from scheduler import (
+    SCHEDULERS,
+    STATE_DIR,
+    Batch,
+    RowItem,
+    RunBudget,
+    create_scheduler,
+    format_row_ranges,
+    load_row_snapshot,
+    load_word_list,
+    save_row_snapshot,
+    snapshot_path,
+    text_hash,
+)
+
+def setup_console():
+    """修复Windows控制台编码问题（使用line_buffering确保实时输出）"""
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', line_buffering=True)
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', line_buffering=True)
 
-# 立即输出启动信息，确保脚本正在运行
-print("🔄 正在初始化...", flush=True)
 # ================= 配置区域 =================
 # 1. 模型配置
-OLLAMA_URL = "http://localhost:11434/api/generate"
-OLLAMA_API_URL = "http://localhost:11434/api"  # Ollama API基础URL
+OLLAMA_URL = "http://localhost:11434/api/generate"  # 生成接口地址（openai 后端为 .../v1/chat/completions）
+OLLAMA_API_URL = "http://localhost:11434/api"  # API基础URL，用于获取模型列表（openai 后端为 .../v1）
+BACKEND = create_backend("ollama")  # 推理后端：ollama 或 openai（llama.cpp server、vLLM 等 OpenAI 兼容接口）
 MODEL_NAME = "qwen3:14b-q4_K_M"  # 修改此处后保存文件，重新运行脚本即可生效
+MODEL_OPTIONS = dict(DEFAULT_MODEL_OPTIONS)  # 模型参数，启动时从 config/check_config.yaml 的 ollama.options 加载
 
 # 2. 文件路径配置
 INPUT_FILE = "F:\\XXX.xlsx"  # 你的配置文件路径
@@ -44,14 +106,206 @@ HEADER_ROWS = [0, 1, 2]  # 使用第1、2、3行作为表头（对应Excel的第
 
 # 4. 检查参数
 BATCH_SIZE = 30  # 每次发给 AI 30 行数据，根据显存情况调整，太大容易幻觉
+WORKERS = 1  # 并发请求数，需配合 Ollama 的 OLLAMA_NUM_PARALLEL 使用
+REQUEST_TIMEOUT = 300  # 单次请求超时时间（秒），启用动态超时后作为上限
+ADAPTIVE_TIMEOUT = True  # 根据历史延迟分位数动态计算超时
+HEDGE_REQUESTS = True  # 请求超过 p99 延迟时发送对冲请求
+ENDPOINTS = []  # 多个生成接口地址（为空时使用 OLLAMA_URL）
+MASK_MARKUP = True  # 发送前将占位符/富文本标记替换为 §1 等短标记，返回后还原
+QUIET = False  # 安静模式：不输出每个批次的解析/对冲日志（进度通过进度条和 --events-* 事件查看）
+EVENTS = EventEmitter()  # NDJSON 进度事件输出，main() 中根据 --events-* 参数打开
+KEEP_ALIVE = None  # 请求中的 keep_alive（模型保持加载的时间），监视模式下设置为 WATCH_KEEP_ALIVE
+RESPONSE_FORMAT = "json"  # 模型输出格式：json 或 compact（每个问题一行，类型用代码表示，生成的 token 更少）
+ISSUE_CODES = issue_codes()  # 紧凑格式的问题类型代码，从配置文件 rules.required 生成
+TRACE = None  # 检查记录（response_trace.TraceWriter），每个批次的提示词和原始响应追加写入，--replay 可离线重新解析
+PROFILER = StageProfiler()  # 分阶段性能剖析，--profile-stages 时启用（未启用时阶段计时为空操作）
+
+LATENCY = LatencyTracker()
+_ENDPOINT_LOCK = threading.Lock()
+_ENDPOINT_CURSOR = 0
+
+# 5. 调度配置
+SENSITIVE_WORDS = []  # 本地敏感词（命中的行会被优先检查），可通过 --sensitive-words 指定词表文件
+PRIORITY_SHEETS = []  # 优先检查的 Sheet 名称
+PREFILTER = None  # 本地规则预筛（LocalRules），启用时只把命中规则的行发送给模型
+LEXICON_SOURCES = []  # 专有名词的名称列 [(Sheet, 列名)]，配置文件 lexicon.sources 或 --lexicon
+LEXICON_MIN_LENGTH = 2  # 名字的最小长度
+LEXICON = None  # 专有名词匹配器（lexicon.NameMatcher），run_check() 中从名称列和 --names 词表构建
+CPU_PLAN = None  # --cpu 的推理槽位划分（cpu_profile.plan_slots）
 OUTPUT_FILE = f"{SHEET_NAME}_{TARGET_COLUMN}_Check_Report_{datetime.now().strftime('%Y%m%d')}.xlsx"  # 文件名包含日期，避免覆盖
+OUTPUT_DIR = ""  # 报告输出目录（为空时输出到当前目录）
+
+# 6. 配置文件（以上配置的默认值可在 config/check_config.yaml 中修改，命令行参数优先）
+CONFIG = None
+TUNED_PROFILE = None  # --calibrate 保存的调优配置（按 模型+推理服务地址），未在命令行指定时覆盖批次大小和并发数
 # ===========================================
 
-def get_check_prompt(batch_data):
+def build_model_options(**overrides):
+    """
+    构造发给 Ollama 的模型参数
+
+    Args:
+        **overrides: 需要覆盖的参数，如 num_predict=1
+
+    Returns:
+        dict: 模型参数（副本，修改不影响全局配置）
+    """
+    options = dict(MODEL_OPTIONS)
+    options.update(overrides)
+    return options
+
+def apply_config(args):
+    """
+    加载配置文件并更新全局配置（命令行参数优先于配置文件）
+
+    未在命令行指定的参数会用配置文件中的值回填到 args 中。
+
+    Args:
+        args: build_arg_parser() 的解析结果
+
+    Returns:
+        AppConfig: 加载的配置
+
+    Raises:
+        ConfigError: 配置文件无法解析或取值错误
+    """
+    global CONFIG, OLLAMA_URL, OLLAMA_API_URL, MODEL_NAME, MODEL_OPTIONS
+    global INPUT_FILE, SHEET_NAME, TARGET_COLUMN, TARGET_COLUMN_INDEX, HEADER_ROWS
+    global BATCH_SIZE, WORKERS, REQUEST_TIMEOUT, ADAPTIVE_TIMEOUT, HEDGE_REQUESTS, ENDPOINTS, MASK_MARKUP
+    global SENSITIVE_WORDS, PRIORITY_SHEETS, OUTPUT_FILE, OUTPUT_DIR, TUNED_PROFILE, QUIET, KEEP_ALIVE
+    global RESPONSE_FORMAT, ISSUE_CODES, BACKEND, PREFILTER, CPU_PLAN, LEXICON_SOURCES, LEXICON_MIN_LENGTH
+
+    config = load_config(args.config)
+    CONFIG = config
+
+    OLLAMA_URL = config.ollama.url
+    OLLAMA_API_URL = config.ollama.api_url
+    args.backend = args.backend or config.ollama.backend
+    BACKEND = create_backend(args.backend)
+    MODEL_OPTIONS = config.model_options()
+    HEADER_ROWS = config.file.header_rows
+    OUTPUT_DIR = config.check.output_dir
+
+    args.input_file = INPUT_FILE = args.input_file or config.file.input_file
+    args.sheet_name = SHEET_NAME = args.sheet_name or config.file.sheet_name
+    args.target_column = TARGET_COLUMN = args.target_column or config.file.target_column
+    if args.column_index is None:
+        args.column_index = config.file.target_column_index
+    TARGET_COLUMN_INDEX = args.column_index
+    args.model = MODEL_NAME = args.model or (config.cpu.model if args.cpu else config.ollama.model)
+    batch_size_given, workers_given = bool(args.batch_size), bool(args.workers)
+    args.batch_size = BATCH_SIZE = args.batch_size or config.check.batch_size
+    args.workers = WORKERS = max(1, args.workers or config.check.workers)
+    args.timeout = REQUEST_TIMEOUT = args.timeout or config.check.timeout
+    if args.endpoints is None:
+        ENDPOINTS = list(config.check.endpoints)
+    else:
+        ENDPOINTS = [e.strip() for e in args.endpoints.split(',') if e.strip()]
+
+    # CPU 运行：较短的上下文和较小的批次，按 NUMA 节点/核心组划分推理槽位
+    CPU_PLAN = None
+    if args.cpu:
+        CPU_PLAN = plan_slots(cpu_groups(), config.cpu.threads_per_slot, config.cpu.slots)
+        MODEL_OPTIONS.update(cpu_options(CPU_PLAN, config.cpu.num_ctx, len(ENDPOINTS)))
+        if not batch_size_given:
+            args.batch_size = BATCH_SIZE = config.cpu.batch_size
+        if not workers_given:
+            # 多个地址时每个地址是一个绑定核心的实例，否则同一实例内并行解码
+            args.workers = WORKERS = len(ENDPOINTS) if len(ENDPOINTS) > 1 else len(CPU_PLAN)
+
+    # 校准保存的调优配置优先于配置文件，命令行指定的值仍然优先
+    TUNED_PROFILE = None
+    if not args.calibrate and not args.no_profile:
+        TUNED_PROFILE = load_profile(MODEL_NAME, ENDPOINTS or [OLLAMA_URL])
+    if TUNED_PROFILE:
+        if not batch_size_given:
+            args.batch_size = BATCH_SIZE = TUNED_PROFILE["batch_size"]
+        if not workers_given:
+            args.workers = WORKERS = max(1, TUNED_PROFILE["workers"])
+    ADAPTIVE_TIMEOUT = not args.fixed_timeout
+    HEDGE_REQUESTS = ADAPTIVE_TIMEOUT and not args.no_hedge
+    MASK_MARKUP = not args.no_mask
+    QUIET = args.quiet
+    # 监视模式下模型需要在两次保存之间保持加载
+    KEEP_ALIVE = WATCH_KEEP_ALIVE if args.watch else None
+    args.response_format = RESPONSE_FORMAT = args.response_format or config.check.response_format
+    ISSUE_CODES = issue_codes(config.rules.required)
+
+    # 配置文件中的严禁词与 --sensitive-words 词表合并，命中的行优先检查
+    words = list(config.rules.forbidden_words)
+    if args.sensitive_words:
+        words.extend(load_word_list(args.sensitive_words))
+    SENSITIVE_WORDS = list(dict.fromkeys(words))
+    # --cpu 默认启用本地规则预筛，--no-prefilter 关闭
+    use_prefilter = (args.prefilter or args.cpu) and not args.no_prefilter
+    PREFILTER = LocalRules(SENSITIVE_WORDS) if use_prefilter else None
+    PRIORITY_SHEETS = [s.strip() for s in args.priority_sheets.split(',') if s.strip()]
+    # 专有名词的名称列：命令行优先于配置文件，--no-lexicon 关闭
+    try:
+        LEXICON_SOURCES = [] if args.no_lexicon else parse_sources(
+            args.lexicon if args.lexicon is not None else config.lexicon.sources)
+    except ValueError as e:
+        raise ConfigError(f"--lexicon 参数错误: {e}") from None
+    LEXICON_MIN_LENGTH = config.lexicon.min_length
+    OUTPUT_FILE = f"{SHEET_NAME}_{TARGET_COLUMN}_Check_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    return config
+
+def apply_hot_config(changes):
+    """
+    应用运行中修改的性能配置
+
+    超时和推理端点在下一次请求时生效；批次大小和并发数的变化
+    需要重新划分批次、调整线程池，由 main() 根据更新后的全局配置处理。
+
+    Args:
+        changes: ConfigWatcher.poll() 返回的变化项
+    """
+    global BATCH_SIZE, WORKERS, REQUEST_TIMEOUT, ENDPOINTS
+    if "batch_size" in changes:
+        BATCH_SIZE = changes["batch_size"]
+    if "workers" in changes:
+        WORKERS = max(1, changes["workers"])
+    if "timeout" in changes:
+        REQUEST_TIMEOUT = changes["timeout"]
+    if "endpoints" in changes:
+        with _ENDPOINT_LOCK:
+            ENDPOINTS = list(changes["endpoints"])
+
+def log_batch(message):
+    """输出批次级别的日志（安静模式下不输出）"""
+    if not QUIET:
+        print(message)
+
+def get_check_prompt(batch_data, masked=False, response_format="json", names=()):
     """
     构造 Prompt，要求返回严格的 JSON 格式（整合游戏文案规范）
+
+    Args:
+        batch_data: {批次内编号: 文本}
+        masked: 文本中的标记是否已替换为 §1 等短标记
+        response_format: "compact" 时必查项带类型代码，要求每个问题输出一行（见 compact_schema）
+        names: 批次文本中出现的专有名词（未遮罩时在忽略项中列出）
     """
-    data_str = json.dumps(batch_data, ensure_ascii=False, indent=2)
+    # 紧凑格式：缩进和换行在每一行上都要消耗 token
+    data_str = json.dumps(batch_data, ensure_ascii=False, separators=(",", ":"))
+    mask_note = f"\n- {SENTINEL_CHAR}1、{SENTINEL_CHAR}2 等为格式标记或专有名词，修改建议中保持原样" if masked else ""
+    if names:
+        mask_note += f"\n- 专有名词（不要报告）：{'、'.join(names)}"
+    if response_format == "compact":
+        return f"""你是游戏文案审核专家。请严格按照以下规范检查剧情对白文本：
+
+【必查项】
+{format_required(ISSUE_CODES)}
+
+【忽略项】
+- 重复内容、非中文文本、标点符号、数字、游戏内角色名字{mask_note}
+
+数据:
+{data_str}
+
+{format_output_rules(ISSUE_CODES)}
+
+直接输出:"""
     
     prompt = f"""你是游戏文案审核专家。请严格按照以下规范检查剧情对白文本：
 
@@ -63,7 +317,7 @@ def get_check_prompt(batch_data):
 5. 内容合规:明确触及政治敏感、暴力色情、黄赌毒，不要过多扩展
 
 【忽略项】
-- 重复内容、非中文文本、标点符号、数字、游戏内角色名字
+- 重复内容、非中文文本、标点符号、数字、游戏内角色名字{mask_note}
 
 数据:
 {data_str}
@@ -71,36 +325,36 @@ def get_check_prompt(batch_data):
 输出要求:
 1. 有问题输出JSON数组，无问题输出[]
 2. 禁止```json标记，禁止任何解释文字
-3. 格式:[{{"line_no":260,"issue":"问题类型：具体问题","suggestion":"修改建议"}}]
-4. line_no必须是数字，字符串值用英文双引号
+3. 格式:[{{"line_no":3,"issue":"问题类型：具体问题","suggestion":"修改建议"}}]
+4. line_no必须是数据中该文本的编号（数字），字符串值用英文双引号
 5. 必须以[开始]结束，确保完整
 
 直接输出:"""
     return prompt
 
-def check_ollama_models():
+def check_available_models():
     """
-    检查Ollama可用的模型列表
+    检查推理服务可用的模型列表
     
     Returns:
         list: 可用的模型名称列表，如果失败返回None
     """
     try:
-        response = requests.get(f"{OLLAMA_API_URL}/tags", timeout=5)
-        if response.status_code == 200:
-            models_data = response.json()
-            models = [model['name'] for model in models_data.get('models', [])]
-            return models
-        else:
-            print(f"⚠️ 获取模型列表失败: HTTP {response.status_code}")
-            return None
+        return BACKEND.list_models(OLLAMA_API_URL)
+    except BackendError as e:
+        print(f"⚠️ 获取模型列表失败: HTTP {e.status}")
+        return None
     except Exception as e:
-        print(f"⚠️ 无法连接到Ollama服务: {e}")
+        print(f"⚠️ 无法连接到{BACKEND.label}服务: {e}")
         return None
 
+def _test_generate(model_name, timeout):
+    """生成1个token测试模型是否可用（健康检查只需要确认模型能响应）"""
+    return BACKEND.generate(OLLAMA_URL, model_name, "测试", build_model_options(num_predict=1), timeout)
+
 def check_model_health(model_name):
     """
-    检查模型健康度，如果模型未运行则自动启动
+    检查模型健康度，如果模型未运行则自动启动（仅 Ollama）
     
     Args:
         model_name: 模型名称
@@ -108,45 +362,37 @@ def check_model_health(model_name):
     Returns:
         bool: 模型是否健康可用
     """
+    import requests
+
     print(f"🏥 正在检查模型健康度: {model_name}")
     
-    # 1. 检查Ollama服务是否可访问
+    # 1. 检查推理服务是否可访问
     try:
-        response = requests.get(f"{OLLAMA_API_URL}/tags", timeout=5)
-        if response.status_code != 200:
-            print(f"❌ Ollama服务不可用 (HTTP {response.status_code})")
-            return False
+        BACKEND.list_models(OLLAMA_API_URL)
+    except BackendError as e:
+        print(f"❌ {BACKEND.label}服务不可用 (HTTP {e.status})")
+        return False
     except Exception as e:
-        print(f"❌ 无法连接到Ollama服务: {e}")
-        print(f"💡 请确保Ollama服务正在运行")
+        print(f"❌ 无法连接到{BACKEND.label}服务: {e}")
+        print(f"💡 请确保{BACKEND.label}服务正在运行")
         return False
     
     # 2. 检查模型是否已加载（通过尝试生成来测试）
     print(f"🔍 测试模型响应...")
-    test_payload = {
-        "model": model_name,
-        "prompt": "测试",
-        "stream": False,
-        "options": {
-            "temperature": 0.1,  # 低温度保证结果确定性
-            "num_ctx": 8192,     # 上下文窗口
-            "num_gpu": 99,       # 使用所有可用GPU
-            "num_predict": 1     # 测试只需要生成1个token
-        }
-    }
-    
     try:
-        response = requests.post(OLLAMA_URL, json=test_payload, timeout=10)
-        if response.status_code == 200:
-            print(f"✅ 模型健康检查通过: {model_name}")
-            return True
-        elif response.status_code == 404:
+        _test_generate(model_name, 10)
+        print(f"✅ 模型健康检查通过: {model_name}")
+        return True
+    except BackendError as e:
+        if e.status == 404 and BACKEND.can_start_model:
             print(f"⚠️ 模型未加载，正在启动模型...")
             return start_model(model_name)
-        else:
-            print(f"⚠️ 模型响应异常 (HTTP {response.status_code})")
-            return False
+        print(f"⚠️ 模型响应异常 (HTTP {e.status})")
+        return False
     except requests.exceptions.Timeout:
+        if not BACKEND.can_start_model:
+            print(f"⚠️ 模型响应超时，请检查推理服务是否已加载模型")
+            return False
         print(f"⚠️ 模型响应超时，可能未加载，正在启动模型...")
         return start_model(model_name)
     except Exception as e:
@@ -163,6 +409,8 @@ def start_model(model_name):
     Returns:
         bool: 启动是否成功
     """
+    import requests
+
     print(f"🚀 正在启动模型: {model_name}")
     print(f"📝 执行命令: ollama run {model_name}")
     
@@ -191,31 +439,18 @@ def start_model(model_name):
         time.sleep(15)
         
         # 验证模型是否成功加载（多次尝试）
-        test_payload = {
-            "model": model_name,
-            "prompt": "测试",
-            "stream": False,
-            "options": {
-                "temperature": 0.1,  # 低温度保证结果确定性
-                "num_ctx": 8192,     # 上下文窗口
-                "num_gpu": 99,       # 使用所有可用GPU
-                "num_predict": 1     # 测试只需要生成1个token
-            }
-        }
-        
         max_retries = 3
         for i in range(max_retries):
             try:
                 print(f"🔍 验证模型状态 ({i+1}/{max_retries})...")
-                response = requests.post(OLLAMA_URL, json=test_payload, timeout=30)
-                if response.status_code == 200:
-                    print(f"✅ 模型启动成功: {model_name}")
-                    return True
-                else:
-                    print(f"⚠️ 模型响应异常 (HTTP {response.status_code})")
-                    if i < max_retries - 1:
-                        print(f"⏳ 等待5秒后重试...")
-                        time.sleep(5)
+                _test_generate(model_name, 30)
+                print(f"✅ 模型启动成功: {model_name}")
+                return True
+            except BackendError as e:
+                print(f"⚠️ 模型响应异常 (HTTP {e.status})")
+                if i < max_retries - 1:
+                    print(f"⏳ 等待5秒后重试...")
+                    time.sleep(5)
             except requests.exceptions.Timeout:
                 print(f"⚠️ 验证超时")
                 if i < max_retries - 1:
@@ -249,7 +484,7 @@ def verify_model_exists(model_name):
         bool: 模型是否存在且健康
     """
     print(f"🔍 正在验证模型: {model_name}")
-    models = check_ollama_models()
+    models = check_available_models()
     
     if models is None:
         print(f"⚠️ 无法验证模型，将尝试直接使用")
@@ -261,53 +496,138 @@ def verify_model_exists(model_name):
         return check_model_health(model_name)
     else:
         print(f"❌ 错误: 模型 '{model_name}' 不存在！")
-        print(f"📋 当前Ollama中可用的模型:")
+        print(f"📋 当前{BACKEND.label}中可用的模型:")
         for i, model in enumerate(models, 1):
             print(f"   {i}. {model}")
         print(f"\n💡 解决方案:")
         print(f"   1. 修改脚本中的 MODEL_NAME 为上述模型之一")
-        print(f"   2. 或者使用命令下载模型: ollama pull {model_name}")
+        if BACKEND.can_start_model:
+            print(f"   2. 或者使用命令下载模型: ollama pull {model_name}")
+        else:
+            print(f"   2. 或者检查推理服务启动时加载的模型名称（如 vLLM 的 --served-model-name）")
         return False
 
-def call_ollama(prompt):
+def call_backend(prompt, timeout=None, endpoint=None, cancel_event=None, meta=None):
     """
-    调用本地 Ollama 接口
+    调用推理服务（BACKEND）
     
     Args:
         prompt: 提示词
+        timeout: 超时时间（秒），默认使用 REQUEST_TIMEOUT
+        endpoint: 生成接口地址，默认使用 OLLAMA_URL
+        cancel_event: threading.Event，指定时使用流式请求，
+            事件被设置或总耗时超过 timeout 时立即断开连接（推理服务会随之停止生成）
+        meta: dict，传入时写入统一格式的耗时统计（prompt_tokens、completion_seconds 等，见 backends.normalize_timing）
     
     Returns:
         str: 模型响应文本，失败返回None
     """
-    payload = {
-        "model": MODEL_NAME,
-        "prompt": prompt,
-        "stream": False,
-        "options": {
-            "temperature": 0.1, # 低温度保证结果确定性
-            "num_ctx": 8192,     # 上下文窗口（增大以支持更长的输入）
-            "num_gpu": 99,    # 使用所有可用GPU
-            "num_predict": 4096,  # 最大生成长度（从1024增加到4096，避免截断）
-            "stop": ["\n\n\n", "【待检查数据】", "现在开始检查"] # 强制停止符
-        }
-    }
-    
+    import requests
+
+    if timeout is None:
+        timeout = REQUEST_TIMEOUT
+
     try:
-        response = requests.post(OLLAMA_URL, json=payload, timeout=300)
-        if response.status_code == 200:
-            return response.json().get("response", "")
-        else:
-            print(f"❌ Ollama API错误 (HTTP {response.status_code}): {response.text}")
-            if response.status_code == 404:
-                print(f"💡 提示: 模型 '{MODEL_NAME}' 可能不存在，请检查模型名称")
-            return None
+        return BACKEND.generate(endpoint or OLLAMA_URL, MODEL_NAME, prompt, build_model_options(), timeout,
+                                cancel_event=cancel_event, keep_alive=KEEP_ALIVE, meta=meta)
+    except BackendError as e:
+        print(f"❌ {e}")
+        if e.status == 404:
+            print(f"💡 提示: 模型 '{MODEL_NAME}' 可能不存在，请检查模型名称")
+        return None
     except requests.exceptions.Timeout:
-        print(f"❌ 请求超时: 模型响应时间过长（>300秒）")
+        print(f"❌ 请求超时: 模型响应时间过长（>{timeout:.0f}秒）")
+        return None
+    except TimeoutError as e:
+        print(f"❌ 请求超时: {e}")
         return None
     except Exception as e:
         print(f"❌ 请求失败: {e}")
         return None
 
+def call_model(prompt, timeout=None, meta=None):
+    """
+    带动态超时和对冲请求的模型调用
+
+    - 超时时间根据该端点、相近提示词长度的历史 p99 延迟计算（上限为 timeout）
+    - 请求耗时超过 p99 时，向下一个端点（只有一个端点时为同端点的另一个并发槽位）
+      发送相同的对冲请求，先返回者胜出，另一个请求被取消
+
+    Args:
+        prompt: 提示词
+        timeout: 超时上限（秒），默认使用 REQUEST_TIMEOUT
+        meta: dict，传入时写入胜出请求的耗时统计
+
+    Returns:
+        str: 模型响应文本，失败返回None
+    """
+    if timeout is None:
+        timeout = REQUEST_TIMEOUT
+    if not ADAPTIVE_TIMEOUT:
+        return call_backend(prompt, timeout=timeout, endpoint=next_endpoint(), meta=meta)
+
+    tokens = estimate_tokens(prompt)
+    primary = next_endpoint()
+    results = queue.Queue()
+    attempts = []
+
+    def attempt(endpoint):
+        cancel = threading.Event()
+        request_timeout = LATENCY.timeout_for(endpoint, tokens, timeout)
+
+        def run():
+            started = time.monotonic()
+            text = None
+            attempt_meta = {}
+            try:
+                text = call_backend(prompt, timeout=request_timeout, endpoint=endpoint, cancel_event=cancel,
+                                    meta=attempt_meta)
+                if text is not None:
+                    LATENCY.record(endpoint, tokens, time.monotonic() - started)
+            finally:
+                results.put((endpoint, text, attempt_meta))
+
+        # 守护线程：被取消的请求不会阻塞进程退出
+        threading.Thread(target=run, daemon=True).start()
+        attempts.append(cancel)
+
+    attempt(primary)
+    hedge_delay = LATENCY.hedge_delay(primary, tokens) if HEDGE_REQUESTS else None
+    started = time.monotonic()
+    finished = 0
+    try:
+        while finished < len(attempts):
+            if hedge_delay is not None and len(attempts) == 1:
+                wait_seconds = max(0.0, hedge_delay - (time.monotonic() - started))
+            else:
+                wait_seconds = None
+            try:
+                endpoint, text, attempt_meta = results.get(timeout=wait_seconds)
+            except queue.Empty:
+                hedge_endpoint = next_endpoint()
+                log_batch(f"🪁 请求超过 p99 延迟（{hedge_delay:.1f}秒），向 {hedge_endpoint} 发送对冲请求")
+                attempt(hedge_endpoint)
+                continue
+            finished += 1
+            if text is not None:
+                if meta is not None:
+                    meta.update(attempt_meta)
+                return text
+        return None
+    finally:
+        # 胜出或全部失败后取消其余请求
+        for cancel in attempts:
+            cancel.set()
+
+def next_endpoint():
+    """轮询选择下一个推理端点"""
+    global _ENDPOINT_CURSOR
+    with _ENDPOINT_LOCK:
+        endpoints = ENDPOINTS or [OLLAMA_URL]
+        endpoint = endpoints[_ENDPOINT_CURSOR % len(endpoints)]
+        _ENDPOINT_CURSOR += 1
+    return endpoint
+
 def parse_llm_response(response_text, batch_info=""):
     """
     尝试解析 LLM 返回的 JSON，支持多种格式和容错处理
@@ -343,7 +663,7 @@ def parse_llm_response(response_text, batch_info=""):
         
         if end == -1 or start >= end:
             # 可能是截断的JSON，尝试查找不完整的数组
-            print(f"⚠️ JSON数组未正确闭合，尝试修复... {batch_info}")
+            log_batch(f"⚠️ JSON数组未正确闭合，尝试修复... {batch_info}")
             json_str = clean_text[start:]
             fixed_json = try_fix_truncated_json(json_str)
             if fixed_json:
@@ -364,7 +684,7 @@ def parse_llm_response(response_text, batch_info=""):
         try:
             result = json.loads(json_str)
             if isinstance(result, list):
-                print(f"✅ 成功解析JSON，发现 {len(result)} 个问题 {batch_info}")
+                log_batch(f"✅ 成功解析JSON，发现 {len(result)} 个问题 {batch_info}")
                 return result
             else:
                 print(f"⚠️ JSON格式错误：期望列表，实际为 {type(result)} {batch_info}")
@@ -375,25 +695,25 @@ def parse_llm_response(response_text, batch_info=""):
             print(f"📍 错误位置: 第{e.lineno}行, 第{e.colno}列 (char {e.pos})")
             
             # 【新增】尝试更激进的清理策略（处理控制字符）
-            print(f"🔧 尝试清理控制字符和特殊字符... {batch_info}")
+            log_batch(f"🔧 尝试清理控制字符和特殊字符... {batch_info}")
             json_str_cleaned = clean_json_string(json_str)
             if json_str_cleaned != json_str:
                 try:
                     result = json.loads(json_str_cleaned)
                     if isinstance(result, list):
-                        print(f"✅ 清理后成功解析JSON，发现 {len(result)} 个问题 {batch_info}")
+                        log_batch(f"✅ 清理后成功解析JSON，发现 {len(result)} 个问题 {batch_info}")
                         return result
                 except json.JSONDecodeError as e2:
                     print(f"⚠️ 清理后仍然失败: {str(e2)} {batch_info}")
             
             # 尝试修复：处理截断的JSON
-            print(f"🔧 尝试修复截断的JSON... {batch_info}")
+            log_batch(f"🔧 尝试修复截断的JSON... {batch_info}")
             fixed_json = try_fix_truncated_json(json_str_cleaned if json_str_cleaned != json_str else json_str)
             if fixed_json:
                 try:
                     result = json.loads(fixed_json)
                     if isinstance(result, list):
-                        print(f"✅ 修复后成功解析JSON，发现 {len(result)} 个问题 {batch_info}")
+                        log_batch(f"✅ 修复后成功解析JSON，发现 {len(result)} 个问题 {batch_info}")
                         return result
                 except Exception as e3:
                     print(f"⚠️ 修复后解析失败: {str(e3)} {batch_info}")
@@ -532,6 +852,8 @@ def load_excel_with_multirow_header(file_path, sheet_name, header_rows=None):
         df: DataFrame
         actual_header_rows: 实际使用的表头行数（用于计算Excel行号）
     """
+    import pandas as pd
+
     try:
         if header_rows is None:
             # 默认单行表头
@@ -575,24 +897,25 @@ def find_target_column(df, target_column_name, column_index=None):
     查找目标列，支持模糊匹配和多列选择
     
     Args:
-        df: DataFrame
+        df: DataFrame（或列名列表）
         target_column_name: 目标列名
         column_index: 可选，当存在多个匹配列时，指定使用第几个（从0开始）
     
     Returns:
         actual_column_name: 实际找到的列名，如果未找到返回None
     """
+    columns = list(getattr(df, "columns", df))
     matched_columns = []
     
     # 1. 精确匹配
-    exact_matches = [col for col in df.columns if col == target_column_name]
+    exact_matches = [col for col in columns if col == target_column_name]
     if exact_matches:
         matched_columns.extend(exact_matches)
     
     # 2. 模糊匹配（忽略大小写和空格）
     if not matched_columns:
         target_lower = target_column_name.lower().replace(' ', '')
-        for col in df.columns:
+        for col in columns:
             col_lower = str(col).lower().replace(' ', '')
             if target_lower in col_lower or col_lower in target_lower:
                 matched_columns.append(col)
@@ -602,7 +925,7 @@ def find_target_column(df, target_column_name, column_index=None):
         # 未找到，列出所有列名供参考
         print(f"❌ 错误: 没找到列名 '{target_column_name}'")
         print(f"📋 当前表格的所有列名:")
-        for i, col in enumerate(df.columns, 1):
+        for i, col in enumerate(columns, 1):
             print(f"   {i}. {col}")
         print(f"\n💡 提示: 请修改脚本中的 TARGET_COLUMN 配置为上述列名之一")
         return None
@@ -637,176 +960,1394 @@ def find_target_column(df, target_column_name, column_index=None):
         print(f"✅ 找到目标列（模糊匹配）: '{selected_col}' (配置中为: '{target_column_name}')")
     return selected_col
 
-def main():
-    # 解析命令行参数
-    if len(sys.argv) >= 4:
-        input_file = sys.argv[1]
-        sheet_name = sys.argv[2]
-        target_column = sys.argv[3]
+def submit_task(executor, fn, *args):
+    """
+    提交任务到线程池；executor为None时在当前线程同步执行
+
+    Returns:
+        Future: 任务结果
+    """
+    if executor is not None:
+        return executor.submit(fn, *args)
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def check_batch(batch, total_batches, timeout=None, meta=None, trace=True):
+    """
+    检查单个批次（在工作线程中执行）
+
+    Args:
+        batch: scheduler.Batch
+        total_batches: 总批次数（用于日志）
+        timeout: 请求超时时间（秒）
+        meta: dict，传入时写入推理服务返回的耗时统计（用于自动调优）
+        trace: 是否写入检查记录（校准的测速批次不写入）
+
+    Returns:
+        dict: {"issues": 问题列表（line_no 为 Excel 行号）, "response_len": 响应长度,
+               "error": 错误信息或None, "elapsed": 耗时秒数,
+               "invalid": 编号不属于本批次的问题数, "recheck": 需要重新检查的 RowItem 列表,
+               "name_issues": 只涉及专有名词、被丢弃的问题数}
+    """
+    started = time.monotonic()
+    with PROFILER.stage("构造提示词"):
+        prompt, restore = build_batch_prompt(batch)
+    meta = {} if meta is None else meta
+    with PROFILER.stage("模型请求"):
+        response = call_model(prompt, timeout=timeout, meta=meta)
+    elapsed = time.monotonic() - started
+    if trace and TRACE is not None:
+        with PROFILER.stage("写入检查记录"):
+            TRACE.record_batch(batch, prompt, response, meta, elapsed)
+    with PROFILER.stage("解析响应"):
+        return parse_batch_response(batch, total_batches, response, restore, elapsed)
+
+
+def build_batch_prompt(batch):
+    """
+    构造批次的提示词（按 MASK_MARKUP 遮罩标记和专有名词；不遮罩时在提示词中列出本批次出现的名字）
+
+    Returns:
+        tuple: (提示词, mask_payload() 返回的标记还原表)
+    """
+    if MASK_MARKUP:
+        payload, restore = mask_payload(batch.payload(), LEXICON)
+        return get_check_prompt(payload, masked=bool(restore), response_format=RESPONSE_FORMAT), restore
+    payload = batch.payload()
+    names = []
+    if LEXICON:
+        names = list(dict.fromkeys(name for text in payload.values() for name in LEXICON.names_in(text)))
+    return get_check_prompt(payload, response_format=RESPONSE_FORMAT, names=names), {}
+
+
+def parse_batch_response(batch, total_batches, response, restore, elapsed=0.0):
+    """
+    解析一个批次的模型响应：解析、还原遮罩标记、校验并还原编号，丢弃只涉及专有名词的问题
+
+    Args:
+        batch: scheduler.Batch
+        total_batches: 总批次数（用于日志）
+        response: 模型原始响应（请求失败时为None）
+        restore: mask_payload() 返回的标记还原表
+        elapsed: 请求耗时（秒）
+
+    Returns:
+        dict: 与 check_batch() 相同
+    """
+    if not response:
+        return {"issues": [], "response_len": 0, "error": "API调用失败", "elapsed": elapsed}
+
+    batch_info = f"(批次 {batch.number}/{total_batches})"
+    if RESPONSE_FORMAT == "compact":
+        issues = parse_compact_response(response, ISSUE_CODES)
+        if issues is None:
+            print(f"❌ 响应中没有可解析的问题行 {batch_info}")
+            print(f"📄 响应内容前200字符: {response[:200]}")
+            return {"issues": [], "response_len": len(response), "error": "响应解析失败", "elapsed": elapsed}
+        log_batch(f"✅ 成功解析响应，发现 {len(issues)} 个问题 {batch_info}")
     else:
-        # 使用默认配置
-        input_file = INPUT_FILE
-        sheet_name = SHEET_NAME
-        target_column = TARGET_COLUMN
-    
-    # 动态生成输出文件名
-    output_file = f"{sheet_name}_{target_column}_Check_Report_{datetime.now().strftime('%Y%m%d')}.xlsx"
-    
+        issues = parse_llm_response(response, batch_info)
+        if not issues and len(response) > 10:
+            # 响应不为空但解析失败
+            return {"issues": [], "response_len": len(response), "error": "JSON解析失败", "elapsed": elapsed}
+    # 问题说明和修改建议中的短标记还原为原始标记
+    issues = unmask_issues(issues, restore)
+    issues, invalid = batch.resolve_issues(issues)
+    recheck = []
+    if invalid:
+        # 编号错误的问题无法确定属于哪一行，不写入报告，可能受影响的行重新检查
+        recheck = suspect_rows(batch, invalid, issues)
+        log_batch(f"⚠️ {len(invalid)} 个问题的编号不属于本批次，已丢弃，"
+                  f"重新检查 {len(recheck)} 行 {batch_info}")
+    issues, name_issues = drop_name_issues(issues, {row.excel_row: row.text for row in batch.rows}, LEXICON,
+                                           issue_spans)
+    return {"issues": issues, "response_len": len(response), "error": None, "elapsed": elapsed,
+            "invalid": len(invalid), "recheck": recheck, "name_issues": name_issues}
+
+
+SUGGESTION_MATCH_RATIO = 0.6  # 修改建议与原文的相似度达到此值时视为对该行的改写
+
+
+def suspect_rows(batch, invalid, resolved):
+    """
+    找出编号无效的问题可能属于的行
+
+    依次尝试：模型照抄了 Excel 行号时对应该行；修改建议或问题说明能在原文中定位时取这些行；
+    都无法判断时取批次中所有没有有效问题的行。已经有有效问题的行不重新检查（避免问题重复）。
+
+    Args:
+        batch: scheduler.Batch
+        invalid: 编号无效的问题列表
+        resolved: 编号有效的问题列表（line_no 已还原为 Excel 行号）
+
+    Returns:
+        list: 需要重新检查的 RowItem 列表（按批次内顺序）
+    """
+    reported = {item["line_no"] for item in resolved}
+    candidates = [row for row in batch.rows if row.excel_row not in reported]
+    by_excel_row = {row.excel_row: row for row in candidates}
+    suspects = set()
+    for item in invalid:
+        try:
+            row = by_excel_row.get(int(item.get("line_no")))
+        except (TypeError, ValueError):
+            row = None
+        if row is not None:
+            suspects.add(row.excel_row)
+            continue
+        # 修改建议是整句改写时取与之最相似的行，否则取问题说明引用的原文片段所在的行
+        suggestion = str(item.get("suggestion") or "")
+        scores = {row.excel_row: difflib.SequenceMatcher(None, row.text, suggestion).ratio()
+                  for row in candidates} if suggestion else {}
+        best = max(scores.values(), default=0)
+        if best >= SUGGESTION_MATCH_RATIO:
+            located = [excel_row for excel_row, score in scores.items() if score == best]
+        else:
+            located = [row.excel_row for row in candidates if issue_spans(row.text, item.get("issue", ""), None)]
+        suspects.update(located or by_excel_row)
+    return [row for row in candidates if row.excel_row in suspects]
+
+
+def probe_batches(batch_rows_list, workers):
+    """
+    校准用：并发检查一组批次并计时
+
+    Args:
+        batch_rows_list: 每个批次的 RowItem 列表
+        workers: 并发数
+
+    Returns:
+        tuple: (check_batch 结果列表（附带 "rows" 行数和 "meta" 耗时统计）, 总耗时秒数)
+    """
+    batches = [Batch(i + 1, rows) for i, rows in enumerate(batch_rows_list)]
+    metas = [{} for _ in batches]
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            executor.submit(check_batch, batch, len(batches), None, meta, False)
+            for batch, meta in zip(batches, metas)
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({"issues": [], "response_len": 0, "error": f"检查异常: {e}", "elapsed": 0})
+    seconds = time.monotonic() - started
+    for batch, meta, result in zip(batches, metas, results):
+        result["rows"] = len(batch.rows)
+        result["meta"] = meta
+    return results, seconds
+
+
+def run_calibration(rows, max_failure_rate):
+    """
+    校准批次大小和并发数，保存调优配置并应用到本次运行
+
+    校准发送的批次只用于测速，发现的问题不写入报告（正式检查时会重新检查这些行）。
+
+    Args:
+        rows: 待检查的 RowItem 列表
+        max_failure_rate: 允许的最大失败率
+
+    Returns:
+        dict: 保存的调优配置，没有满足失败率上限的配置时返回None
+    """
+    # 连续批处理的推理服务可以承受更高的并发，由后端决定尝试的并发数
+    worker_levels = list(BACKEND.calibration_workers or DEFAULT_WORKER_LEVELS)
+    sample = sample_rows(rows, default_sample_size(DEFAULT_BATCH_SIZES, worker_levels))
+    print(f"🎯 开始校准: 从 {len(rows)} 行中抽样 {len(sample)} 行，"
+          f"尝试批次大小 {DEFAULT_BATCH_SIZES} × 并发数 {worker_levels}", flush=True)
+    best, trials = calibrate(sample, probe_batches, DEFAULT_BATCH_SIZES, worker_levels,
+                             max_failure_rate=max_failure_rate, log=lambda msg: print(msg, flush=True))
+    if best is None:
+        print(f"⚠️ 没有失败率不超过 {max_failure_rate:.0%} 的配置，保持当前设置"
+              f"（批次大小 {BATCH_SIZE}，并发数 {WORKERS}）")
+        return None
+    endpoints = ENDPOINTS or [OLLAMA_URL]
+    profile = build_profile(best, trials, len(sample))
+    path = save_profile(MODEL_NAME, endpoints, profile)
+    apply_hot_config({"batch_size": best["batch_size"], "workers": best["workers"]})
+    print(f"✅ 校准完成: 批次大小 {BATCH_SIZE}，并发数 {WORKERS}（{best['rows_per_second']:.2f} 行/秒，"
+          f"失败率 {best['failure_rate']:.0%}），已保存到 {path}")
+    print(f"💡 之后使用 {MODEL_NAME} 和相同推理服务的运行会自动使用此配置")
+    return profile
+
+
+def load_row_items(input_file, sheet_name, target_column):
+    """
+    读取待检查的行
+
+    xlsx/xlsm 文件通过 SheetIndex 读取（首次运行建立索引，之后文件未修改时直接查询索引）；
+    其他格式使用 pandas 读取。
+
+    Args:
+        input_file: Excel文件路径
+        sheet_name: Sheet名称
+        target_column: 目标列名（支持模糊匹配）
+
+    Returns:
+        tuple: (RowItem 列表, 实际列名)；读取失败或找不到列时返回 (None, None)
+    """
+    if os.path.splitext(input_file)[1].lower() not in (".xlsx", ".xlsm"):
+        try:
+            df, header_row_count = load_excel_with_multirow_header(input_file, sheet_name, HEADER_ROWS)
+        except Exception:
+            return None, None
+        print(f"📊 数据行数: {len(df)} 行")
+        print(f"📊 列数: {len(df.columns)} 列")
+        print("-" * 60)
+        actual_column = find_target_column(df, target_column, TARGET_COLUMN_INDEX)
+        if actual_column is None:
+            return None, None
+        # 只检查字符串类型且长度大于1的单元格（减少无效请求）
+        df_to_check = df[df[actual_column].apply(lambda x: isinstance(x, str) and len(x) > 1)].copy()
+        # Excel行号 = DataFrame的index + 表头行数 + 1
+        df_to_check['excel_row'] = df_to_check.index + header_row_count + 1
+        return build_row_items(df_to_check, actual_column, sheet_name, df.columns[0]), actual_column
+
+    try:
+        index = SheetIndex(input_file)
+        built = index.ensure_sheet(sheet_name, HEADER_ROWS)
+    except Exception as e:
+        print(f"❌ 读取文件失败: {e}", flush=True)
+        return None, None
+    try:
+        header_rows = normalize_header_rows(HEADER_ROWS)
+        if built:
+            print(f"✅ 已建立行索引（表头第{min(header_rows) + 1}-{max(header_rows) + 1}行）: {index.db_path}")
+        else:
+            print(f"⚡ 文件未修改，使用缓存的行索引: {index.db_path}")
+        columns = index.columns(sheet_name)
+        print(f"📊 数据行数: {index.row_count(sheet_name)} 行")
+        print(f"📊 列数: {len(columns)} 列")
+        print("-" * 60)
+        actual_column = find_target_column(columns, target_column, TARGET_COLUMN_INDEX)
+        if actual_column is None:
+            return None, None
+        col = index.column_position(sheet_name, actual_column)
+        rows = [
+            RowItem(excel_row, text, sheet_name, row_id)
+            for excel_row, text, row_id in index.iter_texts(sheet_name, col)
+            if len(text) > 1
+        ]
+        return rows, actual_column
+    finally:
+        index.close()
+
+def load_lexicon(input_file, extra_names=()):
+    """
+    构建专有名词匹配器：配置的名称列（同一工作簿，通过按文件版本缓存的 SheetIndex 读取）与 --names 词表合并
+
+    Args:
+        input_file: Excel文件路径
+        extra_names: --names 词表中的名字
+
+    Returns:
+        NameMatcher: 没有任何名字时返回None
+    """
+    names = list(extra_names)
+    counts = {}
+    if LEXICON_SOURCES:
+        if os.path.splitext(input_file)[1].lower() not in (".xlsx", ".xlsm"):
+            print("⚠️ 专有名词的名称列只支持 xlsx/xlsm 工作簿，已跳过")
+        else:
+            try:
+                index = SheetIndex(input_file)
+                try:
+                    counts, found, missing = harvest_names(index, LEXICON_SOURCES, HEADER_ROWS, LEXICON_MIN_LENGTH)
+                finally:
+                    index.close()
+            except Exception as e:
+                print(f"⚠️ 无法读取专有名词的名称列: {e}")
+            else:
+                names.extend(found)
+                if missing:
+                    print(f"⚠️ 找不到名称列: {', '.join(missing)}")
+    if not names:
+        return None
+    matcher = NameMatcher(names)
+    detail = [f"{label} {count} 个" for label, count in counts.items()]
+    if extra_names:
+        detail.append(f"--names 词表 {len(set(extra_names))} 个")
+    print(f"📚 专有名词: {len(matcher)} 个（{'，'.join(detail)}），发送前遮罩，只涉及名字的问题不写入报告")
+    return matcher
+
+def build_row_items(df_to_check, actual_column, sheet_name, id_column=None):
+    """
+    将待检查的DataFrame转换为调度器使用的 RowItem 列表
+    """
+    import pandas as pd
+
+    rows = []
+    for excel_row, text, row_id in zip(
+        df_to_check['excel_row'],
+        df_to_check[actual_column],
+        df_to_check[id_column] if id_column is not None else [""] * len(df_to_check),
+    ):
+        rows.append(RowItem(excel_row, text, sheet_name, "" if pd.isna(row_id) else str(row_id)))
+    return rows
+
+
+def main(args=None):
+    """
+    运行检查；根据 --events-* 参数打开进度事件输出，结束后关闭
+
+    Args:
+        args: 已经过 apply_config() 的参数；为None时（命令行和 conf-check 入口）解析命令行参数并加载配置文件
+    """
+    global EVENTS, TRACE, PROFILER, LEXICON
+    if args is None:
+        setup_console()
+        args = build_arg_parser().parse_args()
+        # 加载配置文件并更新全局配置
+        try:
+            apply_config(args)
+        except ConfigError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    try:
+        EVENTS = open_emitter(args.events_fd, args.events_file, args.events_socket)
+    except (ValueError, OSError) as e:
+        print(f"❌ 无法打开进度事件输出: {e}")
+        return
+    PROFILER = StageProfiler(args.profile_stages)
+    PROFILER.start()
+    try:
+        return run_replay(args) if args.replay else run_check(args)
+    finally:
+        EVENTS.close()
+        EVENTS = EventEmitter()
+        if TRACE is not None:
+            TRACE.close()
+            TRACE = None
+        if PROFILER.enabled:
+            PROFILER.stop()
+            save_stage_profile(PROFILER)
+        PROFILER = StageProfiler()
+        LEXICON = None
+
+
+def save_stage_profile(profiler):
+    """
+    输出各阶段的耗时和内存峰值，并保存到 .conf_check_state/profiles/（cpu/all 模式另存 .pstats）
+
+    Args:
+        profiler: 已结束的 StageProfiler
+    """
+    print("-" * 60)
+    print(f"🔬 分阶段性能剖析（{profiler.mode}）:")
+    print(profiler.format_table())
+    base = os.path.join(STATE_DIR, "profiles", datetime.now().strftime("%Y%m%d_%H%M%S"))
+    try:
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        with open(f"{base}.json", "w", encoding="utf-8") as f:
+            json.dump(profiler.to_dict(), f, ensure_ascii=False, indent=2)
+        print(f"📄 阶段统计已写入: {base}.json")
+        if profiler.cpu and profiler.dump_stats(f"{base}.pstats"):
+            print(f"📄 CPU 剖析已写入: {base}.pstats"
+                  f"（查看: python -m pstats {base}.pstats，或 snakeviz 等工具）")
+    except OSError as e:
+        print(f"⚠️ 无法保存性能剖析结果: {e}")
+
+
+def report_base(sheet_name, column):
+    """报告文件路径（不含扩展名，各报告格式自行添加），OUTPUT_DIR 不存在时创建"""
+    output_base = f"{sheet_name}_{column}_Check_Report_{datetime.now().strftime('%Y%m%d')}"
+    if OUTPUT_DIR:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        output_base = os.path.join(OUTPUT_DIR, output_base)
+    return output_base
+
+
+def run_check(args):
+    global TRACE, LEXICON
+    # 立即输出启动信息，确保脚本正在运行（重量级依赖在此之后才加载）
+    print("🔄 正在初始化...", flush=True)
+    from tqdm import tqdm
+
+    started_at = datetime.now().isoformat(timespec="seconds")
+
+    input_file = args.input_file
+    sheet_name = args.sheet_name
+    target_column = args.target_column
+
+    # 动态生成输出文件名（不含扩展名，各报告格式自行添加）
+    output_base = report_base(sheet_name, target_column)
+
+    if args.sample:
+        try:
+            parse_sample_size(args.sample, 1)
+        except ValueError as e:
+            print(f"❌ --sample 参数错误: {e}")
+            EVENTS.emit("error", message=str(e))
+            return
+        if args.watch:
+            print("❌ --sample 只检查样本，不能与 --watch 同时使用")
+            EVENTS.emit("error", message="--sample 不能与 --watch 同时使用")
+            return
+    if args.plan and (args.calibrate or args.watch):
+        print("❌ --plan 不调用模型，不能与 --calibrate / --watch 同时使用")
+        EVENTS.emit("error", message="--plan 不能与 --calibrate / --watch 同时使用")
+        return
+
+    # 报告格式：在加载模型之前检查，避免跑完才发现缺少依赖
+    try:
+        writers = create_report_writers(parse_formats(args.format), output_base)
+        for writer in writers:
+            if not args.plan:
+                writer.open()
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        EVENTS.emit("error", message=str(e))
+        return
+    if not any(writer.streaming for writer in writers):
+        # 没有流式格式时，额外输出增量CSV，审核人员可以边跑边看
+        partial_report = PartialCsvWriter(f"{output_base}_partial.csv")
+        writers.append(partial_report)
+    else:
+        partial_report = None
+
     print("=" * 60, flush=True)
-    print("🚀 配置文本检查工具 v2.3 (GPU加速版)", flush=True)
+    print(f"🚀 配置文本检查工具 v2.3 ({'CPU版' if CPU_PLAN else 'GPU加速版'})", flush=True)
     print("=" * 60, flush=True)
-    
+
     # 显示当前配置
     print(f"📋 当前配置:")
     print(f"   - 模型名称: {MODEL_NAME}")
-    print(f"   - Ollama地址: {OLLAMA_URL}")
+    print(f"   - {BACKEND.label}地址: {', '.join(ENDPOINTS) if ENDPOINTS else OLLAMA_URL}")
     print(f"   - 输入文件: {input_file}")
     print(f"   - Sheet名称: {sheet_name}")
     print(f"   - 目标列: {target_column}")
     print(f"   - 批次大小: {BATCH_SIZE} 行/批")
+    print(f"   - 调度策略: {args.scheduler}，并发数: {WORKERS}")
+    if TUNED_PROFILE:
+        print(f"   - 调优配置: 批次大小 {TUNED_PROFILE['batch_size']}，并发数 {TUNED_PROFILE['workers']}"
+              f"（{TUNED_PROFILE.get('calibrated_at', '')} 校准，{TUNED_PROFILE.get('rows_per_second', 0)} 行/秒）")
+    if CPU_PLAN:
+        nodes = len({slot["node"] for slot in CPU_PLAN})
+        print(f"   - CPU 运行: {nodes} 个 NUMA 节点，{len(CPU_PLAN)} 个推理槽位，"
+              f"num_thread {MODEL_OPTIONS['num_thread']}，num_ctx {MODEL_OPTIONS['num_ctx']}")
+        if len(ENDPOINTS) <= 1 and len(CPU_PLAN) > 1:
+            # 工具无法替推理服务绑定核心，给出每个槽位一个实例的启动命令
+            commands, endpoints = launch_commands(CPU_PLAN)
+            print(f"     {len(CPU_PLAN)} 个槽位共用一个实例（需要 OLLAMA_NUM_PARALLEL>={len(CPU_PLAN)}）；"
+                  f"每个槽位启动一个绑定核心的实例可避免线程争用和跨节点访问内存:")
+            for command in commands:
+                print(f"       {command}")
+            print(f"     然后指定 --endpoints {endpoints}")
+    if PREFILTER is not None:
+        print(f"   - 本地规则预筛: 只检查命中规则的行")
+    print(f"   - 报告格式: {args.format}")
+    budget = RunBudget.from_options(args.deadline, args.max_minutes)
+    if budget is not None:
+        print(f"   - 时间预算: {budget.seconds / 60:.1f} 分钟")
+    # 运行中修改配置文件的性能配置项，下一个批次派发前生效
+    watcher = None
+    if CONFIG is not None and CONFIG.path and not args.no_reload:
+        watcher = ConfigWatcher(CONFIG)
+        print(f"   - 配置文件: {CONFIG.path}（运行中修改 batch_size/workers/timeout/endpoints 会自动生效）")
     print("-" * 60)
-    
-    # 验证模型是否存在
-    if not verify_model_exists(MODEL_NAME):
+
+    # 验证模型是否存在（试运行不访问推理服务）
+    if not args.plan and not verify_model_exists(MODEL_NAME):
         print("\n❌ 模型验证失败，程序终止")
         print("💡 请修改脚本中的 MODEL_NAME 配置或下载对应模型")
+        EVENTS.emit("error", message=f"模型不可用: {MODEL_NAME}")
         return
-    
-    print("-" * 60)
-    
-    # 加载Excel文件（支持多行表头）
-    try:
-        df, header_row_count = load_excel_with_multirow_header(
-            input_file, 
-            sheet_name, 
-            HEADER_ROWS
-        )
-    except Exception as e:
-        return
-    
-    print(f"📊 数据行数: {len(df)} 行")
-    print(f"📊 列数: {len(df.columns)} 列")
+
     print("-" * 60)
-    
-    # 查找目标列
-    actual_column = find_target_column(df, target_column, TARGET_COLUMN_INDEX)
-    if actual_column is None:
+
+    # 加载待检查的行（xlsx 使用按文件版本缓存的行索引，文件未修改时不再读取Excel）
+    with PROFILER.stage("读取工作簿"):
+        rows, actual_column = load_row_items(input_file, sheet_name, target_column)
+    if rows is None:
+        EVENTS.emit("error", message=f"无法读取待检查的行: {input_file} / {sheet_name} / {target_column}")
         return
-    
-    # 预处理：筛选出非空且包含中文的行（减少无效请求）
-    # 这里假设我们只检查字符串类型的单元格
-    df_to_check = df[df[actual_column].apply(lambda x: isinstance(x, str) and len(x) > 1)].copy()
-    
-    # 记录原始行号（Excel行号 = DataFrame的index + 表头行数 + 1）
-    # 例如：3行表头，DataFrame第0行 = Excel第4行
-    df_to_check['excel_row'] = df_to_check.index + header_row_count + 1
-    
-    total_rows = len(df_to_check)
-    print(f"✅ 共发现 {total_rows} 行有效文本，开始分批检查...")
+    # 专有名词：名称列中的名字和 --names 词表，遮罩后发送，只涉及名字的问题丢弃，聚类时忽略名字差异
+    with PROFILER.stage("读取专有名词"):
+        LEXICON = load_lexicon(input_file, load_word_list(args.names) if args.names else [])
+
+    # 检查历史：导入以前报告中的审核结果，跳过已确认无问题的文本，不再报告已忽略的问题
+    history = None
+    dismissed = set()
+    if not args.no_history:
+        with PROFILER.stage("读取检查历史"):
+            history = ResultsStore()
+            imported = history.sync_reviews(input_file, sheet_name, actual_column)
+            dismissed = history.dismissed_keys(input_file, sheet_name)
+            reviewed = history.reviewed_texts(input_file, sheet_name)
+        if imported:
+            print(f"🗂️ 已导入 {imported} 份报告中的处理状态")
+        if reviewed:
+            before = len(rows)
+            rows = [row for row in rows if text_hash(row.text) not in reviewed]
+            if len(rows) < before:
+                print(f"🙈 跳过 {before - len(rows)} 行审核时所有问题都被标记为「忽略」的文本")
+
+    total_rows = len(rows)
+    if args.calibrate:
+        print("-" * 60)
+        run_calibration(rows, args.max_failure_rate)
+        print("-" * 60)
+    # 分层抽样：只检查样本，结束后估计全表的问题率
+    sample = None
+    if args.sample:
+        sample = StratifiedSample(rows, parse_sample_size(args.sample, total_rows), args.sample_seed, sheet_name)
+        rows = sample.rows
+        print(f"🎲 分层抽样: 从 {total_rows} 行中抽取 {len(rows)} 行"
+              f"（Sheet × 文本长度 × id 区间共 {len(sample.populations)} 层，随机种子 {sample.seed}）")
+    # 本地规则预筛：没有命中任何规则的行不发送给模型
+    prefiltered = []
+    if PREFILTER is not None:
+        with PROFILER.stage("本地规则预筛"):
+            rows, prefiltered, kinds = prefilter(rows, PREFILTER)
+        hits = "，".join(f"{kind} {count} 行" for kind, count in sorted(kinds.items(), key=lambda x: -x[1]))
+        print(f"🧹 本地规则预筛: {len(rows)}/{total_rows} 行命中规则（{hits or '无'}），"
+              f"跳过 {len(prefiltered)} 行")
+    print(f"✅ 共发现 {total_rows} 行有效文本{'' if args.plan else '，开始分批检查...'}")
     print(f"📦 批次大小: {BATCH_SIZE} 行/批")
+    if RESPONSE_FORMAT == "compact":
+        print("🗜️ 紧凑输出: " + "，".join(f"{code}={label}" for code, label, _ in ISSUE_CODES))
+
+    # 调度：决定批次派发顺序
+    rows_by_excel_row = {row.excel_row: row for row in rows}
+    if args.dedup:
+        # 归一化后相同的行只发送代表行，问题投影到同组的其他行
+        with PROFILER.stage("近似重复聚类"):
+            rows = cluster_rows(rows, LEXICON or ())
+        represented = sum(len(row.members) for row in rows)
+        print(f"🧬 近似重复聚类: {total_rows} 行归为 {len(rows)} 组，"
+              f"{represented} 行由同类文本代表（减少 {represented / max(total_rows, 1):.0%} 的检查行数）")
+    if MASK_MARKUP:
+        original_tokens = sum(estimate_tokens(row.text) for row in rows)
+        masked_tokens = sum(estimate_tokens(mask_text(row.text, LEXICON)[0]) for row in rows)
+        if masked_tokens < original_tokens:
+            print(f"🎭 标记遮罩: 待检查文本约 {original_tokens} → {masked_tokens} tokens"
+                  f"（减少 {1 - masked_tokens / original_tokens:.0%}）")
+    snapshot_file = snapshot_path(input_file, sheet_name, actual_column)
+    previous_snapshot = load_row_snapshot(snapshot_file)
+    scheduler = create_scheduler(
+        args.scheduler,
+        BATCH_SIZE,
+        previous_snapshot=previous_snapshot,
+        sensitive_words=SENSITIVE_WORDS,
+        priority_sheets=PRIORITY_SHEETS,
+    )
+    with PROFILER.stage("调度"):
+        batch_list = scheduler.plan(rows)
+    batches = len(batch_list)
+    if args.scheduler != "sequential":
+        changed = sum(1 for r in rows if "已修改" in r.reasons)
+        sensitive = sum(1 for r in rows if any(reason.startswith("敏感词") for reason in r.reasons))
+        if previous_snapshot is None:
+            print(f"🆕 首次运行（无行快照），无法识别已修改的行")
+        else:
+            print(f"✏️ 上次运行后修改的行: {changed} 行")
+        print(f"🚨 命中本地敏感词的行: {sensitive} 行")
     print("-" * 60)
 
-    all_issues = []
+    if args.plan:
+        # 试运行：只估算，不调用模型、不写报告和快照
+        if history is not None:
+            history.close()
+        plan = plan_run(batch_list, rows, previous_snapshot, budget)
+        EVENTS.emit("plan", input_file=input_file, sheet=sheet_name, column=actual_column, model=MODEL_NAME,
+                    total_rows=total_rows, workers=WORKERS, batch_size=BATCH_SIZE,
+                    sample_rows=len(sample.rows) if sample is not None else None,
+                    prefiltered_rows=len(prefiltered), **plan)
+        return plan
 
-    # 分批处理
-    batches = math.ceil(total_rows / BATCH_SIZE)
+    findings = FindingsStore()
     failed_batches = []  # 记录失败的批次
+    skipped_batches = []  # 因时间预算未派发的批次
+    deadline_reached = False
+    dispatching = None  # 正在提交的批次
+    checked_rows = []  # 成功检查的行（用于更新快照）
     interrupted = False  # 标记是否被中断
     completed_batches = 0  # 已完成的批次数
-    
+    dismissed_count = 0  # 审核人员忽略过、不再报告的问题数
+    requeued_rows = set()  # 因模型返回的编号错误而重新排队过的行号
+    invalid_issues = 0  # 编号不属于批次、被丢弃的问题数
+    name_issues = 0  # 只涉及专有名词、被丢弃的问题数
+
+    pending = deque(batch_list)
+    in_flight = {}
+    # 单并发时在主线程中直接执行，Ctrl+C 可以立即打断请求
+    executor = ThreadPoolExecutor(max_workers=WORKERS) if WORKERS > 1 else None
+    executor_size = WORKERS if executor is not None else 1
+    retired_executors = []  # 并发数调大前的线程池（等待其中的请求完成）
+    # 安静模式下只在终端中显示进度条，输出被重定向时不显示
+    # 检查记录：每个批次的提示词和原始响应，--replay 可以不调用模型重新生成报告
+    if not args.no_trace:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        trace_path = args.trace or os.path.join(
+            STATE_DIR, "traces", f"{sheet_name}_{actual_column}_{timestamp}{TRACE_SUFFIX}")
+        try:
+            TRACE = TraceWriter(trace_path)
+            if TRACE.truncated:
+                # 在不完整的 gzip 成员之后追加的运行无法读取
+                print(f"⚠️ 检查记录 {TRACE.truncated} 末尾不完整（上次运行被强制结束），本次写入新文件: {TRACE.path}")
+            TRACE.start_run(started_at=started_at, input_file=input_file, sheet=sheet_name, column=actual_column,
+                            model=MODEL_NAME, backend=BACKEND.name, endpoints=ENDPOINTS or [OLLAMA_URL],
+                            response_format=RESPONSE_FORMAT,
+                            issue_codes=ISSUE_CODES, mask_markup=MASK_MARKUP, options=MODEL_OPTIONS,
+                            lexicon=LEXICON.names if LEXICON else [])
+        except OSError as e:
+            print(f"⚠️ 无法写入检查记录: {e}")
+            TRACE = None
+    progress = tqdm(total=batches, desc="AI 检查进度", disable=None if QUIET else False)
+    tracker = ProgressTracker(sum(len(batch.rows) for batch in batch_list))
+    EVENTS.emit("run_start", input_file=input_file, sheet=sheet_name, column=actual_column,
+                model=MODEL_NAME, backend=BACKEND.name, total_rows=total_rows, rows_to_send=tracker.total_rows,
+                total_batches=batches, batch_size=BATCH_SIZE, workers=WORKERS)
+
+    # 检查循环的总耗时（循环较长，手动进入/退出阶段，在 finally 中结束）
+    check_stage = PROFILER.stage("检查批次")
+    check_stage.__enter__()
     try:
-        for i in tqdm(range(batches), desc="AI 检查进度"):
-            start_idx = i * BATCH_SIZE
-            end_idx = min((i + 1) * BATCH_SIZE, total_rows)
-            batch_num = i + 1
-            
-            # 提取当前批次数据
-            current_batch = df_to_check.iloc[start_idx:end_idx]
-            
-            # 构造发送给 LLM 的简化数据结构：{行号: 文本}
-            batch_payload = {
-                row['excel_row']: row[actual_column] 
-                for _, row in current_batch.iterrows()
-            }
-            
-            # 发送给 LLM
-            prompt = get_check_prompt(batch_payload)
-            response = call_ollama(prompt)
-            
-            if response:
-                # 记录响应长度（用于调试）
-                response_len = len(response)
-                
-                # 解析响应
-                batch_info = f"(批次 {batch_num}/{batches})"
-                issues = parse_llm_response(response, batch_info)
-                
-                if issues:
-                    all_issues.extend(issues)
-                    # 不在进度条中打印，避免干扰
-                elif response_len > 10:
-                    # 如果响应不为空但解析失败，记录失败的批次
-                    failed_batches.append({
-                        'batch': batch_num,
-                        'rows': f"{list(batch_payload.keys())[0]}-{list(batch_payload.keys())[-1]}",
-                        'response_len': response_len
-                    })
-            else:
-                # API调用失败
-                failed_batches.append({
-                    'batch': batch_num,
-                    'rows': f"{list(batch_payload.keys())[0]}-{list(batch_payload.keys())[-1]}",
-                    'response_len': 0,
-                    'error': 'API调用失败'
-                })
-            
-            # 稍微休眠一下防止 GPU 过热或 Ollama 堵塞（可选）
-            # time.sleep(0.1)
-            completed_batches = i + 1
+        while pending or in_flight:
+            changes = watcher.poll() if watcher is not None else {}
+            if changes:
+                summary = ", ".join(f"{key}={value}" for key, value in changes.items())
+                print(f"\n🔧 配置文件已修改，应用新配置: {summary}", flush=True)
+                EVENTS.emit("config_reload", changes=changes)
+                apply_hot_config(changes)
+                if WORKERS > executor_size:
+                    if executor is not None:
+                        retired_executors.append(executor)
+                    executor = ThreadPoolExecutor(max_workers=WORKERS)
+                    executor_size = WORKERS
+                if "batch_size" in changes and pending:
+                    # 未派发的行按新的批次大小重新划分
+                    scheduler.batch_size = BATCH_SIZE
+                    pending = deque(extend_batch_plan(
+                        scheduler, [row for batch in pending for row in batch.rows], batch_list))
+                    batches = batch_list[-1].number
+                    progress.total = completed_batches + len(in_flight) + len(pending)
+                    progress.refresh()
+
+            # 按调度顺序填满工作线程，避免低优先级批次提前排队
+            while pending and len(in_flight) < WORKERS:
+                if budget is not None and not budget.can_dispatch():
+                    deadline_reached = True
+                    skipped_batches.extend(pending)
+                    pending.clear()
+                    print(f"\n⏰ 时间预算即将用完，停止派发新批次（剩余 {len(skipped_batches)} 批未检查）", flush=True)
+                    EVENTS.emit("deadline", skipped_batches=len(skipped_batches),
+                                skipped_rows=sum(len(b.rows) for b in skipped_batches))
+                    if in_flight:
+                        print(f"⏳ 等待 {len(in_flight)} 个进行中的批次完成...", flush=True)
+                    break
+                batch = pending.popleft()
+                dispatching = batch
+                # 有时间预算时，进行中的请求最多等待到预算用完
+                timeout = budget.request_timeout(REQUEST_TIMEOUT) if budget is not None else None
+                EVENTS.emit("batch_start", batch=batch.number, rows=len(batch.rows), row_range=batch.row_range())
+                in_flight[submit_task(executor, check_batch, batch, batches, timeout)] = batch
+                dispatching = None
+
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"issues": [], "response_len": 0, "error": f"检查异常: {e}", "elapsed": 0}
+
+                if budget is not None and result["response_len"]:
+                    budget.observe(result["elapsed"])
+
+                batch_issues = 0
+                if result["error"]:
+                    failed = {
+                        'batch': batch.number,
+                        'rows': batch.row_range(),
+                        'response_len': result["response_len"],
+                    }
+                    if result["error"] != "JSON解析失败":
+                        failed['error'] = result["error"]
+                    failed_batches.append(failed)
+                else:
+                    # 编号错误的问题可能属于的行重新排队（每行最多一次），其余行视为已检查
+                    invalid_issues += result.get("invalid", 0)
+                    name_issues += result.get("name_issues", 0)
+                    requeue = [row for row in result.get("recheck", []) if row.excel_row not in requeued_rows]
+                    batch_rows = batch.rows
+                    if requeue:
+                        requeued_rows.update(row.excel_row for row in requeue)
+                        requeue_set = {row.excel_row for row in requeue}
+                        batch_rows = [row for row in batch.rows if row.excel_row not in requeue_set]
+                        requeue_batches = extend_batch_plan(scheduler, requeue, batch_list)
+                        pending.extend(requeue_batches)
+                        batches = batch_list[-1].number
+                        progress.total += len(requeue_batches)
+                        progress.refresh()
+                        tracker.total_rows += len(requeue)
+                    checked_rows.extend(batch_rows)
+                    issues = result["issues"]
+                    if args.dedup:
+                        projected, covered, recheck = project_batch(batch_rows, issues, LEXICON or ())
+                        issues = issues + projected
+                        checked_rows.extend(covered)
+                        if recheck:
+                            # 差异片段可能受影响的近似重复行，单独交给模型检查
+                            recheck_batches = extend_batch_plan(scheduler, recheck, batch_list)
+                            pending.extend(recheck_batches)
+                            batches = batch_list[-1].number
+                            progress.total += len(recheck_batches)
+                            progress.refresh()
+                            tracker.total_rows += len(recheck)
+                    if dismissed:
+                        issues, dropped = drop_dismissed(issues, rows_by_excel_row, sheet_name, dismissed)
+                        dismissed_count += dropped
+                    batch_issues = len(issues)
+                    if issues:
+                        with PROFILER.stage("汇总问题"):
+                            added = findings.add_llm_issues(issues, rows_by_excel_row, sheet_name)
+                            # 发现问题立即写入流式报告
+                            for writer in writers:
+                                if writer.streaming:
+                                    writer.write(findings, added)
+
+                completed_batches += 1
+                progress.update(1)
+                tracker.update(len(batch.rows))
+                EVENTS.emit("batch_finish", batch=batch.number, rows=len(batch.rows),
+                            elapsed=round(result["elapsed"], 3), issues=batch_issues,
+                            error=result["error"], invalid_line_nos=result.get("invalid", 0),
+                            completed_batches=completed_batches,
+                            total_batches=progress.total, findings=len(findings), **tracker.snapshot())
     except KeyboardInterrupt:
         interrupted = True
-        print(f"\n\n⚠️ 用户中断！已完成 {completed_batches}/{batches} 批次", flush=True)
+        skipped_batches.extend(pending)
+        skipped_batches.extend(in_flight.values())
+        if dispatching is not None:
+            # 单并发时中断发生在正在执行的批次上
+            skipped_batches.append(dispatching)
+        pending.clear()
+        print(f"\n\n⚠️ 用户中断！已完成 {completed_batches}/{progress.total} 批次", flush=True)
         print(f"💾 正在保存已检查的结果...", flush=True)
-    
+    finally:
+        progress.close()
+        check_stage.__exit__(None, None, None)
+        # 不等待进行中的请求，结果已不再需要
+        for pool in retired_executors + [executor]:
+            if pool is not None:
+                pool.shutdown(wait=False)
+
+    if invalid_issues:
+        print(f"🔢 模型返回了 {invalid_issues} 个编号不属于批次的问题（已丢弃），"
+              f"重新检查了 {len(requeued_rows)} 行")
+    if name_issues:
+        print(f"📚 {name_issues} 个问题只涉及专有名词，已丢弃")
+
+    if ADAPTIVE_TIMEOUT:
+        for endpoint, stats in LATENCY.summary().items():
+            if stats["p99"] is not None:
+                print(f"⏱️ {endpoint}: {stats['count']} 次请求，p50 {stats['p50']:.1f}秒，p99 {stats['p99']:.1f}秒")
+
+    # 更新行快照，供下次运行识别已修改的行
+    save_row_snapshot(snapshot_file, checked_rows + prefiltered, previous_snapshot)
+
     # 处理完成后，显示失败的批次信息
     if failed_batches:
         print(f"\n⚠️ 有 {len(failed_batches)} 个批次处理失败或解析失败:")
-        for fb in failed_batches:
+        for fb in sorted(failed_batches, key=lambda x: x['batch']):
             error_msg = fb.get('error', 'JSON解析失败')
             print(f"   - 批次 {fb['batch']} (行号 {fb['rows']}): {error_msg}, 响应长度: {fb['response_len']} 字符")
-        print(f"💡 提示: 检查 llm_response_debug.txt 文件查看详细的响应内容")
-
-    # 结果输出
-    if all_issues:
-        result_df = pd.DataFrame(all_issues)
-        # 调整列顺序
-        cols = ["line_no", "issue", "suggestion"]
-        # 确保列存在（防止 LLM 返回的 key 不对）
-        for c in cols:
-            if c not in result_df.columns:
-                result_df[c] = ""
-        
-        result_df = result_df[cols]
-        result_df.columns = ["行号", "问题说明", "修改建议"]
-        
-        # 使用安全保存函数
-        final_output_file = safe_save_excel(result_df, output_file)
-        print(f"\n检查完成！共发现 {len(all_issues)} 处潜在问题。")
-        print(f"结果已保存至: {final_output_file}")
-        
-        # 追加功能：插入原文内容
-        print("-" * 60)
-        print("📝 正在添加配置原文...")
-        add_original_text_to_report(final_output_file, input_file, sheet_name, actual_column, header_row_count)
+        if TRACE is not None:
+            print(f"💡 提示: 原始响应已写入检查记录 {TRACE.path}，修改解析逻辑后可用 --replay 重新解析")
+        else:
+            print(f"💡 提示: 检查 llm_debug_*.txt 文件查看详细的响应内容")
+
+    # 统计未覆盖的行（未派发、中断或失败的批次）
+    uncovered = collect_uncovered_rows(
+        skipped_batches,
+        failed_batches,
+        batch_list,
+        "超出时间预算" if deadline_reached else "用户中断",
+    )
+    if uncovered:
+        print(f"\n📭 未覆盖的行号: {len(uncovered)} 段")
+        for item in uncovered:
+            print(f"   - {item['行号范围']}（{item['行数']} 行）: {item['原因']}")
+
+    # 抽样估计：只统计完成检查的样本行（失败和未派发的批次不计入）
+    sample_summary = None
+    if sample is not None:
+        rows_by_type = {}
+        for finding in findings:
+            rows_by_type.setdefault(finding.issue_type or "未分类", set()).add(finding.row)
+        covered = [row.excel_row for row in checked_rows + prefiltered]
+        sample_summary = sample.summary(covered, rows_by_type)
+        print_sample_summary(sample_summary, args.sample)
+        sample_file = f"{output_base}_sample.json"
+        with open(sample_file, "w", encoding="utf-8") as f:
+            json.dump(sample_summary, f, ensure_ascii=False, indent=2)
+        print(f"📄 抽样估计已写入: {sample_file}")
+
+    # 结果输出：问题记录中已包含原文和对白id，按行号排序后写出
+    order = findings.sorted_indices("row")
+    report_files = []
+    for writer in writers:
+        if writer is partial_report:
+            writer.close()
+            continue
+        if isinstance(writer, ExcelReportWriter):
+            # 行号链接到源工作簿中的单元格，未覆盖的行写入单独的 Sheet
+            writer.link_source(input_file, source_column_position(input_file, sheet_name, actual_column))
+            writer.coverage = uncovered
+            if not len(findings) and not uncovered:
+                # 没有问题时不生成空的Excel报告
+                continue
+        try:
+            with PROFILER.stage(f"生成报告({writer.format})"):
+                report_files.append(safe_save_file(lambda path: writer.finalize(findings, order, path), writer.path))
+        except Exception as e:
+            print(f"❌ 生成 {writer.format} 报告失败: {e}")
+        finally:
+            writer.close()
+            if isinstance(writer, ExcelReportWriter):
+                # 监视模式更新报告时未覆盖行号已经过时，不再写入
+                writer.coverage = []
+
+    if len(findings):
+        print(f"\n检查完成！共发现 {len(findings)} 处潜在问题。")
+        for issue_type, count in sorted(findings.issue_types().items(), key=lambda x: -x[1]):
+            print(f"   - {issue_type or '未分类'}: {count} 处")
     else:
         print("\n检查完成！未发现明显问题（或者模型未能正确输出）。")
+    for report_file in report_files:
+        print(f"结果已保存至: {report_file}")
+    if dismissed_count:
+        print(f"🙈 {dismissed_count} 处问题审核时已被标记为「忽略」，未写入报告")
+    if TRACE is not None:
+        print(f"🎞️ 检查记录: {TRACE.path}（--replay 可不调用模型重新解析并生成报告）")
+
+    # 未覆盖的行已写入Excel报告的单独Sheet（没有Excel报告时写入JSON），方便后续补检
+    if uncovered:
+        excel_file = next((f for f in report_files if f.endswith(".xlsx")), None)
+        if excel_file is not None:
+            print(f"📄 未覆盖行号已写入报告的「{COVERAGE_SHEET_NAME}」Sheet: {excel_file}")
+        else:
+            coverage_file = f"{output_base}_uncovered.json"
+            with open(coverage_file, "w", encoding="utf-8") as f:
+                json.dump(uncovered, f, ensure_ascii=False, indent=2)
+            print(f"📄 未覆盖行号已写入: {coverage_file}")
+
+    # 中断时保留增量报告，正常完成后以最终报告为准
+    if partial_report is not None:
+        if interrupted and partial_report.count:
+            print(f"📄 增量报告: {partial_report.path}")
+        else:
+            partial_report.remove()
+
+    if history is not None:
+        # 预筛跳过的行没有经过模型检查，其上的旧问题不算已修复
+        history_uncovered = [item["行号范围"] for item in uncovered]
+        if prefiltered:
+            history_uncovered.extend(format_row_ranges(row.excel_row for row in prefiltered).split(","))
+        if sample is not None and sample.unsampled:
+            history_uncovered.extend(format_row_ranges(sample.unsampled).split(","))
+        try:
+            with PROFILER.stage("记录检查历史"):
+                run_id = history.record_run(
+                    input_file, sheet_name, actual_column,
+                    config={"backend": BACKEND.name, "batch_size": BATCH_SIZE, "workers": WORKERS,
+                            "scheduler": args.scheduler, "dedup": args.dedup, "mask_markup": MASK_MARKUP,
+                            "response_format": RESPONSE_FORMAT, "prefilter": PREFILTER is not None,
+                            "options": MODEL_OPTIONS},
+                    metrics={"total_rows": total_rows, "rows_checked": len(checked_rows), "findings": len(findings),
+                             "prefiltered_rows": len(prefiltered),
+                             "sample_rows": len(sample.rows) if sample is not None else None,
+                             "sample_issue_rate": sample_summary["overall"]["rate"] if sample_summary else None,
+                             "dismissed": dismissed_count, "name_issues": name_issues,
+                             "failed_batches": len(failed_batches),
+                             "uncovered_rows": sum(item["行数"] for item in uncovered),
+                             "elapsed_seconds": round(tracker.elapsed, 1), "interrupted": interrupted,
+                             "deadline_reached": deadline_reached},
+                    findings=findings, order=order, uncovered=history_uncovered,
+                    reports=report_files, started_at=started_at, model=MODEL_NAME,
+                )
+            changes = history.summary(run_id)
+            print(f"🗂️ 已记录到检查历史（运行 #{run_id}）：与上次相比新增 {changes['new']} 处，"
+                  f"反复出现 {changes['recurring']} 处，已修复 {changes['fixed']} 处")
+            print(f"💡 查看明细: python scripts/results_store.py diff --run {run_id} --kind new")
+        except Exception as e:
+            print(f"⚠️ 无法记录检查历史: {e}")
+        finally:
+            history.close()
+
+    EVENTS.emit("run_finish", findings=len(findings), issue_types=findings.issue_types(),
+                failed_batches=len(failed_batches), uncovered_rows=sum(item["行数"] for item in uncovered),
+                reports=report_files, interrupted=interrupted, deadline_reached=deadline_reached,
+                sample=sample_summary["overall"] if sample_summary else None, **tracker.snapshot())
+
+    if args.watch and not interrupted:
+        watch_loop(args, actual_column, findings, checked_rows + prefiltered,
+                   [writer for writer in writers if writer is not partial_report])
+
+def run_replay(args):
+    """
+    回放检查记录：不调用模型，重新解析记录中的原始响应并生成报告
+
+    按录制时的输出格式、类型代码和遮罩设置解析响应；同一行在之后的批次中
+    以不同文本出现时（监视模式下修改过的行），以最后一次的结果为准。
+    """
+    global RESPONSE_FORMAT, ISSUE_CODES, MASK_MARKUP, LEXICON
+    try:
+        with PROFILER.stage("读取检查记录"):
+            run, records = load_run(args.replay)
+    except (OSError, ValueError) as e:
+        print(f"❌ 无法读取检查记录: {e}")
+        EVENTS.emit("error", message=str(e))
+        return
+    sheet_name, column = run.get("sheet", ""), run.get("column", "")
+    RESPONSE_FORMAT = run.get("response_format", "json")
+    ISSUE_CODES = [tuple(code) for code in run.get("issue_codes") or issue_codes()]
+    MASK_MARKUP = run.get("mask_markup", True)
+    # 录制时的专有名词：遮罩编号与录制时一致，只涉及名字的问题同样丢弃
+    LEXICON = NameMatcher(run.get("lexicon") or ()) or None
+
+    try:
+        writers = create_report_writers(parse_formats(args.format), report_base(sheet_name, column))
+        for writer in writers:
+            writer.open()
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        EVENTS.emit("error", message=str(e))
+        return
+
+    print(f"🎞️ 回放检查记录: {args.replay}")
+    print(f"   - 录制于 {run.get('started_at', '')}，模型 {run.get('model', '')}，输出格式 {RESPONSE_FORMAT}")
+    print(f"   - {run.get('input_file', '')} / {sheet_name} / {column}，共 {len(records)} 个批次")
+
+    dismissed = set()
+    if not args.no_history:
+        history = ResultsStore()
+        try:
+            dismissed = history.dismissed_keys(run.get("input_file", ""), sheet_name)
+        finally:
+            history.close()
+
+    started = time.monotonic()
+    rows_by_excel_row = {}
+    issues_by_row = {}
+    failed_batches = invalid_issues = name_issues = 0
+    for record in records:
+        batch = Batch(record["batch"], [row_from_record(item) for item in record["rows"]])
+        for row in batch.rows + [member for row in batch.rows for member in row.members]:
+            previous = rows_by_excel_row.get(row.excel_row)
+            if previous is not None and previous.text != row.text:
+                issues_by_row.pop(row.excel_row, None)
+            rows_by_excel_row[row.excel_row] = row
+        _, restore = mask_payload(batch.payload(), LEXICON) if MASK_MARKUP else (None, {})
+        with PROFILER.stage("解析响应"):
+            result = parse_batch_response(batch, len(records), record.get("response"), restore,
+                                          record.get("elapsed") or 0)
+        if result["error"]:
+            failed_batches += 1
+            continue
+        invalid_issues += result.get("invalid", 0)
+        name_issues += result.get("name_issues", 0)
+        issues = result["issues"]
+        if any(row.members for row in batch.rows):
+            recheck = {row.excel_row for row in result.get("recheck", [])}
+            representatives = [row for row in batch.rows if row.excel_row not in recheck]
+            projected, _, _ = project_batch(representatives, issues, LEXICON or ())
+            issues = issues + projected
+        for item in issues:
+            issues_by_row.setdefault(item["line_no"], []).append(item)
+
+    issues = [item for items in issues_by_row.values() for item in items]
+    dismissed_count = 0
+    if dismissed:
+        issues, dismissed_count = drop_dismissed(issues, rows_by_excel_row, sheet_name, dismissed)
+    findings = FindingsStore()
+    findings.add_llm_issues(issues, rows_by_excel_row, sheet_name)
+    order = findings.sorted_indices("row")
+
+    report_files = []
+    for writer in writers:
+        if writer.streaming:
+            writer.write(findings, order)
+        if isinstance(writer, ExcelReportWriter):
+            if not len(findings):
+                writer.close()
+                continue
+            input_file = run.get("input_file", "")
+            if input_file:
+                writer.link_source(input_file, source_column_position(input_file, sheet_name, column))
+        try:
+            with PROFILER.stage(f"生成报告({writer.format})"):
+                report_files.append(safe_save_file(lambda path: writer.finalize(findings, order, path), writer.path))
+        except Exception as e:
+            print(f"❌ 生成 {writer.format} 报告失败: {e}")
+        finally:
+            writer.close()
+
+    print(f"\n回放完成（{time.monotonic() - started:.1f}秒）！共 {len(findings)} 处潜在问题。")
+    for issue_type, count in sorted(findings.issue_types().items(), key=lambda x: -x[1]):
+        print(f"   - {issue_type or '未分类'}: {count} 处")
+    if failed_batches:
+        print(f"⚠️ {failed_batches} 个批次的响应仍然无法解析（或录制时请求失败）")
+    if invalid_issues:
+        print(f"🔢 {invalid_issues} 个问题的编号不属于批次（已丢弃）")
+    if name_issues:
+        print(f"📚 {name_issues} 个问题只涉及专有名词（已丢弃）")
+    if dismissed_count:
+        print(f"🙈 {dismissed_count} 处问题审核时已被标记为「忽略」，未写入报告")
+    for report_file in report_files:
+        print(f"结果已保存至: {report_file}")
+    EVENTS.emit("run_finish", findings=len(findings), issue_types=findings.issue_types(),
+                failed_batches=failed_batches, reports=report_files, replay=args.replay)
 
-def safe_save_excel(df, file_path, max_retries=3):
+def plan_run(batch_list, rows, previous_snapshot, budget=None):
     """
-    安全保存Excel文件，处理文件被占用的情况
+    试运行：按将要发送的批次估算 token 数和耗时并输出
+
+    Args:
+        batch_list: 调度后的批次
+        rows: 将要发送的行（近似重复聚类后为代表行）
+        previous_snapshot: 上次运行的行快照（用于统计修改过的行）
+        budget: RunBudget 或None
+
+    Returns:
+        dict: planner.build_plan() 的结果，另含 changed_rows（修改过的行数，没有快照时为None）
+    """
+    endpoints = ENDPOINTS or [OLLAMA_URL]
+    batch_prompts = [(len(batch.rows), estimate_tokens(build_batch_prompt(batch)[0])) for batch in batch_list]
+    throughput = trace_throughput(find_traces(os.path.join(STATE_DIR, "traces")), MODEL_NAME, endpoints,
+                                  RESPONSE_FORMAT)
+    plan = build_plan(batch_prompts, WORKERS, len(endpoints), RESPONSE_FORMAT, throughput, TUNED_PROFILE)
+
+    print(f"🧮 运行计划（试运行，未调用模型）:")
+    print(f"   - 发送给模型: {plan['rows']} 行，{plan['batches']} 个批次（{BATCH_SIZE} 行/批，并发 {WORKERS}）")
+    per_row = "检查记录中的平均值" if throughput and throughput.get("output_per_row") else "经验值"
+    print(f"   - 输入约 {plan['prompt_tokens']} tokens，输出约 {plan['output_tokens']} tokens（按{per_row}估算）")
+    if plan["eta_range"] is None:
+        print(f"   - 预计耗时: 没有 {MODEL_NAME} 在当前推理服务上的调优配置或检查记录，无法估计")
+        print(f"💡 先运行 --calibrate，或用 --sample 检查一小部分后再试运行")
+        plan["changed_rows"] = None
+        return plan
+    fastest, slowest = plan["eta_range"]
+    eta = format_duration(fastest)
+    if format_duration(slowest) != eta:
+        eta = f"{eta} ~ {format_duration(slowest)}"
+    print(f"   - 预计耗时: {eta}（依据{plan['eta_source']}）")
+    if throughput and not TUNED_PROFILE and len(endpoints) < WORKERS:
+        print(f"     共用 {len(endpoints)} 个推理服务时并发提速取决于 OLLAMA_NUM_PARALLEL 和显存，"
+              f"实际耗时在范围内；--calibrate 可实测")
+    plan["changed_rows"] = None
+    if previous_snapshot is not None:
+        changed = sum(1 for row in rows if previous_snapshot.get(row.excel_row) != text_hash(row.text))
+        plan["changed_rows"] = changed
+        if not changed:
+            print(f"   - 上次运行后没有修改的行")
+        elif plan["rows"]:
+            print(f"   - 上次运行后修改的行: {changed} 行，只检查这些行约需 "
+                  f"{format_duration(plan['eta_seconds'] * changed / plan['rows'])}"
+                  f"（--scheduler priority 会先检查它们，配合 --max-minutes 使用）")
+    if budget is not None and slowest > budget.seconds:
+        print(f"⚠️ 预计耗时超过时间预算（{format_duration(budget.seconds)}），"
+              f"可以增加 --workers / --endpoints，或改用 --sample 估计问题率")
+    return plan
+
+
+def print_sample_summary(summary, sample_arg):
+    """输出抽样估计的问题率和置信区间"""
+    def interval(estimate):
+        return (f"{estimate['rate']:.1%}（95% 置信区间 {estimate['low']:.1%} ~ {estimate['high']:.1%}）")
+
+    overall = summary["overall"]
+    print(f"\n📐 抽样估计（完成检查 {overall['checked']}/{summary['sample_rows']} 行样本，随机种子 {summary['seed']}）:")
+    if overall["rate"] is None:
+        print("   ⚠️ 没有完成检查的样本，无法估计问题率")
+        return
+    print(f"   - 有问题的行: {interval(overall)}，全表约 {overall['estimated_rows']} 行"
+          f"（{overall['estimated_low']} ~ {overall['estimated_high']}）")
+    if len(summary["by_sheet"]) > 1:
+        for sheet, estimate in summary["by_sheet"].items():
+            if estimate["rate"] is not None:
+                print(f"   - Sheet {sheet}: {interval(estimate)}")
+    for issue_type, estimate in summary["by_type"].items():
+        print(f"   - {issue_type}: {interval(estimate)}")
+    print(f"💡 复现本次抽样: --sample {sample_arg} --sample-seed {summary['seed']}")
+
+def drop_dismissed(issues, rows_by_excel_row, sheet_name, dismissed):
+    """
+    去掉审核人员忽略过的问题（按 Sheet + 文本哈希 + 问题类型 匹配）
+
+    Args:
+        issues: LLM 返回的问题列表
+        rows_by_excel_row: {excel_row: RowItem}
+        sheet_name: 默认Sheet名称
+        dismissed: ResultsStore.dismissed_keys() 的结果
+
+    Returns:
+        tuple: (保留的问题列表, 去掉的问题数)
+    """
+    kept = []
+    for item in issues:
+        try:
+            row = rows_by_excel_row.get(int(item.get("line_no")))
+        except (AttributeError, TypeError, ValueError):
+            row = None
+        if row is not None:
+            key = (row.sheet or sheet_name, text_hash(row.text), split_issue(item.get("issue"))[0])
+            if key in dismissed:
+                continue
+        kept.append(item)
+    return kept, len(issues) - len(kept)
+
+
+def check_rows(rows, total_label="", retry=True):
+    """
+    检查一组行（监视模式使用，按顺序分批，并发数为 WORKERS）
+
+    Args:
+        rows: RowItem 列表
+        total_label: 日志中的批次说明
+        retry: 模型返回的编号不属于批次时，是否重新检查可能受影响的行
+
+    Returns:
+        tuple: (问题列表, 检查成功的 RowItem 列表, 检查失败的 RowItem 列表)
+    """
+    batch_list = create_scheduler("sequential", BATCH_SIZE).plan(rows)
+    issues, checked, failed, requeue = [], [], [], []
+    if not batch_list:
+        return issues, checked, failed
+    with ThreadPoolExecutor(max_workers=max(1, min(WORKERS, len(batch_list)))) as executor:
+        futures = [executor.submit(check_batch, batch, len(batch_list)) for batch in batch_list]
+        for batch, future in zip(batch_list, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"issues": [], "error": f"检查异常: {e}"}
+            if result["error"]:
+                print(f"⚠️ 批次 {batch.number}/{len(batch_list)}{total_label} (行号 {batch.row_range()}): "
+                      f"{result['error']}，下次保存时重新检查")
+                failed.extend(batch.rows)
+            else:
+                issues.extend(result["issues"])
+                recheck = {row.excel_row for row in result.get("recheck", [])}
+                checked.extend(row for row in batch.rows if row.excel_row not in recheck)
+                requeue.extend(row for row in batch.rows if row.excel_row in recheck)
+    if requeue and retry:
+        more_issues, more_checked, more_failed = check_rows(requeue, total_label, retry=False)
+        issues.extend(more_issues)
+        checked.extend(more_checked)
+        failed.extend(more_failed)
+    else:
+        checked.extend(requeue)
+    return issues, checked, failed
+
+
+def rewrite_reports(writers, findings, order):
+    """
+    在原路径上重写报告（先写临时文件再替换，报告被占用时另存为新文件）
+
+    Returns:
+        list: 实际写入的报告路径
+    """
+    report_files = []
+    for writer in writers:
+        def write(path, writer=writer):
+            tmp_path = f"{path}.tmp"
+            writer.finalize(findings, order, tmp_path)
+            os.replace(tmp_path, path)
+
+        try:
+            report_files.append(safe_save_file(write, writer.path))
+        except Exception as e:
+            print(f"❌ 更新 {writer.format} 报告失败: {e}")
+    return report_files
+
+
+def watch_loop(args, actual_column, findings, checked_rows, writers):
+    """
+    监视模式：工作簿保存后只检查修改过的行，并在原路径上更新报告
+
+    Args:
+        args: 命令行参数
+        actual_column: 实际列名
+        findings: 首次检查的 FindingsStore（之后的结果继续写入其中）
+        checked_rows: 首次检查成功的 RowItem 列表
+        writers: 报告输出器（不含增量CSV）
+    """
+    input_file, sheet_name = args.input_file, args.sheet_name
+    snapshot_file = snapshot_path(input_file, sheet_name, actual_column)
+    # 只以本次会话实际检查过的行为准，失败或未覆盖的行在第一次保存后重新检查
+    known = {row.excel_row: text_hash(row.text) for row in checked_rows}
+    live = group_by_row(findings, range(len(findings)))
+    file_watcher = FileWatcher([input_file], interval=args.watch_interval)
+
+    print("=" * 60)
+    print(f"👀 监视模式: 保存 {input_file} 后自动检查修改过的行（Ctrl+C 退出）")
+    print("=" * 60, flush=True)
+    try:
+        while True:
+            file_watcher.wait()
+            started = time.monotonic()
+            rows, _ = load_row_items(input_file, sheet_name, actual_column)
+            if rows is None:
+                print("⚠️ 读取工作簿失败，等待下次保存...", flush=True)
+                continue
+            changed, removed = diff_rows(rows, known)
+            if not changed and not removed:
+                print("💤 工作簿已保存，检查列没有修改", flush=True)
+                continue
+
+            # 修改或删除的行：移除旧问题；内容与已检查行相同的直接复用结果
+            previous_live = dict(live)
+            source_rows = {}
+            for excel_row, digest in known.items():
+                source_rows.setdefault(digest, excel_row)
+            resolved = 0
+            for excel_row in removed:
+                resolved += len(live.pop(excel_row, []))
+                del known[excel_row]
+            to_check = []
+            reused = 0
+            for row in changed:
+                resolved += len(live.pop(row.excel_row, []))
+                known.pop(row.excel_row, None)
+                source = source_rows.get(text_hash(row.text))
+                if source is None:
+                    to_check.append(row)
+                    continue
+                reused += 1
+                added = copy_findings(findings, previous_live.get(source, []), row)
+                if added:
+                    live[row.excel_row] = added
+                    # 移动到新行号的问题不算作已消除
+                    resolved -= len(added)
+                known[row.excel_row] = text_hash(row.text)
+
+            if to_check and PREFILTER is not None:
+                to_check, passed, _ = prefilter(to_check, PREFILTER)
+                for row in passed:
+                    known[row.excel_row] = text_hash(row.text)
+                if passed:
+                    print(f"🧹 {len(passed)} 行修改过的文本未命中本地规则，跳过", flush=True)
+
+            new_issues = 0
+            if to_check:
+                print(f"🔎 检查 {len(to_check)} 行修改过的文本...", flush=True)
+                issues, checked, failed = check_rows(to_check)
+                rows_by_excel_row = {row.excel_row: row for row in to_check}
+                added = findings.add_llm_issues(issues, rows_by_excel_row, sheet_name)
+                for excel_row, indices in group_by_row(findings, added).items():
+                    live.setdefault(excel_row, []).extend(indices)
+                new_issues = len(added)
+                for row in checked:
+                    known[row.excel_row] = text_hash(row.text)
+
+            resolved = max(resolved, 0)
+            order = findings.sorted_indices("row", indices=[i for indices in live.values() for i in indices])
+            report_files = rewrite_reports(writers, findings, order)
+            save_row_snapshot(snapshot_file, [row for row in rows if row.excel_row in known])
+            elapsed = time.monotonic() - started
+            print(f"🔁 {datetime.now().strftime('%H:%M:%S')} 修改 {len(changed)} 行、删除 {len(removed)} 行："
+                  f"复用 {reused} 行，检查 {len(to_check)} 行，新增 {new_issues} 处问题，"
+                  f"移除 {resolved} 处旧问题，当前共 {len(order)} 处（用时 {elapsed:.1f}秒）", flush=True)
+            for report_file in report_files:
+                print(f"   报告已更新: {report_file}")
+            EVENTS.emit("watch_cycle", changed_rows=len(changed), removed_rows=len(removed), reused_rows=reused,
+                        checked_rows=len(to_check), new_findings=new_issues, resolved_findings=resolved,
+                        findings=len(order), reports=report_files, elapsed=round(elapsed, 3))
+    except KeyboardInterrupt:
+        print("\n👋 已退出监视模式")
+
+
+def extend_batch_plan(scheduler, rows, batch_list):
+    """
+    将行划分为新批次追加到批次列表，批次号接在已有批次之后
+
+    Args:
+        scheduler: 调度器
+        rows: RowItem 列表
+        batch_list: 全部 Batch 列表（原地追加）
+
+    Returns:
+        list: 新批次列表
+    """
+    new_batches = scheduler.plan(rows)
+    offset = max((batch.number for batch in batch_list), default=0)
+    for batch in new_batches:
+        batch.number += offset
+    batch_list.extend(new_batches)
+    return new_batches
+
+def collect_uncovered_rows(skipped_batches, failed_batches, batch_list, skip_reason):
+    """
+    汇总未覆盖的行号区间
+
+    Args:
+        skipped_batches: 未派发/被取消的 Batch 列表
+        failed_batches: 失败批次信息列表（包含 'batch' 批次号）
+        batch_list: 全部 Batch 列表
+        skip_reason: 未派发批次的原因描述
+
+    Returns:
+        list: [{"行号范围": "12-40", "行数": 29, "原因": "..."}]
+    """
+    by_number = {b.number: b for b in batch_list}
+    groups = {}
+    for batch in skipped_batches:
+        groups.setdefault(skip_reason, []).extend(batch.covered_rows)
+    for fb in failed_batches:
+        reason = fb.get('error', 'JSON解析失败')
+        groups.setdefault(reason, []).extend(by_number[fb['batch']].covered_rows)
+
+    uncovered = []
+    for reason, rows in groups.items():
+        for part in format_row_ranges(rows).split(","):
+            if not part:
+                continue
+            start, _, end = part.partition("-")
+            count = int(end or start) - int(start) + 1
+            uncovered.append({"行号范围": part, "行数": count, "原因": reason})
+    return uncovered
+
+
+def source_column_position(input_file, sheet_name, column):
+    """
+    目标列在源工作簿中的列序号（用于报告中行号的链接）
+
+    Returns:
+        int: 列序号（从0开始）；不是 xlsx/xlsm 或无法读取时返回None（链接到行首）
+    """
+    if not column or os.path.splitext(input_file)[1].lower() not in (".xlsx", ".xlsm"):
+        return None
+    try:
+        index = SheetIndex(input_file)
+    except Exception:
+        return None
+    try:
+        index.ensure_sheet(sheet_name, HEADER_ROWS)
+        return index.column_position(sheet_name, column)
+    except Exception:
+        return None
+    finally:
+        index.close()
+
+
+def safe_save_file(write_func, file_path, max_retries=3):
+    """
+    安全保存文件，处理文件被占用的情况
     
     Args:
-        df: 要保存的DataFrame
+        write_func: 写文件函数，参数为目标路径
         file_path: 目标文件路径
         max_retries: 最大重试次数
     
@@ -816,7 +2357,7 @@ def safe_save_excel(df, file_path, max_retries=3):
     for attempt in range(max_retries):
         try:
             # 尝试保存文件
-            df.to_excel(file_path, index=False)
+            write_func(file_path)
             return file_path
         except PermissionError as e:
             if attempt < max_retries - 1:
@@ -833,7 +2374,7 @@ def safe_save_excel(df, file_path, max_retries=3):
                 new_file_path = f"{base_name}_{timestamp}{ext}"
                 
                 try:
-                    df.to_excel(new_file_path, index=False)
+                    write_func(new_file_path)
                     print(f"✅ 已保存为新文件: {new_file_path}")
                     print(f"💡 提示: 请关闭Excel中的文件后再运行脚本")
                     return new_file_path
@@ -846,101 +2387,80 @@ def safe_save_excel(df, file_path, max_retries=3):
     
     return file_path
 
-def add_original_text_to_report(output_file, input_file, sheet_name, target_column, header_row_count):
+def build_arg_parser():
     """
-    从输出报告中读取行号，从原始Excel文件中获取对应行的原文，
-    并插入到报告的第一列之后
-    
-    Args:
-        output_file: 输出报告文件路径
-        input_file: 原始Excel文件路径
-        sheet_name: Sheet名称
-        target_column: 目标列名
-        header_row_count: 表头行数
+    构造命令行参数解析器
     """
-    try:
-        # 1. 读取输出报告
-        report_df = pd.read_excel(output_file)
-        print(f"✅ 读取报告文件: {len(report_df)} 行")
-        
-        # 2. 读取原始Excel文件
-        original_df, _ = load_excel_with_multirow_header(input_file, sheet_name, HEADER_ROWS)
-        print(f"✅ 读取原始文件: {len(original_df)} 行")
-        
-        # 3. 为每一行获取原文和第一列的id
-        original_texts = []
-        first_column_ids = []
-        
-        # 获取原始Excel的第一列列名
-        first_column_name = original_df.columns[0]
-        print(f"📋 第一列列名: {first_column_name}")
-        
-        for idx, row in report_df.iterrows():
-            line_no = row['行号']
-            try:
-                # Excel行号转换为DataFrame索引
-                # Excel行号 = DataFrame索引 + 表头行数 + 1
-                # 所以 DataFrame索引 = Excel行号 - 表头行数 - 1
-                df_index = int(line_no) - header_row_count - 1
-                
-                if 0 <= df_index < len(original_df):
-                    # 获取原文
-                    original_text = original_df.iloc[df_index][target_column]
-                    # 处理NaN值
-                    if pd.isna(original_text):
-                        original_text = ""
-                    original_texts.append(str(original_text))
-                    
-                    # 获取第一列的id
-                    first_column_value = original_df.iloc[df_index][first_column_name]
-                    if pd.isna(first_column_value):
-                        first_column_value = ""
-                    first_column_ids.append(str(first_column_value))
-                else:
-                    print(f"⚠️ 警告: 行号 {line_no} 超出范围")
-                    original_texts.append("")
-                    first_column_ids.append("")
-            except Exception as e:
-                print(f"⚠️ 警告: 无法获取行号 {line_no} 的数据: {e}")
-                original_texts.append("")
-                first_column_ids.append("")
-        
-        # 4. 在第一列之后插入"配置原文"列，在第二列位置插入"id"列
-        report_df.insert(1, '配置原文', original_texts)
-        report_df.insert(2, '对白id', first_column_ids)
-        
-        # 5. 保存更新后的报告（使用安全保存）
-        final_file = safe_save_excel(report_df, output_file)
-        print(f"✅ 已添加配置原文和id到报告文件")
-        print(f"📊 最终报告: {len(report_df)} 行 × {len(report_df.columns)} 列")
-        print(f"📋 列名: {', '.join(report_df.columns.tolist())}")
-        if final_file != output_file:
-            print(f"💡 注意: 原文件被占用，已保存为: {final_file}")
-        
-    except Exception as e:
-        print(f"❌ 添加原文失败: {e}")
-        import traceback
-        traceback.print_exc()
+    parser = argparse.ArgumentParser(description='游戏配置文本检查工具')
+    # 未指定的参数使用配置文件中的值（见 apply_config）
+    parser.add_argument('input_file', nargs='?', default=None, help='Excel配置文件路径')
+    parser.add_argument('sheet_name', nargs='?', default=None, help='Sheet名称')
+    parser.add_argument('target_column', nargs='?', default=None, help='目标列名')
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH, help='配置文件路径（默认 config/check_config.yaml）')
+    parser.add_argument('--no-reload', action='store_true', help='运行中不重新加载配置文件')
+    parser.add_argument('--batch-size', type=int, default=None, help='批次大小')
+    parser.add_argument('--model', default=None, help='模型名称')
+    parser.add_argument('--column-index', type=int, default=None, help='列索引')
+    parser.add_argument('--scheduler', default='sequential', choices=sorted(SCHEDULERS),
+                        help='批次调度策略：sequential 按表格顺序，priority 优先检查已修改/敏感/长文本')
+    parser.add_argument('--workers', type=int, default=None, help='并发请求数')
+    parser.add_argument('--sensitive-words', default=None, help='本地敏感词表文件（每行一个词）')
+    parser.add_argument('--priority-sheets', default='', help='优先检查的Sheet名称，逗号分隔')
+    parser.add_argument('--deadline', default=None, help='截止时间（HH:MM 或 YYYY-MM-DDTHH:MM），到点前停止派发并输出报告')
+    parser.add_argument('--max-minutes', type=float, default=None, help='最长运行分钟数，与 --deadline 同时指定时取较早者')
+    parser.add_argument('--backend', default=None, choices=sorted(BACKENDS),
+                        help='推理后端：ollama（默认）或 openai（llama.cpp server、vLLM 等 /v1/chat/completions 接口）')
+    parser.add_argument('--endpoints', default=None, help='多个生成接口地址，逗号分隔（轮询分发，对冲请求发往下一个地址）')
+    parser.add_argument('--timeout', type=float, default=None, help='单次请求超时上限（秒）')
+    parser.add_argument('--fixed-timeout', action='store_true', help='使用固定超时，关闭动态超时和对冲请求')
+    parser.add_argument('--no-hedge', action='store_true', help='关闭对冲请求')
+    parser.add_argument('--no-mask', action='store_true', help='不遮罩占位符和富文本标记，原样发送给模型')
+    parser.add_argument('--response-format', default=None, choices=RESPONSE_FORMATS,
+                        help='模型输出格式：json（默认）或 compact（每个问题一行、类型用代码表示，生成更快）')
+    parser.add_argument('--cpu', action='store_true',
+                        help='CPU 运行：使用配置文件 cpu 部分的小型模型和线程设置，按核心组划分并发，默认启用 --prefilter')
+    parser.add_argument('--prefilter', action='store_true', help='本地规则预筛：只把命中错别字/虚词重复/易错成语/敏感词规则的行发送给模型')
+    parser.add_argument('--no-prefilter', action='store_true', help='--cpu 时不启用本地规则预筛')
+    parser.add_argument('--sample', default=None,
+                        help='分层抽样检查：行数（如 2000）或比例（如 2%%），只检查样本并估计全表问题率')
+    parser.add_argument('--sample-seed', type=int, default=None, help='抽样的随机种子（用于复现同一个样本）')
+    parser.add_argument('--trace', default=None,
+                        help=f'检查记录文件路径（默认 .conf_check_state/traces/ 下按时间命名的 *{TRACE_SUFFIX}，已存在时追加）')
+    parser.add_argument('--no-trace', action='store_true', help='不写入检查记录')
+    parser.add_argument('--replay', default=None, metavar='TRACE',
+                        help='回放检查记录：不调用模型，重新解析原始响应并生成报告（使用最后一次运行）')
+    parser.add_argument('--plan', action='store_true',
+                        help='试运行：读取和筛选数据后估算批次数、token 数和耗时，不调用模型、不生成报告')
+    parser.add_argument('--dedup', action='store_true',
+                        help='近似重复聚类：只有占位符、数字和角色名不同的行只检查代表行，问题投影到同组的其他行')
+    parser.add_argument('--names', default=None,
+                        help='角色名词表文件（每行一个），与 --lexicon 的名字合并：发送前遮罩，聚类时忽略名字差异')
+    parser.add_argument('--lexicon', default=None, metavar='SHEET:COL,...',
+                        help='专有名词的名称列（同一工作簿），如 NPC_CONF:name,ITEM_CONF:name（默认使用配置文件 lexicon.sources）')
+    parser.add_argument('--no-lexicon', action='store_true', help='不使用配置文件中的专有名词名称列')
+    parser.add_argument('--calibrate', action='store_true',
+                        help='先用抽样数据校准批次大小和并发数，保存为当前模型和推理服务的调优配置')
+    parser.add_argument('--max-failure-rate', type=float, default=DEFAULT_MAX_FAILURE_RATE,
+                        help=f'校准时允许的最大失败率（默认{DEFAULT_MAX_FAILURE_RATE}）')
+    parser.add_argument('--no-profile', action='store_true', help='不使用已保存的调优配置')
+    parser.add_argument('--watch', action='store_true',
+                        help='监视模式：首次检查后持续运行，工作簿保存后只检查修改过的行并更新报告')
+    parser.add_argument('--watch-interval', type=float, default=2.0, help='监视模式的轮询间隔（秒，默认2）')
+    parser.add_argument('--no-history', action='store_true',
+                        help='不读写检查历史（.conf_check_state/results.sqlite），也不跳过已忽略的问题')
+    parser.add_argument('--profile-stages', nargs='?', const='time', default=None, choices=PROFILE_MODES,
+                        metavar='MODE',
+                        help='分阶段性能剖析：输出各阶段耗时（time，默认）；cpu 另存 cProfile 的 .pstats，'
+                             'memory 另记录 tracemalloc 内存峰值，all 为全部')
+    parser.add_argument('--quiet', action='store_true',
+                        help='安静模式：不输出每个批次的日志，只保留配置、汇总和错误信息')
+    parser.add_argument('--events-fd', type=int, default=None,
+                        help='向已打开的文件描述符输出 NDJSON 进度事件（由父进程传入）')
+    parser.add_argument('--events-file', default=None, help='将 NDJSON 进度事件追加写入文件（"-" 表示标准输出）')
+    parser.add_argument('--events-socket', default=None, help='将 NDJSON 进度事件发送到 TCP 地址 host:port')
+    parser.add_argument('--format', default='xlsx',
+                        help=f"报告格式，逗号分隔（可选: {', '.join(sorted(WRITERS))}），如 jsonl,xlsx")
+    return parser
 
 if __name__ == "__main__":
-    # 解析命令行参数
-    parser = argparse.ArgumentParser(description='游戏配置文本检查工具')
-    parser.add_argument('input_file', nargs='?', default=INPUT_FILE, help='Excel配置文件路径')
-    parser.add_argument('sheet_name', nargs='?', default=SHEET_NAME, help='Sheet名称')
-    parser.add_argument('target_column', nargs='?', default=TARGET_COLUMN, help='目标列名')
-    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='批次大小')
-    parser.add_argument('--model', default=MODEL_NAME, help='模型名称')
-    parser.add_argument('--column-index', type=int, default=TARGET_COLUMN_INDEX, help='列索引')
-    
-    args = parser.parse_args()
-    
-    # 更新全局配置
-    INPUT_FILE = args.input_file
-    SHEET_NAME = args.sheet_name
-    TARGET_COLUMN = args.target_column
-    BATCH_SIZE = args.batch_size
-    MODEL_NAME = args.model
-    TARGET_COLUMN_INDEX = args.column_index
-    OUTPUT_FILE = f"{SHEET_NAME}_{TARGET_COLUMN}_Check_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+配置加载 - 读取 config/check_config.yaml 并校验
+
+配置只在启动时加载一次并缓存；长时间运行的任务中，ConfigWatcher
+定期检查配置文件的修改时间，性能相关的配置（批次大小、并发数、超时、
+推理端点）修改后在下一个批次派发前生效，不需要重启、不会丢失已加载的模型。
+"""
+import copy
+import os
+import time
+from dataclasses import dataclass, field
+
+from backends import BACKENDS
+from compact_schema import RESPONSE_FORMATS
+from lexicon import DEFAULT_MIN_LENGTH, parse_sources
+
+# 默认配置文件路径（仓库根目录下的 config/check_config.yaml）
+DEFAULT_CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "check_config.yaml"
+)
+
+# 默认模型参数（与配置文件中的 ollama.options 对应）
+DEFAULT_MODEL_OPTIONS = {
+    "temperature": 0.1,     # 低温度保证结果确定性
+    "num_ctx": 8192,        # 上下文窗口（增大以支持更长的输入）
+    "num_gpu": 99,          # 使用所有可用GPU
+    "num_predict": 4096,    # 最大生成长度（避免截断）
+    "stop": ["\n\n\n", "【待检查数据】", "现在开始检查"],  # 强制停止符
+}
+
+# 运行中可以热更新的配置项（CheckConfig 字段名）
+HOT_RELOAD_KEYS = ("batch_size", "workers", "timeout", "endpoints")
+
+
+class ConfigError(ValueError):
+    """配置文件格式或取值错误"""
+
+
+@dataclass
+class OllamaConfig:
+    url: str = "http://localhost:11434/api/generate"
+    api_url: str = "http://localhost:11434/api"
+    model: str = "qwen3:14b-q4_K_M"
+    backend: str = "ollama"
+    options: dict = field(default_factory=lambda: copy.deepcopy(DEFAULT_MODEL_OPTIONS))
+
+
+@dataclass
+class FileConfig:
+    input_file: str = "F:\\XXX.xlsx"
+    sheet_name: str = "XXX_CONF"
+    target_column: str = "XXX"
+    target_column_index: int = None
+    header_rows: list = field(default_factory=lambda: [0, 1, 2])
+
+
+@dataclass
+class CheckConfig:
+    batch_size: int = 30
+    timeout: float = 300
+    workers: int = 1
+    endpoints: list = field(default_factory=list)
+    output_dir: str = ""
+    response_format: str = "json"
+
+
+@dataclass
+class CpuConfig:
+    model: str = "qwen3:4b"         # --cpu 使用的小型量化模型
+    num_ctx: int = 4096             # CPU 上注意力计算随上下文长度增长，批次较小时不需要 8192
+    batch_size: int = 10
+    threads_per_slot: int = 8
+    slots: int = None               # 推理槽位数（None 时按 threads_per_slot 自动划分）
+
+
+@dataclass
+class RulesConfig:
+    required: list = field(default_factory=list)
+    ignore: list = field(default_factory=list)
+    avoid_styles: list = field(default_factory=list)
+    forbidden_words: list = field(default_factory=list)
+
+
+@dataclass
+class LexiconConfig:
+    sources: list = field(default_factory=list)  # 名称列 "Sheet:列名"，如 NPC_CONF:name
+    min_length: int = DEFAULT_MIN_LENGTH
+
+
+@dataclass
+class AppConfig:
+    ollama: OllamaConfig = field(default_factory=OllamaConfig)
+    file: FileConfig = field(default_factory=FileConfig)
+    check: CheckConfig = field(default_factory=CheckConfig)
+    rules: RulesConfig = field(default_factory=RulesConfig)
+    cpu: CpuConfig = field(default_factory=CpuConfig)
+    lexicon: LexiconConfig = field(default_factory=LexiconConfig)
+    path: str = ""
+    mtime: float = None
+
+    def model_options(self, **overrides):
+        """
+        构造发给 Ollama 的 options（调用方可覆盖个别参数）
+
+        Args:
+            **overrides: 需要覆盖的参数，如 num_predict=1
+
+        Returns:
+            dict: 新的 options 字典（修改不会影响配置本身）
+        """
+        options = copy.deepcopy(self.ollama.options)
+        options.update(overrides)
+        return options
+
+    def hot_values(self):
+        """返回可热更新的配置项当前值"""
+        return {key: copy.deepcopy(getattr(self.check, key)) for key in HOT_RELOAD_KEYS}
+
+
+_CACHE = {}
+
+
+def _section(data, name):
+    value = data.get(name) or {}
+    if not isinstance(value, dict):
+        raise ConfigError(f"配置项 {name} 应为字典，实际为 {type(value).__name__}")
+    return value
+
+
+def _string_list(value, name):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        raise ConfigError(f"配置项 {name} 应为列表")
+    return [str(item).strip() for item in value if item is not None and str(item).strip()]
+
+
+def _number(value, name, cast, minimum):
+    try:
+        number = cast(value)
+    except (TypeError, ValueError):
+        raise ConfigError(f"配置项 {name} 应为数字，实际为 {value!r}")
+    if number < minimum:
+        raise ConfigError(f"配置项 {name} 不能小于 {minimum}，实际为 {number}")
+    return number
+
+
+def parse_config(data, path=""):
+    """
+    将 YAML 解析结果转换为 AppConfig 并校验取值
+
+    Args:
+        data: yaml.safe_load 的结果（dict 或 None）
+        path: 配置文件路径（用于错误信息）
+
+    Returns:
+        AppConfig: 配置对象，缺少的项使用默认值
+
+    Raises:
+        ConfigError: 配置格式或取值错误
+    """
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        raise ConfigError(f"配置文件顶层应为字典: {path}")
+    config = AppConfig(path=path)
+
+    ollama = _section(data, "ollama")
+    for key in ("url", "api_url", "model"):
+        if ollama.get(key):
+            setattr(config.ollama, key, str(ollama[key]))
+    if ollama.get("backend"):
+        backend = str(ollama["backend"]).strip().lower()
+        if backend not in BACKENDS:
+            raise ConfigError(f"配置项 ollama.backend 应为 {' / '.join(sorted(BACKENDS))}，实际为 {backend!r}")
+        config.ollama.backend = backend
+    options = ollama.get("options")
+    if options is not None:
+        if not isinstance(options, dict):
+            raise ConfigError("配置项 ollama.options 应为字典")
+        config.ollama.options.update(options)
+
+    file_section = _section(data, "file")
+    for key in ("input_file", "sheet_name", "target_column"):
+        if file_section.get(key):
+            setattr(config.file, key, str(file_section[key]))
+    if file_section.get("target_column_index") is not None:
+        config.file.target_column_index = _number(
+            file_section["target_column_index"], "file.target_column_index", int, 0)
+    header_rows = file_section.get("header_rows")
+    if header_rows is not None:
+        if isinstance(header_rows, int):
+            header_rows = [header_rows]
+        if not isinstance(header_rows, list) or not header_rows:
+            raise ConfigError("配置项 file.header_rows 应为整数或整数列表")
+        config.file.header_rows = [_number(r, "file.header_rows", int, 0) for r in header_rows]
+
+    check = _section(data, "check")
+    if check.get("batch_size") is not None:
+        config.check.batch_size = _number(check["batch_size"], "check.batch_size", int, 1)
+    if check.get("timeout") is not None:
+        config.check.timeout = _number(check["timeout"], "check.timeout", float, 1)
+    if check.get("workers") is not None:
+        config.check.workers = _number(check["workers"], "check.workers", int, 1)
+    config.check.endpoints = _string_list(check.get("endpoints"), "check.endpoints")
+    if check.get("response_format") is not None:
+        response_format = str(check["response_format"]).strip().lower()
+        if response_format not in RESPONSE_FORMATS:
+            raise ConfigError(f"配置项 check.response_format 应为 {' / '.join(RESPONSE_FORMATS)}，实际为 {response_format!r}")
+        config.check.response_format = response_format
+    output = check.get("output") or {}
+    if not isinstance(output, dict):
+        raise ConfigError("配置项 check.output 应为字典")
+    config.check.output_dir = str(output.get("dir") or "")
+
+    cpu = _section(data, "cpu")
+    if cpu.get("model"):
+        config.cpu.model = str(cpu["model"])
+    for key, minimum in (("num_ctx", 512), ("batch_size", 1), ("threads_per_slot", 1)):
+        if cpu.get(key) is not None:
+            setattr(config.cpu, key, _number(cpu[key], f"cpu.{key}", int, minimum))
+    if cpu.get("slots") is not None:
+        config.cpu.slots = _number(cpu["slots"], "cpu.slots", int, 1)
+
+    rules = _section(data, "rules")
+    for key in ("required", "ignore", "avoid_styles", "forbidden_words"):
+        setattr(config.rules, key, _string_list(rules.get(key), f"rules.{key}"))
+
+    lexicon = _section(data, "lexicon")
+    config.lexicon.sources = _string_list(lexicon.get("sources"), "lexicon.sources")
+    try:
+        parse_sources(config.lexicon.sources)
+    except ValueError as e:
+        raise ConfigError(f"配置项 lexicon.sources: {e}") from None
+    if lexicon.get("min_length") is not None:
+        config.lexicon.min_length = _number(lexicon["min_length"], "lexicon.min_length", int, 1)
+    return config
+
+
+def load_config(path=DEFAULT_CONFIG_PATH, use_cache=True):
+    """
+    加载配置文件（按路径和修改时间缓存）
+
+    Args:
+        path: 配置文件路径；文件不存在时返回默认配置
+        use_cache: 文件未修改时直接返回上次的结果
+
+    Returns:
+        AppConfig: 配置对象
+
+    Raises:
+        ConfigError: 配置文件无法解析或取值错误
+    """
+    if not path or not os.path.exists(path):
+        return AppConfig(path=path or "")
+    mtime = os.path.getmtime(path)
+    cached = _CACHE.get(path)
+    if use_cache and cached is not None and cached.mtime == mtime:
+        return cached
+
+    import yaml
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f)
+    except yaml.YAMLError as e:
+        raise ConfigError(f"配置文件格式错误 {path}: {e}")
+    config = parse_config(data, path)
+    config.mtime = mtime
+    _CACHE[path] = config
+    return config
+
+
+class ConfigWatcher:
+    """
+    配置文件热更新：每隔 interval 秒检查一次修改时间，
+    返回与上次加载相比发生变化的性能配置项
+
+    用法：
+        watcher = ConfigWatcher(config)
+        changes = watcher.poll()   # {"workers": 4} 或 {}
+    """
+
+    def __init__(self, config, interval=5.0, clock=time.monotonic):
+        self.config = config
+        self.interval = interval
+        self.clock = clock
+        self._last_check = clock()
+        self._values = config.hot_values()
+
+    def poll(self, force=False):
+        """
+        检查配置文件是否被修改
+
+        Returns:
+            dict: 变化的配置项 {字段名: 新值}；未修改或新配置无效时返回空字典
+        """
+        now = self.clock()
+        if not force and now - self._last_check < self.interval:
+            return {}
+        self._last_check = now
+        path = self.config.path
+        if not path or not os.path.exists(path) or os.path.getmtime(path) == self.config.mtime:
+            return {}
+        try:
+            config = load_config(path)
+        except ConfigError as e:
+            print(f"⚠️ 配置文件修改后无法加载，继续使用原配置: {e}")
+            # 记录修改时间，文件再次修改前不重复报错
+            self.config.mtime = os.path.getmtime(path)
+            return {}
+        values = config.hot_values()
+        changes = {key: value for key, value in values.items() if value != self._values.get(key)}
+        self.config = config
+        self._values = values
+        return changes
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+CPU 运行配置 - 没有 GPU 的构建机上的模型参数和推理槽位划分
+
+默认的模型参数（num_gpu: 99、8192 上下文、14B 模型）是为显卡准备的，在纯 CPU 的机器上
+几乎无法使用。--cpu 改用较小的量化模型和较短的上下文，按 NUMA 节点 / 核心组划分推理槽位：
+
+- 只有一个推理服务地址时，num_thread 为全部可用核心，并发数为槽位数
+  （需要 OLLAMA_NUM_PARALLEL >= 槽位数，多个请求在同一个模型实例中并行解码）
+- 配置了多个地址（每个核心组启动一个绑定核心的 Ollama 实例，见 launch_commands）时，
+  每个实例使用一个槽位的线程数，并发数为地址数，避免跨 NUMA 节点访问内存
+"""
+import os
+
+NODE_DIR = "/sys/devices/system/node"
+DEFAULT_THREADS_PER_SLOT = 8  # llama.cpp 在 CPU 上超过约8个线程后单请求几乎不再加速
+DEFAULT_BASE_PORT = 11435
+
+
+def parse_cpulist(text):
+    """
+    解析 Linux cpulist 格式
+
+    Args:
+        text: 如 "0-3,8-11"
+
+    Returns:
+        list: CPU 编号列表
+    """
+    cpus = []
+    for part in str(text).strip().split(","):
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        cpus.extend(range(int(start), int(end or start) + 1))
+    return cpus
+
+
+def format_cpulist(cpus):
+    """CPU 编号列表转换为 cpulist 格式（numactl --physcpubind 使用）"""
+    cpus = sorted(cpus)
+    parts = []
+    start = prev = None
+    for cpu in cpus + [None]:
+        if start is not None and cpu == prev + 1:
+            prev = cpu
+            continue
+        if start is not None:
+            parts.append(f"{start}-{prev}" if prev > start else str(start))
+        start = prev = cpu
+    return ",".join(parts)
+
+
+def available_cpus():
+    """当前进程可以使用的 CPU（容器/构建机限制了 CPU 亲和性时只返回允许的核心）"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cpu_groups(node_dir=NODE_DIR, allowed=None):
+    """
+    按 NUMA 节点分组可用的 CPU
+
+    Args:
+        node_dir: sysfs 中 NUMA 节点目录（非 Linux 或读取失败时视为一个节点）
+        allowed: 可用的 CPU 编号，默认为 available_cpus()
+
+    Returns:
+        list: [(节点编号, [CPU 编号])]，只包含有可用 CPU 的节点
+    """
+    allowed = set(available_cpus() if allowed is None else allowed)
+    groups = []
+    try:
+        names = sorted((n for n in os.listdir(node_dir) if n.startswith("node") and n[4:].isdigit()),
+                       key=lambda n: int(n[4:]))
+        for name in names:
+            with open(os.path.join(node_dir, name, "cpulist"), "r", encoding="utf-8") as f:
+                cpus = [cpu for cpu in parse_cpulist(f.read()) if cpu in allowed]
+            if cpus:
+                groups.append((int(name[4:]), cpus))
+    except (OSError, ValueError):
+        groups = []
+    return groups or [(0, sorted(allowed))]
+
+
+def plan_slots(groups, threads_per_slot=DEFAULT_THREADS_PER_SLOT, slots=None):
+    """
+    将核心组划分为推理槽位（槽位不跨 NUMA 节点）
+
+    Args:
+        groups: cpu_groups() 的结果
+        threads_per_slot: 每个槽位的线程数
+        slots: 指定槽位总数（None 时按 threads_per_slot 自动划分）
+
+    Returns:
+        list: [{"node": 节点编号, "cpus": [CPU 编号]}]
+    """
+    threads_per_slot = max(1, int(threads_per_slot))
+    if slots is None:
+        counts = [max(1, len(cpus) // threads_per_slot) for _, cpus in groups]
+    else:
+        # 按各节点的核心数比例分配槽位，每个节点至少一个
+        slots = max(len(groups), int(slots))
+        total = sum(len(cpus) for _, cpus in groups)
+        counts = [max(1, round(slots * len(cpus) / total)) for _, cpus in groups]
+    plan = []
+    for (node, cpus), count in zip(groups, counts):
+        count = min(count, len(cpus))
+        size, extra = divmod(len(cpus), count)
+        start = 0
+        for i in range(count):
+            end = start + size + (1 if i < extra else 0)
+            plan.append({"node": node, "cpus": cpus[start:end]})
+            start = end
+    return plan
+
+
+def cpu_options(plan, num_ctx, endpoints=1):
+    """
+    CPU 运行的模型参数
+
+    Args:
+        plan: plan_slots() 的结果
+        num_ctx: 上下文长度
+        endpoints: 推理服务地址数（大于1时视为每个槽位一个绑定核心的实例）
+
+    Returns:
+        dict: 覆盖到 ollama.options 的参数
+    """
+    if endpoints > 1:
+        threads = min(len(slot["cpus"]) for slot in plan)
+    else:
+        threads = sum(len(slot["cpus"]) for slot in plan)
+    return {"num_gpu": 0, "num_thread": max(1, threads), "num_ctx": num_ctx}
+
+
+def launch_commands(plan, base_port=DEFAULT_BASE_PORT):
+    """
+    每个槽位启动一个绑定核心的 Ollama 实例的命令
+
+    多个 NUMA 节点时用 numactl 同时绑定核心和本节点内存，否则用 taskset 绑定核心。
+
+    Returns:
+        tuple: (命令列表, --endpoints 参数值)
+    """
+    numa = len({slot["node"] for slot in plan}) > 1
+    commands, endpoints = [], []
+    for i, slot in enumerate(plan):
+        port = base_port + i
+        cpus = format_cpulist(slot["cpus"])
+        bind = f"numactl --physcpubind={cpus} --membind={slot['node']}" if numa else f"taskset -c {cpus}"
+        commands.append(f"OLLAMA_HOST=127.0.0.1:{port} OLLAMA_NUM_PARALLEL=1 {bind} ollama serve")
+        endpoints.append(f"http://127.0.0.1:{port}/api/generate")
+    return commands, ",".join(endpoints)
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+近似重复聚类 - 同类模板文本只请求一次模型
+
+游戏文本中有大量几乎相同的行，如 "击败{0}个敌人" 的各种变体、只有NPC名字
+不同的同一句对白。这里在本地（不需要网络）去掉占位符、富文本标签、数字和角色名，
+把归一化后相同的行归为一组，每组只把代表行发送给模型；代表行的问题在不涉及
+差异片段时投影到组内其他行，涉及差异片段或无法定位的行重新排队交给模型检查。
+差异中有实际文字的行可能有自己的错别字，不归为一组。
+"""
+import difflib
+import re
+
+from lexicon import NameMatcher
+
+# 占位符与富文本标记：{0} {name} %s %d <color=#fff>...</color> [b] $NAME$ 以及数字
+PLACEHOLDER_PATTERN = re.compile(
+    r"\{[^{}]*\}|%[-+ 0#]*\d*(?:\.\d+)?[sdif]|<[^<>]+>|\[[^\[\]]*\]|\$\w+\$|\d+(?:\.\d+)?"
+)
+MASK_CHAR = "#"
+
+# 问题说明中引用原文的写法：'的'、"的"、“的”、‘的’、「的」、的→地
+_QUOTE_PATTERN = re.compile(r"'([^']+)'|\"([^\"]+)\"|“([^”]+)”|‘([^’]+)’|「([^」]+)」|『([^』]+)』")
+_ARROW_PATTERN = re.compile(r"([^\s'\"“”‘’「」，。：:→]+)\s*(?:→|->|=>)")
+
+
+def normalize(text, names=()):
+    """
+    去掉占位符、标签、数字和角色名，用于聚类比较
+
+    Args:
+        text: 原文
+        names: 角色名列表或 lexicon.NameMatcher（名字较多时使用匹配器）
+
+    Returns:
+        str: 归一化后的文本（可变部分替换为 MASK_CHAR）
+    """
+    text = PLACEHOLDER_PATTERN.sub(MASK_CHAR, str(text))
+    if isinstance(names, NameMatcher):
+        text = names.replace(text, MASK_CHAR)
+    else:
+        for name in names:
+            if name:
+                text = text.replace(name, MASK_CHAR)
+    return re.sub(r"\s+", "", text)
+
+
+def cluster_rows(rows, names=()):
+    """
+    将归一化后相同的行归为一组，代表行的 members 记录组内其他行
+
+    只按归一化文本精确分组：差异中有实际文字的行即使很相似也可能有自己的错别字，
+    仍需单独检查，合并后并不能减少请求。
+
+    Args:
+        rows: RowItem 列表（按表格顺序）
+        names: 角色名列表或 lexicon.NameMatcher（比较前去掉）
+
+    Returns:
+        list: 需要发送给模型的行（代表行和未分组的行），保持原有顺序；代表行即组内最靠前的行
+    """
+    if names and not isinstance(names, NameMatcher):
+        names = NameMatcher(names)
+    groups = {}
+    representatives = []
+    for row in rows:
+        representative = groups.setdefault(normalize(row.text, names), row)
+        if representative is row:
+            row.members = []
+            representatives.append(row)
+        else:
+            representative.members.append(row)
+    return representatives
+
+
+def _differing_spans(source, target):
+    """返回 source 中与 target 不同的片段 [(start, end)]"""
+    matcher = difflib.SequenceMatcher(None, source, target, autojunk=False)
+    return [(i1, max(i2, i1 + 1)) for tag, i1, i2, _, _ in matcher.get_opcodes() if tag != "equal"]
+
+
+def issue_spans(text, issue, suggestion):
+    """
+    定位问题在原文中涉及的片段
+
+    优先使用修改建议与原文的差异（建议是整句改写时），
+    其次使用问题说明中引用的原文片段。
+
+    Returns:
+        list: [(start, end)]；无法定位时返回空列表
+    """
+    suggestion = "" if suggestion is None else str(suggestion)
+    if suggestion and suggestion != text and difflib.SequenceMatcher(None, text, suggestion).ratio() >= 0.6:
+        return _differing_spans(text, suggestion)
+
+    spans = []
+    fragments = [g for m in _QUOTE_PATTERN.finditer(str(issue)) for g in m.groups() if g]
+    fragments += _ARROW_PATTERN.findall(str(issue))
+    for fragment in fragments:
+        start = text.find(fragment)
+        while start != -1:
+            spans.append((start, start + len(fragment)))
+            start = text.find(fragment, start + 1)
+    return spans
+
+
+def _map_position(matcher, pos):
+    """将代表行中的位置映射到成员行，位置不在相同片段内时返回None"""
+    for a, b, size in matcher.get_matching_blocks():
+        if a <= pos < a + size or (size and pos == a + size):
+            return b + (pos - a)
+    return None
+
+
+def project_issues(representative, member, issues, names=()):
+    """
+    将代表行的问题投影到簇内的成员行
+
+    Args:
+        representative: 代表行 RowItem
+        member: 成员行 RowItem
+        issues: 代表行的问题列表 [{"line_no", "issue", "suggestion"}]
+        names: 聚类时使用的角色名列表或 lexicon.NameMatcher
+
+    Returns:
+        list: 成员行的问题列表；差异片段中有实际文字、有问题涉及差异片段或无法定位时返回None（需要单独检查）
+    """
+    source, target = str(representative.text), str(member.text)
+    # 只有归一化后完全相同（差异都在占位符、数字和角色名中）才能沿用代表行的结果，
+    # 否则差异片段中可能有成员行自己的错误，即使代表行没有问题也要单独检查
+    if normalize(source, names) != normalize(target, names):
+        return None
+    differing = _differing_spans(source, target)
+    matcher = difflib.SequenceMatcher(None, source, target, autojunk=False)
+    projected = []
+    for item in issues:
+        spans = issue_spans(source, item.get("issue", ""), item.get("suggestion", ""))
+        if not spans:
+            return None
+        if any(s < de and ds < e for s, e in spans for ds, de in differing):
+            return None
+
+        suggestion = item.get("suggestion", "")
+        if suggestion and suggestion != source and \
+                difflib.SequenceMatcher(None, source, str(suggestion)).ratio() >= 0.6:
+            # 整句改写：把同样的修改应用到成员行
+            suggestion = _apply_edits(source, str(suggestion), target, matcher)
+            if suggestion is None:
+                return None
+        projected.append({
+            "line_no": member.excel_row,
+            "issue": f"{item.get('issue', '')}（同类文本，参照第{representative.excel_row}行）",
+            "suggestion": suggestion,
+        })
+    return projected
+
+
+def _apply_edits(source, revised, target, matcher):
+    """将 source→revised 的修改应用到 target，修改位置无法对应时返回None"""
+    edits = difflib.SequenceMatcher(None, source, revised, autojunk=False).get_opcodes()
+    result = target
+    # 从后往前替换，前面的位置不受影响
+    for tag, i1, i2, j1, j2 in reversed(edits):
+        if tag == "equal":
+            continue
+        start = _map_position(matcher, i1)
+        end = _map_position(matcher, i2) if i2 > i1 else start
+        if start is None or end is None or end - start != i2 - i1:
+            return None
+        result = result[:start] + revised[j1:j2] + result[end:]
+    return result
+
+
+def project_batch(rows, issues, names=()):
+    """
+    批次检查完成后，将代表行的问题投影到各自的成员行
+
+    Args:
+        rows: 批次中的 RowItem 列表
+        issues: 模型返回的问题列表
+        names: 聚类时使用的角色名列表或 lexicon.NameMatcher
+
+    Returns:
+        tuple: (投影得到的问题列表, 已覆盖的成员行列表, 需要单独检查的成员行列表)
+    """
+    if names and not isinstance(names, NameMatcher):
+        names = NameMatcher(names)
+    by_line = {}
+    for item in issues:
+        if not isinstance(item, dict):
+            continue
+        try:
+            by_line.setdefault(int(item.get("line_no")), []).append(item)
+        except (TypeError, ValueError):
+            continue
+
+    projected, covered, recheck = [], [], []
+    for row in rows:
+        for member in row.members:
+            member_issues = project_issues(row, member, by_line.get(row.excel_row, []), names)
+            if member_issues is None:
+                recheck.append(member)
+            else:
+                covered.append(member)
+                projected.extend(member_issues)
+    return projected, covered, recheck
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+检查结果存储 - 紧凑的列式问题列表
+
+大表检查可能产生数万条问题，逐条保存 LLM 返回的字典再转成 DataFrame 非常占内存。
+这里按列存储：行号用 array，Sheet/问题类型/处理状态用字符串池编码，
+原文直接引用待检查行的字符串对象，不重复保存。
+"""
+import csv
+import json
+from array import array
+
+# 处理状态
+STATUS_PENDING = "待处理"
+STATUS_FIXED = "已修复"
+STATUS_IGNORED = "忽略"
+
+# 报告列（中文表头）与字段的对应关系
+REPORT_COLUMNS = ["行号", "配置原文", "对白id", "问题说明", "修改建议", "处理状态"]
+COLUMN_FIELDS = {
+    "Sheet": "sheet",
+    "行号": "row",
+    "配置原文": "text",
+    "对白id": "row_id",
+    "问题类型": "issue_type",
+    "问题说明": "issue",
+    "修改建议": "suggestion",
+    "处理状态": "status",
+}
+JSONL_FIELDS = ["sheet", "row", "row_id", "text", "issue_type", "issue", "suggestion", "status"]
+
+
+def split_issue(issue):
+    """
+    拆分问题说明为 (问题类型, 具体描述)
+
+    Args:
+        issue: 如 "错别字：'的'应改为'地'"
+
+    Returns:
+        tuple: ("错别字", "'的'应改为'地'")；没有类型前缀时类型为空字符串
+    """
+    issue = "" if issue is None else str(issue).strip()
+    for sep in ("：", ":"):
+        head, found, tail = issue.partition(sep)
+        # 类型前缀通常很短，过长说明冒号出现在描述中
+        if found and 0 < len(head) <= 12:
+            return head.strip(), tail.strip()
+    return "", issue
+
+
+class StringPool:
+    """
+    字符串池：重复出现的字符串只保存一份，列中保存编码
+    """
+    __slots__ = ("values", "_codes")
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._codes[value] = code
+        return code
+
+    def lookup(self, value):
+        """返回字符串的编码，不存在时返回None"""
+        return self._codes.get(value)
+
+
+class Finding:
+    """
+    单条问题的只读视图（迭代和导出时生成）
+    """
+    __slots__ = ("index", "sheet", "row", "row_id", "text", "issue_type", "detail", "suggestion", "status")
+
+    def __init__(self, index, sheet, row, row_id, text, issue_type, detail, suggestion, status):
+        self.index = index
+        self.sheet = sheet
+        self.row = row
+        self.row_id = row_id
+        self.text = text
+        self.issue_type = issue_type
+        self.detail = detail
+        self.suggestion = suggestion
+        self.status = status
+
+    @property
+    def issue(self):
+        """完整问题说明（类型：描述）"""
+        return f"{self.issue_type}：{self.detail}" if self.issue_type else self.detail
+
+    def get(self, field):
+        return getattr(self, field)
+
+    def to_dict(self):
+        return {field: self.get(field) for field in JSONL_FIELDS}
+
+
+class FindingsStore:
+    """
+    列式问题存储
+
+    用法：
+        store = FindingsStore()
+        store.add("TASK_CONF", 260, "1001", "原文", "错别字：xx", "建议")
+        for finding in store.iter(store.sorted_indices()):
+            ...
+        store.to_excel("report.xlsx")
+    """
+
+    def __init__(self):
+        self._sheets = StringPool()
+        self._types = StringPool()
+        self._statuses = StringPool()
+        self.sheet_codes = array("H")
+        self.rows = array("l")
+        self.row_ids = []
+        self.texts = []
+        self.type_codes = array("H")
+        self.details = []
+        self.suggestions = []
+        self.status_codes = array("B")
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, sheet, row, row_id, text, issue, suggestion, status=STATUS_PENDING):
+        """
+        添加一条问题
+
+        Returns:
+            int: 新问题的序号
+        """
+        issue_type, detail = split_issue(issue)
+        self.sheet_codes.append(self._sheets.code(sheet or ""))
+        self.rows.append(int(row))
+        self.row_ids.append(row_id or "")
+        self.texts.append(text or "")
+        self.type_codes.append(self._types.code(issue_type))
+        self.details.append(detail)
+        self.suggestions.append("" if suggestion is None else str(suggestion))
+        self.status_codes.append(self._statuses.code(status))
+        return len(self.rows) - 1
+
+    def add_llm_issues(self, issues, rows_by_excel_row, sheet=""):
+        """
+        添加 LLM 返回的问题列表，并从待检查行中补全原文和id
+
+        Args:
+            issues: [{"line_no": 260, "issue": "...", "suggestion": "..."}]
+            rows_by_excel_row: {excel_row: RowItem}
+            sheet: 默认Sheet名称（行信息中没有时使用）
+
+        Returns:
+            list: 新增问题的序号列表
+        """
+        added = []
+        for item in issues:
+            if not isinstance(item, dict):
+                continue
+            try:
+                line_no = int(item.get("line_no"))
+            except (TypeError, ValueError):
+                line_no = 0
+            row = rows_by_excel_row.get(line_no)
+            added.append(self.add(
+                row.sheet if row is not None and row.sheet else sheet,
+                line_no,
+                row.row_id if row is not None else "",
+                row.text if row is not None else "",
+                item.get("issue", ""),
+                item.get("suggestion", ""),
+            ))
+        return added
+
+    def get(self, index):
+        """获取指定序号的问题"""
+        return Finding(
+            index,
+            self._sheets.values[self.sheet_codes[index]],
+            self.rows[index],
+            self.row_ids[index],
+            self.texts[index],
+            self._types.values[self.type_codes[index]],
+            self.details[index],
+            self.suggestions[index],
+            self._statuses.values[self.status_codes[index]],
+        )
+
+    def iter(self, indices=None):
+        """按给定序号（默认全部）迭代问题"""
+        if indices is None:
+            indices = range(len(self))
+        for index in indices:
+            yield self.get(index)
+
+    __iter__ = iter
+
+    def set_status(self, index, status):
+        self.status_codes[index] = self._statuses.code(status)
+
+    def issue_types(self):
+        """返回各问题类型及数量"""
+        counts = {}
+        for code in self.type_codes:
+            counts[code] = counts.get(code, 0) + 1
+        return {self._types.values[code]: n for code, n in counts.items()}
+
+    # ---------- 筛选与排序 ----------
+
+    def filter(self, sheet=None, issue_type=None, status=None, rows=None, indices=None):
+        """
+        按条件筛选问题
+
+        Args:
+            sheet: Sheet名称
+            issue_type: 问题类型（如 "错别字"）
+            status: 处理状态
+            rows: 行号集合
+            indices: 在这些序号中筛选（默认全部）
+
+        Returns:
+            list: 符合条件的问题序号
+        """
+        candidates = range(len(self)) if indices is None else indices
+        # 字符串条件先转换为编码，比较整数即可
+        checks = []
+        for pool, column, value in (
+            (self._sheets, self.sheet_codes, sheet),
+            (self._types, self.type_codes, issue_type),
+            (self._statuses, self.status_codes, status),
+        ):
+            if value is not None:
+                code = pool.lookup(value)
+                if code is None:
+                    return []
+                checks.append((column, code))
+        row_set = set(rows) if rows is not None else None
+        result = []
+        for i in candidates:
+            if row_set is not None and self.rows[i] not in row_set:
+                continue
+            if all(column[i] == code for column, code in checks):
+                result.append(i)
+        return result
+
+    def sorted_indices(self, key="row", indices=None, reverse=False):
+        """
+        返回排序后的问题序号
+
+        Args:
+            key: row（Sheet+行号）/ issue_type / status
+        """
+        candidates = list(range(len(self)) if indices is None else indices)
+        if key == "row":
+            sheets = self._sheets.values
+            sort_key = lambda i: (sheets[self.sheet_codes[i]], self.rows[i], i)  # noqa: E731
+        elif key == "issue_type":
+            types = self._types.values
+            sort_key = lambda i: (types[self.type_codes[i]], self.rows[i], i)  # noqa: E731
+        elif key == "status":
+            statuses = self._statuses.values
+            sort_key = lambda i: (statuses[self.status_codes[i]], self.rows[i], i)  # noqa: E731
+        else:
+            raise ValueError(f"不支持的排序字段: {key}")
+        return sorted(candidates, key=sort_key, reverse=reverse)
+
+    # ---------- 导出 ----------
+
+    def iter_rows(self, columns=None, indices=None):
+        """按报告列顺序逐行生成单元格值"""
+        columns = columns or REPORT_COLUMNS
+        fields = [COLUMN_FIELDS[c] for c in columns]
+        for finding in self.iter(indices):
+            yield [finding.get(field) for field in fields]
+
+    def to_columns(self, fields=None, indices=None):
+        """
+        按列导出（用于 parquet 等列式格式）
+
+        Returns:
+            dict: {字段名: 值列表}
+        """
+        fields = fields or JSONL_FIELDS
+        columns = {field: [] for field in fields}
+        for finding in self.iter(indices):
+            for field in fields:
+                columns[field].append(finding.get(field))
+        return columns
+
+    def to_csv(self, file_path, columns=None, indices=None):
+        """导出为CSV（utf-8-sig，Excel可直接打开）"""
+        columns = columns or REPORT_COLUMNS
+        with open(file_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(self.iter_rows(columns, indices))
+        return file_path
+
+    def to_jsonl(self, file_path, indices=None):
+        """导出为JSONL，每行一条问题"""
+        with open(file_path, "w", encoding="utf-8") as f:
+            for finding in self.iter(indices):
+                f.write(json.dumps(finding.to_dict(), ensure_ascii=False))
+                f.write("\n")
+        return file_path
+
+    def to_excel(self, file_path, columns=None, indices=None, sheet_name="Sheet1"):
+        """导出为Excel（openpyxl 只写模式，不经过DataFrame）"""
+        from openpyxl import Workbook
+
+        columns = columns or REPORT_COLUMNS
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(sheet_name)
+        ws.append(columns)
+        for values in self.iter_rows(columns, indices):
+            ws.append(values)
+        wb.save(file_path)
+        return file_path
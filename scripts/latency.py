@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+请求延迟统计 - 为每个推理端点维护滚动延迟分位数
+
+超时时间不再固定为300秒，而是根据同一端点、相近提示词长度的历史延迟
+（p99）动态计算；超过 p99 仍未返回的请求会触发对冲请求。
+"""
+import math
+import threading
+from collections import deque
+
+WINDOW_SIZE = 64          # 每个分桶保留的最近样本数
+MIN_SAMPLES = 8           # 样本数不足时不计算分位数
+TIMEOUT_FACTOR = 3.0      # 超时时间 = p99 × 系数
+MIN_TIMEOUT = 30.0        # 动态超时的下限（秒）
+MIN_BUCKET_TOKENS = 256   # 最小分桶（token数）
+
+
+def estimate_tokens(text):
+    """
+    粗略估算文本的 token 数
+
+    中文字符按1个token计，其他字符按4个字符1个token计（Qwen等BPE分词器的经验值）
+
+    Args:
+        text: 文本
+
+    Returns:
+        int: 估算的 token 数
+    """
+    if not text:
+        return 0
+    cjk = sum(1 for c in text if ord(c) > 0x2E80)
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def token_bucket(tokens):
+    """将 token 数归入2的幂次分桶，相近大小的批次共享统计"""
+    tokens = max(int(tokens), MIN_BUCKET_TOKENS)
+    return 1 << math.ceil(math.log2(tokens))
+
+
+def percentile(values, q):
+    """
+    计算分位数（线性插值）
+
+    Args:
+        values: 数值列表
+        q: 分位（0-100）
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100.0
+    low = int(math.floor(pos))
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+class LatencyTracker:
+    """
+    按 (端点, token分桶) 记录请求耗时的滚动窗口，线程安全
+    """
+
+    def __init__(self, window=WINDOW_SIZE, min_samples=MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, tokens, seconds):
+        """记录一次成功请求的耗时"""
+        key = (endpoint, token_bucket(tokens))
+        with self._lock:
+            if key not in self._samples:
+                self._samples[key] = deque(maxlen=self.window)
+            self._samples[key].append(float(seconds))
+
+    def samples(self, endpoint, tokens):
+        """
+        获取用于估算的样本：优先使用同分桶样本，
+        不足时用该端点全部样本按分桶大小比例换算
+        """
+        bucket = token_bucket(tokens)
+        with self._lock:
+            exact = list(self._samples.get((endpoint, bucket), ()))
+            if len(exact) >= self.min_samples:
+                return exact
+            scaled = []
+            for (ep, other_bucket), values in self._samples.items():
+                if ep == endpoint:
+                    ratio = bucket / other_bucket
+                    scaled.extend(v * ratio for v in values)
+        return scaled if len(scaled) >= self.min_samples else []
+
+    def quantile(self, endpoint, tokens, q):
+        """返回指定分位的延迟，样本不足时返回None"""
+        return percentile(self.samples(endpoint, tokens), q)
+
+    def timeout_for(self, endpoint, tokens, default):
+        """
+        计算请求超时时间
+
+        Args:
+            endpoint: 端点地址
+            tokens: 提示词估算 token 数
+            default: 固定超时（样本不足时使用，同时作为上限）
+
+        Returns:
+            float: 超时秒数
+        """
+        p99 = self.quantile(endpoint, tokens, 99)
+        if p99 is None:
+            return float(default)
+        return min(float(default), max(MIN_TIMEOUT, p99 * TIMEOUT_FACTOR))
+
+    def hedge_delay(self, endpoint, tokens):
+        """超过该时间（p99）仍未返回时发送对冲请求，样本不足时返回None"""
+        return self.quantile(endpoint, tokens, 99)
+
+    def summary(self):
+        """
+        返回各端点的延迟概况
+
+        Returns:
+            dict: {endpoint: {"count": n, "p50": s, "p99": s}}
+        """
+        with self._lock:
+            by_endpoint = {}
+            for (endpoint, _), values in self._samples.items():
+                by_endpoint.setdefault(endpoint, []).extend(values)
+        return {
+            endpoint: {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p99": percentile(values, 99),
+            }
+            for endpoint, values in by_endpoint.items()
+        }
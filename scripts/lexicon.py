@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+专有名词词库 - 从工作簿的名称表中收集角色、物品、地点、技能名
+
+提示词要求模型忽略游戏内的名字，但模型并不知道哪些是名字：既会在名字上浪费推理，
+也会把生僻的名字当作错别字报告。词库从同一工作簿中指定的名称列（配置文件
+lexicon.sources，如 NPC_CONF:name、ITEM_CONF:name）收集名字，编译为一个匹配器，
+在一次运行中共用：
+
+- 遮罩：与占位符一起替换为 §N 短标记后发送（--no-mask 时在提示词中列出本批次出现的名字）
+- 过滤：模型报告的问题只涉及名字时丢弃
+- 聚类：近似重复聚类时忽略名字差异
+
+名称列通过 SheetIndex 读取，按工作簿版本缓存，文件未修改时不再读取 Excel。
+"""
+import re
+
+DEFAULT_MIN_LENGTH = 2  # 单字名字误匹配太多
+MAX_NAME_LENGTH = 16  # 更长的单元格通常是描述文本而不是名字
+_NOT_NAME = re.compile(r"[\s{}<>\[\]%$§\\，。！？、；：,.!?;:\"“”'‘’（）()]")
+
+
+def parse_sources(value):
+    """
+    解析名称列配置
+
+    Args:
+        value: "NPC_CONF:name,ITEM_CONF:name" 或列表 ["NPC_CONF:name", ...]
+
+    Returns:
+        list: [(Sheet, 列名)]
+
+    Raises:
+        ValueError: 缺少 Sheet 或列名
+    """
+    items = value.split(",") if isinstance(value, str) else list(value or [])
+    sources = []
+    for item in items:
+        item = str(item).strip()
+        if not item:
+            continue
+        sheet, sep, column = item.rpartition(":")
+        if not sep or not sheet.strip() or not column.strip():
+            raise ValueError(f"名称列格式应为 Sheet:列名，实际为 {item!r}")
+        sources.append((sheet.strip(), column.strip()))
+    return sources
+
+
+def is_name(text, min_length=DEFAULT_MIN_LENGTH):
+    """名称列中的单元格是否可以作为名字（排除描述文本、带标记和标点的内容）"""
+    text = str(text).strip()
+    return min_length <= len(text) <= MAX_NAME_LENGTH and not _NOT_NAME.search(text) and not text.isdigit()
+
+
+class NameMatcher:
+    """
+    名字匹配器：按首字分组，每个位置优先匹配最长的名字，结果互不重叠
+
+    Args:
+        names: 名字列表
+    """
+
+    def __init__(self, names=()):
+        self.names = sorted({str(name).strip() for name in names if str(name).strip()})
+        self._by_first = {}
+        for name in sorted(self.names, key=len, reverse=True):
+            self._by_first.setdefault(name[0], []).append(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __bool__(self):
+        return bool(self.names)
+
+    def finditer(self, text):
+        """
+        查找文本中的名字
+
+        Yields:
+            tuple: (起始位置, 结束位置, 名字)
+        """
+        by_first = self._by_first
+        i, length = 0, len(text)
+        while i < length:
+            candidates = by_first.get(text[i])
+            if candidates:
+                for name in candidates:
+                    if text.startswith(name, i):
+                        yield i, i + len(name), name
+                        i += len(name)
+                        break
+                else:
+                    i += 1
+            else:
+                i += 1
+
+    def names_in(self, text):
+        """文本中出现的名字（按出现顺序去重）"""
+        return list(dict.fromkeys(name for _, _, name in self.finditer(str(text))))
+
+    def replace(self, text, repl):
+        """
+        替换文本中的名字
+
+        Args:
+            text: 原文
+            repl: 替换字符串，或 repl(名字) -> 替换字符串
+
+        Returns:
+            str: 替换后的文本
+        """
+        text = str(text)
+        parts, last = [], 0
+        for start, end, name in self.finditer(text):
+            parts.append(text[last:start])
+            parts.append(repl(name) if callable(repl) else repl)
+            last = end
+        if not parts:
+            return text
+        parts.append(text[last:])
+        return "".join(parts)
+
+    def covers(self, text, spans):
+        """
+        片段是否全部落在名字上
+
+        Args:
+            text: 原文
+            spans: [(起始位置, 结束位置)]（dedup.issue_spans 的结果）
+
+        Returns:
+            bool: spans 非空且每个片段都在某个名字的范围内
+        """
+        if not spans:
+            return False
+        ranges = [(start, end) for start, end, _ in self.finditer(str(text))]
+        return all(any(start <= s and e <= end for start, end in ranges) for s, e in spans)
+
+
+def find_column(columns, column):
+    """
+    名称列的位置：精确匹配，否则与目标列相同地忽略大小写和空格模糊匹配（多行表头合并后的列名），取第一个
+
+    Returns:
+        int: 列序号（从0开始），找不到时返回None
+    """
+    if column in columns:
+        return columns.index(column)
+    target = column.lower().replace(" ", "")
+    for i, name in enumerate(columns):
+        name = str(name).lower().replace(" ", "")
+        if target in name or name in target:
+            return i
+    return None
+
+
+def harvest_names(index, sources, header_rows=None, min_length=DEFAULT_MIN_LENGTH):
+    """
+    从工作簿的名称列收集名字
+
+    Args:
+        index: 工作簿的 SheetIndex（按文件版本缓存）
+        sources: parse_sources() 的结果
+        header_rows: 名称表的表头配置
+        min_length: 名字的最小长度
+
+    Returns:
+        tuple: ({"Sheet:列名": 名字数}, 名字列表, 找不到的名称列列表)
+    """
+    counts, names, missing = {}, [], []
+    for sheet, column in sources:
+        label = f"{sheet}:{column}"
+        try:
+            index.ensure_sheet(sheet, header_rows)
+        except KeyError:
+            missing.append(label)
+            continue
+        col = find_column(index.columns(sheet), column)
+        if col is None:
+            missing.append(label)
+            continue
+        found = [text.strip() for _, text, _ in index.iter_texts(sheet, col) if is_name(text, min_length)]
+        counts[label] = len(set(found))
+        names.extend(found)
+    return counts, names, missing
+
+
+def drop_name_issues(issues, texts, matcher, locate):
+    """
+    丢弃只涉及名字的问题
+
+    Args:
+        issues: [{"line_no", "issue", "suggestion"}]（line_no 为 Excel 行号）
+        texts: {Excel 行号: 原文}
+        matcher: NameMatcher
+        locate: locate(原文, 问题说明, 修改建议) -> [(起始位置, 结束位置)]（dedup.issue_spans）
+
+    Returns:
+        tuple: (保留的问题, 丢弃的问题数)
+    """
+    if not matcher:
+        return issues, 0
+    kept = []
+    for item in issues:
+        text = texts.get(item.get("line_no"))
+        if text is not None and matcher.covers(text, locate(text, item.get("issue", ""), item.get("suggestion"))):
+            continue
+        kept.append(item)
+    return kept, len(issues) - len(kept)
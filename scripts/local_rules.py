@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+本地规则预筛 - 只把可疑的行交给模型
+
+在没有 GPU 的构建机上模型每分钟只能检查很少的行。预筛用不需要模型的本地规则找出
+值得检查的行，其余行视为通过、不发送给模型：
+
+- 常见错别字（悉悉索索、再接再励……）
+- 重复的虚词（的的、了了、是是）
+- 的地得误用的典型写法（慢慢的走）
+- 容易用错褒贬义的成语（负隅顽抗、娓娓道来……）
+- 本地敏感词 / 严禁词
+
+规则只决定哪些行需要模型检查，不直接产生检查结果；规则漏掉的语病不会被检查，
+因此预筛适合 CPU 环境下的快速检查，完整检查仍应在 GPU 环境下不带 --prefilter 运行。
+"""
+import re
+
+# 常见错别字 → 正确写法
+COMMON_TYPOS = {
+    "悉悉索索": "窸窸窣窣",
+    "再接再励": "再接再厉",
+    "迫不急待": "迫不及待",
+    "一愁莫展": "一筹莫展",
+    "出奇不意": "出其不意",
+    "一股作气": "一鼓作气",
+    "走头无路": "走投无路",
+    "甘败下风": "甘拜下风",
+    "谈笑风声": "谈笑风生",
+    "哀声叹气": "唉声叹气",
+    "默守成规": "墨守成规",
+    "世外桃园": "世外桃源",
+    "脍灸人口": "脍炙人口",
+    "穿流不息": "川流不息",
+    "震憾": "震撼",
+    "布署": "部署",
+    "松驰": "松弛",
+    "寒喧": "寒暄",
+    "针贬": "针砭",
+    "坐阵": "坐镇",
+    "报负": "抱负",
+    "沉缅": "沉湎",
+    "既使": "即使",
+    "按装": "安装",
+    "渡假": "度假",
+}
+
+# 容易用错褒贬义或望文生义的成语（出现即交给模型判断用法）
+MISUSED_IDIOMS = (
+    "负隅顽抗", "娓娓道来", "逡巡不前", "差强人意", "首当其冲", "空穴来风",
+    "七月流火", "炙手可热", "万人空巷", "美轮美奂", "罄竹难书", "始作俑者",
+    "明日黄花", "望其项背", "上下其手", "文不加点", "不刊之论", "目无全牛",
+)
+
+# 重复的虚词；后面的例外是正常用法
+_REPEATED_PARTICLE = re.compile(r"(的|地|得|了|是|在|和|就|都|也|把|被|着)\1")
+_REPEAT_EXCEPTIONS = ("不了了之", "了了解", "是是非非", "的的确确", "得得")
+
+# 叠词 + 的 + 动作（应为"地"）
+_DE_BEFORE_VERB = re.compile(r"([一-鿿])\1的[走跑说笑看跳哭叫喊点想望飞冲叹躲靠坐站转摇挥拍]")
+
+
+class LocalRules:
+    """
+    本地预筛规则
+
+    Args:
+        sensitive_words: 敏感词（配置文件 rules.forbidden_words 与 --sensitive-words 词表）
+        typos: 错别字词典，默认为 COMMON_TYPOS
+        idioms: 易错成语，默认为 MISUSED_IDIOMS
+    """
+
+    def __init__(self, sensitive_words=(), typos=None, idioms=None):
+        self.sensitive_words = [word for word in sensitive_words if word]
+        self.typos = COMMON_TYPOS if typos is None else typos
+        self.idioms = MISUSED_IDIOMS if idioms is None else idioms
+
+    def scan(self, text):
+        """
+        检查一行文本
+
+        Args:
+            text: 待检查文本
+
+        Returns:
+            list: 命中的规则（"类型:片段"），为空表示没有可疑之处
+        """
+        text = str(text)
+        hits = [f"错别字:{wrong}→{right}" for wrong, right in self.typos.items() if wrong in text]
+        for match in _REPEATED_PARTICLE.finditer(text):
+            context = text[max(0, match.start() - 2):match.end() + 2]
+            if not any(exception in context for exception in _REPEAT_EXCEPTIONS):
+                hits.append(f"重复字:{match.group()}")
+        hits.extend(f"的地得:{match.group()}" for match in _DE_BEFORE_VERB.finditer(text))
+        hits.extend(f"成语:{idiom}" for idiom in self.idioms if idiom in text)
+        hits.extend(f"敏感词:{word}" for word in self.sensitive_words if word in text)
+        return hits
+
+
+def prefilter(rows, rules):
+    """
+    按本地规则筛选需要模型检查的行
+
+    Args:
+        rows: RowItem 列表
+        rules: LocalRules 实例
+
+    Returns:
+        tuple: (可疑的行, 跳过的行, {规则类型: 命中行数})
+    """
+    suspicious, skipped = [], []
+    kinds = {}
+    for row in rows:
+        hits = rules.scan(row.text)
+        if not hits:
+            skipped.append(row)
+            continue
+        suspicious.append(row)
+        for kind in {hit.split(":", 1)[0] for hit in hits}:
+            kinds[kind] = kinds.get(kind, 0) + 1
+    return suspicious, skipped, kinds
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+标记遮罩 - 发送给模型前把占位符和富文本标记替换为短标记
+
+配置文本中的 {0}、%s、<color=#ff0000>、\\n 转义等既占用提示词 token，
+又容易让模型误报，模型原样抄写时还会带出引号、反斜杠和控制字符导致 JSON 解析失败。
+这里把连续的标记整体替换为 §1、§2 这样的短标记（通常只占1-2个token），
+模型返回后再把问题说明和修改建议中的短标记还原为原始标记。
+传入专有名词匹配器（lexicon.NameMatcher）时，标记之间的名字也替换为短标记。
+"""
+import re
+
+SENTINEL_CHAR = "§"
+
+# 占位符、富文本标签、转义序列和换行；相邻的多个标记合并为一个短标记
+MARKUP_PATTERN = re.compile(
+    r"(?:\{[^{}\n]*\}"                     # {0} {name}
+    r"|%[-+ 0#]*\d*(?:\.\d+)?[sdifx]"      # %s %d %.2f
+    r"|</?[A-Za-z][^<>\n]*>"               # <color=#ff0000> </color> <br/>
+    r"|\[/?[A-Za-z][^\[\]\n]*\]"           # [b] [/url]
+    r"|\$\w+\$"                            # $NAME$
+    r"|\\[nrt]"                            # 文本中的 \n \r \t 转义
+    r"|[\r\n\t])+"                         # 真实的换行和制表符
+)
+_SENTINEL_PATTERN = re.compile(re.escape(SENTINEL_CHAR) + r"(\d+)")
+
+
+def mask_text(text, names=None):
+    """
+    将文本中的标记替换为短标记
+
+    Args:
+        text: 原文
+        names: 专有名词匹配器（lexicon.NameMatcher），名字同样替换为短标记；None 表示只遮罩标记
+
+    Returns:
+        tuple: (遮罩后的文本, 原始标记列表)；原文本身包含 § 时不做遮罩，返回 (原文, [])
+    """
+    text = str(text)
+    if SENTINEL_CHAR in text:
+        return text, []
+    tokens = []
+
+    def sentinel(value):
+        tokens.append(value)
+        return f"{SENTINEL_CHAR}{len(tokens)}"
+
+    if not names:
+        return MARKUP_PATTERN.sub(lambda match: sentinel(match.group(0)), text), tokens
+    # 按出现顺序编号：标记之间的片段中替换名字
+    parts, last = [], 0
+    for match in MARKUP_PATTERN.finditer(text):
+        parts.append(names.replace(text[last:match.start()], sentinel))
+        parts.append(sentinel(match.group(0)))
+        last = match.end()
+    parts.append(names.replace(text[last:], sentinel))
+    return "".join(parts), tokens
+
+
+def unmask_text(text, tokens):
+    """
+    将短标记还原为原始标记
+
+    Args:
+        text: 模型返回的文本（问题说明或修改建议）
+        tokens: mask_text 返回的原始标记列表
+
+    Returns:
+        str: 还原后的文本；不认识的短标记保持原样
+    """
+    if not tokens or text is None:
+        return text
+
+    def replace(match):
+        index = int(match.group(1))
+        return tokens[index - 1] if 1 <= index <= len(tokens) else match.group(0)
+
+    return _SENTINEL_PATTERN.sub(replace, str(text))
+
+
+def mask_payload(payload, names=None):
+    """
+    遮罩一个批次的数据
+
+    Args:
+        payload: {行号: 原文}
+        names: 专有名词匹配器（见 mask_text）
+
+    Returns:
+        tuple: (遮罩后的 {行号: 文本}, {行号: 原始标记列表})，没有标记的行不出现在第二项中
+    """
+    masked = {}
+    restore = {}
+    for line_no, text in payload.items():
+        masked[line_no], tokens = mask_text(text, names)
+        if tokens:
+            restore[line_no] = tokens
+    return masked, restore
+
+
+def unmask_issues(issues, restore):
+    """
+    还原模型返回的问题列表中的短标记
+
+    Args:
+        issues: [{"line_no", "issue", "suggestion"}]
+        restore: mask_payload 返回的 {行号: 原始标记列表}
+
+    Returns:
+        list: 还原后的问题列表（原地修改并返回）
+    """
+    if not restore:
+        return issues
+    for item in issues:
+        if not isinstance(item, dict):
+            continue
+        try:
+            tokens = restore.get(int(item.get("line_no")))
+        except (TypeError, ValueError):
+            continue
+        if tokens:
+            for key in ("issue", "suggestion"):
+                if key in item:
+                    item[key] = unmask_text(item[key], tokens)
+    return issues
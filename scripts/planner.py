@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+运行计划 - 不调用模型，估算批次数、token 数和耗时
+
+--plan 执行与正式检查相同的读取、历史过滤、抽样、预筛、近似重复聚类和调度，
+然后按以下数据估算：
+
+- 输入 token：按实际会发送的提示词估算（estimate_tokens），有检查记录时按记录中
+  推理服务返回的 prompt_tokens 与估算值的比例校正
+- 输出 token：检查记录中平均每行的 completion_tokens；没有记录时使用经验值
+- 耗时：优先使用 --calibrate 保存的调优配置（实测行/秒，已包含并发的效果）；
+  否则用检查记录中同一模型和推理服务地址的 prefill / 生成速度（token/秒）计算单请求耗时，
+  再按并发数给出范围（多个请求共用一个推理服务时并发提速有限）
+"""
+import os
+
+from autotune import profile_key
+from latency import estimate_tokens
+from response_trace import TRACE_SUFFIX, read_trace
+
+# 没有检查记录时每行的输出 token 经验值（多数行没有问题，只输出空结果）
+DEFAULT_OUTPUT_TOKENS_PER_ROW = {"json": 8, "compact": 4}
+MAX_TRACES = 5  # 最多读取最近几份匹配的检查记录
+
+
+def find_traces(trace_dir, limit=MAX_TRACES * 4):
+    """检查记录目录中的记录文件（新的在前）"""
+    try:
+        names = [name for name in os.listdir(trace_dir) if name.endswith(TRACE_SUFFIX)]
+    except OSError:
+        return []
+    paths = [os.path.join(trace_dir, name) for name in names]
+    return sorted(paths, key=os.path.getmtime, reverse=True)[:limit]
+
+
+def trace_throughput(paths, model, endpoints, response_format=None, limit=MAX_TRACES):
+    """
+    从检查记录统计同一模型和推理服务的 token 速度
+
+    Args:
+        paths: 检查记录路径（新的在前）
+        model: 模型名称
+        endpoints: 生成接口地址列表（记录中没有地址信息时只按模型匹配）
+        response_format: 只统计该输出格式的批次（None 表示全部）
+        limit: 最多使用几份匹配的记录
+
+    Returns:
+        dict: prompt_rate / eval_rate（token/秒）、output_per_row（每行输出 token）、
+              prompt_ratio（实际 prompt_tokens / 估算值）、batches（参与统计的批次数）、traces（记录数）；
+              没有可用数据时返回None
+    """
+    key = profile_key(model, endpoints)
+    totals = dict.fromkeys(("prompt_tokens", "prompt_seconds", "completion_tokens", "completion_seconds",
+                            "rows", "estimated"), 0)
+    batches = traces = 0
+    for path in paths:
+        if traces >= limit:
+            break
+        matched = False
+        current = None
+        try:
+            for record in read_trace(path):
+                if record.get("type") == "run":
+                    current = (record.get("model") == model
+                               and (not record.get("endpoints") or profile_key(model, record["endpoints"]) == key)
+                               and (response_format is None or record.get("response_format") == response_format))
+                    continue
+                timing = record.get("timing") or {}
+                if not current or not timing.get("completion_seconds"):
+                    continue
+                matched = True
+                batches += 1
+                totals["rows"] += len(record.get("rows") or ())
+                for field in ("prompt_tokens", "prompt_seconds", "completion_tokens", "completion_seconds"):
+                    totals[field] += timing.get(field) or 0
+                if timing.get("prompt_tokens"):
+                    totals["estimated"] += estimate_tokens(record.get("prompt") or "")
+        except (OSError, ValueError):
+            continue
+        traces += matched
+    if not batches:
+        return None
+    return {
+        "prompt_rate": totals["prompt_tokens"] / totals["prompt_seconds"] if totals["prompt_seconds"] else None,
+        "eval_rate": totals["completion_tokens"] / totals["completion_seconds"],
+        "output_per_row": totals["completion_tokens"] / totals["rows"] if totals["rows"] else None,
+        "prompt_ratio": totals["prompt_tokens"] / totals["estimated"] if totals["estimated"] else 1.0,
+        "batches": batches,
+        "traces": traces,
+    }
+
+
+def build_plan(batch_prompts, workers, endpoints=1, response_format="json", throughput=None, tuned=None):
+    """
+    估算一次运行的 token 数和耗时
+
+    Args:
+        batch_prompts: [(批次行数, 提示词估算 token 数)]
+        workers: 并发数
+        endpoints: 推理服务地址数
+        response_format: 输出格式（没有检查记录时决定输出 token 经验值）
+        throughput: trace_throughput() 的结果
+        tuned: --calibrate 保存的调优配置（包含 rows_per_second）
+
+    Returns:
+        dict: batches / rows / prompt_tokens / output_tokens，
+              eta_seconds 与 eta_range（(最短, 最长) 秒，无法估计时为None）、eta_source（估计依据）
+    """
+    rows = sum(count for count, _ in batch_prompts)
+    ratio = throughput["prompt_ratio"] if throughput else 1.0
+    prompt_tokens = round(sum(tokens for _, tokens in batch_prompts) * ratio)
+    per_row = (throughput or {}).get("output_per_row") or DEFAULT_OUTPUT_TOKENS_PER_ROW.get(response_format, 8)
+    output_tokens = round(rows * per_row)
+    plan = {"batches": len(batch_prompts), "rows": rows, "prompt_tokens": prompt_tokens,
+            "output_tokens": output_tokens, "eta_seconds": None, "eta_range": None, "eta_source": None}
+    if tuned and tuned.get("rows_per_second"):
+        seconds = rows / tuned["rows_per_second"]
+        plan.update(eta_seconds=seconds, eta_range=(seconds, seconds),
+                    eta_source=f"调优配置（{tuned['rows_per_second']} 行/秒，{tuned.get('calibrated_at', '')} 校准）")
+    elif throughput:
+        prefill = prompt_tokens / throughput["prompt_rate"] if throughput["prompt_rate"] else 0.0
+        serial = prefill + output_tokens / throughput["eval_rate"]
+        parallel = max(1, min(workers, len(batch_prompts)))
+        # 每个请求有独立的推理服务时接近线性加速；共用一个推理服务时最多按并发数加速
+        fastest = serial / parallel
+        slowest = fastest if endpoints >= parallel else serial / max(1, min(endpoints, parallel))
+        plan.update(eta_seconds=(fastest + slowest) / 2, eta_range=(fastest, slowest),
+                    eta_source=f"检查记录（{throughput['traces']} 份、{throughput['batches']} 个批次，"
+                               f"生成 {throughput['eval_rate']:.0f} token/秒）")
+    return plan
+
+
+def format_duration(seconds):
+    """秒数转换为「1小时5分」形式"""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}秒"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}分{seconds}秒" if seconds else f"{minutes}分"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}小时{minutes}分" if minutes else f"{hours}小时"
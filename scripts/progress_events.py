@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+进度事件 - 以 NDJSON 输出机器可读的运行进度
+
+控制台输出面向人工查看，编排工具不应该解析带 emoji 的中文日志。
+通过 --events-fd / --events-file / --events-socket 指定输出目标后，
+每个事件写一行 JSON（UTF-8），包含 "event" 类型、"ts" 时间戳和事件字段：
+
+- run_start: 总行数、总批次数、批次大小、并发数、模型
+- batch_start / batch_finish: 批次号、行数、行号范围；完成时附带耗时、问题数、错误、
+  编号不属于批次被丢弃的问题数、累计行/秒、预计剩余秒数和累计问题数
+- config_reload / deadline: 运行中的配置变化和时间预算用完
+- run_finish: 问题总数、失败批次数、未覆盖行数、报告文件、是否中断
+- error: 启动阶段失败（模型不存在、读取文件失败等）
+"""
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+
+class ProgressTracker:
+    """按已完成的行数计算吞吐量和预计剩余时间"""
+
+    def __init__(self, total_rows, clock=time.monotonic):
+        self.total_rows = total_rows
+        self.done_rows = 0
+        self._clock = clock
+        self._started = clock()
+
+    def update(self, rows):
+        """记录完成的行数（失败的批次也计入，它们不会再被检查）"""
+        self.done_rows += rows
+
+    @property
+    def elapsed(self):
+        return self._clock() - self._started
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.done_rows / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self):
+        """预计剩余秒数，还没有完成的行时返回None"""
+        rate = self.rows_per_second
+        if rate <= 0:
+            return None
+        return max(self.total_rows - self.done_rows, 0) / rate
+
+    def snapshot(self):
+        """用于事件的进度字段"""
+        eta = self.eta_seconds
+        return {
+            "done_rows": self.done_rows,
+            "total_rows": self.total_rows,
+            "rows_per_second": round(self.rows_per_second, 3),
+            "eta_seconds": None if eta is None else round(eta, 1),
+            "elapsed_seconds": round(self.elapsed, 1),
+        }
+
+
+class EventEmitter:
+    """
+    NDJSON 事件输出（线程安全，每个事件写完立即 flush）
+
+    stream 为 None 时不输出任何内容，调用方无需判断是否启用了事件输出。
+    """
+
+    def __init__(self, stream=None, closer=None):
+        self._stream = stream
+        self._closer = closer
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self._stream is not None
+
+    def emit(self, event, **fields):
+        """
+        输出一个事件
+
+        Args:
+            event: 事件类型
+            **fields: 事件字段（需可 JSON 序列化）
+        """
+        if self._stream is None:
+            return
+        line = json.dumps({"event": event, "ts": round(time.time(), 3), **fields}, ensure_ascii=False)
+        with self._lock:
+            try:
+                self._stream.write(line + "\n")
+                self._stream.flush()
+            except (OSError, ValueError):
+                # 消费端已关闭（管道断开等），不影响检查本身
+                self._stream = None
+
+    def close(self):
+        with self._lock:
+            stream, self._stream = self._stream, None
+            if stream is not None and self._closer is not None:
+                try:
+                    self._closer()
+                except OSError:
+                    pass
+
+
+def parse_address(value):
+    """
+    解析 --events-socket 参数
+
+    Args:
+        value: "host:port" 或 ":port"（默认 127.0.0.1）
+
+    Returns:
+        tuple: (host, port)
+    """
+    host, sep, port = value.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"事件地址格式错误: {value}（应为 host:port）")
+    return host or "127.0.0.1", int(port)
+
+
+def open_emitter(fd=None, path=None, address=None):
+    """
+    根据命令行参数创建事件输出
+
+    Args:
+        fd: 已打开的文件描述符（如 3，由父进程传入）
+        path: 事件文件路径（追加写入；"-" 表示标准输出）
+        address: TCP 地址 "host:port"（由编排工具监听）
+
+    Returns:
+        EventEmitter: 未指定任何目标时返回不输出的 EventEmitter
+
+    Raises:
+        ValueError: 参数格式错误
+        OSError: 打开文件或连接失败
+    """
+    if fd is not None:
+        stream = os.fdopen(fd, "w", encoding="utf-8", buffering=1)
+        return EventEmitter(stream, stream.close)
+    if path == "-":
+        return EventEmitter(sys.stdout)
+    if path:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        stream = open(path, "a", encoding="utf-8", buffering=1)
+        return EventEmitter(stream, stream.close)
+    if address:
+        sock = socket.create_connection(parse_address(address), timeout=10)
+        sock.settimeout(None)
+        stream = sock.makefile("w", encoding="utf-8", buffering=1)
+
+        def close():
+            stream.close()
+            sock.close()
+
+        return EventEmitter(stream, close)
+    return EventEmitter()
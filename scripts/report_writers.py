@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+"""
+报告输出 - 可插拔的报告格式
+
+- jsonl: 每个批次完成后立即追加，下游工具可以边跑边消费
+- csv: 流式追加，结束时按行号重新排序
+- parquet: 列式格式，需要安装 pyarrow
+- xlsx: 供人工审核的 Excel 报告（最终一次性生成；安装 xlsxwriter 时以常量内存模式写出，
+  否则使用 openpyxl 只写模式）。冻结表头、自动筛选、列宽和自动换行按列设置一次，
+  行号链接到源工作簿中对应的单元格
+
+新格式只需继承 ReportWriter 并用 register_writer 注册。
+"""
+import csv
+import json
+import os
+
+from findings import COLUMN_FIELDS, JSONL_FIELDS, REPORT_COLUMNS, STATUS_FIXED, STATUS_IGNORED, STATUS_PENDING
+
+WRITERS = {}
+
+COVERAGE_SHEET_NAME = "未覆盖行号"
+COVERAGE_COLUMNS = ["行号范围", "行数", "原因"]
+COLUMN_WIDTHS = {"Sheet": 14, "行号": 8, "配置原文": 50, "对白id": 14, "问题类型": 12,
+                 "问题说明": 40, "修改建议": 40, "处理状态": 10}
+WRAP_COLUMNS = ("配置原文", "问题说明", "修改建议")
+MAX_HYPERLINKS = 65530  # Excel 单个工作表的超链接上限，超出的行号不加链接
+
+
+def register_writer(name):
+    """注册报告格式的装饰器"""
+    def decorator(cls):
+        cls.format = name
+        WRITERS[name] = cls
+        return cls
+    return decorator
+
+
+def parse_formats(value):
+    """
+    解析 --format 参数
+
+    Args:
+        value: 逗号分隔的格式列表，如 "jsonl,xlsx"
+
+    Returns:
+        list: 格式名称列表（去重，保持顺序）
+    """
+    formats = []
+    for name in str(value).split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in WRITERS:
+            raise ValueError(f"不支持的报告格式: {name}（可选: {', '.join(sorted(WRITERS))}）")
+        if name not in formats:
+            formats.append(name)
+    if not formats:
+        raise ValueError("至少需要指定一种报告格式")
+    return formats
+
+
+def create_report_writers(formats, base_path):
+    """
+    创建报告输出器
+
+    Args:
+        formats: 格式名称列表
+        base_path: 不含扩展名的报告路径
+
+    Returns:
+        list: ReportWriter 列表
+    """
+    return [WRITERS[name](f"{base_path}{WRITERS[name].extension}") for name in formats]
+
+
+class ReportWriter:
+    """
+    报告输出器基类
+
+    streaming=True 的输出器在每个批次完成后通过 write() 追加问题；
+    所有输出器在运行结束时通过 finalize() 生成最终文件。
+    """
+    format = ""
+    extension = ""
+    streaming = False
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+
+    def open(self):
+        """运行开始前调用，用于检查依赖、创建文件"""
+
+    def write(self, store, indices):
+        """追加一批新问题（流式输出器实现）"""
+
+    def finalize(self, store, order, path):
+        """
+        生成最终报告
+
+        Args:
+            store: FindingsStore
+            order: 排序后的问题序号
+            path: 目标路径（原路径被占用时为新路径）
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """释放文件句柄"""
+
+
+@register_writer("jsonl")
+class JsonlReportWriter(ReportWriter):
+    """JSONL：每个批次完成后立即追加写入"""
+    extension = ".jsonl"
+    streaming = True
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = None
+
+    def open(self):
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def write(self, store, indices):
+        if not indices:
+            return
+        for finding in store.iter(indices):
+            self._file.write(json.dumps(finding.to_dict(), ensure_ascii=False))
+            self._file.write("\n")
+        self._file.flush()
+        self.count += len(indices)
+
+    def finalize(self, store, order, path):
+        self.close()
+        if path != self.path:
+            store.to_jsonl(path, indices=order)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+@register_writer("csv")
+class CsvReportWriter(ReportWriter):
+    """CSV：流式追加，结束时按行号排序重写"""
+    extension = ".csv"
+    streaming = True
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = None
+        self._writer = None
+
+    def open(self):
+        # utf-8-sig 保证 Excel 直接打开不乱码；首个问题到达时才创建文件
+        pass
+
+    def write(self, store, indices):
+        """追加一批问题并立即刷新到磁盘"""
+        if not indices:
+            return
+        if self._file is None:
+            self._file = open(self.path, "w", encoding="utf-8-sig", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(REPORT_COLUMNS)
+        self._writer.writerows(store.iter_rows(REPORT_COLUMNS, indices))
+        self._file.flush()
+        self.count += len(indices)
+
+    def finalize(self, store, order, path):
+        self.close()
+        tmp_path = f"{path}.tmp"
+        store.to_csv(tmp_path, indices=order)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class PartialCsvWriter(CsvReportWriter):
+    """
+    增量报告：只选择了非流式格式（如 xlsx）时，
+    仍把每批问题实时追加到 *_partial.csv，最终报告生成后删除
+    """
+    format = "partial"
+
+    def finalize(self, store, order, path):
+        self.close()
+
+    def remove(self):
+        if os.path.exists(self.path):
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+@register_writer("parquet")
+class ParquetReportWriter(ReportWriter):
+    """Parquet：列式输出，直接从问题存储的列构建，不经过DataFrame"""
+    extension = ".parquet"
+
+    def open(self):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("输出 parquet 需要安装 pyarrow: pip install pyarrow")
+
+    def finalize(self, store, order, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table(store.to_columns(JSONL_FIELDS, order))
+        pq.write_table(table, path)
+        self.count = len(order)
+
+
+@register_writer("xlsx")
+class ExcelReportWriter(ReportWriter):
+    """
+    Excel：供人工审核的最终报告
+
+    link_source() 指定源工作簿后，行号链接到源工作簿中对应的单元格（相对报告所在目录的路径）；
+    coverage 非空时另写「未覆盖行号」Sheet。
+    """
+    extension = ".xlsx"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.source = None
+        self.source_column = None
+        self.coverage = []
+
+    def link_source(self, workbook, column=None):
+        """
+        行号链接的目标
+
+        Args:
+            workbook: 源工作簿路径
+            column: 目标列序号（从0开始），None 时链接到该行的第一列
+        """
+        self.source = workbook
+        self.source_column = column
+
+    def _link_base(self):
+        if not self.source:
+            return None
+        report_dir = os.path.dirname(os.path.abspath(self.path))
+        try:
+            return os.path.relpath(os.path.abspath(self.source), report_dir)
+        except ValueError:
+            # Windows 上报告和源文件不在同一个盘符
+            return os.path.abspath(self.source)
+
+    def _cell_location(self, sheet, row):
+        column = _column_letter(self.source_column or 0)
+        sheet = str(sheet).replace("'", "''")
+        return f"'{sheet}'!{column}{row}"
+
+    def finalize(self, store, order, path):
+        try:
+            import xlsxwriter  # noqa: F401
+        except ImportError:
+            self._finalize_openpyxl(store, order, path)
+        else:
+            self._finalize_xlsxwriter(store, order, path)
+        self.count = len(order)
+
+    def _finalize_xlsxwriter(self, store, order, path):
+        import xlsxwriter
+
+        columns = REPORT_COLUMNS
+        fields = [COLUMN_FIELDS[c] for c in columns]
+        row_col = columns.index("行号")
+        link_base = self._link_base()
+        # constant_memory：逐行写出并立即落盘，内存占用与报告行数无关
+        wb = xlsxwriter.Workbook(path, {"constant_memory": True, "strings_to_urls": False,
+                                        "strings_to_formulas": False})
+        try:
+            header = wb.add_format({"bold": True, "bg_color": "#DDEBF7", "border": 1, "text_wrap": True,
+                                    "valign": "top"})
+            wrap = wb.add_format({"text_wrap": True, "valign": "top"})
+            top = wb.add_format({"valign": "top"})
+            link = wb.add_format({"font_color": "blue", "underline": 1, "valign": "top"})
+            ws = wb.add_worksheet("Sheet1")
+            for col, name in enumerate(columns):
+                ws.set_column(col, col, COLUMN_WIDTHS.get(name, 12), wrap if name in WRAP_COLUMNS else top)
+            ws.freeze_panes(1, 0)
+            ws.write_row(0, 0, columns, header)
+            excel_row = 0
+            for excel_row, finding in enumerate(store.iter(order), start=1):
+                for col, field in enumerate(fields):
+                    value = finding.get(field)
+                    if col == row_col and link_base and excel_row <= MAX_HYPERLINKS:
+                        url = f"external:{link_base}#{self._cell_location(finding.sheet, value)}"
+                        ws.write_url(excel_row, col, url, link, string=str(value))
+                        # 覆盖为数字，保留链接（导入审核结果时行号仍为数字）
+                        ws.write_number(excel_row, col, value, link)
+                    elif isinstance(value, str):
+                        if value:
+                            ws.write_string(excel_row, col, value)
+                    elif value is not None:
+                        ws.write(excel_row, col, value)
+            ws.autofilter(0, 0, max(excel_row, 1), len(columns) - 1)
+            ws.data_validation(1, columns.index("处理状态"), max(excel_row, 1), columns.index("处理状态"), {
+                "validate": "list", "source": [STATUS_PENDING, STATUS_FIXED, STATUS_IGNORED],
+                "ignore_blank": True, "show_error": False,
+            })
+            if self.coverage:
+                cs = wb.add_worksheet(COVERAGE_SHEET_NAME)
+                cs.set_column(0, len(COVERAGE_COLUMNS) - 1, 16)
+                cs.write_row(0, 0, COVERAGE_COLUMNS, header)
+                for i, item in enumerate(self.coverage, start=1):
+                    cs.write_row(i, 0, [item[c] for c in COVERAGE_COLUMNS])
+        finally:
+            wb.close()
+
+    def _finalize_openpyxl(self, store, order, path):
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Font, PatternFill
+        from openpyxl.worksheet.datavalidation import DataValidation
+
+        columns = REPORT_COLUMNS
+        fields = [COLUMN_FIELDS[c] for c in columns]
+        row_col = columns.index("行号")
+        status_col = _column_letter(columns.index("处理状态"))
+        link_base = self._link_base()
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Sheet1")
+        # 只写模式下冻结窗格、列宽和数据验证需要在写入行之前设置
+        ws.freeze_panes = "A2"
+        for col, name in enumerate(columns):
+            ws.column_dimensions[_column_letter(col)].width = COLUMN_WIDTHS.get(name, 12)
+        validation = DataValidation(type="list", formula1=f'"{STATUS_PENDING},{STATUS_FIXED},{STATUS_IGNORED}"',
+                                    allow_blank=True, showErrorMessage=False)
+        ws.data_validations.append(validation)
+        bold, fill = Font(bold=True), PatternFill("solid", fgColor="DDEBF7")
+        header = []
+        for name in columns:
+            cell = WriteOnlyCell(ws, name)
+            cell.font, cell.fill = bold, fill
+            header.append(cell)
+        ws.append(header)
+        wrap = Alignment(wrap_text=True, vertical="top")
+        count = 0
+        for count, finding in enumerate(store.iter(order), start=1):
+            values = []
+            for col, field in enumerate(fields):
+                value = finding.get(field)
+                if col == row_col and link_base and count <= MAX_HYPERLINKS:
+                    value = WriteOnlyCell(ws, value)
+                    value.hyperlink = f"{link_base}#{self._cell_location(finding.sheet, finding.row)}"
+                    value.style = "Hyperlink"
+                elif columns[col] in WRAP_COLUMNS:
+                    value = WriteOnlyCell(ws, value)
+                    value.alignment = wrap
+                values.append(value)
+            ws.append(values)
+        last_row = max(count + 1, 2)
+        ws.auto_filter.ref = f"A1:{_column_letter(len(columns) - 1)}{last_row}"
+        validation.add(f"{status_col}2:{status_col}{last_row}")
+        if self.coverage:
+            cs = wb.create_sheet(COVERAGE_SHEET_NAME)
+            cs.append(COVERAGE_COLUMNS)
+            for item in self.coverage:
+                cs.append([item[c] for c in COVERAGE_COLUMNS])
+        wb.save(path)
+
+
+def _column_letter(index):
+    """列序号（从0开始）转换为 Excel 列名"""
+    name = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+检查记录 - 模型原始响应的录制与回放
+
+每次运行把每个批次的行、提示词、原始响应和推理服务的耗时统计追加写入
+gzip 压缩的 JSONL 文件（.trace.jsonl.gz）：
+
+    {"type": "run", "version": 1, "input_file": ..., "sheet": ..., "response_format": ..., ...}
+    {"type": "batch", "batch": 1, "rows": [[行号, 文本, Sheet, 对白id, 同类行], ...],
+     "prompt": ..., "response": ..., "timing": {...}, "elapsed": 3.2}
+
+--replay 读取记录，不调用模型，重新执行响应解析、编号校验和报告生成：
+修改解析逻辑后可以立即验证，也可以不重新检查就生成其他格式的报告。
+
+追加写入时每次打开文件都会开始一个新的 gzip 成员，gzip 读取时会自动拼接；
+进程被强制结束时文件末尾可能不完整，读取时忽略不完整的部分。不完整的成员之后的
+数据无法再读出，因此已存在的文件末尾不完整时不再追加，改为写入新的文件。
+"""
+import gzip
+import json
+import os
+import threading
+import zlib
+
+TRACE_VERSION = 1
+TRACE_SUFFIX = ".trace.jsonl.gz"
+FLUSH_EVERY = 32  # 每写入多少个批次刷新一次（刷新会略微降低压缩率）
+
+
+def _row_record(row):
+    record = [row.excel_row, row.text, row.sheet, row.row_id]
+    if row.members:
+        record.append([_row_record(member) for member in row.members])
+    return record
+
+
+def row_from_record(record):
+    """
+    从记录还原 RowItem（包括近似重复聚类的同类行）
+
+    Args:
+        record: [行号, 文本, Sheet, 对白id] 或 [行号, 文本, Sheet, 对白id, [同类行...]]
+
+    Returns:
+        RowItem
+    """
+    from scheduler import RowItem
+
+    row = RowItem(record[0], record[1], record[2], record[3])
+    if len(record) > 4:
+        row.members = [row_from_record(member) for member in record[4]]
+    return row
+
+
+def is_complete(path):
+    """记录文件是否完整（最后一个 gzip 成员没有被截断）"""
+    try:
+        with gzip.open(path, "rb") as f:
+            while f.read(1 << 20):
+                pass
+    except (EOFError, zlib.error, gzip.BadGzipFile):
+        return False
+    return True
+
+
+def _free_path(path):
+    """path 的下一个未被占用的编号文件名：run.trace.jsonl.gz → run_1.trace.jsonl.gz"""
+    if path.endswith(TRACE_SUFFIX):
+        base, suffix = path[:-len(TRACE_SUFFIX)], TRACE_SUFFIX
+    else:
+        base, suffix = os.path.splitext(path)
+    number = 1
+    while os.path.exists(f"{base}_{number}{suffix}"):
+        number += 1
+    return f"{base}_{number}{suffix}"
+
+
+class TraceWriter:
+    """
+    追加写入检查记录（线程安全，并发检查的多个工作线程共用一个实例）
+
+    Args:
+        path: 记录文件路径（已存在时追加；末尾不完整时改为写入新文件，见 truncated）
+    """
+
+    def __init__(self, path):
+        self.truncated = None  # 末尾不完整、没有追加的原文件路径
+        if os.path.exists(path) and os.path.getsize(path) and not is_complete(path):
+            self.truncated = path
+            path = _free_path(path)
+        self.path = path
+        self.batches = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = gzip.open(path, "ab")
+
+    def _write(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        self._file.write(line.encode("utf-8"))
+
+    def start_run(self, **fields):
+        """写入一次运行的配置（回放时按此配置解析响应）"""
+        with self._lock:
+            self._write(dict({"type": "run", "version": TRACE_VERSION}, **fields))
+            self._file.flush()
+
+    def record_batch(self, batch, prompt, response, timing=None, elapsed=None):
+        """
+        写入一个批次的请求和原始响应
+
+        Args:
+            batch: scheduler.Batch
+            prompt: 提示词
+            response: 模型原始响应（请求失败时为None）
+            timing: 推理服务的耗时统计（backends.normalize_timing）
+            elapsed: 请求总耗时（秒）
+        """
+        record = {
+            "type": "batch",
+            "batch": batch.number,
+            "rows": [_row_record(row) for row in batch.rows],
+            "prompt": prompt,
+            "response": response,
+            "timing": timing or {},
+            "elapsed": round(elapsed, 3) if elapsed is not None else None,
+        }
+        with self._lock:
+            if self._file is None:
+                return
+            self._write(record)
+            self.batches += 1
+            if self.batches % FLUSH_EVERY == 0:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_trace(path):
+    """
+    逐条读取检查记录
+
+    Yields:
+        dict: run / batch 记录；文件末尾不完整（进程被强制结束）时停止
+    """
+    with gzip.open(path, "rb") as f:
+        try:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # 最后一行被截断
+                    return
+        except (EOFError, zlib.error):
+            return
+
+
+def load_run(path, index=-1):
+    """
+    读取记录文件中的一次运行
+
+    Args:
+        path: 记录文件路径
+        index: 第几次运行（从0开始，-1 表示最后一次）
+
+    Returns:
+        tuple: (run 记录, batch 记录列表)
+
+    Raises:
+        OSError: 文件无法读取
+        ValueError: 文件中没有运行记录或 index 超出范围
+    """
+    runs = []
+    for record in read_trace(path):
+        if record.get("type") == "run":
+            if record.get("version", 0) > TRACE_VERSION:
+                raise ValueError(f"检查记录版本 {record['version']} 高于当前支持的版本 {TRACE_VERSION}: {path}")
+            runs.append((record, []))
+        elif record.get("type") == "batch" and runs:
+            runs[-1][1].append(record)
+    if not runs:
+        raise ValueError(f"检查记录中没有运行记录: {path}")
+    try:
+        return runs[index]
+    except IndexError:
+        raise ValueError(f"检查记录中只有 {len(runs)} 次运行: {path}")
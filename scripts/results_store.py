@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+"""
+检查历史 - 按运行记录配置、指标和问题的 SQLite 数据库
+
+每次运行只留下一份带日期的报告，和上周的结果对比只能手动翻表格。
+这里把每次运行的配置、耗时、问题列表保存到 .conf_check_state/results.sqlite：
+
+- 问题按 工作簿/Sheet/行（对白id，没有时用行号）/文本哈希/问题类型 生成指纹，
+  两次运行之间可以直接查询新增、已修复和反复出现的问题
+- 审核人员在报告中标记为「忽略」的问题导入为忽略记录，之后的运行不再报告；
+  一行的所有问题都被忽略时，相同文本不再发送给模型
+
+命令行查询：
+    python scripts/results_store.py runs
+    python scripts/results_store.py diff --kind new
+    python scripts/results_store.py import-review reports/DLG_text_Check_Report_20251219.xlsx
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+from itertools import groupby
+
+from findings import COLUMN_FIELDS, STATUS_IGNORED, split_issue
+from scheduler import STATE_DIR, text_hash
+
+DB_FILE = "results.sqlite"
+DIFF_KINDS = ("new", "fixed", "recurring")
+
+
+def default_db_path(state_dir=STATE_DIR):
+    return os.path.join(state_dir, DB_FILE)
+
+
+def row_key(row_id, excel_row):
+    """行的标识：优先使用对白id（插入行后行号会变化），没有id时使用行号"""
+    row_id = "" if row_id is None else str(row_id).strip()
+    return row_id or f"#{int(excel_row)}"
+
+
+def fingerprint(sheet, key, digest, issue_type):
+    """问题指纹：同一行、同一文本、同一类型的问题在不同运行中指纹相同"""
+    raw = "\x1f".join((sheet or "", key, digest, issue_type or ""))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def parse_row_ranges(ranges):
+    """将 "4-33" / "40" 形式的行号范围转换为 [(4, 33), (40, 40)]"""
+    result = []
+    for part in ranges:
+        start, _, end = str(part).partition("-")
+        result.append((int(start), int(end or start)))
+    return result
+
+
+def iter_report_rows(path):
+    """
+    逐行读取检查报告（xlsx / csv / jsonl）
+
+    Yields:
+        dict: 以 findings 字段名为键（row、text、row_id、issue、suggestion、status）
+    """
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == ".jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+    if suffix == ".csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.reader(f)
+            fields = [COLUMN_FIELDS.get(name) for name in next(reader, [])]
+            for values in reader:
+                yield {field: value for field, value in zip(fields, values) if field}
+        return
+
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        fields = [COLUMN_FIELDS.get(str(name)) if name is not None else None for name in next(rows, ())]
+        for values in rows:
+            yield {field: ("" if value is None else value) for field, value in zip(fields, values) if field}
+    finally:
+        wb.close()
+
+
+class ResultsStore:
+    """
+    检查历史数据库
+
+    用法：
+        store = ResultsStore()
+        run_id = store.record_run(workbook, sheet, column, config, metrics, findings, order)
+        new_items = store.diff(run_id, kind="new")
+    """
+
+    def __init__(self, db_path=None, state_dir=STATE_DIR):
+        self.db_path = db_path or default_db_path(state_dir)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                workbook TEXT, sheet TEXT, column_name TEXT,
+                started_at TEXT, finished_at TEXT, model TEXT, config TEXT, metrics TEXT,
+                uncovered TEXT, reports TEXT);
+            CREATE INDEX IF NOT EXISTS idx_runs_target ON runs (workbook, sheet, column_name, id);
+            CREATE TABLE IF NOT EXISTS findings (
+                run_id INTEGER, fingerprint TEXT, sheet TEXT, row_key TEXT, excel_row INTEGER,
+                text_hash TEXT, text TEXT, issue_type TEXT, issue TEXT, suggestion TEXT);
+            CREATE INDEX IF NOT EXISTS idx_findings_run ON findings (run_id, fingerprint);
+            CREATE INDEX IF NOT EXISTS idx_findings_fp ON findings (fingerprint);
+            CREATE TABLE IF NOT EXISTS dismissals (
+                workbook TEXT, sheet TEXT, text_hash TEXT, issue_type TEXT, source TEXT, dismissed_at TEXT,
+                PRIMARY KEY (workbook, sheet, text_hash, issue_type, source)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS reviewed_texts (
+                workbook TEXT, sheet TEXT, text_hash TEXT, source TEXT,
+                PRIMARY KEY (workbook, sheet, text_hash, source)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS review_imports (path TEXT PRIMARY KEY, mtime_ns INTEGER);
+        """)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # ---------- 记录运行 ----------
+
+    def record_run(self, workbook, sheet, column, config, metrics, findings, order=None,
+                   uncovered=(), reports=(), started_at=None, model=""):
+        """
+        记录一次运行
+
+        Args:
+            workbook: 工作簿路径
+            sheet / column: 检查的 Sheet 和列
+            config: 运行配置（批次大小、并发数、调度策略等）
+            metrics: 运行指标（行数、耗时、失败批次等）
+            findings: FindingsStore
+            order: 写入报告的问题序号（默认全部）
+            uncovered: 未覆盖的行号范围（如 ["4-33"]），这些行上的旧问题不算已修复
+            reports: 报告文件路径
+            started_at: 开始时间（ISO格式）
+
+        Returns:
+            int: 运行id
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        cursor = self.conn.execute(
+            "INSERT INTO runs (workbook, sheet, column_name, started_at, finished_at, model, config, metrics,"
+            " uncovered, reports) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(workbook), sheet, column, started_at or now, now, model,
+             json.dumps(config, ensure_ascii=False), json.dumps(metrics, ensure_ascii=False),
+             json.dumps(parse_row_ranges(uncovered)), json.dumps([os.path.abspath(p) for p in reports])),
+        )
+        run_id = cursor.lastrowid
+        rows = []
+        for finding in findings.iter(order):
+            key = row_key(finding.row_id, finding.row)
+            digest = text_hash(finding.text)
+            rows.append((run_id, fingerprint(finding.sheet or sheet, key, digest, finding.issue_type),
+                         finding.sheet or sheet, key, finding.row, digest, finding.text,
+                         finding.issue_type, finding.issue, finding.suggestion))
+        self.conn.executemany("INSERT INTO findings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self.conn.commit()
+        return run_id
+
+    def runs(self, workbook=None, sheet=None, column=None, limit=20):
+        """最近的运行（新的在前）"""
+        sql = "SELECT * FROM runs"
+        conditions, params = [], []
+        for name, value in (("workbook", workbook and os.path.abspath(workbook)),
+                            ("sheet", sheet), ("column_name", column)):
+            if value:
+                conditions.append(f"{name} = ?")
+                params.append(value)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY id DESC LIMIT ?"
+        return [dict(row) for row in self.conn.execute(sql, params + [limit])]
+
+    def previous_run(self, run_id):
+        """同一 工作簿/Sheet/列 的上一次运行id，没有时返回None"""
+        row = self.conn.execute(
+            "SELECT p.id FROM runs r JOIN runs p ON p.workbook = r.workbook AND p.sheet = r.sheet"
+            " AND p.column_name = r.column_name AND p.id < r.id WHERE r.id = ? ORDER BY p.id DESC LIMIT 1",
+            (run_id,),
+        ).fetchone()
+        return row[0] if row else None
+
+    # ---------- 运行对比 ----------
+
+    def diff(self, run_id, base_id=None, kind="new"):
+        """
+        对比两次运行的问题
+
+        Args:
+            run_id: 本次运行
+            base_id: 对比的运行（默认同一目标的上一次运行）
+            kind: new（本次新出现）/ fixed（上次有、本次没有，且本次检查过该行）/ recurring（两次都有）
+
+        Returns:
+            list: 问题字典列表（fixed 返回上次运行中的记录）
+        """
+        if kind not in DIFF_KINDS:
+            raise ValueError(f"不支持的对比类型: {kind}（可选: {', '.join(DIFF_KINDS)}）")
+        if base_id is None:
+            base_id = self.previous_run(run_id)
+        if base_id is None:
+            return [dict(row) for row in self._findings(run_id)] if kind == "new" else []
+        if kind == "fixed":
+            current, other = base_id, run_id
+        else:
+            current, other = run_id, base_id
+        op = "IN" if kind == "recurring" else "NOT IN"
+        rows = [dict(row) for row in self.conn.execute(
+            f"SELECT * FROM findings WHERE run_id = ? AND fingerprint {op}"
+            " (SELECT fingerprint FROM findings WHERE run_id = ?) ORDER BY excel_row",
+            (current, other),
+        )]
+        if kind == "fixed":
+            # 本次未覆盖的行、已被忽略的问题不算已修复
+            run = self.conn.execute("SELECT workbook, uncovered FROM runs WHERE id = ?", (run_id,)).fetchone()
+            ranges = json.loads(run["uncovered"] or "[]")
+            dismissed = self.dismissed_keys(run["workbook"])
+            rows = [
+                row for row in rows
+                if not any(start <= row["excel_row"] <= end for start, end in ranges)
+                and (row["sheet"], row["text_hash"], row["issue_type"]) not in dismissed
+            ]
+        return rows
+
+    def _findings(self, run_id):
+        return self.conn.execute("SELECT * FROM findings WHERE run_id = ? ORDER BY excel_row", (run_id,))
+
+    def summary(self, run_id, base_id=None):
+        """返回 {"new": n, "fixed": n, "recurring": n}"""
+        return {kind: len(self.diff(run_id, base_id, kind)) for kind in DIFF_KINDS}
+
+    # ---------- 审核结果 ----------
+
+    def import_review(self, report_path, workbook, sheet):
+        """
+        导入报告中的处理状态
+
+        标记为「忽略」的问题记为忽略（按 文本哈希 + 问题类型，相同文本在其他行也生效）；
+        一行的所有问题都被忽略时，该文本记为已审核无问题。同一报告重复导入时替换旧记录。
+
+        Returns:
+            tuple: (忽略的问题数, 审核为无问题的文本数)
+        """
+        source = os.path.abspath(report_path)
+        workbook = os.path.abspath(workbook)
+        now = datetime.now().isoformat(timespec="seconds")
+        dismissals, clean = [], []
+        records = iter_report_rows(report_path)
+        for (_, text), group in groupby(records, key=lambda r: (str(r.get("row", "")), r.get("text") or "")):
+            group = list(group)
+            digest = text_hash(text)
+            ignored = [r for r in group if str(r.get("status") or "").strip() == STATUS_IGNORED]
+            for record in ignored:
+                issue_type = split_issue(record.get("issue"))[0]
+                dismissals.append((workbook, sheet, digest, issue_type, source, now))
+            if ignored and len(ignored) == len(group):
+                clean.append((workbook, sheet, digest, source))
+        with self.conn:
+            self.conn.execute("DELETE FROM dismissals WHERE source = ?", (source,))
+            self.conn.execute("DELETE FROM reviewed_texts WHERE source = ?", (source,))
+            self.conn.executemany("INSERT OR IGNORE INTO dismissals VALUES (?, ?, ?, ?, ?, ?)", dismissals)
+            self.conn.executemany("INSERT OR IGNORE INTO reviewed_texts VALUES (?, ?, ?, ?)", clean)
+            self.conn.execute("INSERT OR REPLACE INTO review_imports VALUES (?, ?)",
+                              (source, os.stat(report_path).st_mtime_ns))
+        return len(dismissals), len(clean)
+
+    def sync_reviews(self, workbook, sheet, column):
+        """
+        导入以前运行的报告中的审核结果（报告自上次导入后被修改过才重新导入）
+
+        Returns:
+            int: 导入的报告数
+        """
+        imported = 0
+        for run in self.runs(workbook, sheet, column, limit=50):
+            for path in json.loads(run["reports"] or "[]"):
+                if not os.path.exists(path) or os.path.splitext(path)[1].lower() not in (".xlsx", ".csv", ".jsonl"):
+                    continue
+                row = self.conn.execute("SELECT mtime_ns FROM review_imports WHERE path = ?", (path,)).fetchone()
+                if row is not None and row[0] == os.stat(path).st_mtime_ns:
+                    continue
+                try:
+                    self.import_review(path, workbook, sheet)
+                    imported += 1
+                except Exception as e:
+                    print(f"⚠️ 无法导入审核结果 {path}: {e}")
+        return imported
+
+    def dismissed_keys(self, workbook, sheet=None):
+        """已忽略的问题：{(sheet, 文本哈希, 问题类型)}"""
+        sql = "SELECT sheet, text_hash, issue_type FROM dismissals WHERE workbook = ?"
+        params = [os.path.abspath(workbook)]
+        if sheet is not None:
+            sql += " AND sheet = ?"
+            params.append(sheet)
+        return {tuple(row) for row in self.conn.execute(sql, params)}
+
+    def reviewed_texts(self, workbook, sheet):
+        """所有问题都被忽略过的文本哈希"""
+        return {row[0] for row in self.conn.execute(
+            "SELECT text_hash FROM reviewed_texts WHERE workbook = ? AND sheet = ?",
+            (os.path.abspath(workbook), sheet))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="查询检查历史")
+    parser.add_argument("--db", default=None, help=f"数据库路径（默认 {default_db_path()}）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    runs_parser = sub.add_parser("runs", help="列出最近的运行")
+    runs_parser.add_argument("--limit", type=int, default=20)
+    diff_parser = sub.add_parser("diff", help="对比两次运行的问题")
+    diff_parser.add_argument("--run", type=int, default=None, help="运行id（默认最近一次）")
+    diff_parser.add_argument("--base", type=int, default=None, help="对比的运行id（默认同一目标的上一次运行）")
+    diff_parser.add_argument("--kind", default="new", choices=DIFF_KINDS)
+    review_parser = sub.add_parser("import-review", help="导入报告中的处理状态（忽略）")
+    review_parser.add_argument("report")
+    review_parser.add_argument("--workbook", default=None, help="工作簿路径（默认从生成该报告的运行中查找）")
+    review_parser.add_argument("--sheet", default=None)
+    args = parser.parse_args(argv)
+
+    store = ResultsStore(args.db)
+    try:
+        if args.command == "runs":
+            for run in store.runs(limit=args.limit):
+                metrics = json.loads(run["metrics"] or "{}")
+                print(f"#{run['id']} {run['finished_at']} {os.path.basename(run['workbook'])} "
+                      f"{run['sheet']}/{run['column_name']}: {metrics.get('findings', 0)} 处问题，"
+                      f"{metrics.get('rows_checked', 0)} 行，{metrics.get('elapsed_seconds', 0)} 秒")
+        elif args.command == "diff":
+            run_id = args.run or next((run["id"] for run in store.runs(limit=1)), None)
+            if run_id is None:
+                print("没有运行记录")
+                return 1
+            rows = store.diff(run_id, args.base, args.kind)
+            print(f"运行 #{run_id} {args.kind}: {len(rows)} 处")
+            for row in rows:
+                print(f"   - {row['sheet']} 第{row['excel_row']}行 [{row['row_key']}] "
+                      f"{row['issue']} → {row['suggestion']}")
+        elif args.command == "import-review":
+            workbook, sheet = args.workbook, args.sheet
+            if workbook is None or sheet is None:
+                source = os.path.abspath(args.report)
+                run = next((r for r in store.runs(limit=1000) if source in json.loads(r["reports"] or "[]")), None)
+                if run is None:
+                    print("❌ 找不到生成该报告的运行，请指定 --workbook 和 --sheet")
+                    return 1
+                workbook, sheet = workbook or run["workbook"], sheet or run["sheet"]
+            dismissed, clean = store.import_review(args.report, workbook, sheet)
+            print(f"✅ 已导入: {dismissed} 条忽略，{clean} 条文本审核为无问题")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
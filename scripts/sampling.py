@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+分层抽样 - 用少量样本估计整张表的问题率
+
+新导入的大批量文本（如 20 万行的本地化文本）有时只需要判断质量是否可以接受，
+不需要完整检查。--sample 按 Sheet、文本长度和 id 区间分层抽样，只检查样本，
+按层加权估计有问题的行所占比例，并给出 Wilson 置信区间：
+
+- 分层保证短句、长句和表格不同位置（不同批次导入的 id 段）都被覆盖
+- 各层按行数比例分配样本（行数足够时每层至少1行），层内简单随机抽样
+- 方差按层计算（含有限总体校正），用 Kish 有效样本量换算为 Wilson 区间，
+  样本中没有发现问题时区间上界仍大于0
+"""
+import math
+import random
+from collections import Counter
+
+LENGTH_BINS = (20, 60)  # 文本长度分层边界：短（<20）、中（<60）、长
+ID_BINS = 4  # 每个 Sheet 按 id 顺序分为几段
+Z_95 = 1.959964  # 95% 置信水平
+
+
+def parse_sample_size(value, total):
+    """
+    解析 --sample 参数
+
+    Args:
+        value: 行数（如 "2000"）或比例（如 "2%"、"0.02"）
+        total: 总行数
+
+    Returns:
+        int: 抽样行数（至少1行，不超过总行数）
+
+    Raises:
+        ValueError: 格式错误或不是正数
+    """
+    text = str(value).strip()
+    if text.endswith("%"):
+        size = total * float(text[:-1]) / 100
+    elif "." in text:
+        size = total * float(text)
+    else:
+        size = int(text)
+    if size <= 0:
+        raise ValueError(f"抽样数量应为正数: {value}")
+    return max(1, min(total, int(math.ceil(size))))
+
+
+def length_label(text):
+    """文本长度所在的层"""
+    length = len(str(text))
+    for bound in LENGTH_BINS:
+        if length < bound:
+            return f"<{bound}"
+    return f">={LENGTH_BINS[-1]}"
+
+
+def _id_order(row):
+    # 数字 id 按数值排序，否则按行号
+    try:
+        return (0, float(row.row_id), row.excel_row)
+    except (TypeError, ValueError):
+        return (1, 0.0, row.excel_row)
+
+
+def assign_strata(rows, default_sheet="", id_bins=ID_BINS):
+    """
+    为每一行分配层：(Sheet, 长度层, id 区间序号)
+
+    Args:
+        rows: RowItem 列表
+        default_sheet: 行没有 Sheet 信息时使用的名称
+        id_bins: 每个 Sheet 按 id 顺序划分的段数
+
+    Returns:
+        dict: {excel_row: 层}
+    """
+    by_sheet = {}
+    for row in rows:
+        by_sheet.setdefault(row.sheet or default_sheet, []).append(row)
+    strata = {}
+    for sheet, sheet_rows in by_sheet.items():
+        ordered = sorted(sheet_rows, key=_id_order)
+        for position, row in enumerate(ordered):
+            strata[row.excel_row] = (sheet, length_label(row.text), position * id_bins // len(ordered))
+    return strata
+
+
+def allocate(populations, size):
+    """
+    按行数比例为各层分配样本量（最大余数法，样本量不少于层数时每层至少1行）
+
+    Args:
+        populations: {层: 行数}
+        size: 总样本量
+
+    Returns:
+        dict: {层: 样本量}
+    """
+    total = sum(populations.values())
+    if size >= total:
+        return dict(populations)
+    exact = {key: size * count / total for key, count in populations.items()}
+    alloc = {key: int(value) for key, value in exact.items()}
+    if size >= len(populations):
+        alloc = {key: max(1, count) for key, count in alloc.items()}
+    remaining = size - sum(alloc.values())
+    by_remainder = sorted(populations, key=lambda key: exact[key] - int(exact[key]), reverse=True)
+    while remaining > 0:
+        for key in by_remainder:
+            if remaining and alloc[key] < populations[key]:
+                alloc[key] += 1
+                remaining -= 1
+    while remaining < 0:
+        # 每层至少1行导致超出时，从分配最多的层中扣除
+        key = max(alloc, key=lambda k: alloc[k])
+        alloc[key] -= 1
+        remaining += 1
+    return alloc
+
+
+def wilson_interval(successes, n, z=Z_95):
+    """
+    比例的 Wilson 置信区间
+
+    Args:
+        successes: 命中数（可以是小数，用于有效样本量）
+        n: 样本量
+        z: 正态分位数
+
+    Returns:
+        tuple: (下界, 上界)
+    """
+    if n <= 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def estimate_rate(strata, z=Z_95):
+    """
+    分层估计有问题的行所占比例
+
+    Args:
+        strata: {层: {"population": 层内行数, "checked": 检查了的样本行数, "flagged": 其中有问题的行数}}
+            没有检查任何样本的层不参与估计
+        z: 正态分位数
+
+    Returns:
+        dict: rate / low / high（比例及置信区间）、checked / flagged（样本行数）、
+              population（参与估计的总行数）、estimated_rows / estimated_low / estimated_high（换算为行数）
+    """
+    used = {key: s for key, s in strata.items() if s["checked"]}
+    population = sum(s["population"] for s in used.values())
+    checked = sum(s["checked"] for s in used.values())
+    flagged = sum(s["flagged"] for s in used.values())
+    if not population:
+        return {"rate": None, "low": None, "high": None, "checked": 0, "flagged": 0, "population": 0,
+                "estimated_rows": None, "estimated_low": None, "estimated_high": None}
+    rate = variance = 0.0
+    for s in used.values():
+        weight = s["population"] / population
+        p = s["flagged"] / s["checked"]
+        rate += weight * p
+        fpc = 1 - s["checked"] / s["population"]
+        variance += weight * weight * p * (1 - p) / s["checked"] * fpc
+    # Kish 有效样本量：与分层估计方差相同的简单随机样本量
+    effective = rate * (1 - rate) / variance if variance > 0 else checked
+    low, high = wilson_interval(rate * effective, effective, z)
+    return {
+        "rate": rate, "low": low, "high": high,
+        "checked": checked, "flagged": flagged, "population": population,
+        "estimated_rows": round(rate * population),
+        "estimated_low": round(low * population),
+        "estimated_high": round(high * population),
+    }
+
+
+class StratifiedSample:
+    """
+    按 Sheet、文本长度和 id 区间分层的随机样本
+
+    Args:
+        rows: 全部待检查的 RowItem
+        size: 样本量
+        seed: 随机种子（None 时随机生成，记录在 seed 属性中便于复现）
+        default_sheet: 行没有 Sheet 信息时使用的名称
+    """
+
+    def __init__(self, rows, size, seed=None, default_sheet=""):
+        self.seed = random.randrange(2 ** 31) if seed is None else seed
+        self.strata_of = assign_strata(rows, default_sheet)
+        self.populations = Counter(self.strata_of.values())
+        members = {}
+        for row in rows:
+            members.setdefault(self.strata_of[row.excel_row], []).append(row)
+        rng = random.Random(self.seed)
+        picked = set()
+        for key, count in allocate(self.populations, size).items():
+            picked.update(row.excel_row for row in rng.sample(members[key], count))
+        # 保持表格顺序，批次仍按行号划分
+        self.rows = [row for row in rows if row.excel_row in picked]
+        self.unsampled = [row.excel_row for row in rows if row.excel_row not in picked]
+
+    def strata_counts(self, covered_rows, flagged_rows, keys=None):
+        """
+        各层的行数、检查了的样本行数和有问题的行数
+
+        Args:
+            covered_rows: 实际完成检查的样本行号（失败或未派发的行不计入）
+            flagged_rows: 有问题的行号
+            keys: 只统计这些层（None 表示全部）
+        """
+        counts = {key: {"population": count, "checked": 0, "flagged": 0}
+                  for key, count in self.populations.items() if keys is None or key in keys}
+        flagged_rows = set(flagged_rows)
+        for excel_row in set(covered_rows):
+            key = self.strata_of.get(excel_row)
+            if key in counts:
+                counts[key]["checked"] += 1
+                counts[key]["flagged"] += excel_row in flagged_rows
+        return counts
+
+    def summary(self, covered_rows, rows_by_type):
+        """
+        汇总样本检查结果
+
+        Args:
+            covered_rows: 实际完成检查的样本行号
+            rows_by_type: {问题类型: 有该类问题的行号集合}
+
+        Returns:
+            dict: overall（全部问题）、by_sheet（按 Sheet）、by_type（按问题类型）的 estimate_rate() 结果
+        """
+        flagged = set().union(*rows_by_type.values()) if rows_by_type else set()
+        sheets = sorted({key[0] for key in self.populations})
+        return {
+            "seed": self.seed,
+            "sample_rows": len(self.rows),
+            "strata": len(self.populations),
+            "overall": estimate_rate(self.strata_counts(covered_rows, flagged)),
+            "by_sheet": {
+                sheet: estimate_rate(self.strata_counts(
+                    covered_rows, flagged, {key for key in self.populations if key[0] == sheet}))
+                for sheet in sheets
+            },
+            "by_type": {
+                issue_type: estimate_rate(self.strata_counts(covered_rows, type_rows))
+                for issue_type, type_rows in sorted(rows_by_type.items(), key=lambda item: -len(item[1]))
+            },
+        }
@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+"""
+批次调度器 - 决定待检查行以什么顺序发送给模型
+
+默认的 sequential 调度器保持表格原有顺序；priority 调度器优先派发
+策划刚改过的行、命中本地敏感词的行、较长的文本以及指定 Sheet 的行，
+让审核人员尽早拿到最重要的问题。
+"""
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+# 调度器状态（上次运行的行快照）保存目录
+STATE_DIR = ".conf_check_state"
+
+# 优先级权重
+PRIORITY_CHANGED = 100       # 上次运行后新增或修改的行
+PRIORITY_SENSITIVE = 50      # 命中本地敏感词规则的行
+PRIORITY_NAMED_SHEET = 30    # 用户指定优先检查的Sheet
+PRIORITY_LENGTH_MAX = 20     # 文本长度加分上限（每20字1分）
+
+
+def text_hash(text):
+    """
+    计算文本的短哈希（用于判断行内容是否变化）
+
+    Args:
+        text: 文本内容
+
+    Returns:
+        str: 16位十六进制哈希
+    """
+    return hashlib.sha1(str(text).encode("utf-8")).hexdigest()[:16]
+
+
+class RowItem:
+    """
+    一条待检查的文本行
+    """
+    __slots__ = ("excel_row", "text", "sheet", "row_id", "priority", "reasons", "members")
+
+    def __init__(self, excel_row, text, sheet="", row_id=""):
+        self.excel_row = int(excel_row)
+        self.text = text
+        self.sheet = sheet
+        self.row_id = row_id
+        self.priority = 0
+        self.reasons = []
+        self.members = []  # 近似重复聚类时，由本行代表的其他行（见 dedup.py）
+
+    def __repr__(self):
+        return f"RowItem({self.sheet}!{self.excel_row}, priority={self.priority})"
+
+
+class Batch:
+    """
+    一个发送给模型的批次
+    """
+    __slots__ = ("number", "rows", "priority")
+
+    def __init__(self, number, rows, priority=0):
+        self.number = number
+        self.rows = rows
+        self.priority = priority
+
+    @property
+    def excel_rows(self):
+        return [row.excel_row for row in self.rows]
+
+    @property
+    def covered_rows(self):
+        """批次覆盖的全部行号（包括代表行所代表的近似重复行）"""
+        return self.excel_rows + [member.excel_row for row in self.rows for member in row.members]
+
+    def payload(self):
+        """
+        构造发送给 LLM 的数据结构：{批次内编号: 文本}
+
+        编号从1开始，比5-6位的 Excel 行号更省 token；模型返回的编号由 resolve_issues 还原为行号。
+        """
+        return {handle: row.text for handle, row in enumerate(self.rows, 1)}
+
+    def resolve_issues(self, issues):
+        """
+        将模型返回的批次内编号还原为 Excel 行号
+
+        Args:
+            issues: 模型返回的问题列表（line_no 为批次内编号）
+
+        Returns:
+            tuple: (line_no 已替换为 Excel 行号的问题列表, 编号不属于本批次的问题列表)
+        """
+        resolved, invalid = [], []
+        for item in issues:
+            if not isinstance(item, dict):
+                continue
+            try:
+                handle = int(item.get("line_no"))
+            except (TypeError, ValueError):
+                handle = 0
+            if 1 <= handle <= len(self.rows):
+                resolved.append(dict(item, line_no=self.rows[handle - 1].excel_row))
+            else:
+                invalid.append(item)
+        return resolved, invalid
+
+    def row_range(self):
+        """返回批次行号的可读描述，如 "12-40" 或 "12-20,35" """
+        return format_row_ranges(self.excel_rows)
+
+
+def format_row_ranges(rows):
+    """
+    将行号列表压缩为区间描述
+
+    Args:
+        rows: 行号列表
+
+    Returns:
+        str: 例如 "5-8,12,20-21"
+    """
+    rows = sorted(set(int(r) for r in rows))
+    if not rows:
+        return ""
+    ranges = []
+    start = prev = rows[0]
+    for r in rows[1:]:
+        if r == prev + 1:
+            prev = r
+            continue
+        ranges.append(f"{start}-{prev}" if start != prev else str(start))
+        start = prev = r
+    ranges.append(f"{start}-{prev}" if start != prev else str(start))
+    return ",".join(ranges)
+
+
+def snapshot_path(input_file, sheet_name, column, state_dir=STATE_DIR):
+    """
+    获取行快照文件路径（每个 文件/Sheet/列 一个快照）
+    """
+    base = os.path.splitext(os.path.basename(str(input_file)))[0]
+    safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in f"{base}_{sheet_name}_{column}")
+    return os.path.join(state_dir, f"{safe_name}.json")
+
+
+def load_row_snapshot(path):
+    """
+    读取上次运行保存的行快照
+
+    Returns:
+        dict: {excel_row: text_hash}，没有快照时返回None
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {int(k): v for k, v in data.get("rows", {}).items()}
+    except Exception as e:
+        print(f"⚠️ 无法读取行快照 {path}: {e}")
+        return None
+
+
+def save_row_snapshot(path, checked_rows, previous=None):
+    """
+    保存行快照
+
+    只更新本次真正检查过的行；未检查的行保留旧哈希，
+    这样它们在下次运行时仍会被识别为“已修改”。
+
+    Args:
+        path: 快照文件路径
+        checked_rows: 本次检查完成的 RowItem 列表
+        previous: 旧快照 {excel_row: text_hash}
+    """
+    rows = dict(previous or {})
+    for row in checked_rows:
+        rows[row.excel_row] = text_hash(row.text)
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"rows": {str(k): v for k, v in sorted(rows.items())}}, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"⚠️ 无法保存行快照 {path}: {e}")
+
+
+def find_sensitive_hits(text, words):
+    """
+    查找文本命中的本地敏感词
+
+    Args:
+        text: 文本
+        words: 敏感词列表
+
+    Returns:
+        list: 命中的敏感词
+    """
+    if not words or not isinstance(text, str):
+        return []
+    return [w for w in words if w and w in text]
+
+
+def load_word_list(path):
+    """
+    读取词表文件（每行一个词，#开头为注释）
+    """
+    words = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            word = line.strip()
+            if word and not word.startswith("#"):
+                words.append(word)
+    return words
+
+
+# ================= 时间预算 =================
+
+def parse_deadline(value, now=None):
+    """
+    解析截止时间
+
+    Args:
+        value: "HH:MM"（今天，已过则为明天）或 ISO 格式日期时间，如 "2025-12-20T06:30"
+        now: 当前时间（测试用）
+
+    Returns:
+        datetime: 截止时间
+    """
+    now = now or datetime.now()
+    try:
+        clock = datetime.strptime(value, "%H:%M")
+    except ValueError:
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"无法解析截止时间: {value}（格式: HH:MM 或 YYYY-MM-DDTHH:MM）")
+    deadline = now.replace(hour=clock.hour, minute=clock.minute, second=0, microsecond=0)
+    if deadline <= now:
+        deadline += timedelta(days=1)
+    return deadline
+
+
+class RunBudget:
+    """
+    运行时间预算
+
+    根据已完成批次的耗时估算下一批需要的时间，在预算即将用完时停止派发新批次，
+    并把进行中请求的超时时间限制在预算之内，保证留出生成报告的时间。
+    """
+
+    SAFETY_FACTOR = 1.2          # 预估耗时的安全系数
+    REPORT_RESERVE = 15.0        # 为保存报告预留的秒数
+    SMOOTHING = 0.3              # 批次耗时指数平滑系数
+
+    def __init__(self, seconds, clock=time.monotonic):
+        self.clock = clock
+        self.started = clock()
+        self.seconds = float(seconds)
+        self.avg_batch_seconds = None
+        self.observed = 0
+
+    @classmethod
+    def from_options(cls, deadline=None, max_minutes=None):
+        """
+        根据 --deadline / --max-minutes 创建预算，两者都未指定时返回None；
+        同时指定时取较早者
+        """
+        limits = []
+        if max_minutes is not None:
+            limits.append(float(max_minutes) * 60)
+        if deadline:
+            limits.append((parse_deadline(deadline) - datetime.now()).total_seconds())
+        if not limits:
+            return None
+        return cls(max(0.0, min(limits)))
+
+    def elapsed(self):
+        return self.clock() - self.started
+
+    def remaining(self):
+        """剩余可用于检查的秒数（已扣除报告预留时间）"""
+        return self.seconds - self.elapsed() - self.REPORT_RESERVE
+
+    def observe(self, batch_seconds):
+        """记录一个已完成批次的耗时"""
+        self.observed += 1
+        if self.avg_batch_seconds is None:
+            self.avg_batch_seconds = batch_seconds
+        else:
+            self.avg_batch_seconds += self.SMOOTHING * (batch_seconds - self.avg_batch_seconds)
+
+    def can_dispatch(self):
+        """剩余时间是否足够再完成一个批次"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            return False
+        if self.avg_batch_seconds is None:
+            # 还没有观测数据，只要有剩余时间就派发
+            return True
+        return remaining > self.avg_batch_seconds * self.SAFETY_FACTOR
+
+    def request_timeout(self, default):
+        """进行中的请求最多等待到预算用完"""
+        return max(1.0, min(float(default), self.remaining()))
+
+    def estimated_finish(self, pending_batches, workers):
+        """按当前平均耗时估算剩余批次还需多少秒，无观测数据时返回None"""
+        if self.avg_batch_seconds is None:
+            return None
+        rounds = -(-pending_batches // max(1, workers))
+        return rounds * self.avg_batch_seconds
+
+
+# ================= 调度器 =================
+
+SCHEDULERS = {}
+
+
+def register_scheduler(name):
+    """
+    注册调度器的装饰器，新调度器只需继承 SequentialScheduler 并实现 order()
+    """
+    def decorator(cls):
+        cls.name = name
+        SCHEDULERS[name] = cls
+        return cls
+    return decorator
+
+
+def create_scheduler(name, batch_size, **options):
+    """
+    按名称创建调度器
+
+    Args:
+        name: 调度器名称（sequential / priority）
+        batch_size: 批次大小
+        **options: 调度器参数
+
+    Returns:
+        SequentialScheduler: 调度器实例
+    """
+    if name not in SCHEDULERS:
+        raise ValueError(f"未知的调度器: {name}（可选: {', '.join(sorted(SCHEDULERS))}）")
+    return SCHEDULERS[name](batch_size, **options)
+
+
+@register_scheduler("sequential")
+class SequentialScheduler:
+    """
+    顺序调度：按表格原有顺序分批
+    """
+
+    def __init__(self, batch_size, **options):
+        if batch_size < 1:
+            raise ValueError(f"批次大小必须大于0: {batch_size}")
+        self.batch_size = batch_size
+        self.options = options
+
+    def order(self, rows):
+        """返回排序后的行列表，子类覆盖此方法实现不同策略"""
+        return list(rows)
+
+    def plan(self, rows):
+        """
+        将待检查行划分为批次
+
+        Args:
+            rows: RowItem 列表
+
+        Returns:
+            list: Batch 列表，按派发顺序排列
+        """
+        ordered = self.order(rows)
+        batches = []
+        for start in range(0, len(ordered), self.batch_size):
+            chunk = ordered[start:start + self.batch_size]
+            priority = max(row.priority for row in chunk)
+            # 批次内部按行号排序，方便模型和人工对照
+            chunk = sorted(chunk, key=lambda r: (r.sheet, r.excel_row))
+            batches.append(Batch(len(batches) + 1, chunk, priority))
+        return batches
+
+
+@register_scheduler("priority")
+class PriorityScheduler(SequentialScheduler):
+    """
+    优先级调度：已修改 > 命中敏感词 > 指定Sheet > 长文本
+
+    options:
+        previous_snapshot: 上次运行的行快照 {excel_row: text_hash}，None表示首次运行
+        sensitive_words: 本地敏感词列表
+        priority_sheets: 优先检查的Sheet名称列表
+    """
+
+    def score(self, row):
+        """计算单行优先级，同时记录加分原因"""
+        snapshot = self.options.get("previous_snapshot")
+        score = 0
+        reasons = []
+
+        if snapshot is not None and snapshot.get(row.excel_row) != text_hash(row.text):
+            score += PRIORITY_CHANGED
+            reasons.append("已修改")
+
+        hits = find_sensitive_hits(row.text, self.options.get("sensitive_words"))
+        if hits:
+            score += PRIORITY_SENSITIVE
+            reasons.append(f"敏感词:{'/'.join(hits[:3])}")
+
+        if row.sheet and row.sheet in (self.options.get("priority_sheets") or []):
+            score += PRIORITY_NAMED_SHEET
+            reasons.append("指定Sheet")
+
+        score += min(len(row.text) // 20, PRIORITY_LENGTH_MAX)
+        return score, reasons
+
+    def order(self, rows):
+        for row in rows:
+            row.priority, row.reasons = self.score(row)
+        # 稳定排序：同优先级保持原有顺序
+        return sorted(rows, key=lambda r: -r.priority)
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+工作簿行索引 - 持久化的 行号 ↔ 对白id ↔ 文本哈希 映射
+
+每次运行都用 pandas 重新读取整个工作簿、再用 "行号 = index + 表头行数 + 1"
+逐行换算非常慢。这里按工作簿版本建立 SQLite 索引（保存在 .conf_check_state 下），
+记录每个 Sheet 每个文本单元格的行号、所在行的id和文本哈希：
+
+- 工作簿的修改时间和大小不变时直接复用；变化时再比较文件哈希，内容相同只更新修改时间
+- Sheet 按需建立索引，报告补全、增量检查、去重和缓存查询都是一次索引查询
+"""
+import hashlib
+import json
+import os
+import sqlite3
+
+from scheduler import STATE_DIR, text_hash
+
+INDEX_VERSION = 1
+INSERT_CHUNK = 5000
+
+
+def index_path(workbook, state_dir=STATE_DIR):
+    """返回工作簿索引文件路径（文件名包含路径哈希，同名文件不会冲突）"""
+    path = os.path.abspath(workbook)
+    digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:8]
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(state_dir, f"{name}-{digest}.index.sqlite")
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """计算文件内容的 sha1"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def normalize_header_rows(header_rows):
+    """将表头配置（None / int / list）统一为行号列表（0-based）"""
+    if header_rows is None:
+        return [0]
+    if isinstance(header_rows, int):
+        return [header_rows]
+    return sorted(int(r) for r in header_rows)
+
+
+def build_column_names(header_values):
+    """
+    合并多行表头为列名（与 load_excel_with_multirow_header 的规则一致：下划线连接、跳过空值）
+
+    Args:
+        header_values: 每个表头行的单元格值列表
+
+    Returns:
+        list: 列名列表，重名列依次加 .1、.2 后缀
+    """
+    width = max((len(values) for values in header_values), default=0)
+    names = []
+    seen = {}
+    for col in range(width):
+        parts = []
+        for values in header_values:
+            value = values[col] if col < len(values) else None
+            if value is not None and str(value).strip() != "":
+                parts.append(str(value))
+        name = "_".join(parts) or f"Unnamed: {col}"
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        names.append(f"{name}.{count}" if count else name)
+    return names
+
+
+def _cell_id(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class SheetIndex:
+    """
+    工作簿行索引
+
+    用法：
+        index = SheetIndex("task.xlsx")
+        index.ensure_sheet("TASK_CONF", [0, 1, 2])
+        col = index.column_position("TASK_CONF", "optional_string_text")
+        for excel_row, text, row_id in index.iter_texts("TASK_CONF", col):
+            ...
+    """
+
+    def __init__(self, workbook, db_path=None, state_dir=STATE_DIR):
+        self.workbook = os.path.abspath(workbook)
+        if not os.path.exists(self.workbook):
+            raise FileNotFoundError(f"文件不存在: {workbook}")
+        self.db_path = db_path or index_path(workbook, state_dir)
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self._create_tables()
+        # 工作簿内容发生变化（索引被清空）时为 True
+        self.invalidated = self._validate()
+
+    def _create_tables(self):
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS sheets (sheet TEXT PRIMARY KEY, header_rows TEXT, columns TEXT);
+            CREATE TABLE IF NOT EXISTS rows (
+                sheet TEXT, excel_row INTEGER, row_id TEXT,
+                PRIMARY KEY (sheet, excel_row)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS cells (
+                sheet TEXT, col INTEGER, excel_row INTEGER, text TEXT, text_hash TEXT,
+                PRIMARY KEY (sheet, col, excel_row)) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_rows_id ON rows (sheet, row_id);
+            CREATE INDEX IF NOT EXISTS idx_cells_hash ON cells (text_hash);
+        """)
+
+    def _meta(self):
+        return dict(self.conn.execute("SELECT key, value FROM meta"))
+
+    def _set_meta(self, **values):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [(k, str(v)) for k, v in values.items()]
+        )
+        self.conn.commit()
+
+    def _validate(self):
+        """检查索引是否对应当前版本的工作簿，不对应时清空索引"""
+        stat = os.stat(self.workbook)
+        mtime, size = repr(stat.st_mtime), str(stat.st_size)
+        meta = self._meta()
+        if meta.get("version") == str(INDEX_VERSION) and meta.get("mtime") == mtime and meta.get("size") == size:
+            return False
+        digest = file_hash(self.workbook)
+        if meta.get("version") == str(INDEX_VERSION) and meta.get("hash") == digest:
+            # 文件被重新保存但内容未变（如只是打开后另存）
+            self._set_meta(mtime=mtime, size=size)
+            return False
+        with self.conn:
+            self.conn.execute("DELETE FROM sheets")
+            self.conn.execute("DELETE FROM rows")
+            self.conn.execute("DELETE FROM cells")
+        self._set_meta(version=INDEX_VERSION, workbook=self.workbook, mtime=mtime, size=size, hash=digest)
+        return True
+
+    def close(self):
+        self.conn.close()
+
+    # ---------- 建立索引 ----------
+
+    def ensure_sheet(self, sheet, header_rows=None):
+        """
+        确保指定 Sheet 已建立索引
+
+        Args:
+            sheet: Sheet名称
+            header_rows: 表头配置（None / int / list）
+
+        Returns:
+            bool: 本次是否重新读取了工作簿
+        """
+        header = normalize_header_rows(header_rows)
+        row = self.conn.execute("SELECT header_rows FROM sheets WHERE sheet = ?", (sheet,)).fetchone()
+        if row is not None and json.loads(row[0]) == header:
+            return False
+        self.build([sheet], header)
+        return True
+
+    def ensure_all(self, header_rows=None):
+        """确保所有 Sheet 已建立索引（跨 Sheet 查询前调用）"""
+        from openpyxl import load_workbook
+
+        wb = load_workbook(self.workbook, read_only=True)
+        try:
+            names = list(wb.sheetnames)
+        finally:
+            wb.close()
+        header = normalize_header_rows(header_rows)
+        indexed = {
+            sheet: json.loads(rows) for sheet, rows in self.conn.execute("SELECT sheet, header_rows FROM sheets")
+        }
+        missing = [name for name in names if indexed.get(name) != header]
+        if missing:
+            self.build(missing, header)
+        return bool(missing)
+
+    def build(self, sheets, header_rows=None):
+        """
+        读取工作簿，为指定 Sheet 建立索引（openpyxl 只读模式逐行读取）
+
+        Raises:
+            KeyError: Sheet 不存在
+        """
+        from openpyxl import load_workbook
+
+        header = normalize_header_rows(header_rows)
+        header_count = max(header) + 1
+        wb = load_workbook(self.workbook, read_only=True, data_only=True)
+        try:
+            for sheet in sheets:
+                if sheet not in wb.sheetnames:
+                    raise KeyError(f"Sheet不存在: {sheet}（可选: {', '.join(wb.sheetnames)}）")
+                self._build_sheet(wb[sheet], sheet, header, header_count)
+        finally:
+            wb.close()
+
+    def _build_sheet(self, ws, sheet, header, header_count):
+        header_values = []
+        row_buffer = []
+        cell_buffer = []
+        with self.conn:
+            self.conn.execute("DELETE FROM rows WHERE sheet = ?", (sheet,))
+            self.conn.execute("DELETE FROM cells WHERE sheet = ?", (sheet,))
+            for excel_row, values in enumerate(ws.iter_rows(values_only=True), start=1):
+                if excel_row <= header_count:
+                    if excel_row - 1 in header:
+                        header_values.append(list(values))
+                    continue
+                if not any(value is not None for value in values):
+                    continue
+                row_buffer.append((sheet, excel_row, _cell_id(values[0])))
+                for col, value in enumerate(values):
+                    if isinstance(value, str) and value != "":
+                        cell_buffer.append((sheet, col, excel_row, value, text_hash(value)))
+                if len(cell_buffer) >= INSERT_CHUNK:
+                    self._flush(row_buffer, cell_buffer)
+            self._flush(row_buffer, cell_buffer)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sheets (sheet, header_rows, columns) VALUES (?, ?, ?)",
+                (sheet, json.dumps(header), json.dumps(build_column_names(header_values), ensure_ascii=False)),
+            )
+
+    def _flush(self, row_buffer, cell_buffer):
+        self.conn.executemany("INSERT OR REPLACE INTO rows VALUES (?, ?, ?)", row_buffer)
+        self.conn.executemany("INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?, ?)", cell_buffer)
+        row_buffer.clear()
+        cell_buffer.clear()
+
+    # ---------- 查询 ----------
+
+    def sheets(self):
+        """已建立索引的 Sheet 名称"""
+        return [row[0] for row in self.conn.execute("SELECT sheet FROM sheets ORDER BY sheet")]
+
+    def header_row_count(self, sheet):
+        row = self.conn.execute("SELECT header_rows FROM sheets WHERE sheet = ?", (sheet,)).fetchone()
+        return max(json.loads(row[0])) + 1 if row else 0
+
+    def columns(self, sheet):
+        """返回 Sheet 的列名列表（按列顺序）"""
+        row = self.conn.execute("SELECT columns FROM sheets WHERE sheet = ?", (sheet,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def column_position(self, sheet, column):
+        """返回列名对应的列序号（从0开始），不存在时返回None"""
+        columns = self.columns(sheet)
+        return columns.index(column) if column in columns else None
+
+    def row_count(self, sheet):
+        """Sheet 中非空数据行的数量"""
+        return self.conn.execute("SELECT COUNT(*) FROM rows WHERE sheet = ?", (sheet,)).fetchone()[0]
+
+    def iter_texts(self, sheet, col):
+        """
+        按行号顺序返回某一列的所有文本
+
+        Yields:
+            tuple: (excel_row, text, row_id)
+        """
+        return self.conn.execute(
+            "SELECT c.excel_row, c.text, r.row_id FROM cells c "
+            "JOIN rows r ON r.sheet = c.sheet AND r.excel_row = c.excel_row "
+            "WHERE c.sheet = ? AND c.col = ? ORDER BY c.excel_row",
+            (sheet, col),
+        )
+
+    def text_at(self, sheet, col, excel_row):
+        """返回单元格文本，不存在时返回空字符串"""
+        row = self.conn.execute(
+            "SELECT text FROM cells WHERE sheet = ? AND col = ? AND excel_row = ?", (sheet, col, int(excel_row))
+        ).fetchone()
+        return row[0] if row else ""
+
+    def row_id_at(self, sheet, excel_row):
+        """返回行的id（第一列的值），不存在时返回空字符串"""
+        row = self.conn.execute(
+            "SELECT row_id FROM rows WHERE sheet = ? AND excel_row = ?", (sheet, int(excel_row))
+        ).fetchone()
+        return row[0] if row else ""
+
+    def rows_for_id(self, sheet, row_id):
+        """返回id对应的行号列表"""
+        return [row[0] for row in self.conn.execute(
+            "SELECT excel_row FROM rows WHERE sheet = ? AND row_id = ? ORDER BY excel_row", (sheet, str(row_id))
+        )]
+
+    def hashes(self, sheet, col):
+        """返回某一列的 {行号: 文本哈希}（与行快照格式相同）"""
+        return dict(self.conn.execute(
+            "SELECT excel_row, text_hash FROM cells WHERE sheet = ? AND col = ?", (sheet, col)
+        ))
+
+    def find_text(self, text):
+        """
+        查找与给定文本完全相同的单元格（跨 Sheet、跨列）
+
+        Returns:
+            list: [(sheet, 列名, excel_row)]
+        """
+        found = []
+        columns = {}
+        for sheet, col, excel_row in self.conn.execute(
+            "SELECT sheet, col, excel_row FROM cells WHERE text_hash = ? ORDER BY sheet, excel_row",
+            (text_hash(text),),
+        ):
+            if sheet not in columns:
+                columns[sheet] = self.columns(sheet)
+            names = columns[sheet]
+            found.append((sheet, names[col] if col < len(names) else str(col), excel_row))
+        return found
@@ -6,9 +6,15 @@ SKILL执行器 - 游戏配置文本检查
 import sys
 import os
 import re
+import json
+import socket
 import subprocess
+import threading
+import time
 from pathlib import Path
 
+PROGRESS_INTERVAL = 2.0  # 进度行的最短输出间隔（秒），避免每个批次刷屏
+
 def parse_skill_command(command):
     """
     解析SKILL命令
@@ -84,6 +90,70 @@ def validate_params(params):
     
     return True, ""
 
+def format_duration(seconds):
+    """将秒数格式化为 "X分Y秒" """
+    if seconds is None:
+        return "估算中"
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}分{seconds}秒" if minutes else f"{seconds}秒"
+
+def format_event(event):
+    """
+    将进度事件格式化为一行中文进度（不需要显示的事件返回None）
+
+    Args:
+        event: conf_check.py 输出的 NDJSON 事件（已解析为 dict）
+    """
+    kind = event.get("event")
+    if kind == "run_start":
+        return (f"📦 开始检查: {event['total_rows']} 行，{event['total_batches']} 批"
+                f"（{event['batch_size']} 行/批，并发 {event['workers']}）")
+    if kind == "batch_finish":
+        failed = f"，批次 {event['batch']} 失败: {event['error']}" if event.get("error") else ""
+        return (f"📈 {event['completed_batches']}/{event['total_batches']} 批 | "
+                f"{event['rows_per_second']:.1f} 行/秒 | 剩余 {format_duration(event.get('eta_seconds'))} | "
+                f"已发现 {event['findings']} 处问题{failed}")
+    if kind == "run_finish":
+        return (f"🏁 检查结束: {event['findings']} 处问题，失败批次 {event['failed_batches']}，"
+                f"未覆盖 {event['uncovered_rows']} 行，用时 {format_duration(event['elapsed_seconds'])}")
+    if kind == "error":
+        return f"❌ {event.get('message', '')}"
+    return None
+
+def relay_events(server, process, interval=PROGRESS_INTERVAL):
+    """
+    接收检查脚本发来的进度事件并输出进度行（在后台线程中运行）
+
+    批次完成事件按 interval 节流，失败批次和开始/结束事件总是输出。
+    检查脚本在连接前退出（参数错误等）时直接返回。
+    """
+    server.settimeout(1.0)
+    while True:
+        try:
+            conn, _ = server.accept()
+            break
+        except socket.timeout:
+            if process.poll() is not None:
+                return
+        except OSError:
+            return
+    conn.settimeout(None)
+    last_shown = 0.0
+    with conn, conn.makefile("r", encoding="utf-8") as stream:
+        for line in stream:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            now = time.monotonic()
+            throttled = event.get("event") == "batch_finish" and not event.get("error")
+            if throttled and now - last_shown < interval:
+                continue
+            text = format_event(event)
+            if text:
+                last_shown = now
+                print(text, flush=True)
+
 def execute_check(params):
     """
     执行检查任务（实时显示输出）
@@ -102,13 +172,22 @@ def execute_check(params):
         print(f"❌ 检查脚本不存在: {check_script}")
         return 1
     
+    # 进度通过本地 socket 上的 NDJSON 事件获取，检查脚本以安静模式运行，不再逐批打印日志
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    events_address = f"127.0.0.1:{server.getsockname()[1]}"
+
     # 构造命令
     cmd = [
         sys.executable,
         str(check_script),
         params["file"],
         params["sheet"],
-        params["column"]
+        params["column"],
+        "--quiet",
+        "--events-socket",
+        events_address,
     ]
     
     print("=" * 60)
@@ -135,6 +214,8 @@ def execute_check(params):
             bufsize=1,  # 行缓冲
             universal_newlines=True
         )
+        relay = threading.Thread(target=relay_events, args=(server, process), daemon=True)
+        relay.start()
         
         # 实时读取并打印输出
         for line in process.stdout:
@@ -142,11 +223,14 @@ def execute_check(params):
         
         # 等待进程结束
         process.wait()
+        relay.join(timeout=5)
         return process.returncode
         
     except Exception as e:
         print(f"❌ 执行失败: {e}")
         return 1
+    finally:
+        server.close()
 
 def main():
     """主函数"""
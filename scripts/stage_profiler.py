@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+分阶段性能剖析 - --profile-stages 时统计各阶段的耗时、内存峰值和 CPU 热点
+
+    with PROFILER.stage("读取工作簿"):
+        rows = load_row_items(...)
+
+- time: 每个阶段的调用次数、总耗时、最长耗时（工作线程中的阶段按线程累加，可能超过实际经过的时间）
+- memory: 另外用 tracemalloc 记录主线程顶层阶段的内存峰值（相对阶段开始时的增量；
+  Python 3.8 没有 tracemalloc.reset_peak()，只记录整个运行的峰值）
+- cpu: 另外用 cProfile 记录整个运行（主线程）和工作线程中各阶段的调用，结束时保存为 .pstats
+- all: 以上全部
+
+未启用时 stage() 返回共享的空上下文管理器，只有一次属性查找和方法调用的开销。
+"""
+import threading
+import time
+import unicodedata
+
+PROFILE_MODES = ("time", "cpu", "memory", "all")
+
+
+def _display_width(text):
+    return sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+
+
+def _ljust(text, width):
+    """按终端显示宽度左对齐（中文占两列）"""
+    return text + " " * max(0, width - _display_width(text))
+
+
+def _rjust(text, width):
+    return " " * max(0, width - _display_width(text)) + text
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.peak_base = self.profiler._enter(self)
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        self.profiler._exit(self, elapsed)
+        return False
+
+
+class StageProfiler:
+    """
+    分阶段性能剖析
+
+    Args:
+        mode: None（不启用）或 PROFILE_MODES 之一
+    """
+
+    def __init__(self, mode=None):
+        if mode is not None and mode not in PROFILE_MODES:
+            raise ValueError(f"未知的剖析模式: {mode}（可选: {', '.join(PROFILE_MODES)}）")
+        self.mode = mode
+        self.enabled = mode is not None
+        self.cpu = mode in ("cpu", "all")
+        self.memory = mode in ("memory", "all")
+        self.stats = {}  # {阶段: {"calls", "seconds", "max_seconds", "peak_bytes"}}
+        self._order = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._main_thread = threading.main_thread()
+        self._main_profile = None
+        self._thread_profiles = []
+        self._started = None
+        self.total_seconds = 0.0
+        self.peak_bytes = None
+
+    def start(self):
+        """开始剖析（运行开始时调用）"""
+        if not self.enabled:
+            return
+        self._started = time.perf_counter()
+        if self.memory:
+            import tracemalloc
+
+            tracemalloc.start()
+        if self.cpu:
+            import cProfile
+
+            self._main_profile = cProfile.Profile()
+            self._main_profile.enable()
+
+    def stop(self):
+        """结束剖析（运行结束时调用）"""
+        if not self.enabled or self._started is None:
+            return
+        self.total_seconds = time.perf_counter() - self._started
+        if self._main_profile is not None:
+            self._main_profile.disable()
+        if self.memory:
+            import tracemalloc
+
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self._started = None
+
+    def stage(self, name):
+        """
+        阶段计时的上下文管理器
+
+        Args:
+            name: 阶段名称（同名阶段累加）
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def _enter(self, stage):
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        local.depth = depth + 1
+        in_main = threading.current_thread() is self._main_thread
+        if self.cpu and not in_main and depth == 0:
+            # 主线程由整个运行的 profiler 覆盖，工作线程只在阶段内剖析
+            profile = getattr(local, "profile", None)
+            if profile is None:
+                import cProfile
+
+                profile = local.profile = cProfile.Profile()
+                try:
+                    profile.enable()
+                except ValueError:
+                    # Python 3.12+ 的 cProfile 基于 sys.monitoring，主线程的 profiler 已覆盖所有线程
+                    profile = local.profile = False
+                else:
+                    with self._lock:
+                        self._thread_profiles.append(profile)
+            elif profile:
+                profile.enable()
+        if self.memory and in_main and depth == 0:
+            import tracemalloc
+
+            # reset_peak() 是 Python 3.9 新增的，没有时各阶段不记录峰值
+            if tracemalloc.is_tracing() and hasattr(tracemalloc, "reset_peak"):
+                # 内存峰值只对主线程的顶层阶段有意义（工作线程的分配会互相重叠）
+                tracemalloc.reset_peak()
+                return tracemalloc.get_traced_memory()[0]
+        return None
+
+    def _exit(self, stage, elapsed):
+        local = self._local
+        local.depth -= 1
+        peak = None
+        if stage.peak_base is not None:
+            import tracemalloc
+
+            if tracemalloc.is_tracing():
+                peak = max(0, tracemalloc.get_traced_memory()[1] - stage.peak_base)
+        if self.cpu and local.depth == 0 and getattr(local, "profile", None):
+            local.profile.disable()
+        with self._lock:
+            entry = self.stats.get(stage.name)
+            if entry is None:
+                entry = self.stats[stage.name] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "peak_bytes": None}
+                self._order.append(stage.name)
+            entry["calls"] += 1
+            entry["seconds"] += elapsed
+            entry["max_seconds"] = max(entry["max_seconds"], elapsed)
+            if peak is not None:
+                entry["peak_bytes"] = max(entry["peak_bytes"] or 0, peak)
+
+    def rows(self):
+        """按首次出现顺序返回各阶段的统计：[(阶段, 统计)]"""
+        with self._lock:
+            return [(name, dict(self.stats[name])) for name in self._order]
+
+    def format_table(self):
+        """各阶段耗时和内存峰值的文本表格"""
+        widths = (18, 8, 14, 12, 14)
+        header = ("阶段", "次数", "总耗时(秒)", "最长(秒)", "内存峰值(MB)")
+        lines = [_ljust(header[0], widths[0]) + "".join(_rjust(h, w) for h, w in zip(header[1:], widths[1:]))]
+        for name, entry in self.rows():
+            peak = f"{entry['peak_bytes'] / 1048576:.1f}" if entry["peak_bytes"] is not None else "-"
+            cells = (str(entry["calls"]), f"{entry['seconds']:.2f}", f"{entry['max_seconds']:.2f}", peak)
+            lines.append(_ljust(name, widths[0]) + "".join(_rjust(c, w) for c, w in zip(cells, widths[1:])))
+        total = f"运行总耗时 {self.total_seconds:.2f} 秒"
+        if self.peak_bytes is not None:
+            total += f"，内存峰值 {self.peak_bytes / 1048576:.1f} MB"
+        lines.append(total)
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {"mode": self.mode, "total_seconds": round(self.total_seconds, 3), "peak_bytes": self.peak_bytes,
+                "stages": {name: entry for name, entry in self.rows()}}
+
+    def dump_stats(self, path):
+        """
+        保存 cProfile 结果（主线程和各工作线程合并）
+
+        Returns:
+            str: 保存的路径；没有 cProfile 数据时返回None
+        """
+        import pstats
+
+        profiles = [p for p in [self._main_profile] + self._thread_profiles if p is not None]
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        return path
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+监视模式 - 工作簿保存后只检查修改过的行
+
+策划全天都在修改配置表，每次修改后重新跑完整检查要等很久。监视模式在首次检查完成后
+保持运行：轮询工作簿的修改时间和大小，保存完成（文件稳定）后通过行索引只重新读取
+被检查的 Sheet，与已检查文本的哈希比较：
+
+- 内容未变的行不处理
+- 内容与其他已检查行相同的行（如插入行导致下方行号整体移动）直接复用原有结果
+- 其余修改过的行发送给模型检查，被删除或修改的行的旧问题从报告中移除
+
+报告在原路径上重写，模型通过 keep_alive 保持加载，每次修改通常几秒内就能得到反馈。
+"""
+import os
+import time
+
+from scheduler import text_hash
+
+DEFAULT_INTERVAL = 2.0   # 轮询间隔（秒）
+DEFAULT_SETTLE = 1.0     # 文件修改时间和大小保持不变多久后才读取（Excel保存过程中会多次写入）
+WATCH_KEEP_ALIVE = "1h"  # 监视模式下请求模型保持加载的时间（Ollama 默认5分钟后卸载）
+
+
+def file_stat(path):
+    """返回 (修改时间ns, 大小)，文件不存在时返回None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher:
+    """
+    轮询一组文件，返回已保存完成的修改
+
+    文件的修改时间或大小变化后，需要在 settle 秒内保持不变才视为保存完成；
+    保存过程中文件暂时不存在（先删除再重命名）时继续等待。
+    """
+
+    def __init__(self, paths, interval=DEFAULT_INTERVAL, settle=DEFAULT_SETTLE, clock=time.monotonic):
+        self.paths = list(paths)
+        self.interval = interval
+        self.settle = settle
+        self._clock = clock
+        self._stats = {path: file_stat(path) for path in self.paths}
+        self._pending = {}  # path -> (stat, 首次看到该状态的时间)
+
+    def poll(self):
+        """
+        检查一次（不阻塞）
+
+        Returns:
+            list: 已保存完成的修改过的文件
+        """
+        now = self._clock()
+        ready = []
+        for path in self.paths:
+            stat = file_stat(path)
+            if stat == self._stats[path]:
+                self._pending.pop(path, None)
+                continue
+            if stat is None:
+                continue
+            seen = self._pending.get(path)
+            if seen is None or seen[0] != stat:
+                self._pending[path] = (stat, now)
+                continue
+            if now - seen[1] >= self.settle:
+                self._stats[path] = stat
+                del self._pending[path]
+                ready.append(path)
+        return ready
+
+    def wait(self, sleep=time.sleep):
+        """阻塞直到有文件修改完成，返回修改过的文件列表"""
+        while True:
+            ready = self.poll()
+            if ready:
+                return ready
+            sleep(self.interval)
+
+
+def diff_rows(rows, known):
+    """
+    比较当前行与已检查文本的哈希
+
+    Args:
+        rows: 当前的 RowItem 列表
+        known: {excel_row: text_hash}，已检查过的行
+
+    Returns:
+        tuple: (内容变化或新增的 RowItem 列表, 已删除（不再有文本）的行号列表)
+    """
+    current = set()
+    changed = []
+    for row in rows:
+        current.add(row.excel_row)
+        if known.get(row.excel_row) != text_hash(row.text):
+            changed.append(row)
+    removed = sorted(r for r in known if r not in current)
+    return changed, removed
+
+
+def group_by_row(findings, indices):
+    """
+    按行号分组问题序号
+
+    Returns:
+        dict: {excel_row: [问题序号]}
+    """
+    by_row = {}
+    for index in indices:
+        by_row.setdefault(findings.rows[index], []).append(index)
+    return by_row
+
+
+def copy_findings(findings, indices, row):
+    """
+    将其他行的问题复制到内容相同的行（保留处理状态）
+
+    Args:
+        findings: FindingsStore
+        indices: 源行的问题序号
+        row: 目标 RowItem
+
+    Returns:
+        list: 新增的问题序号
+    """
+    added = []
+    for finding in findings.iter(list(indices)):
+        added.append(findings.add(row.sheet or finding.sheet, row.excel_row, row.row_id, row.text,
+                                  finding.issue, finding.suggestion, finding.status))
+    return added
@@ -6,10 +6,10 @@
 import sys
 import os
 
-# 添加当前目录到路径
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# 添加脚本目录到路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
 
-from conf_check import check_ollama_models, verify_model_exists, check_model_health
+from conf_check import check_available_models, verify_model_exists, check_model_health
 
 def test_model_health():
     """测试模型健康度检查功能"""
@@ -21,7 +21,7 @@ def test_model_health():
     # 测试1: 检查Ollama可用模型
     print("📋 测试1: 检查Ollama可用模型")
     print("-" * 60)
-    models = check_ollama_models()
+    models = check_available_models()
     if models:
         print(f"✅ 成功获取模型列表，共 {len(models)} 个模型:")
         for i, model in enumerate(models, 1):
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Auto Tuning Tests
+
+This module contains unit tests for scripts/autotune.py.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import autotune  # noqa: E402
+from scheduler import RowItem  # noqa: E402
+
+
+def fake_probe(rows_per_second, failure_rates=None, calls=None):
+    """Build a probe whose throughput depends on (batch_size, workers)."""
+    failure_rates = failure_rates or {}
+
+    def probe(batches, workers):
+        batch_size = len(batches[0])
+        if calls is not None:
+            calls.append((batch_size, workers))
+        failed = round(len(batches) * failure_rates.get(batch_size, 0))
+        results = [
+            {"rows": len(rows), "error": "JSON解析失败" if i < failed else None,
+             "meta": {"completion_tokens": 100, "completion_seconds": 2.0}}
+            for i, rows in enumerate(batches)
+        ]
+        return results, sum(len(rows) for rows in batches) / rows_per_second[(batch_size, workers)]
+
+    return probe
+
+
+class TestAutotune(unittest.TestCase):
+    """Test cases for batch size and concurrency calibration."""
+
+    def setUp(self):
+        self.rows = [RowItem(i, f"文本{i}") for i in range(1, 101)]
+
+    def test_best_under_failure_ceiling(self):
+        """Test the fastest config is chosen among those under the failure ceiling."""
+        speeds = {(10, 1): 1.0, (10, 2): 1.8, (20, 1): 1.5, (20, 2): 2.5, (40, 1): 3.0}
+        probe = fake_probe(speeds, failure_rates={40: 1.0})
+        best, trials = autotune.calibrate(self.rows, probe, [10, 20, 40], [1, 2], log=lambda msg: None)
+        self.assertEqual((best["batch_size"], best["workers"]), (20, 2))
+        self.assertEqual(best["failure_rate"], 0)
+        self.assertEqual(best["eval_rate"], 50)
+        # The failing batch size stops the search at workers=1
+        self.assertNotIn((40, 2), [(t["batch_size"], t["workers"]) for t in trials])
+
+    def test_worker_climb_stops_without_gain(self):
+        """Test concurrency stops growing when throughput barely improves."""
+        calls = []
+        speeds = {(10, 1): 1.0, (10, 2): 1.05, (10, 4): 4.0}
+        best, _ = autotune.calibrate(self.rows, fake_probe(speeds, calls=calls), [10], [1, 2, 4],
+                                     log=lambda msg: None)
+        self.assertEqual(calls, [(10, 1), (10, 2)])
+        self.assertEqual(best["workers"], 2)
+
+    def test_no_eligible_config(self):
+        """Test None is returned when every config fails too often."""
+        probe = fake_probe({(10, 1): 1.0}, failure_rates={10: 1.0})
+        best, trials = autotune.calibrate(self.rows, probe, [10], [1], log=lambda msg: None)
+        self.assertIsNone(best)
+        self.assertEqual(len(trials), 1)
+
+    def test_sample_rows(self):
+        """Test sampling is spread across the whole sheet."""
+        sample = autotune.sample_rows(self.rows, 4)
+        self.assertEqual([row.excel_row for row in sample], [1, 26, 51, 76])
+        self.assertEqual(len(autotune.sample_rows(self.rows[:3], 10)), 3)
+
+    def test_profile_round_trip(self):
+        """Test profiles are stored per model and inference host."""
+        with tempfile.TemporaryDirectory() as tmp:
+            endpoints = ["http://gpu1:11434/api/generate"]
+            self.assertIsNone(autotune.load_profile("m1", endpoints, state_dir=tmp))
+            autotune.save_profile("m1", endpoints, {"batch_size": 20, "workers": 2}, state_dir=tmp)
+            autotune.save_profile("m2", endpoints, {"batch_size": 50, "workers": 1}, state_dir=tmp)
+            self.assertEqual(autotune.load_profile("m1", endpoints, state_dir=tmp)["batch_size"], 20)
+            self.assertEqual(autotune.load_profile("m2", ["http://gpu1:11434/x"], state_dir=tmp)["workers"], 1)
+            self.assertIsNone(autotune.load_profile("m1", ["http://gpu2:11434/api/generate"], state_dir=tmp))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Inference Backend Tests
+
+This module contains unit tests for scripts/backends.py, run against a
+local stand-in server that speaks both the Ollama and OpenAI-compatible APIs.
+"""
+import json
+import os
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import backends  # noqa: E402
+
+REPLY = '[{"line_no":1,"issue":"错别字","suggestion":"改"}]'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Minimal Ollama and OpenAI-compatible server."""
+
+    protocol_version = "HTTP/1.1"
+    requests_seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, status=200, content_type="application/json"):
+        data = body.encode("utf-8") if isinstance(body, str) else json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send({"models": [{"name": "qwen3:14b"}]})
+        elif self.path == "/v1/models":
+            self._send({"object": "list", "data": [{"id": "qwen3-14b"}]})
+        else:
+            self._send({"error": "not found"}, 404)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        StandInHandler.requests_seen.append((self.path, payload, self.headers.get("Authorization")))
+        if payload.get("model") == "missing":
+            self._send({"error": "model not found"}, 404)
+        elif self.path == "/api/generate":
+            timing = {"prompt_eval_count": 40, "prompt_eval_duration": 200_000_000,
+                      "eval_count": 20, "eval_duration": 500_000_000, "total_duration": 800_000_000}
+            if payload["stream"]:
+                lines = [{"response": REPLY[:10], "done": False},
+                         dict({"response": REPLY[10:], "done": True}, **timing)]
+                self._send("".join(json.dumps(line) + "\n" for line in lines), content_type="application/x-ndjson")
+            else:
+                self._send(dict({"response": REPLY, "done": True}, **timing))
+        elif self.path == "/v1/chat/completions":
+            usage = {"prompt_tokens": 40, "completion_tokens": 20, "total_tokens": 60}
+            if payload["stream"]:
+                chunks = [{"choices": [{"delta": {"content": REPLY[:10]}}]},
+                          {"choices": [{"delta": {"content": REPLY[10:]}}]},
+                          {"choices": [], "usage": usage}]
+                body = "".join(f"data: {json.dumps(c)}\n\n" for c in chunks) + "data: [DONE]\n\n"
+                self._send(body, content_type="text/event-stream")
+            else:
+                self._send({"choices": [{"message": {"role": "assistant", "content": REPLY}}], "usage": usage,
+                            "timings": {"prompt_n": 40, "prompt_ms": 100.0, "predicted_n": 20, "predicted_ms": 400.0}})
+        else:
+            self._send({"error": "not found"}, 404)
+
+
+class BackendTestCase(unittest.TestCase):
+    """Starts the stand-in server once for all backend tests."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StandInHandler.requests_seen.clear()
+
+
+class TestOllamaBackend(BackendTestCase):
+    """Test cases for the Ollama backend."""
+
+    def setUp(self):
+        super().setUp()
+        self.backend = backends.create_backend("ollama")
+        self.endpoint = f"{self.base}/api/generate"
+
+    def test_list_models(self):
+        """Test model names come from /api/tags."""
+        self.assertEqual(self.backend.list_models(f"{self.base}/api"), ["qwen3:14b"])
+
+    def test_generate_normalizes_timing(self):
+        """Test nanosecond durations are converted to seconds."""
+        meta = {}
+        text = self.backend.generate(self.endpoint, "qwen3:14b", "p", {"num_predict": 8}, 5, keep_alive="1h", meta=meta)
+        self.assertEqual(text, REPLY)
+        self.assertEqual(meta, {"prompt_tokens": 40, "completion_tokens": 20, "prompt_seconds": 0.2,
+                                "completion_seconds": 0.5, "total_seconds": 0.8})
+        _, payload, _ = StandInHandler.requests_seen[0]
+        self.assertEqual(payload["options"], {"num_predict": 8})
+        self.assertEqual(payload["keep_alive"], "1h")
+
+    def test_generate_stream(self):
+        """Test streamed chunks are joined and the final chunk carries timing."""
+        meta = {}
+        text = self.backend.generate(self.endpoint, "qwen3:14b", "p", {}, 5, cancel_event=threading.Event(), meta=meta)
+        self.assertEqual(text, REPLY)
+        self.assertEqual(meta["completion_tokens"], 20)
+
+    def test_http_error(self):
+        """Test HTTP errors raise BackendError with the status code."""
+        with self.assertRaises(backends.BackendError) as ctx:
+            self.backend.generate(self.endpoint, "missing", "p", {}, 5)
+        self.assertEqual(ctx.exception.status, 404)
+
+
+class TestOpenAIBackend(BackendTestCase):
+    """Test cases for the OpenAI-compatible backend."""
+
+    def setUp(self):
+        super().setUp()
+        self.backend = backends.create_backend("openai")
+        self.endpoint = f"{self.base}/v1/chat/completions"
+
+    def test_list_models(self):
+        """Test model ids come from /v1/models."""
+        self.assertEqual(self.backend.list_models(f"{self.base}/v1"), ["qwen3-14b"])
+
+    def test_generate_maps_options(self):
+        """Test Ollama options are mapped to chat completion parameters."""
+        meta = {}
+        options = {"temperature": 0.1, "num_predict": 64, "num_ctx": 8192, "num_gpu": 99, "stop": ["\n\n\n"]}
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "secret"}):
+            text = self.backend.generate(self.endpoint, "qwen3-14b", "检查", options, 5, keep_alive="1h", meta=meta)
+        self.assertEqual(text, REPLY)
+        _, payload, auth = StandInHandler.requests_seen[0]
+        self.assertEqual(payload["messages"], [{"role": "user", "content": "检查"}])
+        self.assertEqual((payload["temperature"], payload["max_tokens"], payload["stop"]), (0.1, 64, ["\n\n\n"]))
+        self.assertNotIn("num_ctx", payload)
+        self.assertNotIn("keep_alive", payload)
+        self.assertEqual(auth, "Bearer secret")
+        # llama.cpp timings take precedence over wall-clock estimates
+        self.assertEqual((meta["prompt_seconds"], meta["completion_seconds"]), (0.1, 0.4))
+        self.assertEqual(meta["completion_tokens"], 20)
+
+    def test_generate_stream(self):
+        """Test server-sent events are joined and usage is reported."""
+        meta = {}
+        text = self.backend.generate(self.endpoint, "qwen3-14b", "p", {}, 5, cancel_event=threading.Event(), meta=meta)
+        self.assertEqual(text, REPLY)
+        self.assertEqual(meta["completion_tokens"], 20)
+        self.assertIn("completion_seconds", meta)
+        _, payload, _ = StandInHandler.requests_seen[0]
+        self.assertEqual(payload["stream_options"], {"include_usage": True})
+
+    def test_cancelled_stream_returns_none(self):
+        """Test a cancelled request returns None instead of partial text."""
+        cancel = threading.Event()
+        cancel.set()
+        self.assertIsNone(self.backend.generate(self.endpoint, "qwen3-14b", "p", {}, 5, cancel_event=cancel))
+
+    def test_unknown_backend(self):
+        """Test unknown backend names are rejected."""
+        with self.assertRaises(ValueError):
+            backends.create_backend("tgi")
+
+
+class TestConfCheckBackend(BackendTestCase):
+    """Test cases for conf_check running against the OpenAI-compatible backend."""
+
+    def test_health_check_and_call(self):
+        """Test model listing, health check and requests go through the selected backend."""
+        import conf_check
+
+        with patch.object(conf_check, "BACKEND", backends.create_backend("openai")), \
+                patch.object(conf_check, "OLLAMA_URL", f"{self.base}/v1/chat/completions"), \
+                patch.object(conf_check, "OLLAMA_API_URL", f"{self.base}/v1"), \
+                patch.object(conf_check, "MODEL_NAME", "qwen3-14b"), \
+                patch.object(conf_check, "ENDPOINTS", []), \
+                patch.object(conf_check, "ADAPTIVE_TIMEOUT", False):
+            self.assertEqual(conf_check.check_available_models(), ["qwen3-14b"])
+            self.assertTrue(conf_check.verify_model_exists("qwen3-14b"))
+            meta = {}
+            self.assertEqual(conf_check.call_model("p", timeout=5, meta=meta), REPLY)
+            self.assertEqual(meta["completion_tokens"], 20)
+            self.assertFalse(conf_check.verify_model_exists("other"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Compact Response Schema Tests
+
+This module contains unit tests for scripts/compact_schema.py.
+"""
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import compact_schema  # noqa: E402
+from scheduler import Batch, RowItem  # noqa: E402
+
+
+class TestIssueCodes(unittest.TestCase):
+    """Test cases for issue type codes."""
+
+    def test_codes_from_required(self):
+        """Test codes are assigned in order and labels drop the explanation."""
+        codes = compact_schema.issue_codes(["错别字（重点：的地得用法）", "多字/漏字", "内容合规(政治敏感)"])
+        self.assertEqual([(c, label) for c, label, _ in codes], [("A", "错别字"), ("B", "多字/漏字"), ("C", "内容合规")])
+
+    def test_default_required(self):
+        """Test the built-in categories are used when the config has none."""
+        labels = [label for _, label, _ in compact_schema.issue_codes([])]
+        self.assertEqual(labels, ["错别字", "语病", "成语错用", "多字/漏字", "内容合规"])
+
+    def test_more_than_26_codes(self):
+        """Test codes stay unique beyond the alphabet."""
+        codes = [c for c, _, _ in compact_schema.issue_codes([f"类型{i}" for i in range(28)])]
+        self.assertEqual(codes[25:], ["Z", "Z1", "Z2"])
+        self.assertEqual(len(set(codes)), 28)
+
+
+class TestParseCompactResponse(unittest.TestCase):
+    """Test cases for expanding compact responses."""
+
+    def setUp(self):
+        self.codes = compact_schema.issue_codes(["错别字（的地得）", "语病", "成语错用"])
+
+    def test_expand_lines(self):
+        """Test each line expands to the JSON issue schema."""
+        text = '1|A|"的"应为"地"|他高兴地跑了\n3|c|负隅顽抗为贬义|英勇抵抗\n'
+        self.assertEqual(compact_schema.parse_compact_response(text, self.codes), [
+            {"line_no": 1, "issue": '错别字："的"应为"地"', "suggestion": "他高兴地跑了"},
+            {"line_no": 3, "issue": "成语错用：负隅顽抗为贬义", "suggestion": "英勇抵抗"},
+        ])
+
+    def test_no_issues(self):
+        """Test only the explicit no-issue marker means no issues."""
+        self.assertEqual(compact_schema.parse_compact_response("无", self.codes), [])
+        self.assertEqual(compact_schema.parse_compact_response("```\n无。\n```", self.codes), [])
+
+    def test_empty_output_is_failure(self):
+        """Test blank or fence-only output is a parse failure, not a clean batch."""
+        for text in ("", "  \n\t", "```\n```", "```text\n\n```"):
+            self.assertIsNone(compact_schema.parse_compact_response(text, self.codes), repr(text))
+
+    def test_noise_and_truncation(self):
+        """Test headers, fences, full-width bars and a truncated last line."""
+        text = "```\n编号|类型代码|具体问题|修改建议\n2｜B｜缺少主语｜补充主语\n3|A"
+        self.assertEqual(compact_schema.parse_compact_response(text, self.codes), [
+            {"line_no": 2, "issue": "语病：缺少主语", "suggestion": "补充主语"},
+        ])
+
+    def test_unknown_code_and_extra_bars(self):
+        """Test a label written instead of a code and bars inside the suggestion."""
+        issues = compact_schema.parse_compact_response("4|多字|多了一个字|甲|乙", self.codes)
+        self.assertEqual(issues, [{"line_no": 4, "issue": "多字：多了一个字", "suggestion": "甲|乙"}])
+
+    def test_unparsable(self):
+        """Test prose without any finding lines is reported as a parse failure."""
+        self.assertIsNone(compact_schema.parse_compact_response("这些文本没有发现明显问题。", self.codes))
+
+
+class TestCompactCheckBatch(unittest.TestCase):
+    """Test cases for check_batch with the compact response format."""
+
+    def test_check_batch_compact(self):
+        """Test the prompt lists codes and the response maps back to Excel rows."""
+        import conf_check
+
+        batch = Batch(1, [RowItem(120, "他高兴的跑了"), RowItem(121, "今天天气很好")])
+        codes = compact_schema.issue_codes(["错别字", "语病"])
+        sent = {}
+
+        def fake_call(prompt, timeout=None, meta=None):
+            sent["prompt"] = prompt
+            return "1|A|的应为地|他高兴地跑了"
+
+        with patch.object(conf_check, "RESPONSE_FORMAT", "compact"), \
+                patch.object(conf_check, "ISSUE_CODES", codes), \
+                patch.object(conf_check, "call_model", side_effect=fake_call):
+            result = conf_check.check_batch(batch, 1)
+        self.assertIn("A. 错别字", sent["prompt"])
+        self.assertNotIn('"line_no"', sent["prompt"])
+        self.assertIsNone(result["error"])
+        self.assertEqual(result["issues"], [{"line_no": 120, "issue": "错别字：的应为地", "suggestion": "他高兴地跑了"}])
+
+    def test_check_batch_compact_parse_failure(self):
+        """Test prose responses count as a failed batch."""
+        import conf_check
+
+        batch = Batch(1, [RowItem(120, "他高兴的跑了")])
+        with patch.object(conf_check, "RESPONSE_FORMAT", "compact"), \
+                patch.object(conf_check, "call_model", return_value="我认为这段文本没有任何问题。"):
+            result = conf_check.check_batch(batch, 1)
+        self.assertEqual(result["error"], "响应解析失败")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,8 +10,10 @@ import sys
 import unittest
 from unittest.mock import MagicMock, patch
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add parent and scripts directories to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
 
 
 class TestJsonParsing(unittest.TestCase):
@@ -124,6 +126,63 @@ class TestPromptGeneration(unittest.TestCase):
         self.assertIn("JSON", prompt)
         self.assertIn("测试文本", prompt)
 
+    def test_prompt_data_is_compact(self):
+        """Test batch data is serialized without indentation."""
+        prompt = self.conf_check.get_check_prompt({1: "测试文本", 2: "另一个测试"})
+        self.assertIn('{"1":"测试文本","2":"另一个测试"}', prompt)
+
+
+class TestLineHandles(unittest.TestCase):
+    """Test cases for mapping model line numbers back to batch rows."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        import conf_check
+        from scheduler import Batch, RowItem
+        self.conf_check = conf_check
+        self.batch = Batch(1, [
+            RowItem(120, "他高兴的跑了过来"),
+            RowItem(121, "今天天气很好"),
+            RowItem(122, "我们负隅顽抗到底"),
+        ])
+
+    def run_batch(self, issues):
+        response = json.dumps(issues, ensure_ascii=False)
+        with patch.object(self.conf_check, "MASK_MARKUP", False), \
+                patch.object(self.conf_check, "call_model", return_value=response):
+            return self.conf_check.check_batch(self.batch, 1)
+
+    def test_handles_resolved_to_excel_rows(self):
+        """Test valid handles are mapped to Excel rows and nothing is rechecked."""
+        result = self.run_batch([{"line_no": 3, "issue": "成语错用", "suggestion": "顽强抵抗"}])
+        self.assertEqual(result["issues"][0]["line_no"], 122)
+        self.assertEqual(result["invalid"], 0)
+        self.assertEqual(result["recheck"], [])
+
+    def test_invalid_handle_located_by_quote(self):
+        """Test an out-of-batch finding only rechecks the row its quote points to."""
+        result = self.run_batch([
+            {"line_no": 3, "issue": "成语错用", "suggestion": "顽强抵抗"},
+            {"line_no": 7, "issue": "错别字：“高兴的”", "suggestion": "高兴地"},
+        ])
+        self.assertEqual([i["line_no"] for i in result["issues"]], [122])
+        self.assertEqual(result["invalid"], 1)
+        self.assertEqual([row.excel_row for row in result["recheck"]], [120])
+
+    def test_echoed_excel_row_rechecks_that_row(self):
+        """Test a finding that uses the real Excel row rechecks only that row."""
+        result = self.run_batch([{"line_no": 121, "issue": "语病", "suggestion": "改写"}])
+        self.assertEqual(result["issues"], [])
+        self.assertEqual([row.excel_row for row in result["recheck"]], [121])
+
+    def test_unlocated_finding_rechecks_rows_without_findings(self):
+        """Test an unattributable finding rechecks every row without a valid finding."""
+        result = self.run_batch([
+            {"line_no": 1, "issue": "错别字：“的”", "suggestion": "他高兴地跑了过来"},
+            {"line_no": 0, "issue": "语病：缺少主语", "suggestion": "补充主语"},
+        ])
+        self.assertEqual([row.excel_row for row in result["recheck"]], [121, 122])
+
 
 class TestModelHealth(unittest.TestCase):
     """Test cases for model health check."""
@@ -134,7 +193,7 @@ class TestModelHealth(unittest.TestCase):
         self.conf_check = conf_check
 
     @patch('requests.get')
-    def test_check_ollama_models_success(self, mock_get):
+    def test_check_available_models_success(self, mock_get):
         """Test checking Ollama models when service is available."""
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -143,16 +202,16 @@ class TestModelHealth(unittest.TestCase):
         }
         mock_get.return_value = mock_response
 
-        result = self.conf_check.check_ollama_models()
+        result = self.conf_check.check_available_models()
         self.assertIsInstance(result, list)
         self.assertIn("qwen3:14b-q4_K_M", result)
 
     @patch('requests.get')
-    def test_check_ollama_models_failure(self, mock_get):
+    def test_check_available_models_failure(self, mock_get):
         """Test checking Ollama models when service is unavailable."""
         mock_get.side_effect = Exception("Connection refused")
 
-        result = self.conf_check.check_ollama_models()
+        result = self.conf_check.check_available_models()
         self.assertIsNone(result)
 
 
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Config Loader Tests
+
+This module contains unit tests for scripts/config_loader.py.
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import config_loader  # noqa: E402
+
+
+class TestConfigLoader(unittest.TestCase):
+    """Test cases for loading and validating check_config.yaml."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "check_config.yaml")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text, mtime=None):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_repo_config_is_valid(self):
+        """Test the shipped config file loads."""
+        config = config_loader.load_config(config_loader.DEFAULT_CONFIG_PATH)
+        self.assertEqual(config.check.batch_size, 30)
+        self.assertEqual(config.model_options()["num_ctx"], 8192)
+
+    def test_missing_file_uses_defaults(self):
+        """Test a missing config file falls back to defaults."""
+        config = config_loader.load_config(os.path.join(self.tmp.name, "none.yaml"))
+        self.assertEqual(config.check.workers, 1)
+        self.assertEqual(config.ollama.options, config_loader.DEFAULT_MODEL_OPTIONS)
+
+    def test_options_merged_and_overridden(self):
+        """Test options from the file merge with defaults and callers can override."""
+        self.write("ollama:\n  options:\n    num_ctx: 4096\nrules:\n  forbidden_words: [竞品A]\n")
+        config = config_loader.load_config(self.path)
+        options = config.model_options(num_predict=1)
+        self.assertEqual(options["num_ctx"], 4096)
+        self.assertEqual(options["num_predict"], 1)
+        self.assertEqual(config.ollama.options["num_predict"], 4096)
+        self.assertEqual(config.rules.forbidden_words, ["竞品A"])
+
+    def test_lexicon_sources(self):
+        """Test lexicon name columns are read as Sheet:column strings."""
+        self.write("lexicon:\n  sources: [\"NPC_CONF:name\", \"ITEM_CONF:name\"]\n  min_length: 3\n")
+        config = config_loader.load_config(self.path)
+        self.assertEqual(config.lexicon.sources, ["NPC_CONF:name", "ITEM_CONF:name"])
+        self.assertEqual(config.lexicon.min_length, 3)
+
+    def test_invalid_values(self):
+        """Test invalid values raise ConfigError."""
+        for text in ("check:\n  batch_size: 0\n", "check:\n  workers: many\n", "ollama: [1]\n", "check: [\n",
+                     "check:\n  response_format: xml\n", "cpu:\n  num_ctx: 64\n", "cpu:\n  slots: 0\n",
+                     "lexicon:\n  sources: [NPC_CONF]\n", "lexicon:\n  min_length: 0\n"):
+            self.write(text)
+            with self.assertRaises(config_loader.ConfigError):
+                config_loader.load_config(self.path, use_cache=False)
+
+    def test_cached_until_modified(self):
+        """Test the file is parsed once until its mtime changes."""
+        self.write("check:\n  batch_size: 10\n", mtime=1000)
+        first = config_loader.load_config(self.path)
+        self.assertIs(config_loader.load_config(self.path), first)
+        self.write("check:\n  batch_size: 20\n", mtime=2000)
+        self.assertEqual(config_loader.load_config(self.path).check.batch_size, 20)
+
+    def test_watcher_reports_changed_keys(self):
+        """Test only changed hot-reload keys are reported."""
+        self.write("check:\n  batch_size: 10\n  workers: 1\n", mtime=1000)
+        watcher = config_loader.ConfigWatcher(config_loader.load_config(self.path))
+        self.assertEqual(watcher.poll(force=True), {})
+        self.write("check:\n  batch_size: 10\n  workers: 4\n  endpoints: [http://a]\n", mtime=2000)
+        self.assertEqual(watcher.poll(force=True), {"workers": 4, "endpoints": ["http://a"]})
+        # Broken edits keep the previous config
+        self.write("check:\n  workers: -1\n", mtime=3000)
+        self.assertEqual(watcher.poll(force=True), {})
+        self.assertEqual(watcher.config.check.workers, 4)
+
+    def test_watcher_interval(self):
+        """Test the file is not checked more often than the interval."""
+        now = [0.0]
+        self.write("check:\n  batch_size: 10\n", mtime=1000)
+        watcher = config_loader.ConfigWatcher(
+            config_loader.load_config(self.path), interval=5, clock=lambda: now[0])
+        self.write("check:\n  batch_size: 50\n", mtime=2000)
+        now[0] = 1.0
+        self.assertEqual(watcher.poll(), {})
+        now[0] = 6.0
+        self.assertEqual(watcher.poll(), {"batch_size": 50})
+
+
+class TestApplyConfig(unittest.TestCase):
+    """Test cases for applying config and CLI overrides in conf_check."""
+
+    def test_cli_overrides_config(self):
+        import conf_check
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "c.yaml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("ollama:\n  model: m1\n  options:\n    num_ctx: 2048\n"
+                        "check:\n  batch_size: 12\n  workers: 2\n  response_format: compact\n"
+                        "rules:\n  required: [错别字, 语病（搭配不当）]\n  forbidden_words: [禁词]\n")
+            saved = {name: getattr(conf_check, name) for name in (
+                "CONFIG", "OLLAMA_URL", "OLLAMA_API_URL", "MODEL_NAME", "MODEL_OPTIONS", "INPUT_FILE",
+                "SHEET_NAME", "TARGET_COLUMN", "TARGET_COLUMN_INDEX", "HEADER_ROWS", "BATCH_SIZE",
+                "WORKERS", "REQUEST_TIMEOUT", "ADAPTIVE_TIMEOUT", "HEDGE_REQUESTS", "ENDPOINTS",
+                "SENSITIVE_WORDS", "PRIORITY_SHEETS", "OUTPUT_FILE", "OUTPUT_DIR", "TUNED_PROFILE",
+                "RESPONSE_FORMAT", "ISSUE_CODES", "BACKEND", "PREFILTER", "CPU_PLAN")}
+            try:
+                args = conf_check.build_arg_parser().parse_args(
+                    ["book.xlsx", "DLG", "text", "--config", path, "--workers", "5"])
+                conf_check.apply_config(args)
+                self.assertEqual(conf_check.MODEL_NAME, "m1")
+                self.assertEqual(conf_check.BATCH_SIZE, 12)
+                self.assertEqual(conf_check.WORKERS, 5)
+                self.assertEqual(conf_check.SENSITIVE_WORDS, ["禁词"])
+                self.assertEqual(conf_check.RESPONSE_FORMAT, "compact")
+                self.assertEqual([(c, label) for c, label, _ in conf_check.ISSUE_CODES],
+                                 [("A", "错别字"), ("B", "语病")])
+                self.assertEqual(conf_check.build_model_options(num_predict=1)["num_ctx"], 2048)
+            finally:
+                for name, value in saved.items():
+                    setattr(conf_check, name, value)
+
+    def test_entry_point_loads_config(self):
+        """Test main() without args (the conf-check console script) applies the config file."""
+        import conf_check
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "c.yaml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("ollama:\n  model: m1\ncheck:\n  batch_size: 12\n")
+            saved = {name: getattr(conf_check, name) for name in (
+                "CONFIG", "MODEL_NAME", "MODEL_OPTIONS", "BATCH_SIZE", "WORKERS", "ENDPOINTS", "SENSITIVE_WORDS",
+                "TUNED_PROFILE", "PREFILTER", "CPU_PLAN", "OUTPUT_FILE", "INPUT_FILE", "SHEET_NAME",
+                "TARGET_COLUMN", "TARGET_COLUMN_INDEX", "HEADER_ROWS", "OUTPUT_DIR")}
+            argv = ["conf-check", "book.xlsx", "DLG", "text", "--config", path, "--no-profile"]
+            try:
+                with patch.object(sys, "argv", argv), patch.object(conf_check, "setup_console"), \
+                        patch.object(conf_check, "run_check", return_value="done") as run_check:
+                    self.assertEqual(conf_check.main(), "done")
+                self.assertEqual(run_check.call_args[0][0].input_file, "book.xlsx")
+                self.assertEqual((conf_check.MODEL_NAME, conf_check.BATCH_SIZE), ("m1", 12))
+
+                bad = os.path.join(tmp, "bad.yaml")
+                with open(bad, "w", encoding="utf-8") as f:
+                    f.write("check:\n  batch_size: 0\n")
+                argv[argv.index(path)] = bad
+                with patch.object(sys, "argv", argv), patch.object(conf_check, "setup_console"), \
+                        self.assertRaises(SystemExit):
+                    conf_check.main()
+            finally:
+                for name, value in saved.items():
+                    setattr(conf_check, name, value)
+
+    def test_cpu_profile(self):
+        """Test --cpu selects the CPU model, threads and one worker per pinned endpoint."""
+        import conf_check
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "c.yaml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("ollama:\n  model: m14b\ncheck:\n  batch_size: 30\n"
+                        "cpu:\n  model: m4b\n  num_ctx: 2048\n  batch_size: 8\n  threads_per_slot: 4\n")
+            saved = {name: getattr(conf_check, name) for name in (
+                "CONFIG", "MODEL_NAME", "MODEL_OPTIONS", "BATCH_SIZE", "WORKERS", "ENDPOINTS", "SENSITIVE_WORDS",
+                "TUNED_PROFILE", "PREFILTER", "CPU_PLAN", "OUTPUT_FILE", "INPUT_FILE", "SHEET_NAME",
+                "TARGET_COLUMN", "TARGET_COLUMN_INDEX", "HEADER_ROWS", "OUTPUT_DIR")}
+            groups = [(0, list(range(8))), (1, list(range(8, 16)))]
+            try:
+                with patch.object(conf_check, "cpu_groups", return_value=groups):
+                    args = conf_check.build_arg_parser().parse_args(
+                        ["book.xlsx", "DLG", "text", "--config", path, "--cpu", "--no-profile"])
+                    conf_check.apply_config(args)
+                    self.assertEqual((conf_check.MODEL_NAME, conf_check.BATCH_SIZE, conf_check.WORKERS), ("m4b", 8, 4))
+                    options = conf_check.build_model_options()
+                    self.assertEqual((options["num_gpu"], options["num_thread"], options["num_ctx"]), (0, 16, 2048))
+                    self.assertIsNotNone(conf_check.PREFILTER)
+
+                    args = conf_check.build_arg_parser().parse_args(
+                        ["book.xlsx", "DLG", "text", "--config", path, "--cpu", "--no-profile", "--no-prefilter",
+                         "--model", "m1b", "--endpoints", "http://a/api/generate,http://b/api/generate"])
+                    conf_check.apply_config(args)
+                    self.assertEqual((conf_check.MODEL_NAME, conf_check.WORKERS), ("m1b", 2))
+                    self.assertEqual(conf_check.build_model_options()["num_thread"], 4)
+                    self.assertIsNone(conf_check.PREFILTER)
+            finally:
+                for name, value in saved.items():
+                    setattr(conf_check, name, value)
+
+
+if __name__ == "__main__":
+    unittest.main()
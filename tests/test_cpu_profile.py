@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - CPU Profile Tests
+
+This module contains unit tests for scripts/cpu_profile.py.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import cpu_profile  # noqa: E402
+
+
+class TestCpuList(unittest.TestCase):
+    """Test cases for cpulist parsing and formatting."""
+
+    def test_round_trip(self):
+        """Test ranges and single CPUs survive a round trip."""
+        cpus = cpu_profile.parse_cpulist("0-3,8,10-11\n")
+        self.assertEqual(cpus, [0, 1, 2, 3, 8, 10, 11])
+        self.assertEqual(cpu_profile.format_cpulist(cpus), "0-3,8,10-11")
+
+
+class TestCpuGroups(unittest.TestCase):
+    """Test cases for NUMA node detection."""
+
+    def test_reads_nodes_and_respects_affinity(self):
+        """Test CPUs are grouped per node and limited to the allowed set."""
+        with tempfile.TemporaryDirectory() as tmp:
+            for node, cpulist in (("node0", "0-3"), ("node1", "4-7"), ("node10", "")):
+                os.makedirs(os.path.join(tmp, node))
+                with open(os.path.join(tmp, node, "cpulist"), "w", encoding="utf-8") as f:
+                    f.write(cpulist)
+            groups = cpu_profile.cpu_groups(tmp, allowed=[1, 2, 3, 4, 5])
+        self.assertEqual(groups, [(0, [1, 2, 3]), (1, [4, 5])])
+
+    def test_fallback_without_sysfs(self):
+        """Test a missing node directory yields a single group."""
+        groups = cpu_profile.cpu_groups("/nonexistent", allowed=[0, 1])
+        self.assertEqual(groups, [(0, [0, 1])])
+
+
+class TestPlanSlots(unittest.TestCase):
+    """Test cases for slot planning and launch commands."""
+
+    groups = [(0, list(range(16))), (1, list(range(16, 32)))]
+
+    def test_slots_stay_within_nodes(self):
+        """Test automatic planning splits each node by threads per slot."""
+        plan = cpu_profile.plan_slots(self.groups, threads_per_slot=8)
+        self.assertEqual([(slot["node"], len(slot["cpus"])) for slot in plan], [(0, 8), (0, 8), (1, 8), (1, 8)])
+        self.assertTrue(all(cpu < 16 for slot in plan if slot["node"] == 0 for cpu in slot["cpus"]))
+
+    def test_explicit_slot_count(self):
+        """Test an explicit slot count is spread over nodes, at least one each."""
+        plan = cpu_profile.plan_slots(self.groups, slots=1)
+        self.assertEqual([len(slot["cpus"]) for slot in plan], [16, 16])
+        plan = cpu_profile.plan_slots([(0, [0, 1, 2])], slots=2)
+        self.assertEqual([slot["cpus"] for slot in plan], [[0, 1], [2]])
+
+    def test_options_depend_on_endpoints(self):
+        """Test one shared instance uses every core, pinned instances use one slot each."""
+        plan = cpu_profile.plan_slots(self.groups, threads_per_slot=8)
+        self.assertEqual(cpu_profile.cpu_options(plan, 4096)["num_thread"], 32)
+        options = cpu_profile.cpu_options(plan, 4096, endpoints=4)
+        self.assertEqual(options, {"num_gpu": 0, "num_thread": 8, "num_ctx": 4096})
+
+    def test_launch_commands(self):
+        """Test NUMA machines bind memory, single-node machines use taskset."""
+        commands, endpoints = cpu_profile.launch_commands(cpu_profile.plan_slots(self.groups, 16))
+        self.assertIn("numactl --physcpubind=16-31 --membind=1", commands[1])
+        self.assertEqual(endpoints, "http://127.0.0.1:11435/api/generate,http://127.0.0.1:11436/api/generate")
+        commands, _ = cpu_profile.launch_commands(cpu_profile.plan_slots([(0, list(range(8)))], 4))
+        self.assertIn("taskset -c 4-7", commands[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
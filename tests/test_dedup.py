@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Near-Duplicate Clustering Tests
+
+This module contains unit tests for scripts/dedup.py.
+"""
+import os
+import sys
+import unittest
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import dedup  # noqa: E402
+from lexicon import NameMatcher  # noqa: E402
+from scheduler import Batch, RowItem  # noqa: E402
+
+
+class TestClustering(unittest.TestCase):
+    """Test cases for grouping rows by normalized text."""
+
+    def test_normalize(self):
+        """Test placeholders, tags, numbers and names are masked."""
+        self.assertEqual(dedup.normalize("击败{0}个<color=red>敌人</color>", ()), "击败#个#敌人#")
+        self.assertEqual(dedup.normalize("阿明：获得 30 金币", ["阿明"]), "#：获得#金币")
+        self.assertEqual(dedup.normalize("阿明：获得 30 金币", NameMatcher(["阿明"])), "#：获得#金币")
+
+    def test_templated_rows_cluster(self):
+        """Test template variants and name variants share one representative."""
+        rows = [RowItem(10 + i, f"击败{i}个敌人后回来找我领取奖励") for i in range(5)]
+        rows += [RowItem(20 + i, f"{name}：你来得正好，快去村口看看吧") for i, name in enumerate(["阿明", "小红"])]
+        rows.append(RowItem(30, "完全不同的一句对白内容"))
+        representatives = dedup.cluster_rows(rows, names=["阿明", "小红"])
+        self.assertEqual([r.excel_row for r in representatives], [10, 20, 30])
+        self.assertEqual([m.excel_row for m in representatives[0].members], [11, 12, 13, 14])
+        self.assertEqual([m.excel_row for m in representatives[1].members], [21])
+        self.assertEqual(representatives[2].members, [])
+
+    def test_text_differences_not_clustered(self):
+        """Test lines differing by real text stay separate however similar they are."""
+        base = "你来得正好，这里有一批货物需要送到村口的铁匠铺去，路上小心山贼"
+        rows = [RowItem(1, base), RowItem(2, base.replace("铁匠铺", "铁匠家")), RowItem(3, base.replace("山贼", "{0}"))]
+        self.assertEqual([r.excel_row for r in dedup.cluster_rows(rows)], [1, 2, 3])
+        rows.append(RowItem(4, base.replace("山贼", "{1}")))
+        representatives = dedup.cluster_rows(rows)
+        self.assertEqual([r.excel_row for r in representatives], [1, 2, 3])
+        self.assertEqual(Batch(1, representatives).covered_rows, [1, 2, 3, 4])
+
+
+class TestProjection(unittest.TestCase):
+    """Test cases for projecting representative findings onto members."""
+
+    names = ["阿明", "小红", "老王"]
+
+    def setUp(self):
+        self.rep = RowItem(10, "阿明：他高兴的跑了过来")
+        self.member = RowItem(11, "小红：他高兴的跑了过来")
+
+    def test_projects_rewrite(self):
+        """Test a full-sentence suggestion is re-applied to the member text."""
+        issues = [{"line_no": 10, "issue": "错别字：'的'应为'地'", "suggestion": "阿明：他高兴地跑了过来"}]
+        projected = dedup.project_issues(self.rep, self.member, issues, self.names)
+        self.assertEqual(projected[0]["line_no"], 11)
+        self.assertEqual(projected[0]["suggestion"], "小红：他高兴地跑了过来")
+        self.assertIn("参照第10行", projected[0]["issue"])
+
+    def test_projects_quoted_fragment(self):
+        """Test a fragment suggestion is kept when the quoted text is shared."""
+        issues = [{"line_no": 10, "issue": "错别字：“高兴的”", "suggestion": "高兴地"}]
+        projected = dedup.project_issues(self.rep, self.member, issues, self.names)
+        self.assertEqual(projected[0]["suggestion"], "高兴地")
+
+    def test_issue_on_differing_span_needs_recheck(self):
+        """Test findings touching the differing span are not projected."""
+        issues = [{"line_no": 10, "issue": "错别字：'阿明'", "suggestion": "阿鸣"}]
+        self.assertIsNone(dedup.project_issues(self.rep, self.member, issues, self.names))
+
+    def test_unlocatable_issue_needs_recheck(self):
+        """Test findings that cannot be located are not projected."""
+        issues = [{"line_no": 10, "issue": "语病：缺少主语", "suggestion": "补充主语"}]
+        self.assertIsNone(dedup.project_issues(self.rep, self.member, issues, self.names))
+
+    def test_project_batch(self):
+        """Test batch projection splits covered and recheck members."""
+        other = RowItem(12, "老王：他高兴的跑了过来")
+        self.rep.members = [self.member, other]
+        clean = RowItem(20, "没有问题的句子")
+        clean.members = [RowItem(21, "没有问题的句子")]
+        issues = [{"line_no": "10", "issue": "错别字：'的'应为'地'", "suggestion": "阿明：他高兴地跑了过来"}]
+        projected, covered, recheck = dedup.project_batch([self.rep, clean], issues, self.names)
+        self.assertEqual([p["line_no"] for p in projected], [11, 12])
+        self.assertEqual([m.excel_row for m in covered], [11, 12, 21])
+        self.assertEqual(recheck, [])
+
+    def test_typo_in_differing_span_not_projected(self):
+        """Test a row whose difference is real text is checked on its own, even if the other row is clean."""
+        rep = RowItem(10, "全军将士听令，明日清晨在城门集结，发起最后的总攻，务必一举拿下")
+        member = RowItem(11, "全军将士听令，明日清晨在城门集结，发起最后的总功，务必一举拿下")
+        self.assertEqual([r.excel_row for r in dedup.cluster_rows([rep, member])], [10, 11])
+
+        # 直接投影时同样不能沿用，即使问题与差异片段无关
+        self.assertIsNone(dedup.project_issues(rep, member, []))
+        issues = [{"line_no": 10, "issue": "语病：'务必一举拿下'", "suggestion": ""}]
+        self.assertIsNone(dedup.project_issues(rep, member, issues))
+
+    def test_names_without_lexicon_need_recheck(self):
+        """Test name variants are only covered when the names are known."""
+        self.assertIsNone(dedup.project_issues(self.rep, self.member, []))
+        self.assertEqual(dedup.project_issues(self.rep, self.member, [], self.names), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
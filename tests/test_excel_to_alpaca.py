@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Alpaca Export Tests
+
+This module contains unit tests for excel_to_alpaca.py.
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# Add repository root to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import excel_to_alpaca  # noqa: E402
+
+
+def write_workbook(path, rows, header=("instruction", "input", "output")):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(list(header))
+    for row in rows:
+        ws.append(list(row))
+    wb.save(path)
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestExcelToAlpaca(unittest.TestCase):
+    """Test cases for the streaming Alpaca exporter."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_convert_and_dedup_across_files(self):
+        """Test rows are streamed from several workbooks and duplicates dropped."""
+        write_workbook(self.path("a.xlsx"), [
+            ("纠错", " 他高兴的跑了 ", "他高兴地跑了"),
+            (None, None, None),
+            ("纠错", "你好", 1),
+            ("纠错", "你好", 1),
+        ])
+        write_workbook(self.path("b.xlsx"), [("纠错", "你好", "1"), ("翻译", "再见", "bye")])
+        written, duplicates = excel_to_alpaca.convert_files(
+            [self.path("a.xlsx"), self.path("b.xlsx")], self.path("out.jsonl"), workers=2)
+        self.assertEqual((written, duplicates), (3, 2))
+        entries = read_jsonl(self.path("out.jsonl"))
+        self.assertEqual(entries[0], {"instruction": "纠错", "input": "他高兴的跑了", "output": "他高兴地跑了"})
+        self.assertEqual([e["input"] for e in entries], ["他高兴的跑了", "你好", "再见"])
+
+    def test_json_array_output(self):
+        """Test a .json output is still written as a JSON array."""
+        write_workbook(self.path("a.xlsx"), [("a", "b", "c"), ("d", "e", "f")])
+        excel_to_alpaca.convert_files([self.path("a.xlsx")], self.path("out.json"))
+        with open(self.path("out.json"), encoding="utf-8") as f:
+            self.assertEqual([e["output"] for e in json.load(f)], ["c", "f"])
+
+    def test_missing_columns(self):
+        """Test a workbook without the required columns is rejected."""
+        write_workbook(self.path("bad.xlsx"), [("x", "y")], header=("instruction", "input"))
+        with self.assertRaises(ValueError):
+            list(excel_to_alpaca.read_excel_file(self.path("bad.xlsx")))
+
+    def test_from_report(self):
+        """Test reports are joined with review status."""
+        records = [
+            {"sheet": "DLG", "row": 4, "text": "他高兴的跑了", "issue": "错别字：的→地",
+             "suggestion": "他高兴地跑了", "status": "已修复"},
+            {"sheet": "DLG", "row": 4, "text": "他高兴的跑了", "issue": "标点", "suggestion": "", "status": "忽略"},
+            {"sheet": "DLG", "row": 5, "text": "§1你好", "issue": "误报", "suggestion": "", "status": "忽略"},
+            {"sheet": "DLG", "row": 6, "text": "待定", "issue": "x", "suggestion": "y", "status": "待处理"},
+        ]
+        entries = list(excel_to_alpaca.convert_report_to_alpaca(records, instruction="检查"))
+        self.assertEqual([e["input"] for e in entries], ["他高兴的跑了", "§1你好"])
+        self.assertEqual(json.loads(entries[0]["output"]), [{"issue": "错别字：的→地", "suggestion": "他高兴地跑了"}])
+        self.assertEqual(entries[1]["output"], "[]")
+
+    def test_from_excel_report(self):
+        """Test an Excel report is read by its Chinese headers."""
+        write_workbook(self.path("report.xlsx"), [
+            (4, "他高兴的跑了", "1001", "错别字：的→地", "他高兴地跑了", "已修复"),
+        ], header=("行号", "配置原文", "对白id", "问题说明", "修改建议", "处理状态"))
+        written, _ = excel_to_alpaca.convert_files(
+            [self.path("report.xlsx")], self.path("out.jsonl"), from_report=True)
+        self.assertEqual(written, 1)
+        self.assertEqual(read_jsonl(self.path("out.jsonl"))[0]["input"], "他高兴的跑了")
+
+
+if __name__ == "__main__":
+    unittest.main()
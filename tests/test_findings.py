@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Findings Store Tests
+
+This module contains unit tests for scripts/findings.py.
+"""
+import csv
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import findings  # noqa: E402
+from scheduler import RowItem  # noqa: E402
+
+
+class TestSplitIssue(unittest.TestCase):
+    """Test cases for issue type parsing."""
+
+    def test_split_chinese_colon(self):
+        self.assertEqual(findings.split_issue("错别字：'的'应改为'地'"), ("错别字", "'的'应改为'地'"))
+
+    def test_split_ascii_colon(self):
+        self.assertEqual(findings.split_issue("语病: 缺少主语"), ("语病", "缺少主语"))
+
+    def test_no_type(self):
+        self.assertEqual(findings.split_issue("句子不通顺"), ("", "句子不通顺"))
+
+
+class TestFindingsStore(unittest.TestCase):
+    """Test cases for the columnar findings store."""
+
+    def setUp(self):
+        self.store = findings.FindingsStore()
+        rows = {
+            10: RowItem(10, "他高兴的跑了", "DLG", "1001"),
+            12: RowItem(12, "负隅顽抗的勇士", "DLG", "1003"),
+        }
+        self.store.add_llm_issues([
+            {"line_no": 12, "issue": "成语错用：负隅顽抗", "suggestion": "英勇抵抗"},
+            {"line_no": "10", "issue": "错别字：的→地", "suggestion": "他高兴地跑了"},
+            {"line_no": 99, "issue": "错别字：xx", "suggestion": "yy"},
+            "not a dict",
+        ], rows, "DLG")
+
+    def test_add_llm_issues(self):
+        """Test row text and id are filled from checked rows."""
+        self.assertEqual(len(self.store), 3)
+        first = self.store.get(1)
+        self.assertEqual((first.row, first.row_id, first.text), (10, "1001", "他高兴的跑了"))
+        self.assertEqual(first.issue, "错别字：的→地")
+        self.assertEqual(first.status, findings.STATUS_PENDING)
+        self.assertEqual(self.store.get(2).text, "")
+
+    def test_issue_types_interned(self):
+        """Test issue types are stored once."""
+        self.assertEqual(self.store.issue_types(), {"成语错用": 1, "错别字": 2})
+
+    def test_filter_and_sort(self):
+        """Test filtering by type/status and sorting by row."""
+        self.assertEqual(self.store.filter(issue_type="错别字"), [1, 2])
+        self.assertEqual(self.store.filter(issue_type="不存在"), [])
+        self.assertEqual(self.store.filter(rows={12}), [0])
+        self.store.set_status(1, findings.STATUS_FIXED)
+        self.assertEqual(self.store.filter(status=findings.STATUS_PENDING), [0, 2])
+        self.assertEqual(self.store.sorted_indices("row"), [1, 0, 2])
+
+    def test_exports(self):
+        """Test CSV, JSONL and Excel exports."""
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = self.store.to_csv(os.path.join(tmp, "r.csv"))
+            with open(csv_path, encoding="utf-8-sig") as f:
+                rows = list(csv.reader(f))
+            self.assertEqual(rows[0], findings.REPORT_COLUMNS)
+            self.assertEqual(rows[1][:3], ["12", "负隅顽抗的勇士", "1003"])
+
+            jsonl_path = self.store.to_jsonl(os.path.join(tmp, "r.jsonl"), indices=[1])
+            with open(jsonl_path, encoding="utf-8") as f:
+                record = json.loads(f.readline())
+            self.assertEqual(record["issue_type"], "错别字")
+            self.assertEqual(record["row"], 10)
+
+            from openpyxl import load_workbook
+            xlsx_path = self.store.to_excel(os.path.join(tmp, "r.xlsx"))
+            ws = load_workbook(xlsx_path).active
+            self.assertEqual(ws.max_row, 4)
+            self.assertEqual(ws.cell(1, 2).value, "配置原文")
+
+
+if __name__ == "__main__":
+    unittest.main()
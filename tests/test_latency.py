@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Latency Tests
+
+This module contains unit tests for adaptive timeouts and hedged requests.
+"""
+import os
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import latency  # noqa: E402
+
+
+class TestLatencyTracker(unittest.TestCase):
+    """Test cases for rolling latency percentiles."""
+
+    def test_estimate_tokens(self):
+        """Test CJK characters count as one token each."""
+        self.assertEqual(latency.estimate_tokens("测试文本"), 4)
+        self.assertEqual(latency.estimate_tokens("abcdefgh"), 2)
+        self.assertEqual(latency.estimate_tokens(""), 0)
+
+    def test_percentile(self):
+        """Test linear interpolated percentile."""
+        self.assertEqual(latency.percentile([1, 2, 3, 4, 5], 50), 3)
+        self.assertIsNone(latency.percentile([], 99))
+
+    def test_default_timeout_without_samples(self):
+        """Test fixed timeout is used until enough samples exist."""
+        tracker = latency.LatencyTracker()
+        self.assertEqual(tracker.timeout_for("a", 1000, 300), 300)
+        self.assertIsNone(tracker.hedge_delay("a", 1000))
+
+    def test_timeout_from_p99(self):
+        """Test timeout derives from p99 and is clamped."""
+        tracker = latency.LatencyTracker(min_samples=4)
+        for seconds in (10, 12, 14, 20):
+            tracker.record("a", 1000, seconds)
+        self.assertAlmostEqual(tracker.timeout_for("a", 1000, 300), 19.82 * latency.TIMEOUT_FACTOR, places=1)
+        self.assertEqual(tracker.timeout_for("a", 1000, 30), 30)
+        # Other endpoints are tracked separately
+        self.assertEqual(tracker.timeout_for("b", 1000, 300), 300)
+
+    def test_scaled_samples_from_other_bucket(self):
+        """Test samples from a smaller bucket are scaled up."""
+        tracker = latency.LatencyTracker(min_samples=2)
+        tracker.record("a", 256, 1.0)
+        tracker.record("a", 256, 1.0)
+        self.assertEqual(tracker.quantile("a", 1024, 50), 4.0)
+
+
+class TestHedgedRequests(unittest.TestCase):
+    """Test cases for hedged model calls."""
+
+    def setUp(self):
+        import conf_check
+        self.conf_check = conf_check
+        self.tracker = latency.LatencyTracker(min_samples=1)
+        self.tracker.record("slow", latency.estimate_tokens("prompt"), 0.05)
+
+    def test_hedge_wins_and_cancels_loser(self):
+        """Test hedged duplicate wins and the slow request is cancelled."""
+        cancelled = {}
+
+        def fake_call(prompt, timeout=None, endpoint=None, cancel_event=None, meta=None):
+            if endpoint == "slow":
+                cancelled["slow"] = cancel_event.wait(2)
+                return None
+            return "[]"
+
+        with patch.object(self.conf_check, "LATENCY", self.tracker), \
+                patch.object(self.conf_check, "ENDPOINTS", ["slow", "fast"]), \
+                patch.object(self.conf_check, "_ENDPOINT_CURSOR", 0), \
+                patch.object(self.conf_check, "call_backend", side_effect=fake_call):
+            self.assertEqual(self.conf_check.call_model("prompt", timeout=5), "[]")
+            time.sleep(0.1)
+        self.assertTrue(cancelled.get("slow"))
+
+    def test_no_hedge_when_disabled(self):
+        """Test fixed-timeout mode calls the endpoint directly."""
+        with patch.object(self.conf_check, "ADAPTIVE_TIMEOUT", False), \
+                patch.object(self.conf_check, "call_backend", return_value="[]") as mock_call:
+            self.assertEqual(self.conf_check.call_model("prompt", timeout=5), "[]")
+        self.assertEqual(mock_call.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
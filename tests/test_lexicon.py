@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Proper Noun Lexicon Tests
+
+This module contains unit tests for scripts/lexicon.py.
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import lexicon  # noqa: E402
+from dedup import issue_spans  # noqa: E402
+from masking import mask_payload, unmask_issues  # noqa: E402
+from scheduler import Batch, RowItem  # noqa: E402
+from sheet_index import SheetIndex  # noqa: E402
+
+
+class TestNameMatcher(unittest.TestCase):
+    """Test cases for matching names in text."""
+
+    matcher = lexicon.NameMatcher(["艾琳", "艾琳娜", "铁剑", "", " 风语镇 "])
+
+    def test_longest_match_first(self):
+        """Test the longest name wins and matches do not overlap."""
+        found = list(self.matcher.finditer("艾琳娜拿起铁剑走向风语镇，艾琳跟在后面"))
+        self.assertEqual([name for _, _, name in found], ["艾琳娜", "铁剑", "风语镇", "艾琳"])
+        self.assertEqual(found[0][:2], (0, 3))
+        self.assertEqual(len(self.matcher), 4)
+
+    def test_replace_and_names_in(self):
+        """Test names are replaced and listed in order of appearance."""
+        self.assertEqual(self.matcher.replace("艾琳把铁剑给了艾琳", "#"), "#把#给了#")
+        self.assertEqual(self.matcher.replace("没有名字", "#"), "没有名字")
+        self.assertEqual(self.matcher.names_in("铁剑、艾琳、铁剑"), ["铁剑", "艾琳"])
+
+    def test_covers(self):
+        """Test spans count as covered only when every span is inside a name."""
+        text = "艾琳娜高兴的跑了"
+        self.assertTrue(self.matcher.covers(text, [(0, 2)]))
+        self.assertFalse(self.matcher.covers(text, [(0, 2), (5, 6)]))
+        self.assertFalse(self.matcher.covers(text, []))
+
+    def test_drop_name_issues(self):
+        """Test issues about a name are dropped and others kept."""
+        texts = {4: "艾琳娜高兴的跑了"}
+        issues = [{"line_no": 4, "issue": "错别字：「艾琳娜」应为「艾林娜」", "suggestion": ""},
+                  {"line_no": 4, "issue": "错别字：「高兴的跑」", "suggestion": "艾琳娜高兴地跑了"},
+                  {"line_no": 4, "issue": "语病：句子不通顺", "suggestion": ""}]
+        kept, dropped = lexicon.drop_name_issues(issues, texts, self.matcher, issue_spans)
+        self.assertEqual(dropped, 1)
+        self.assertEqual(kept, issues[1:])
+        self.assertEqual(lexicon.drop_name_issues(issues, texts, None, issue_spans), (issues, 0))
+
+    def test_mask_names_with_markup(self):
+        """Test names become sentinels numbered in text order and are restored."""
+        payload, restore = mask_payload({5: "<b>艾琳</b>在风语镇等{0}"}, self.matcher)
+        self.assertEqual(payload[5], "§1§2§3在§4等§5")
+        issues = unmask_issues([{"line_no": 5, "issue": "语病", "suggestion": "§1§2§3在§4等候§5"}], restore)
+        self.assertEqual(issues[0]["suggestion"], "<b>艾琳</b>在风语镇等候{0}")
+
+
+class TestParseSources(unittest.TestCase):
+    """Test cases for name column settings and name filtering."""
+
+    def test_parse_sources(self):
+        """Test Sheet:column pairs from a string or list."""
+        self.assertEqual(lexicon.parse_sources("NPC_CONF:name, ITEM_CONF:名称,"),
+                         [("NPC_CONF", "name"), ("ITEM_CONF", "名称")])
+        self.assertEqual(lexicon.parse_sources(["A:B:name"]), [("A:B", "name")])
+        for value in ("NPC_CONF", ":name", "NPC_CONF:"):
+            with self.assertRaises(ValueError):
+                lexicon.parse_sources(value)
+
+    def test_find_column(self):
+        """Test exact matches win over fuzzy matches on merged header names."""
+        columns = ["id", "optional_string_name", "name"]
+        self.assertEqual(lexicon.find_column(columns, "name"), 2)
+        self.assertEqual(lexicon.find_column(columns[:2], "Name"), 1)
+        self.assertIsNone(lexicon.find_column(columns, "desc"))
+
+    def test_is_name(self):
+        """Test descriptions, markup, digits and single characters are not names."""
+        self.assertTrue(lexicon.is_name("艾琳娜"))
+        for text in ("剑", "一把锋利的剑，可以斩断钢铁", "{0}之剑", "1001", "艾琳 娜", "x" * 17):
+            self.assertFalse(lexicon.is_name(text), text)
+
+
+class TestHarvestNames(unittest.TestCase):
+    """Test cases for reading names from workbook sheets."""
+
+    def setUp(self):
+        from openpyxl import Workbook
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.workbook = os.path.join(self.tmp.name, "book.xlsx")
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "DLG"
+        ws.append(["id", "text"])
+        ws.append([1, "艾琳娜来到风语镇"])
+        npc = wb.create_sheet("NPC_CONF")
+        npc.append(["id", "name", "desc"])
+        npc.append([1, "艾琳娜", "风语镇的铁匠"])
+        npc.append([2, "老汤姆", "酒馆老板，总是喝醉"])
+        npc.append([3, "某", None])
+        item = wb.create_sheet("ITEM_CONF")
+        item.append(["id", "name"])
+        item.append([1, "铁剑"])
+        wb.save(self.workbook)
+        self.index = SheetIndex(self.workbook, state_dir=os.path.join(self.tmp.name, "state"))
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def test_harvest(self):
+        """Test names are read from the configured columns and missing sources reported."""
+        sources = lexicon.parse_sources("NPC_CONF:name,ITEM_CONF:name,NPC_CONF:nick,SKILL_CONF:name")
+        counts, names, missing = lexicon.harvest_names(self.index, sources, [0])
+        self.assertEqual(counts, {"NPC_CONF:name": 2, "ITEM_CONF:name": 1})
+        self.assertEqual(sorted(names), ["老汤姆", "艾琳娜", "铁剑"])
+        self.assertEqual(missing, ["NPC_CONF:nick", "SKILL_CONF:name"])
+
+    def test_index_cached_per_version(self):
+        """Test the name sheets are read once while the workbook is unchanged."""
+        self.assertTrue(self.index.ensure_sheet("NPC_CONF", [0]))
+        self.assertFalse(self.index.ensure_sheet("NPC_CONF", [0]))
+
+
+class TestCheckWithLexicon(unittest.TestCase):
+    """Test cases for names in conf_check prompts and results."""
+
+    def test_names_masked_and_name_issues_dropped(self):
+        """Test names are masked in the prompt and issues about them are dropped."""
+        import conf_check
+
+        batch = Batch(1, [RowItem(10, "艾琳娜高兴的跑了")])
+        sent = {}
+
+        def fake_call(prompt, timeout=None, meta=None):
+            sent["prompt"] = prompt
+            return json.dumps([{"line_no": 1, "issue": "错别字：「§1」", "suggestion": ""},
+                               {"line_no": 1, "issue": "的地得", "suggestion": "§1高兴地跑了"}], ensure_ascii=False)
+
+        matcher = lexicon.NameMatcher(["艾琳娜"])
+        with patch.object(conf_check, "MASK_MARKUP", True), patch.object(conf_check, "LEXICON", matcher), \
+                patch.object(conf_check, "call_model", side_effect=fake_call):
+            result = conf_check.check_batch(batch, 1, trace=False)
+        self.assertNotIn("艾琳娜", sent["prompt"])
+        self.assertEqual(result["name_issues"], 1)
+        self.assertEqual([item["suggestion"] for item in result["issues"]], ["艾琳娜高兴地跑了"])
+
+    def test_names_listed_without_masking(self):
+        """Test names in the batch are listed in the prompt when masking is off."""
+        import conf_check
+
+        batch = Batch(1, [RowItem(10, "艾琳娜来了"), RowItem(11, "铁剑")])
+        with patch.object(conf_check, "MASK_MARKUP", False), \
+                patch.object(conf_check, "LEXICON", lexicon.NameMatcher(["艾琳娜", "风语镇", "铁剑"])):
+            prompt, restore = conf_check.build_batch_prompt(batch)
+        self.assertEqual(restore, {})
+        self.assertIn("专有名词（不要报告）：艾琳娜、铁剑", prompt)
+        self.assertNotIn("风语镇", prompt)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Local Rules Tests
+
+This module contains unit tests for scripts/local_rules.py.
+"""
+import os
+import sys
+import unittest
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+from local_rules import LocalRules, prefilter  # noqa: E402
+from scheduler import RowItem  # noqa: E402
+
+
+class TestLocalRules(unittest.TestCase):
+    """Test cases for the local prefilter rules."""
+
+    def setUp(self):
+        self.rules = LocalRules(sensitive_words=["竞品"])
+
+    def test_clean_text(self):
+        """Test ordinary dialogue hits no rule."""
+        self.assertEqual(self.rules.scan("今天的任务完成了，回去休息吧。"), [])
+
+    def test_rule_kinds(self):
+        """Test each rule kind is reported."""
+        self.assertEqual(self.rules.scan("草丛里悉悉索索地响"), ["错别字:悉悉索索→窸窸窣窣"])
+        self.assertEqual(self.rules.scan("这是是我的剑"), ["重复字:是是"])
+        self.assertEqual(self.rules.scan("他慢慢的走了过来"), ["的地得:慢慢的走"])
+        self.assertEqual(self.rules.scan("英雄们负隅顽抗"), ["成语:负隅顽抗"])
+        self.assertEqual(self.rules.scan("去竞品看看"), ["敏感词:竞品"])
+
+    def test_repeat_exceptions(self):
+        """Test legitimate repeated characters are not flagged."""
+        self.assertEqual(self.rules.scan("这件事最后不了了之"), [])
+        self.assertEqual(self.rules.scan("为了了解真相"), [])
+        self.assertEqual(self.rules.scan("的的确确是他"), [])
+
+    def test_prefilter(self):
+        """Test only suspicious rows are kept and hits are counted per kind."""
+        rows = [RowItem(5, "一切正常"), RowItem(6, "再接再励"), RowItem(7, "我们都都去")]
+        suspicious, skipped, kinds = prefilter(rows, self.rules)
+        self.assertEqual([row.excel_row for row in suspicious], [6, 7])
+        self.assertEqual([row.excel_row for row in skipped], [5])
+        self.assertEqual(kinds, {"错别字": 1, "重复字": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
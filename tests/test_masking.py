@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Markup Masking Tests
+
+This module contains unit tests for scripts/masking.py.
+"""
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import masking  # noqa: E402
+from scheduler import Batch, RowItem  # noqa: E402
+
+
+class TestMasking(unittest.TestCase):
+    """Test cases for placeholder and markup masking."""
+
+    def test_mask_and_restore(self):
+        """Test markup is replaced by sentinels and restored."""
+        text = "<color=#ff0000>警告</color>：{0}出错了\\n请重试%s次"
+        masked, tokens = masking.mask_text(text)
+        self.assertEqual(masked, "§1警告§2：§3出错了§4请重试§5次")
+        self.assertEqual(tokens, ["<color=#ff0000>", "</color>", "{0}", "\\n", "%s"])
+        self.assertEqual(masking.unmask_text(masked, tokens), text)
+
+    def test_adjacent_markup_merged(self):
+        """Test adjacent markup becomes one sentinel."""
+        masked, tokens = masking.mask_text("</color>{0}<b>你好")
+        self.assertEqual(masked, "§1你好")
+        self.assertEqual(tokens, ["</color>{0}<b>"])
+
+    def test_plain_text_untouched(self):
+        """Test text without markup or containing the sentinel char is unchanged."""
+        self.assertEqual(masking.mask_text("普通文本"), ("普通文本", []))
+        self.assertEqual(masking.mask_text("§1 {0}"), ("§1 {0}", []))
+
+    def test_unknown_sentinel_kept(self):
+        """Test sentinels the model invented are left as-is."""
+        self.assertEqual(masking.unmask_text("§1和§9", ["{0}"]), "{0}和§9")
+
+    def test_unmask_issues(self):
+        """Test issue and suggestion are restored per line."""
+        payload, restore = masking.mask_payload({10: "{0}高兴的跑了", 11: "没有标记"})
+        self.assertEqual(payload, {10: "§1高兴的跑了", 11: "没有标记"})
+        self.assertEqual(list(restore), [10])
+        issues = masking.unmask_issues(
+            [{"line_no": "10", "issue": "错别字：'§1高兴的'", "suggestion": "§1高兴地跑了"}], restore)
+        self.assertEqual(issues[0]["suggestion"], "{0}高兴地跑了")
+        self.assertEqual(issues[0]["issue"], "错别字：'{0}高兴的'")
+
+    def test_check_batch_sends_masked_text(self):
+        """Test check_batch sends masked text and restores suggestions."""
+        import conf_check
+
+        batch = Batch(1, [RowItem(10, "<b>他高兴的跑了</b>")])
+        sent = {}
+
+        def fake_call(prompt, timeout=None, meta=None):
+            sent["prompt"] = prompt
+            return json.dumps([{"line_no": 1, "issue": "错别字", "suggestion": "§1他高兴地跑了§2"}],
+                              ensure_ascii=False)
+
+        with patch.object(conf_check, "MASK_MARKUP", True), \
+                patch.object(conf_check, "call_model", side_effect=fake_call):
+            result = conf_check.check_batch(batch, 1)
+        self.assertNotIn("<b>", sent["prompt"])
+        self.assertIn("§1他高兴的跑了§2", sent["prompt"])
+        self.assertEqual(result["issues"][0]["suggestion"], "<b>他高兴地跑了</b>")
+        self.assertEqual(result["issues"][0]["line_no"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
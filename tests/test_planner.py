@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Run Planner Tests
+
+This module contains unit tests for scripts/planner.py.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import planner  # noqa: E402
+from latency import estimate_tokens  # noqa: E402
+from response_trace import TraceWriter  # noqa: E402
+from scheduler import Batch, RowItem  # noqa: E402
+
+URL = "http://gpu1:11434/api/generate"
+
+
+class TestTraceThroughput(unittest.TestCase):
+    """Test cases for token rates measured from trace archives."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_trace(self, name, model, endpoints=None, response_format="json", timing=None):
+        path = os.path.join(self.tmp.name, name + planner.TRACE_SUFFIX)
+        writer = TraceWriter(path)
+        fields = {"model": model, "response_format": response_format}
+        if endpoints is not None:
+            fields["endpoints"] = endpoints
+        writer.start_run(**fields)
+        batch = Batch(1, [RowItem(i, f"文本{i}") for i in range(10)])
+        for _ in range(2):
+            writer.record_batch(batch, "提示词" * 50, "[]", timing if timing is not None else {
+                "prompt_tokens": 300, "prompt_seconds": 1.0, "completion_tokens": 40, "completion_seconds": 2.0})
+        writer.close()
+        return path
+
+    def test_rates_from_matching_traces(self):
+        """Test rates, output per row and prompt ratio from a matching trace."""
+        path = self.write_trace("a", "qwen3:14b", [URL])
+        stats = planner.trace_throughput([path], "qwen3:14b", [URL])
+        self.assertEqual(stats["batches"], 2)
+        self.assertEqual(stats["traces"], 1)
+        self.assertAlmostEqual(stats["prompt_rate"], 300)
+        self.assertAlmostEqual(stats["eval_rate"], 20)
+        self.assertAlmostEqual(stats["output_per_row"], 4)
+        self.assertAlmostEqual(stats["prompt_ratio"], 300 / estimate_tokens("提示词" * 50))
+
+    def test_other_model_endpoint_or_format_ignored(self):
+        """Test traces from another model, endpoint or response format are skipped."""
+        paths = [self.write_trace("a", "qwen3:4b", [URL]),
+                 self.write_trace("b", "qwen3:14b", ["http://gpu2:11434/api/generate"]),
+                 self.write_trace("c", "qwen3:14b", [URL], response_format="compact"),
+                 self.write_trace("d", "qwen3:14b", [URL], timing={})]
+        self.assertIsNone(planner.trace_throughput(paths, "qwen3:14b", [URL], "json"))
+
+    def test_traces_without_endpoints_match_by_model(self):
+        """Test older traces without endpoint information still count."""
+        path = self.write_trace("a", "qwen3:14b")
+        self.assertEqual(planner.trace_throughput([path], "qwen3:14b", [URL])["batches"], 2)
+
+    def test_find_traces(self):
+        """Test only trace archives are listed, and a missing directory is empty."""
+        self.write_trace("a", "m")
+        open(os.path.join(self.tmp.name, "notes.txt"), "w").close()
+        self.assertEqual(len(planner.find_traces(self.tmp.name)), 1)
+        self.assertEqual(planner.find_traces(os.path.join(self.tmp.name, "missing")), [])
+
+
+class TestBuildPlan(unittest.TestCase):
+    """Test cases for batch, token and ETA estimates."""
+
+    batches = [(10, 500), (10, 500), (5, 300)]
+    throughput = {"prompt_rate": 1000.0, "eval_rate": 20.0, "output_per_row": 4.0,
+                  "prompt_ratio": 1.2, "batches": 10, "traces": 1}
+
+    def test_without_history(self):
+        """Test defaults are used and no ETA is given without history."""
+        plan = planner.build_plan(self.batches, 2, response_format="compact")
+        self.assertEqual((plan["batches"], plan["rows"], plan["prompt_tokens"]), (3, 25, 1300))
+        self.assertEqual(plan["output_tokens"], 25 * planner.DEFAULT_OUTPUT_TOKENS_PER_ROW["compact"])
+        self.assertIsNone(plan["eta_range"])
+
+    def test_tuned_profile_rows_per_second(self):
+        """Test a calibrated rows/second is used directly."""
+        plan = planner.build_plan(self.batches, 2, tuned={"rows_per_second": 0.5}, throughput=self.throughput)
+        self.assertEqual(plan["eta_range"], (50.0, 50.0))
+        self.assertIn("调优配置", plan["eta_source"])
+
+    def test_trace_rates_with_shared_endpoint(self):
+        """Test token rates give a range when workers share one endpoint."""
+        plan = planner.build_plan(self.batches, 2, endpoints=1, throughput=self.throughput)
+        self.assertEqual(plan["prompt_tokens"], 1560)
+        self.assertEqual(plan["output_tokens"], 100)
+        serial = 1560 / 1000 + 100 / 20
+        self.assertAlmostEqual(plan["eta_range"][0], serial / 2)
+        self.assertAlmostEqual(plan["eta_range"][1], serial)
+
+        plan = planner.build_plan(self.batches, 2, endpoints=2, throughput=self.throughput)
+        self.assertAlmostEqual(plan["eta_range"][0], plan["eta_range"][1])
+
+    def test_format_duration(self):
+        """Test human readable durations."""
+        self.assertEqual(planner.format_duration(42), "42秒")
+        self.assertEqual(planner.format_duration(125), "2分5秒")
+        self.assertEqual(planner.format_duration(3600 * 2 + 60 * 5), "2小时5分")
+        self.assertEqual(planner.format_duration(3600), "1小时")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Progress Events Tests
+
+This module contains unit tests for scripts/progress_events.py.
+"""
+import io
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import progress_events  # noqa: E402
+import skill_executor  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProgressEvents(unittest.TestCase):
+    """Test cases for NDJSON progress events."""
+
+    def test_tracker_eta(self):
+        """Test throughput and ETA are computed from completed rows."""
+        clock = FakeClock()
+        tracker = progress_events.ProgressTracker(100, clock=clock)
+        self.assertIsNone(tracker.eta_seconds)
+        clock.now += 10
+        tracker.update(25)
+        snapshot = tracker.snapshot()
+        self.assertEqual(snapshot["rows_per_second"], 2.5)
+        self.assertEqual(snapshot["eta_seconds"], 30.0)
+        self.assertEqual(snapshot["done_rows"], 25)
+
+    def test_emit_ndjson(self):
+        """Test each event is one JSON line with type and timestamp."""
+        stream = io.StringIO()
+        emitter = progress_events.EventEmitter(stream)
+        emitter.emit("batch_start", batch=1, row_range="4-33")
+        emitter.emit("error", message="模型不可用")
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([e["event"] for e in lines], ["batch_start", "error"])
+        self.assertEqual(lines[0]["row_range"], "4-33")
+        self.assertIn("ts", lines[0])
+        self.assertEqual(lines[1]["message"], "模型不可用")
+
+    def test_disabled_emitter(self):
+        """Test the default emitter silently drops events."""
+        emitter = progress_events.open_emitter()
+        self.assertFalse(emitter.enabled)
+        emitter.emit("run_start")
+        emitter.close()
+
+    def test_events_file(self):
+        """Test events are appended to a file."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "events", "run.ndjson")
+            emitter = progress_events.open_emitter(path=path)
+            emitter.emit("run_start", total_rows=3)
+            emitter.close()
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(json.loads(f.readline())["total_rows"], 3)
+
+    def test_events_socket(self):
+        """Test events are streamed to a TCP listener."""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        received = []
+
+        def accept():
+            conn, _ = server.accept()
+            with conn, conn.makefile("r", encoding="utf-8") as stream:
+                received.extend(json.loads(line) for line in stream)
+
+        thread = threading.Thread(target=accept)
+        thread.start()
+        emitter = progress_events.open_emitter(address=f":{server.getsockname()[1]}")
+        emitter.emit("run_finish", findings=2)
+        emitter.close()
+        thread.join(timeout=5)
+        server.close()
+        self.assertEqual(received[0]["findings"], 2)
+
+    def test_bad_address(self):
+        """Test a malformed socket address is rejected."""
+        with self.assertRaises(ValueError):
+            progress_events.parse_address("localhost")
+
+    def test_skill_executor_format(self):
+        """Test the SKILL executor renders batch events as one progress line."""
+        text = skill_executor.format_event({
+            "event": "batch_finish", "batch": 3, "completed_batches": 3, "total_batches": 10,
+            "rows_per_second": 4.25, "eta_seconds": 95, "findings": 7, "error": None,
+        })
+        self.assertEqual(text, "📈 3/10 批 | 4.2 行/秒 | 剩余 1分35秒 | 已发现 7 处问题")
+        self.assertIsNone(skill_executor.format_event({"event": "batch_start"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Report Writer Tests
+
+This module contains unit tests for scripts/report_writers.py.
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import report_writers  # noqa: E402
+from findings import FindingsStore  # noqa: E402
+
+
+class TestReportWriters(unittest.TestCase):
+    """Test cases for pluggable report writers."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = os.path.join(self.tmp.name, "report")
+        self.store = FindingsStore()
+        self.store.add("DLG", 20, "2", "乙", "语病：缺少主语", "补充主语")
+        self.store.add("DLG", 10, "1", "甲", "错别字：的→地", "地")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse_formats(self):
+        """Test format list parsing and validation."""
+        self.assertEqual(report_writers.parse_formats("JSONL, xlsx,jsonl"), ["jsonl", "xlsx"])
+        with self.assertRaises(ValueError):
+            report_writers.parse_formats("docx")
+        with self.assertRaises(ValueError):
+            report_writers.parse_formats("")
+
+    def test_jsonl_streams_batches(self):
+        """Test JSONL findings are on disk before the run finishes."""
+        writer = report_writers.create_report_writers(["jsonl"], self.base)[0]
+        writer.open()
+        writer.write(self.store, [0])
+        with open(writer.path, encoding="utf-8") as f:
+            self.assertEqual(json.loads(f.readline())["row"], 20)
+        writer.write(self.store, [1])
+        writer.finalize(self.store, self.store.sorted_indices(), writer.path)
+        with open(writer.path, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_csv_sorted_on_finalize(self):
+        """Test streamed CSV is rewritten in row order."""
+        writer = report_writers.create_report_writers(["csv"], self.base)[0]
+        writer.open()
+        writer.write(self.store, [0])
+        writer.write(self.store, [1])
+        writer.finalize(self.store, self.store.sorted_indices(), writer.path)
+        with open(writer.path, encoding="utf-8-sig") as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines[1].startswith("10,"))
+        self.assertTrue(lines[2].startswith("20,"))
+
+    def test_partial_csv_removed(self):
+        """Test partial CSV can be removed after the final report."""
+        writer = report_writers.PartialCsvWriter(self.base + "_partial.csv")
+        writer.write(self.store, [0])
+        writer.finalize(self.store, [], writer.path)
+        self.assertTrue(os.path.exists(writer.path))
+        writer.remove()
+        self.assertFalse(os.path.exists(writer.path))
+
+    def test_parquet(self):
+        """Test parquet output when pyarrow is available."""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow not installed")
+        writer = report_writers.create_report_writers(["parquet"], self.base)[0]
+        writer.open()
+        writer.finalize(self.store, self.store.sorted_indices(), writer.path)
+        table = pq.read_table(writer.path)
+        self.assertEqual(table.column("row").to_pylist(), [10, 20])
+
+    def _check_excel_report(self, path):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path)
+        ws = wb.worksheets[0]
+        self.assertEqual(wb.sheetnames, ["Sheet1", report_writers.COVERAGE_SHEET_NAME])
+        self.assertEqual(ws.freeze_panes, "A2")
+        self.assertEqual(ws.auto_filter.ref, "A1:F3")
+        self.assertEqual([c.value for c in ws[1]], report_writers.REPORT_COLUMNS)
+        # row numbers stay numeric and link to the checked cell in the source workbook
+        self.assertEqual(ws["A2"].value, 10)
+        link = ws["A2"].hyperlink
+        target = link.target + (f"#{link.location}" if link.location else "")
+        self.assertEqual(target.replace("\\", "/"), "data/source.xlsx#'DLG'!C10")
+        self.assertTrue(ws["B2"].alignment.wrap_text)
+        self.assertEqual(wb[report_writers.COVERAGE_SHEET_NAME]["A2"].value, "30-31")
+
+    def _excel_writer(self):
+        writer = report_writers.create_report_writers(["xlsx"], self.base)[0]
+        writer.link_source(os.path.join(self.tmp.name, "data", "source.xlsx"), 2)
+        writer.coverage = [{"行号范围": "30-31", "行数": 2, "原因": "用户中断"}]
+        return writer
+
+    def test_xlsx_with_xlsxwriter(self):
+        """Test the constant-memory xlsxwriter report layout and source links."""
+        try:
+            import xlsxwriter  # noqa: F401
+        except ImportError:
+            self.skipTest("xlsxwriter not installed")
+        writer = self._excel_writer()
+        writer.finalize(self.store, self.store.sorted_indices(), writer.path)
+        self.assertEqual(writer.count, 2)
+        self._check_excel_report(writer.path)
+
+    def test_xlsx_with_openpyxl_fallback(self):
+        """Test the openpyxl fallback produces the same layout."""
+        writer = self._excel_writer()
+        writer._finalize_openpyxl(self.store, self.store.sorted_indices(), writer.path)
+        self._check_excel_report(writer.path)
+
+    def test_column_letter(self):
+        """Test column index to Excel column name conversion."""
+        self.assertEqual([report_writers._column_letter(i) for i in (0, 25, 26, 701)], ["A", "Z", "AA", "ZZ"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Response Trace Tests
+
+This module contains unit tests for scripts/response_trace.py and the
+--replay mode of conf_check.
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import response_trace  # noqa: E402
+from scheduler import Batch, RowItem  # noqa: E402
+
+
+class TestTrace(unittest.TestCase):
+    """Test cases for writing and reading trace archives."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "traces", "run.trace.jsonl.gz")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_run(self, batches, **fields):
+        writer = response_trace.TraceWriter(self.path)
+        writer.start_run(**fields)
+        for batch, response in batches:
+            writer.record_batch(batch, "prompt", response, {"completion_tokens": 3}, 1.23456)
+        writer.close()
+        return writer
+
+    def test_round_trip_with_members(self):
+        """Test rows, clusters, responses and timing survive a round trip."""
+        row = RowItem(5, "你好", "DLG", "1001")
+        row.members = [RowItem(9, "你好呀", "DLG", "1005")]
+        self.write_run([(Batch(1, [row]), "[]"), (Batch(2, [RowItem(6, "再见")]), None)], sheet="DLG")
+        run, records = response_trace.load_run(self.path)
+        self.assertEqual(run["sheet"], "DLG")
+        self.assertEqual(run["version"], response_trace.TRACE_VERSION)
+        self.assertEqual([r["response"] for r in records], ["[]", None])
+        self.assertEqual(records[0]["timing"], {"completion_tokens": 3})
+        self.assertEqual(records[0]["elapsed"], 1.235)
+        restored = response_trace.row_from_record(records[0]["rows"][0])
+        self.assertEqual((restored.excel_row, restored.text, restored.sheet, restored.row_id), (5, "你好", "DLG", "1001"))
+        self.assertEqual([m.excel_row for m in restored.members], [9])
+
+    def test_append_keeps_runs_separate(self):
+        """Test appending a second run and selecting runs by index."""
+        self.write_run([(Batch(1, [RowItem(5, "a")]), "[]")], sheet="first")
+        self.write_run([(Batch(1, [RowItem(5, "b")]), "[]"), (Batch(2, [RowItem(6, "c")]), "[]")], sheet="second")
+        run, records = response_trace.load_run(self.path)
+        self.assertEqual((run["sheet"], len(records)), ("second", 2))
+        run, records = response_trace.load_run(self.path, 0)
+        self.assertEqual((run["sheet"], len(records)), ("first", 1))
+        with self.assertRaises(ValueError):
+            response_trace.load_run(self.path, 5)
+
+    def test_truncated_file(self):
+        """Test a trace cut off mid-write yields the complete records."""
+        self.write_run([(Batch(i, [RowItem(i + 4, "文本" * 50)]), "[]") for i in range(1, 200)])
+        with open(self.path, "rb") as f:
+            data = f.read()
+        with open(self.path, "wb") as f:
+            f.write(data[:len(data) // 2])
+        records = list(response_trace.read_trace(self.path))
+        self.assertEqual(records[0]["type"], "run")
+        self.assertLess(len(records), 200)
+
+    def test_truncated_file_not_appended(self):
+        """Test a new run goes to a new file instead of following a truncated member."""
+        self.write_run([(Batch(i, [RowItem(i + 4, "文本" * 50)]), "[]") for i in range(1, 200)], sheet="first")
+        with open(self.path, "rb") as f:
+            data = f.read()
+        with open(self.path, "wb") as f:
+            f.write(data[:len(data) // 2])
+        self.assertFalse(response_trace.is_complete(self.path))
+        writer = self.write_run([(Batch(1, [RowItem(5, "b")]), "[]")], sheet="second")
+        self.assertEqual(writer.truncated, self.path)
+        self.assertTrue(writer.path.endswith("run_1" + response_trace.TRACE_SUFFIX))
+        run, records = response_trace.load_run(writer.path)
+        self.assertEqual((run["sheet"], len(records)), ("second", 1))
+        # Complete files are still appended to
+        appended = response_trace.TraceWriter(writer.path)
+        appended.close()
+        self.assertIsNone(appended.truncated)
+
+
+class TestReplay(unittest.TestCase):
+    """Test cases for regenerating reports from a trace."""
+
+    def test_replay_writes_report(self):
+        """Test replay parses recorded responses with the recorded format and later text wins."""
+        import conf_check
+
+        saved = {name: getattr(conf_check, name) for name in (
+            "RESPONSE_FORMAT", "ISSUE_CODES", "MASK_MARKUP", "OUTPUT_DIR", "QUIET")}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "t.trace.jsonl.gz")
+            writer = response_trace.TraceWriter(path)
+            writer.start_run(sheet="DLG", column="text", input_file="book.xlsx", response_format="compact",
+                             issue_codes=[["A", "错别字", "错别字"], ["B", "语病", "语病"]], mask_markup=True)
+            batch = Batch(1, [RowItem(5, "他高兴的跑了"), RowItem(6, "今天天气很好")])
+            writer.record_batch(batch, "p", '1|A|"的"应为"地"|他高兴地跑了\n2|B|语序|今天很好')
+            # Row 6 edited later (watch mode): its earlier finding is superseded
+            writer.record_batch(Batch(2, [RowItem(6, "今天天气真好")]), "p", "无")
+            writer.record_batch(Batch(3, [RowItem(7, "失败")]), "p", None)
+            writer.close()
+            try:
+                conf_check.OUTPUT_DIR = tmp
+                args = conf_check.build_arg_parser().parse_args(
+                    ["--replay", path, "--format", "jsonl", "--no-history", "--quiet"])
+                conf_check.run_replay(args)
+                reports = [name for name in os.listdir(tmp) if name.endswith(".jsonl")]
+                with open(os.path.join(tmp, reports[0]), encoding="utf-8") as f:
+                    findings = [json.loads(line) for line in f]
+            finally:
+                for name, value in saved.items():
+                    setattr(conf_check, name, value)
+        self.assertEqual([(f["row"], f["issue_type"], f["suggestion"]) for f in findings],
+                         [(5, "错别字", "他高兴地跑了")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Results Store Tests
+
+This module contains unit tests for scripts/results_store.py.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import results_store  # noqa: E402
+from findings import STATUS_IGNORED, FindingsStore  # noqa: E402
+from scheduler import text_hash  # noqa: E402
+
+
+def make_findings(items):
+    store = FindingsStore()
+    for row, row_id, text, issue in items:
+        store.add("DLG", row, row_id, text, issue, "建议")
+    return store
+
+
+class TestResultsStore(unittest.TestCase):
+    """Test cases for the run history database."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.workbook = os.path.join(self.tmp.name, "task.xlsx")
+        self.store = results_store.ResultsStore(os.path.join(self.tmp.name, "results.sqlite"))
+        self.addCleanup(self.store.close)
+
+    def record(self, items, uncovered=(), reports=()):
+        return self.store.record_run(self.workbook, "DLG", "text", {"batch_size": 30}, {"findings": len(items)},
+                                     make_findings(items), uncovered=uncovered, reports=reports)
+
+    def test_new_fixed_recurring(self):
+        """Test findings are compared with the previous run of the same target."""
+        first = self.record([
+            (4, "1001", "他高兴的跑了", "错别字：的"),
+            (5, "1002", "再见把", "语气词：把"),
+            (6, "1003", "走罢", "错别字：罢"),
+        ])
+        # Row 1001 moved to row 10 but keeps its id; 1002 was fixed; row 6 was not covered
+        second = self.record([
+            (10, "1001", "他高兴的跑了", "错别字：的"),
+            (7, "1004", "新问题", "标点：缺少句号"),
+        ], uncovered=["6"])
+        self.assertEqual(self.store.previous_run(second), first)
+        self.assertEqual([r["row_key"] for r in self.store.diff(second, kind="new")], ["1004"])
+        self.assertEqual([r["row_key"] for r in self.store.diff(second, kind="recurring")], ["1001"])
+        self.assertEqual([r["row_key"] for r in self.store.diff(second, kind="fixed")], ["1002"])
+        self.assertEqual(self.store.summary(second), {"new": 1, "fixed": 1, "recurring": 1})
+        self.assertEqual(len(self.store.diff(first, kind="new")), 3)
+
+    def test_import_review(self):
+        """Test ignored findings become dismissals and fully ignored texts are skipped."""
+        report = os.path.join(self.tmp.name, "report.jsonl")
+        with open(report, "w", encoding="utf-8") as f:
+            f.write('{"row": 4, "text": "你好", "issue": "错别字：好", "status": "%s"}\n' % STATUS_IGNORED)
+            f.write('{"row": 5, "text": "再见", "issue": "标点：缺少句号", "status": "%s"}\n' % STATUS_IGNORED)
+            f.write('{"row": 5, "text": "再见", "issue": "语病：xx", "status": "待处理"}\n')
+        self.record([(4, "", "你好", "错别字：好")], reports=[report])
+
+        self.assertEqual(self.store.sync_reviews(self.workbook, "DLG", "text"), 1)
+        self.assertEqual(self.store.dismissed_keys(self.workbook, "DLG"), {
+            ("DLG", text_hash("你好"), "错别字"),
+            ("DLG", text_hash("再见"), "标点"),
+        })
+        self.assertEqual(self.store.reviewed_texts(self.workbook, "DLG"), {text_hash("你好")})
+        # Unchanged report is not imported again
+        self.assertEqual(self.store.sync_reviews(self.workbook, "DLG", "text"), 0)
+
+    def test_drop_dismissed(self):
+        """Test conf_check drops issues that reviewers dismissed."""
+        import conf_check
+        from scheduler import RowItem
+
+        rows = {4: RowItem(4, "你好", "DLG"), 5: RowItem(5, "再见", "DLG")}
+        dismissed = {("DLG", text_hash("你好"), "错别字")}
+        kept, dropped = conf_check.drop_dismissed(
+            [{"line_no": 4, "issue": "错别字：好"}, {"line_no": 4, "issue": "标点：句号"},
+             {"line_no": 5, "issue": "错别字：见"}], rows, "DLG", dismissed)
+        self.assertEqual(dropped, 1)
+        self.assertEqual([item["issue"] for item in kept], ["标点：句号", "错别字：见"])
+
+
+if __name__ == "__main__":
+    unittest.main()
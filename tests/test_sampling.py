@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Stratified Sampling Tests
+
+This module contains unit tests for scripts/sampling.py.
+"""
+import os
+import sys
+import unittest
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import sampling  # noqa: E402
+from scheduler import RowItem  # noqa: E402
+
+
+def make_rows(count=400):
+    # Short and long lines interleaved, numeric ids in table order
+    return [RowItem(i + 4, "短句" if i % 3 else "这是一句比较长的对白文本" * 3, row_id=str(1000 + i))
+            for i in range(count)]
+
+
+class TestSampleSize(unittest.TestCase):
+    """Test cases for parsing --sample."""
+
+    def test_counts_and_ratios(self):
+        """Test row counts, percentages and fractions."""
+        self.assertEqual(sampling.parse_sample_size("50", 1000), 50)
+        self.assertEqual(sampling.parse_sample_size("2%", 1000), 20)
+        self.assertEqual(sampling.parse_sample_size("0.05", 1000), 50)
+        self.assertEqual(sampling.parse_sample_size("5000", 1000), 1000)
+
+    def test_invalid(self):
+        """Test non-positive and malformed values are rejected."""
+        for value in ("0", "-3", "abc", "0%"):
+            with self.assertRaises(ValueError):
+                sampling.parse_sample_size(value, 1000)
+
+
+class TestAllocation(unittest.TestCase):
+    """Test cases for strata and proportional allocation."""
+
+    def test_strata_cover_length_and_id_range(self):
+        """Test rows are split by length bucket and id quartile."""
+        strata = sampling.assign_strata(make_rows(), "DLG")
+        self.assertEqual({key[1] for key in strata.values()}, {"<20", "<60"})
+        self.assertEqual({key[2] for key in strata.values()}, {0, 1, 2, 3})
+        self.assertEqual(strata[4], ("DLG", "<60", 0))
+        self.assertEqual(strata[403][2], 3)
+
+    def test_allocate_is_proportional_with_minimum(self):
+        """Test allocation sums to the sample size and keeps small strata."""
+        alloc = sampling.allocate({"a": 900, "b": 90, "c": 10}, 50)
+        self.assertEqual(sum(alloc.values()), 50)
+        self.assertEqual(alloc["a"], 45)
+        self.assertGreaterEqual(alloc["c"], 1)
+        self.assertEqual(sampling.allocate({"a": 3, "b": 2}, 10), {"a": 3, "b": 2})
+
+    def test_sample_is_reproducible(self):
+        """Test the same seed draws the same rows in table order."""
+        rows = make_rows()
+        first = sampling.StratifiedSample(rows, 40, seed=7, default_sheet="DLG")
+        second = sampling.StratifiedSample(rows, 40, seed=7, default_sheet="DLG")
+        self.assertEqual(len(first.rows), 40)
+        self.assertEqual([r.excel_row for r in first.rows], [r.excel_row for r in second.rows])
+        self.assertEqual([r.excel_row for r in first.rows], sorted(r.excel_row for r in first.rows))
+        self.assertEqual(len(first.unsampled), 360)
+        self.assertEqual({first.strata_of[r.excel_row] for r in first.rows}, set(first.populations))
+
+
+class TestEstimate(unittest.TestCase):
+    """Test cases for rate estimation and confidence intervals."""
+
+    def test_wilson_interval(self):
+        """Test the Wilson interval against a known value and the zero case."""
+        low, high = sampling.wilson_interval(10, 100)
+        self.assertAlmostEqual(low, 0.0552, places=3)
+        self.assertAlmostEqual(high, 0.1744, places=3)
+        low, high = sampling.wilson_interval(0, 50)
+        self.assertEqual(low, 0.0)
+        self.assertGreater(high, 0.05)
+
+    def test_stratified_estimate_weights_by_population(self):
+        """Test strata are weighted by their size, not by sample counts."""
+        estimate = sampling.estimate_rate({
+            "long": {"population": 100, "checked": 20, "flagged": 10},
+            "short": {"population": 900, "checked": 20, "flagged": 0},
+            "skipped": {"population": 500, "checked": 0, "flagged": 0},
+        })
+        self.assertAlmostEqual(estimate["rate"], 0.05)
+        self.assertEqual((estimate["checked"], estimate["flagged"], estimate["population"]), (40, 10, 1000))
+        self.assertEqual(estimate["estimated_rows"], 50)
+        self.assertLess(estimate["low"], 0.05)
+        self.assertGreater(estimate["high"], 0.05)
+
+    def test_summary(self):
+        """Test only covered sample rows count and issue types get their own estimates."""
+        rows = make_rows()
+        sample = sampling.StratifiedSample(rows, 100, seed=1, default_sheet="DLG")
+        covered = [r.excel_row for r in sample.rows][:80]
+        flagged = [row for row in covered if row % 2][:8]
+        summary = sample.summary(covered, {"错别字": set(flagged[:5]), "语病": set(flagged[5:])})
+        self.assertEqual(summary["overall"]["checked"], 80)
+        self.assertEqual(summary["overall"]["flagged"], 8)
+        self.assertEqual(list(summary["by_type"]), ["错别字", "语病"])
+        self.assertEqual(summary["by_type"]["语病"]["flagged"], 3)
+        self.assertIn("DLG", summary["by_sheet"])
+
+
+if __name__ == "__main__":
+    unittest.main()
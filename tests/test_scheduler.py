@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Scheduler Tests
+
+This module contains unit tests for scripts/scheduler.py.
+"""
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import scheduler  # noqa: E402
+
+
+class TestRowRanges(unittest.TestCase):
+    """Test cases for row range formatting."""
+
+    def test_format_row_ranges(self):
+        """Test consecutive rows are merged into ranges."""
+        self.assertEqual(scheduler.format_row_ranges([8, 5, 6, 7, 12, 20, 21]), "5-8,12,20-21")
+
+    def test_format_empty(self):
+        """Test empty row list."""
+        self.assertEqual(scheduler.format_row_ranges([]), "")
+
+
+class TestBatchHandles(unittest.TestCase):
+    """Test cases for batch-local line handles."""
+
+    def make_batch(self):
+        return scheduler.Batch(1, [scheduler.RowItem(10234, "第一行"), scheduler.RowItem(10240, "第二行")])
+
+    def test_payload_uses_handles(self):
+        """Test payload is keyed by 1..N instead of Excel row numbers."""
+        self.assertEqual(self.make_batch().payload(), {1: "第一行", 2: "第二行"})
+
+    def test_resolve_issues(self):
+        """Test handles map back to Excel rows and out-of-batch handles are rejected."""
+        issues = [
+            {"line_no": 2, "issue": "错别字"},
+            {"line_no": "1", "issue": "语病"},
+            {"line_no": 3, "issue": "越界"},
+            {"line_no": 10234, "issue": "照抄行号"},
+            {"line_no": "abc", "issue": "非数字"},
+            "not a dict",
+        ]
+        resolved, invalid = self.make_batch().resolve_issues(issues)
+        self.assertEqual([(i["line_no"], i["issue"]) for i in resolved], [(10240, "错别字"), (10234, "语病")])
+        self.assertEqual([i["issue"] for i in invalid], ["越界", "照抄行号", "非数字"])
+        self.assertEqual(issues[0]["line_no"], 2)
+
+
+class TestSchedulers(unittest.TestCase):
+    """Test cases for batch planning."""
+
+    def make_rows(self):
+        return [
+            scheduler.RowItem(4, "普通文本", "A"),
+            scheduler.RowItem(5, "这是一段很长的文本" * 10, "A"),
+            scheduler.RowItem(6, "包含禁词的文本", "A"),
+            scheduler.RowItem(7, "刚刚修改过", "A"),
+        ]
+
+    def test_sequential_keeps_order(self):
+        """Test sequential scheduler keeps sheet order."""
+        batches = scheduler.create_scheduler("sequential", 3).plan(self.make_rows())
+        self.assertEqual([b.excel_rows for b in batches], [[4, 5, 6], [7]])
+
+    def test_priority_order(self):
+        """Test changed rows come first, then sensitive, then long texts."""
+        rows = self.make_rows()
+        snapshot = {r.excel_row: scheduler.text_hash(r.text) for r in rows}
+        snapshot[7] = "changed"
+        sched = scheduler.create_scheduler(
+            "priority", 1, previous_snapshot=snapshot, sensitive_words=["禁词"]
+        )
+        batches = sched.plan(rows)
+        self.assertEqual([b.excel_rows[0] for b in batches], [7, 6, 5, 4])
+        self.assertIn("已修改", batches[0].rows[0].reasons)
+
+    def test_priority_first_run(self):
+        """Test no row is marked changed without a snapshot."""
+        rows = self.make_rows()
+        scheduler.create_scheduler("priority", 10, previous_snapshot=None).plan(rows)
+        self.assertFalse(any("已修改" in r.reasons for r in rows))
+
+    def test_unknown_scheduler(self):
+        """Test unknown scheduler name raises ValueError."""
+        with self.assertRaises(ValueError):
+            scheduler.create_scheduler("random", 10)
+
+
+class TestSnapshot(unittest.TestCase):
+    """Test cases for row snapshots."""
+
+    def test_snapshot_roundtrip(self):
+        """Test unchecked rows keep their old hash."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state", "snap.json")
+            self.assertIsNone(scheduler.load_row_snapshot(path))
+            scheduler.save_row_snapshot(path, [scheduler.RowItem(4, "新文本")], {5: "old"})
+            snapshot = scheduler.load_row_snapshot(path)
+            self.assertEqual(snapshot[4], scheduler.text_hash("新文本"))
+            self.assertEqual(snapshot[5], "old")
+
+
+class TestRunBudget(unittest.TestCase):
+    """Test cases for time-budgeted runs."""
+
+    def make_budget(self, seconds):
+        self.now = 0.0
+        budget = scheduler.RunBudget(seconds, clock=lambda: self.now)
+        budget.REPORT_RESERVE = 0
+        return budget
+
+    def test_dispatch_until_budget_used(self):
+        """Test dispatching stops once the next batch would overrun."""
+        budget = self.make_budget(100)
+        self.assertTrue(budget.can_dispatch())
+        budget.observe(30)
+        self.now = 60
+        self.assertTrue(budget.can_dispatch())
+        self.now = 70
+        self.assertFalse(budget.can_dispatch())
+
+    def test_request_timeout_capped(self):
+        """Test in-flight request timeout never exceeds remaining budget."""
+        budget = self.make_budget(100)
+        self.now = 40
+        self.assertEqual(budget.request_timeout(300), 60)
+        self.assertEqual(budget.request_timeout(10), 10)
+
+    def test_no_budget(self):
+        """Test no budget is created without options."""
+        self.assertIsNone(scheduler.RunBudget.from_options())
+
+    def test_parse_deadline_clock(self):
+        """Test HH:MM deadlines roll over to the next day when passed."""
+        now = datetime(2025, 12, 20, 23, 0)
+        self.assertEqual(scheduler.parse_deadline("06:30", now), datetime(2025, 12, 21, 6, 30))
+        self.assertEqual(scheduler.parse_deadline("23:30", now), datetime(2025, 12, 20, 23, 30))
+
+    def test_parse_deadline_invalid(self):
+        """Test invalid deadline raises ValueError."""
+        with self.assertRaises(ValueError):
+            scheduler.parse_deadline("tomorrow")
+
+
+if __name__ == "__main__":
+    unittest.main()
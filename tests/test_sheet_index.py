@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Sheet Index Tests
+
+This module contains unit tests for scripts/sheet_index.py.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import sheet_index  # noqa: E402
+from scheduler import text_hash  # noqa: E402
+
+
+def write_workbook(path, dialog_rows):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "DLG"
+    ws.append(["int64", "string", "string"])
+    ws.append([None, "text", "text"])
+    ws.append(["id", None, "name"])
+    for row in dialog_rows:
+        ws.append(row)
+    other = wb.create_sheet("NPC")
+    other.append(["id", "name"])
+    other.append([7, "你好"])
+    wb.save(path)
+
+
+class TestSheetIndex(unittest.TestCase):
+    """Test cases for the persistent workbook row index."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.workbook = os.path.join(self.tmp.name, "book.xlsx")
+        self.state_dir = os.path.join(self.tmp.name, "state")
+        write_workbook(self.workbook, [
+            [1001, "你好", "阿明"],
+            [None, None, None],
+            [1003.0, "再见", 5],
+        ])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open_index(self):
+        index = sheet_index.SheetIndex(self.workbook, state_dir=self.state_dir)
+        self.addCleanup(index.close)
+        return index
+
+    def test_column_names(self):
+        """Test multi-row headers are merged and duplicates suffixed."""
+        self.assertEqual(
+            sheet_index.build_column_names([["a", "b", "b"], [None, "x", "x"], ["", None, None]]),
+            ["a", "b_x", "b_x.1"],
+        )
+
+    def test_lookups(self):
+        """Test id, row and text hash lookups."""
+        index = self.open_index()
+        self.assertTrue(index.ensure_sheet("DLG", [0, 1, 2]))
+        self.assertEqual(index.columns("DLG"), ["int64_id", "string_text", "string_text_name"])
+        col = index.column_position("DLG", "string_text")
+        self.assertEqual(list(index.iter_texts("DLG", col)), [(4, "你好", "1001"), (6, "再见", "1003")])
+        self.assertEqual(index.row_count("DLG"), 2)
+        self.assertEqual(index.text_at("DLG", col, 6), "再见")
+        self.assertEqual(index.text_at("DLG", col, 5), "")
+        self.assertEqual(index.row_id_at("DLG", 4), "1001")
+        self.assertEqual(index.rows_for_id("DLG", "1003"), [6])
+        self.assertEqual(index.hashes("DLG", col)[4], text_hash("你好"))
+        self.assertEqual(index.header_row_count("DLG"), 3)
+
+    def test_cross_sheet_lookup(self):
+        """Test identical text is found across sheets."""
+        index = self.open_index()
+        index.ensure_all([0])
+        self.assertIn(("NPC", "name", 2), index.find_text("你好"))
+
+    def test_reused_until_workbook_changes(self):
+        """Test the index is reused across runs until the file content changes."""
+        index = self.open_index()
+        index.ensure_sheet("DLG", [0, 1, 2])
+        index.close()
+
+        index = self.open_index()
+        self.assertFalse(index.invalidated)
+        self.assertFalse(index.ensure_sheet("DLG", [0, 1, 2]))
+        # A different header layout rebuilds the sheet
+        self.assertTrue(index.ensure_sheet("DLG", 0))
+        index.close()
+
+        # Touching the file without changing content keeps the index
+        os.utime(self.workbook, (1, 1))
+        index = self.open_index()
+        self.assertFalse(index.invalidated)
+        index.close()
+
+        write_workbook(self.workbook, [[2001, "新的文本", None]])
+        index = self.open_index()
+        self.assertTrue(index.invalidated)
+        self.assertTrue(index.ensure_sheet("DLG", [0, 1, 2]))
+        self.assertEqual(index.rows_for_id("DLG", "2001"), [4])
+
+    def test_missing_sheet(self):
+        """Test a missing sheet raises KeyError."""
+        with self.assertRaises(KeyError):
+            self.open_index().ensure_sheet("NOPE")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import tracemalloc
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import stage_profiler  # noqa: E402
+from stage_profiler import StageProfiler  # noqa: E402
+
+
+def busy(n=20000):
+    return sum(i * i for i in range(n))
+
+
+class StageProfilerTest(unittest.TestCase):
+    def test_disabled_profiler_records_nothing(self):
+        profiler = StageProfiler()
+        profiler.start()
+        with profiler.stage("load"):
+            busy()
+        profiler.stop()
+        self.assertFalse(profiler.enabled)
+        self.assertEqual(profiler.rows(), [])
+        self.assertIs(profiler.stage("a"), profiler.stage("b"))
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            StageProfiler("gpu")
+
+    def test_stages_accumulate_calls_and_time(self):
+        profiler = StageProfiler("time")
+        profiler.start()
+        for _ in range(3):
+            with profiler.stage("parse"):
+                busy()
+        with profiler.stage("write"):
+            pass
+        profiler.stop()
+        rows = dict(profiler.rows())
+        self.assertEqual([name for name, _ in profiler.rows()], ["parse", "write"])
+        self.assertEqual(rows["parse"]["calls"], 3)
+        self.assertGreaterEqual(rows["parse"]["seconds"], rows["parse"]["max_seconds"])
+        self.assertIsNone(rows["parse"]["peak_bytes"])
+        self.assertGreaterEqual(profiler.total_seconds, rows["parse"]["seconds"])
+
+    def test_stage_records_even_when_body_raises(self):
+        profiler = StageProfiler("time")
+        with self.assertRaises(RuntimeError):
+            with profiler.stage("request"):
+                raise RuntimeError("boom")
+        self.assertEqual(dict(profiler.rows())["request"]["calls"], 1)
+
+    @unittest.skipUnless(hasattr(tracemalloc, "reset_peak"), "tracemalloc.reset_peak() needs Python 3.9+")
+    def test_memory_mode_reports_top_level_peak(self):
+        profiler = StageProfiler("memory")
+        profiler.start()
+        with profiler.stage("load"):
+            data = [bytes(1024) for _ in range(2000)]
+            with profiler.stage("inner"):
+                pass
+            del data
+        profiler.stop()
+        rows = dict(profiler.rows())
+        self.assertGreater(rows["load"]["peak_bytes"], 1024 * 1024)
+        self.assertIsNone(rows["inner"]["peak_bytes"])
+        self.assertGreater(profiler.peak_bytes, 0)
+
+    def test_memory_mode_without_reset_peak_reports_run_peak(self):
+        reset_peak = getattr(tracemalloc, "reset_peak", None)
+        if reset_peak is not None:
+            del tracemalloc.reset_peak
+        try:
+            profiler = StageProfiler("memory")
+            profiler.start()
+            with profiler.stage("load"):
+                data = [bytes(1024) for _ in range(2000)]
+                del data
+            profiler.stop()
+        finally:
+            if reset_peak is not None:
+                tracemalloc.reset_peak = reset_peak
+        self.assertIsNone(dict(profiler.rows())["load"]["peak_bytes"])
+        self.assertGreater(profiler.peak_bytes, 1024 * 1024)
+
+    def test_cpu_mode_merges_worker_threads_into_pstats(self):
+        profiler = StageProfiler("cpu")
+        profiler.start()
+
+        def worker():
+            with profiler.stage("request"):
+                busy()
+
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        profiler.stop()
+        self.assertEqual(dict(profiler.rows())["request"]["calls"], 2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = profiler.dump_stats(os.path.join(tmp, "run.pstats"))
+            functions = {func[2] for func in pstats.Stats(path).stats}
+        self.assertIn("busy", functions)
+
+    def test_table_and_dict(self):
+        profiler = StageProfiler("time")
+        profiler.start()
+        with profiler.stage("读取工作簿"):
+            pass
+        profiler.stop()
+        table = profiler.format_table().splitlines()
+        self.assertTrue(table[1].startswith("读取工作簿"))
+        self.assertEqual(stage_profiler._display_width(table[0]), stage_profiler._display_width(table[1]))
+        self.assertEqual(profiler.to_dict()["stages"]["读取工作簿"]["calls"], 1)
+        self.assertIsNone(profiler.dump_stats(os.devnull))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Game Config Text Checker - Watch Mode Tests
+
+This module contains unit tests for scripts/watch.py.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# Add scripts directory to path for imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "scripts"))
+
+import watch  # noqa: E402
+from findings import STATUS_IGNORED, FindingsStore  # noqa: E402
+from scheduler import RowItem, text_hash  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestWatch(unittest.TestCase):
+    """Test cases for workbook watching and row diffing."""
+
+    def test_change_reported_after_settle(self):
+        """Test a save is reported once the file stops changing."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "book.xlsx")
+            with open(path, "w") as f:
+                f.write("v1")
+            clock = FakeClock()
+            watcher = watch.FileWatcher([path], settle=1.0, clock=clock)
+            self.assertEqual(watcher.poll(), [])
+
+            with open(path, "w") as f:
+                f.write("v2 longer")
+            self.assertEqual(watcher.poll(), [])
+            clock.now += 0.5
+            self.assertEqual(watcher.poll(), [])
+            clock.now += 0.6
+            self.assertEqual(watcher.poll(), [path])
+            clock.now += 5
+            self.assertEqual(watcher.poll(), [])
+
+            # The file disappearing mid-save is not a change
+            os.remove(path)
+            clock.now += 5
+            self.assertEqual(watcher.poll(), [])
+
+    def test_diff_rows(self):
+        """Test changed, new and removed rows are detected."""
+        known = {4: text_hash("你好"), 5: text_hash("再见"), 6: text_hash("删掉")}
+        rows = [RowItem(4, "你好"), RowItem(5, "再见！"), RowItem(7, "新行")]
+        changed, removed = watch.diff_rows(rows, known)
+        self.assertEqual([row.excel_row for row in changed], [5, 7])
+        self.assertEqual(removed, [6])
+
+    def test_copy_findings(self):
+        """Test findings of identical text move to the new row with their status."""
+        store = FindingsStore()
+        first = store.add("DLG", 10, "1001", "他高兴的跑了", "错别字：'的'应为'地'", "他高兴地跑了")
+        store.set_status(first, STATUS_IGNORED)
+        live = watch.group_by_row(store, range(len(store)))
+        self.assertEqual(live, {10: [first]})
+
+        added = watch.copy_findings(store, live[10], RowItem(11, "他高兴的跑了", "DLG", "1001"))
+        copied = store.get(added[0])
+        self.assertEqual((copied.row, copied.issue_type, copied.status), (11, "错别字", STATUS_IGNORED))
+        self.assertEqual(copied.suggestion, "他高兴地跑了")
+
+
+if __name__ == "__main__":
+    unittest.main()